@@ -0,0 +1,180 @@
+"""
+数据权限过滤条件基准测试：缓存的sqlalchemy条件对象与优化前每次请求拼接字符串后eval的方式对比
+
+python -m benchmarks.bench_data_scope
+"""
+
+import asyncio
+from datetime import datetime
+from sqlalchemy import func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from types import SimpleNamespace
+from benchmarks.bench_util import BenchUtil
+from module_admin.aspect.data_scope import GetDataScope
+from module_admin.dao.user_dao import UserDao
+from module_admin.entity.do.dept_do import SysDept, SysDeptClosure
+from module_admin.entity.do.role_do import SysRoleDept
+from module_admin.entity.do.user_do import SysUser
+from module_admin.entity.vo.user_vo import UserPageQueryModel
+
+
+USER_COUNT = 5000
+DEPT_COUNT = 50
+FILTER_REPEAT = 2000
+LIST_REPEAT = 200
+# 优化前的数据权限字符串中引用的名称
+EVAL_NAMESPACE = dict(SysUser=SysUser, SysDept=SysDept, SysRoleDept=SysRoleDept, select=select, or_=or_, func=func)
+
+
+class LegacyGetDataScope:
+    """
+    对照组：优化前的实现，每次请求拼接数据权限条件的python源码字符串，由dao层eval后作为查询条件
+    """
+
+    DATA_SCOPE_ALL = '1'
+    DATA_SCOPE_CUSTOM = '2'
+    DATA_SCOPE_DEPT = '3'
+    DATA_SCOPE_DEPT_AND_CHILD = '4'
+    DATA_SCOPE_SELF = '5'
+
+    def __init__(self, query_alias: str = '', user_alias: str = 'user_id', dept_alias: str = 'dept_id'):
+        self.query_alias = query_alias
+        self.user_alias = user_alias
+        self.dept_alias = dept_alias
+
+    def __call__(self, current_user) -> str:
+        user_id = current_user.user.user_id
+        dept_id = current_user.user.dept_id
+        custom_data_scope_role_id_list = [
+            item.role_id for item in current_user.user.role if item.data_scope == self.DATA_SCOPE_CUSTOM
+        ]
+        param_sql_list = []
+        for role in current_user.user.role:
+            if current_user.user.admin or role.data_scope == self.DATA_SCOPE_ALL:
+                param_sql_list = ['1 == 1']
+                break
+            elif role.data_scope == self.DATA_SCOPE_CUSTOM:
+                if len(custom_data_scope_role_id_list) > 1:
+                    param_sql_list.append(
+                        f'{self.query_alias}.{self.dept_alias}.in_(select(SysRoleDept.dept_id).where('
+                        f'SysRoleDept.role_id.in_({custom_data_scope_role_id_list}))) '
+                        f"if hasattr({self.query_alias}, '{self.dept_alias}') else 1 == 0"
+                    )
+                else:
+                    param_sql_list.append(
+                        f'{self.query_alias}.{self.dept_alias}.in_(select(SysRoleDept.dept_id).where('
+                        f'SysRoleDept.role_id == {role.role_id})) '
+                        f"if hasattr({self.query_alias}, '{self.dept_alias}') else 1 == 0"
+                    )
+            elif role.data_scope == self.DATA_SCOPE_DEPT:
+                param_sql_list.append(
+                    f'{self.query_alias}.{self.dept_alias} == {dept_id} '
+                    f"if hasattr({self.query_alias}, '{self.dept_alias}') else 1 == 0"
+                )
+            elif role.data_scope == self.DATA_SCOPE_DEPT_AND_CHILD:
+                param_sql_list.append(
+                    f'{self.query_alias}.{self.dept_alias}.in_(select(SysDept.dept_id).where(or_('
+                    f'SysDept.dept_id == {dept_id}, func.find_in_set({dept_id}, SysDept.ancestors)))) '
+                    f"if hasattr({self.query_alias}, '{self.dept_alias}') else 1 == 0"
+                )
+            elif role.data_scope == self.DATA_SCOPE_SELF:
+                param_sql_list.append(
+                    f'{self.query_alias}.{self.user_alias} == {user_id} '
+                    f"if hasattr({self.query_alias}, '{self.user_alias}') else 1 == 0"
+                )
+            else:
+                param_sql_list.append('1 == 0')
+        param_sql_list = list(dict.fromkeys(param_sql_list))
+
+        return f'or_({", ".join(param_sql_list)})'
+
+
+def make_current_user(*data_scopes: str) -> SimpleNamespace:
+    """
+    构造仅包含数据权限所需字段的当前用户对象
+
+    :param data_scopes: 各角色的数据权限
+    :return: 当前用户对象
+    """
+    role = [SimpleNamespace(role_id=index, data_scope=data_scope) for index, data_scope in enumerate(data_scopes, 2)]
+
+    return SimpleNamespace(user=SimpleNamespace(user_id=1, dept_id=1, admin=False, role=role))
+
+
+async def seed(session: AsyncSession):
+    """
+    写入测试数据，用户平均分布在各部门，自定义数据权限角色可访问前5个部门
+
+    :param session: orm对象
+    :return:
+    """
+    await session.execute(
+        insert(SysDept),
+        [
+            dict(dept_id=i, parent_id=0, ancestors='0', dept_name=f'dept{i}', status='0', del_flag='0')
+            for i in range(1, DEPT_COUNT + 1)
+        ],
+    )
+    await session.execute(
+        insert(SysDeptClosure),
+        [dict(ancestor_id=i, descendant_id=i, depth=0) for i in range(1, DEPT_COUNT + 1)],
+    )
+    await session.execute(insert(SysRoleDept), [dict(role_id=2, dept_id=i) for i in range(1, 6)])
+    await session.execute(
+        insert(SysUser),
+        [
+            dict(
+                user_id=i,
+                dept_id=i % DEPT_COUNT + 1,
+                user_name=f'user{i}',
+                nick_name=f'nick{i}',
+                status='0',
+                del_flag='0',
+                create_time=datetime(2026, 1, 1),
+            )
+            for i in range(1, USER_COUNT + 1)
+        ],
+    )
+    await session.commit()
+
+
+async def main():
+    rows = []
+    # 构造过滤条件：自定义数据权限与本部门及以下数据权限组合
+    filter_user = make_current_user(GetDataScope.DATA_SCOPE_CUSTOM, GetDataScope.DATA_SCOPE_DEPT_AND_CHILD)
+    current_data_scope = GetDataScope('SysUser')
+    legacy_data_scope = LegacyGetDataScope('SysUser')
+
+    async def build_current():
+        current_data_scope(filter_user)
+
+    async def build_legacy():
+        eval(legacy_data_scope(filter_user), EVAL_NAMESPACE)
+
+    for name, func_ in (('cached filter', build_current), ('legacy eval filter', build_legacy)):
+        samples = await BenchUtil.measure(func_, repeat=FILTER_REPEAT, warmup=100)
+        rows.append((f'{name} build', BenchUtil.summarize([sample * 1000 for sample in samples])))
+    BenchUtil.report(f'data scope filter, custom + dept and child roles, {FILTER_REPEAT} runs', rows, unit='us')
+
+    rows = []
+    # 用户列表：自定义数据权限与本部门数据权限组合，legacy在sqlite下无法执行find_in_set，因此不使用本部门及以下数据权限
+    list_user = make_current_user(GetDataScope.DATA_SCOPE_CUSTOM, GetDataScope.DATA_SCOPE_DEPT)
+    query_object = UserPageQueryModel(page_num=1, page_size=10)
+    async with BenchUtil.session_factory() as session_factory, session_factory() as session:
+        await seed(session)
+
+        async def list_current():
+            await UserDao.get_user_list(session, query_object, current_data_scope(list_user), is_page=True)
+
+        async def list_legacy():
+            data_scope_filter = eval(legacy_data_scope(list_user), EVAL_NAMESPACE)
+            await UserDao.get_user_list(session, query_object, data_scope_filter, is_page=True)
+
+        for name, func_ in (('cached filter', list_current), ('legacy eval filter', list_legacy)):
+            samples = await BenchUtil.measure(func_, repeat=LIST_REPEAT)
+            rows.append((f'{name} user list page', BenchUtil.summarize(samples)))
+    BenchUtil.report(f'user list over {USER_COUNT} users, custom + dept roles, {LIST_REPEAT} runs', rows)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
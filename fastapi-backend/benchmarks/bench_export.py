@@ -0,0 +1,186 @@
+"""
+操作日志导出基准测试：流式导出xlsx及csv的耗时、文件大小与进程常驻内存峰值增量，
+对照组为优化前全量加载后通过pandas生成xlsx的方式，对照组内存占用随行数线性增长，仅在较小的行数下运行
+
+python -u -m benchmarks.bench_export
+"""
+
+import asyncio
+import io
+import json
+import pandas as pd
+from datetime import datetime
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from types import SimpleNamespace
+from typing import AsyncIterable, Dict, Optional
+from benchmarks.bench_util import BenchUtil
+from config.enums import RedisInitKeyConfig
+from module_admin.dao.log_dao import OperationLogDao
+from module_admin.entity.do.log_do import SysOperLog
+from module_admin.entity.vo.log_vo import OperLogPageQueryModel
+from module_admin.service.log_service import OperationLogService
+from utils.common_util import SqlalchemyUtil
+
+
+ROW_COUNTS = (200000, 1000000)
+# 对照组仅在该行数下运行
+LEGACY_ROW_COUNT = 200000
+SEED_BATCH_SIZE = 10000
+OPER_TYPE_DICT = [
+    dict(dict_label=label, dict_value=str(value))
+    for value, label in enumerate(
+        ['其他', '新增', '修改', '删除', '授权', '导出', '导入', '强退', '生成代码', '清空数据']
+    )
+]
+
+
+class DictCacheRedis:
+    """
+    仅提供操作类型字典缓存的redis替身，导出service只读取该键
+    """
+
+    async def get(self, key: str) -> Optional[str]:
+        if key == f'{RedisInitKeyConfig.SYS_DICT.key}:sys_oper_type':
+            return json.dumps(OPER_TYPE_DICT)
+        return None
+
+
+async def seed(session: AsyncSession, start: int, end: int):
+    """
+    写入操作日志测试数据，请求参数及返回参数为数百字节的json文本
+
+    :param session: orm对象
+    :param start: 起始日志编号
+    :param end: 结束日志编号（不含）
+    :return:
+    """
+    oper_param = json.dumps({'pageNum': 1, 'pageSize': 10, 'userName': 'admin', 'remark': '备注' * 40})
+    json_result = json.dumps({'code': 200, 'msg': '操作成功', 'rows': [{'userId': i} for i in range(20)]})
+    for batch_start in range(start, end, SEED_BATCH_SIZE):
+        await session.execute(
+            insert(SysOperLog),
+            [
+                dict(
+                    oper_id=i,
+                    title='用户管理',
+                    business_type=i % 10,
+                    method='module_admin.controller.user_controller.get_system_user_list()',
+                    request_method='GET',
+                    operator_type=1,
+                    oper_name='admin',
+                    dept_name='研发部门',
+                    oper_url='/system/user/list',
+                    oper_ip='127.0.0.1',
+                    oper_location='内网IP',
+                    oper_param=oper_param,
+                    json_result=json_result,
+                    status=i % 2,
+                    error_msg='',
+                    oper_time=datetime(2026, 1, 1),
+                    cost_time=i % 1000,
+                )
+                for i in range(batch_start, min(batch_start + SEED_BATCH_SIZE, end))
+            ],
+        )
+    await session.commit()
+
+
+async def consume(chunks: AsyncIterable[bytes]) -> int:
+    """
+    读取导出文件内容并丢弃
+
+    :param chunks: 分块返回文件内容的异步生成器
+    :return: 文件大小，单位字节
+    """
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+
+    return size
+
+
+async def export_by_pandas(session: AsyncSession, request: SimpleNamespace, row_count: int) -> int:
+    """
+    对照组：优化前的导出方式，全量加载后逐行格式化，再通过pandas在内存中生成xlsx
+
+    :param session: orm对象
+    :param request: Request对象替身
+    :param row_count: 导出行数
+    :return: 文件大小，单位字节
+    """
+    data = SqlalchemyUtil.serialize_result(
+        list((await session.execute(select(SysOperLog).limit(row_count))).scalars().all())
+    )
+    operation_type_option_dict = {
+        item.get('dict_value'): dict(label=item.get('dict_label'), value=item.get('dict_value'))
+        for item in json.loads(await request.app.state.redis.get(f'{RedisInitKeyConfig.SYS_DICT.key}:sys_oper_type'))
+    }
+    mapping_dict = {
+        'oper_id': '日志编号',
+        'title': '系统模块',
+        'business_type': '操作类型',
+        'method': '方法名称',
+        'request_method': '请求方式',
+        'oper_name': '操作人员',
+        'dept_name': '部门名称',
+        'oper_url': '请求URL',
+        'oper_ip': '操作地址',
+        'oper_location': '操作地点',
+        'oper_param': '请求参数',
+        'json_result': '返回参数',
+        'status': '操作状态',
+        'error_msg': '错误消息',
+        'oper_time': '操作日期',
+        'cost_time': '消耗时间（毫秒）',
+    }
+    for item in data:
+        item['status'] = '成功' if item.get('status') == 0 else '失败'
+        if str(item.get('business_type')) in operation_type_option_dict:
+            item['business_type'] = operation_type_option_dict.get(str(item.get('business_type'))).get('label')
+    new_data = [{mapping_dict.get(key): value for key, value in item.items() if mapping_dict.get(key)} for item in data]
+    binary_data = io.BytesIO()
+    pd.DataFrame(new_data).to_excel(binary_data, index=False, engine='openpyxl')
+
+    return len(binary_data.getvalue())
+
+
+async def main():
+    request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(redis=DictCacheRedis())))
+    results = []
+    async with BenchUtil.session_factory() as session_factory:
+        seeded = 1
+        for row_count in ROW_COUNTS:
+            async with session_factory() as session:
+                await seed(session, seeded, row_count + 1)
+            seeded = row_count + 1
+            cases = [('csv', 'csv'), ('xlsx', 'xlsx')]
+            if row_count == LEGACY_ROW_COUNT:
+                cases.append(('legacy pandas xlsx', None))
+            for name, export_format in cases:
+                file_size: Dict[str, int] = {}
+
+                async def run(export_format=export_format):
+                    async with session_factory() as session:
+                        if export_format is None:
+                            file_size['size'] = await export_by_pandas(session, request, row_count)
+                        else:
+                            file_size['size'] = await consume(
+                                await OperationLogService.export_operation_log_list_services(
+                                    request,
+                                    OperationLogDao.stream_operation_log_list(session, OperLogPageQueryModel()),
+                                    export_format,
+                                )
+                            )
+
+                elapsed, peak_rss = await BenchUtil.measure_peak_rss(run)
+                results.append((f'{row_count} rows {name}', elapsed, file_size['size'] / 1024 / 1024, peak_rss))
+                print(f'{results[-1][0]} done in {elapsed:.1f}s')
+    print('operation log export, 16 columns, peak RSS over the process baseline before each case')
+    print(f'{"case":<32}{"time(s)":>12}{"file(MB)":>12}{"peak RSS(MB)":>16}')
+    for name, elapsed, file_mb, peak_rss in results:
+        print(f'{name:<32}{elapsed:>12.1f}{file_mb:>12.1f}{peak_rss:>16.1f}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
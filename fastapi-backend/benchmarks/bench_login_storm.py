@@ -0,0 +1,82 @@
+"""
+登录风暴基准测试：并发登录进行中时其他接口的响应延迟
+
+python -m benchmarks.bench_login_storm
+"""
+
+import asyncio
+import time
+from passlib.context import CryptContext
+from typing import Awaitable, Callable, List, Optional
+from benchmarks.bench_util import BenchUtil
+from utils.pwd_util import PwdUtil
+
+
+LOGIN_COUNT = 200
+# 降低bcrypt轮数以缩短同步对照组的运行时间，单次校验耗时仍远大于探测间隔
+BCRYPT_ROUNDS = 8
+# 登录请求到达间隔，模拟登录请求在一段时间内陆续到达
+ARRIVAL_INTERVAL = 0.002
+PROBE_INTERVAL = 0.005
+IDLE_DURATION = 1
+
+
+async def probe(stop: asyncio.Event) -> List[float]:
+    """
+    模拟其他接口请求，按固定间隔调度并记录实际等待时长与间隔的差值，即请求在事件循环中的额外延迟
+
+    :param stop: 停止探测事件
+    :return: 每次探测的额外延迟列表，单位毫秒
+    """
+    samples = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        samples.append((time.perf_counter() - start - PROBE_INTERVAL) * 1000)
+
+    return samples
+
+
+async def storm(login: Optional[Callable[[], Awaitable]]) -> List[float]:
+    """
+    在登录风暴期间运行探测
+
+    :param login: 单次登录的密码校验方法，为None时不发起登录，仅空闲探测
+    :return: 探测的额外延迟列表，单位毫秒
+    """
+
+    async def arrive(index: int):
+        await asyncio.sleep(index * ARRIVAL_INTERVAL)
+        await login()
+
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(stop))
+    if login is None:
+        await asyncio.sleep(IDLE_DURATION)
+    else:
+        await asyncio.gather(*(arrive(index) for index in range(LOGIN_COUNT)))
+    stop.set()
+
+    return await probe_task
+
+
+async def main():
+    hashed_password = CryptContext(schemes=['bcrypt'], bcrypt__rounds=BCRYPT_ROUNDS).hash('admin123')
+
+    async def verify_sync():
+        return PwdUtil.verify_password('admin123', hashed_password)
+
+    async def verify_async():
+        return await PwdUtil.verify_password_async('admin123', hashed_password)
+
+    rows = [
+        ('idle', BenchUtil.summarize(await storm(None))),
+        (f'{LOGIN_COUNT} logins, verify_password', BenchUtil.summarize(await storm(verify_sync))),
+        (f'{LOGIN_COUNT} logins, verify_password_async', BenchUtil.summarize(await storm(verify_async))),
+    ]
+    BenchUtil.report(f'probe latency over {PROBE_INTERVAL * 1000:.0f}ms sleep, bcrypt rounds {BCRYPT_ROUNDS}', rows)
+    print(PwdUtil.get_executor_statistic())
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,140 @@
+"""
+查询结果序列化及键名转换基准测试，统计每行耗时
+
+python -m benchmarks.bench_serialize
+"""
+
+import asyncio
+import re
+from datetime import datetime
+from sqlalchemy import insert, select
+from sqlalchemy.engine.row import Row
+from typing import Callable, List
+from benchmarks.bench_util import BenchUtil
+from config.database import Base
+from module_admin.entity.do.user_do import SysUser
+from utils.common_util import CamelCaseUtil, SnakeCaseUtil, SqlalchemyUtil
+
+
+ROW_COUNT = 10000
+REPEAT = 30
+
+
+class LegacySerializeUtil:
+    """
+    对照组：逐行递归序列化并逐键执行字符串分割及正则替换的原实现
+    """
+
+    @classmethod
+    def serialize_result(cls, result):
+        if isinstance(result, Base):
+            base_dict = result.__dict__.copy()
+            base_dict.pop('_sa_instance_state', None)
+            return base_dict
+        elif isinstance(result, (list, tuple)):
+            return [cls.serialize_result(row) for row in result]
+        return result
+
+    @classmethod
+    def snake_to_camel(cls, snake_str):
+        words = snake_str.split('_')
+        return words[0] + ''.join(word.capitalize() for word in words[1:])
+
+    @classmethod
+    def camel_to_snake(cls, camel_str):
+        words = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', camel_str)
+        return re.sub('([a-z0-9])([A-Z])', r'\1_\2', words).lower()
+
+    @classmethod
+    def transform_result(cls, result, convert: Callable[[str], str]):
+        if result is None:
+            return result
+        elif isinstance(result, dict):
+            return {convert(k): v for k, v in result.items()}
+        elif isinstance(result, list):
+            return [
+                cls.transform_result(row, convert)
+                if isinstance(row, (dict, Row))
+                else (
+                    cls.transform_result({c.name: getattr(row, c.name) for c in row.__table__.columns}, convert)
+                    if row
+                    else row
+                )
+                for row in result
+            ]
+        return cls.transform_result({c.name: getattr(result, c.name) for c in result.__table__.columns}, convert)
+
+
+def per_row(samples: List[float]) -> List[float]:
+    """
+    将整批耗时换算为每行耗时
+
+    :param samples: 整批耗时列表，单位毫秒
+    :return: 每行耗时列表，单位微秒
+    """
+    return [sample * 1000 / ROW_COUNT for sample in samples]
+
+
+async def main():
+    async with BenchUtil.session_factory() as session_factory, session_factory() as session:
+        await session.execute(
+            insert(SysUser),
+            [
+                dict(
+                    user_id=i,
+                    dept_id=1,
+                    user_name=f'user{i}',
+                    nick_name=f'nick{i}',
+                    email=f'user{i}@example.com',
+                    phonenumber='15888888888',
+                    status='0',
+                    del_flag='0',
+                    create_time=datetime(2026, 1, 1),
+                )
+                for i in range(1, ROW_COUNT + 1)
+            ],
+        )
+        await session.commit()
+        models = (await session.execute(select(SysUser))).scalars().all()
+    snake_dicts = SqlalchemyUtil.serialize_result(list(models))
+    camel_dicts = CamelCaseUtil.transform_result(snake_dicts)
+    cases = [
+        (
+            'serialize_result(models)',
+            lambda: SqlalchemyUtil.serialize_result(list(models)),
+            lambda: LegacySerializeUtil.serialize_result(list(models)),
+        ),
+        (
+            'CamelCaseUtil.transform_result(models)',
+            lambda: CamelCaseUtil.transform_result(list(models)),
+            lambda: LegacySerializeUtil.transform_result(list(models), LegacySerializeUtil.snake_to_camel),
+        ),
+        (
+            'CamelCaseUtil.transform_result(dicts)',
+            lambda: CamelCaseUtil.transform_result(snake_dicts),
+            lambda: LegacySerializeUtil.transform_result(snake_dicts, LegacySerializeUtil.snake_to_camel),
+        ),
+        (
+            'SnakeCaseUtil.transform_result(dicts)',
+            lambda: SnakeCaseUtil.transform_result(camel_dicts),
+            lambda: LegacySerializeUtil.transform_result(camel_dicts, LegacySerializeUtil.camel_to_snake),
+        ),
+    ]
+    rows = []
+    for name, current_func, legacy_func in cases:
+
+        async def run_current(func=current_func):
+            func()
+
+        async def run_legacy(func=legacy_func):
+            func()
+
+        samples = await BenchUtil.measure(run_current, repeat=REPEAT, warmup=3)
+        rows.append((name, BenchUtil.summarize(per_row(samples))))
+        samples = await BenchUtil.measure(run_legacy, repeat=REPEAT, warmup=3)
+        rows.append((f'legacy {name}', BenchUtil.summarize(per_row(samples))))
+    BenchUtil.report(f'per-row cost over {ROW_COUNT} SysUser rows, {REPEAT} runs', rows, unit='us')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
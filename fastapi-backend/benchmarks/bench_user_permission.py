@@ -0,0 +1,230 @@
+"""
+用户权限信息加载基准测试，分别在无延迟及模拟每条语句一次网络往返延迟的情况下统计耗时
+
+python -m benchmarks.bench_user_permission
+"""
+
+import asyncio
+import time
+from sqlalchemy import and_, event, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from benchmarks.bench_util import BenchUtil
+from module_admin.dao.user_dao import UserDao
+from module_admin.entity.do.dept_do import SysDept
+from module_admin.entity.do.menu_do import SysMenu
+from module_admin.entity.do.post_do import SysPost
+from module_admin.entity.do.role_do import SysRole, SysRoleMenu
+from module_admin.entity.do.user_do import SysUser, SysUserPost, SysUserRole
+
+
+MENU_COUNTS = (1000, 10000)
+# 测试用户id与其角色数、岗位数
+USER_CASES = {2: (1, 1), 3: (5, 5), 4: (20, 20)}
+# 模拟的每条语句网络往返延迟，单位秒，内存sqlite本身没有网络往返
+ROUND_TRIP_LATENCIES = (0, 0.0005)
+REPEAT = 50
+
+
+async def seed(session: AsyncSession, menu_count: int):
+    """
+    写入测试数据，每个角色关联全部菜单的一半
+
+    :param session: orm对象
+    :param menu_count: 菜单数
+    :return:
+    """
+    max_count = max(max(role_count, post_count) for role_count, post_count in USER_CASES.values())
+    await session.execute(insert(SysDept), [dict(dept_id=1, parent_id=0, dept_name='dept', status='0', del_flag='0')])
+    await session.execute(
+        insert(SysMenu),
+        [
+            dict(menu_id=i, parent_id=0, menu_name=f'menu{i}', order_num=i, menu_type='C', perms=f'm:{i}', status='0')
+            for i in range(1, menu_count + 1)
+        ],
+    )
+    await session.execute(
+        insert(SysRole),
+        [
+            dict(role_id=i, role_name=f'role{i}', role_key=f'role{i}', role_sort=i, status='0', del_flag='0')
+            for i in range(2, max_count + 2)
+        ],
+    )
+    await session.execute(
+        insert(SysRoleMenu),
+        [
+            dict(role_id=role_id, menu_id=menu_id)
+            for role_id in range(2, max_count + 2)
+            for menu_id in range(1, menu_count + 1)
+            if (menu_id + role_id) % 2
+        ],
+    )
+    await session.execute(
+        insert(SysPost),
+        [
+            dict(post_id=i, post_code=f'post{i}', post_name=f'post{i}', post_sort=i, status='0')
+            for i in range(1, max_count + 1)
+        ],
+    )
+    for user_id, (role_count, post_count) in USER_CASES.items():
+        await session.execute(
+            insert(SysUser),
+            [dict(user_id=user_id, dept_id=1, user_name=f'user{user_id}', nick_name='user', status='0', del_flag='0')],
+        )
+        await session.execute(
+            insert(SysUserRole), [dict(user_id=user_id, role_id=role_id) for role_id in range(2, role_count + 2)]
+        )
+        await session.execute(
+            insert(SysUserPost), [dict(user_id=user_id, post_id=post_id) for post_id in range(1, post_count + 1)]
+        )
+    await session.commit()
+
+
+async def load_by_single_join(session: AsyncSession, user_id: int):
+    """
+    对照组：用户、部门、角色、岗位通过一条联表语句获取，联表结果行数为角色数与岗位数的乘积，菜单查询与被测方法相同
+
+    :param session: orm对象
+    :param user_id: 用户id
+    :return: 去重后的角色及岗位
+    """
+    rows = (
+        await session.execute(
+            select(SysUser, SysDept, SysRole, SysPost)
+            .select_from(SysUser)
+            .where(SysUser.status == '0', SysUser.del_flag == '0', SysUser.user_id == user_id)
+            .join(SysDept, and_(SysUser.dept_id == SysDept.dept_id, SysDept.status == '0'), isouter=True)
+            .join(SysUserRole, SysUser.user_id == SysUserRole.user_id, isouter=True)
+            .join(SysRole, and_(SysUserRole.role_id == SysRole.role_id, SysRole.status == '0'), isouter=True)
+            .join(SysUserPost, SysUser.user_id == SysUserPost.user_id, isouter=True)
+            .join(SysPost, and_(SysUserPost.post_id == SysPost.post_id, SysPost.status == '0'), isouter=True)
+        )
+    ).all()
+    role_info = tuple(dict.fromkeys(row[2] for row in rows if row[2] is not None))
+    post_info = tuple(dict.fromkeys(row[3] for row in rows if row[3] is not None))
+    menu_info = (
+        (
+            await session.execute(
+                select(SysMenu).where(
+                    SysMenu.status == '0',
+                    SysMenu.menu_id.in_(
+                        select(SysRoleMenu.menu_id)
+                        .where(SysRoleMenu.role_id.in_([role.role_id for role in role_info]))
+                        .distinct()
+                    ),
+                )
+            )
+        )
+        .scalars()
+        .all()
+    )
+
+    return role_info, post_info, menu_info
+
+
+async def load_by_five_queries(session: AsyncSession, user_id: int):
+    """
+    对照组：优化前的加载方式，用户、部门、角色、岗位、菜单各通过一条联表语句获取
+
+    :param session: orm对象
+    :param user_id: 用户id
+    :return: 用户、部门、角色、岗位及菜单
+    """
+    user_filter = (SysUser.status == '0', SysUser.del_flag == '0', SysUser.user_id == user_id)
+    user = (await session.execute(select(SysUser).where(*user_filter).distinct())).scalars().first()
+    dept = (
+        (
+            await session.execute(
+                select(SysDept)
+                .select_from(SysUser)
+                .where(*user_filter)
+                .join(SysDept, and_(SysUser.dept_id == SysDept.dept_id, SysDept.status == '0', SysDept.del_flag == '0'))
+                .distinct()
+            )
+        )
+        .scalars()
+        .first()
+    )
+    role_info = (
+        (
+            await session.execute(
+                select(SysRole)
+                .select_from(SysUser)
+                .where(*user_filter)
+                .join(SysUserRole, SysUser.user_id == SysUserRole.user_id, isouter=True)
+                .join(
+                    SysRole,
+                    and_(SysUserRole.role_id == SysRole.role_id, SysRole.status == '0', SysRole.del_flag == '0'),
+                )
+                .distinct()
+            )
+        )
+        .scalars()
+        .all()
+    )
+    post_info = (
+        (
+            await session.execute(
+                select(SysPost)
+                .select_from(SysUser)
+                .where(*user_filter)
+                .join(SysUserPost, SysUser.user_id == SysUserPost.user_id, isouter=True)
+                .join(SysPost, and_(SysUserPost.post_id == SysPost.post_id, SysPost.status == '0'))
+                .distinct()
+            )
+        )
+        .scalars()
+        .all()
+    )
+    menu_info = (
+        (
+            await session.execute(
+                select(SysMenu)
+                .select_from(SysUser)
+                .where(*user_filter)
+                .join(SysUserRole, SysUser.user_id == SysUserRole.user_id, isouter=True)
+                .join(
+                    SysRole,
+                    and_(SysUserRole.role_id == SysRole.role_id, SysRole.status == '0', SysRole.del_flag == '0'),
+                    isouter=True,
+                )
+                .join(SysRoleMenu, SysRole.role_id == SysRoleMenu.role_id, isouter=True)
+                .join(SysMenu, and_(SysRoleMenu.menu_id == SysMenu.menu_id, SysMenu.status == '0'))
+                .order_by(SysMenu.order_num)
+                .distinct()
+            )
+        )
+        .scalars()
+        .all()
+    )
+
+    return user, dept, role_info, post_info, menu_info
+
+
+async def main():
+    rows = []
+    for menu_count in MENU_COUNTS:
+        async with BenchUtil.session_factory() as session_factory, session_factory() as session:
+            await seed(session, menu_count)
+            round_trip_latency = 0
+
+            # 每条语句执行前休眠以模拟一次网络往返，延迟取外层循环当前的取值
+            def simulate_round_trip(*args):
+                if round_trip_latency:
+                    time.sleep(round_trip_latency)
+
+            event.listen(session.bind.sync_engine, 'before_cursor_execute', simulate_round_trip)
+            for round_trip_latency in ROUND_TRIP_LATENCIES:
+                for user_id, (role_count, post_count) in USER_CASES.items():
+                    case = f'{menu_count // 1000}k/{role_count}r/{post_count}p/rtt {round_trip_latency * 1000:g}ms'
+                    for name, loader in (
+                        ('get_user_permission_info', UserDao.get_user_permission_info_by_id),
+                        ('five queries', load_by_five_queries),
+                        ('single join', load_by_single_join),
+                    ):
+                        samples = await BenchUtil.measure(lambda: loader(session, user_id), repeat=REPEAT, warmup=3)
+                        rows.append((f'{name} {case}', BenchUtil.summarize(samples)))
+    BenchUtil.report(f'user permission info, {REPEAT} runs', rows)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+import psutil
+import statistics
+import threading
+import time
+from contextlib import asynccontextmanager
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from typing import AsyncGenerator, Awaitable, Callable, Dict, List, Tuple
+from config.database import Base
+
+
+class BenchUtil:
+    """
+    基准测试工具类，基准测试使用内存sqlite数据库（需安装aiosqlite），在fastapi-backend目录下通过python -m运行
+    """
+
+    @classmethod
+    @asynccontextmanager
+    async def session_factory(cls) -> AsyncGenerator[async_sessionmaker[AsyncSession], None]:
+        """
+        创建内存sqlite数据库并按已导入的模型建表，退出时释放连接，否则aiosqlite的连接线程会阻止进程退出
+
+        :return: 数据库会话工厂
+        """
+        engine = create_async_engine('sqlite+aiosqlite://')
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        try:
+            yield async_sessionmaker(engine, expire_on_commit=False)
+        finally:
+            await engine.dispose()
+
+    @classmethod
+    async def measure(cls, func: Callable[[], Awaitable], repeat: int, warmup: int = 10) -> List[float]:
+        """
+        顺序执行异步方法并记录每次的耗时
+
+        :param func: 被测的异步方法
+        :param repeat: 计时执行次数
+        :param warmup: 计时前的预热执行次数
+        :return: 每次执行的耗时列表，单位毫秒
+        """
+        for _ in range(warmup):
+            await func()
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await func()
+            samples.append((time.perf_counter() - start) * 1000)
+
+        return samples
+
+    @classmethod
+    async def measure_peak_rss(cls, func: Callable[[], Awaitable], interval: float = 0.05) -> Tuple[float, float]:
+        """
+        执行一次异步方法，期间由后台线程按固定间隔采样进程常驻内存，返回耗时及相对执行前的常驻内存峰值增量
+
+        :param func: 被测的异步方法
+        :param interval: 采样间隔，单位秒
+        :return: (耗时，单位秒, 常驻内存峰值增量，单位MB)
+        """
+        process = psutil.Process()
+        baseline = process.memory_info().rss
+        peak = baseline
+        stop = threading.Event()
+
+        def sample():
+            nonlocal peak
+            while not stop.wait(interval):
+                peak = max(peak, process.memory_info().rss)
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            await func()
+        finally:
+            elapsed = time.perf_counter() - start
+            stop.set()
+            sampler.join()
+        peak = max(peak, process.memory_info().rss)
+
+        return elapsed, (peak - baseline) / 1024 / 1024
+
+    @classmethod
+    def summarize(cls, samples: List[float]) -> Dict[str, float]:
+        """
+        计算耗时样本的p50、p99及平均值
+
+        :param samples: 耗时列表，单位毫秒
+        :return: 统计结果
+        """
+        quantiles = statistics.quantiles(samples, n=100, method='inclusive')
+
+        return dict(p50=quantiles[49], p99=quantiles[98], mean=statistics.fmean(samples))
+
+    @classmethod
+    def report(cls, title: str, rows: List[Tuple[str, Dict[str, float]]], unit: str = 'ms'):
+        """
+        打印基准测试结果表格
+
+        :param title: 基准测试名称
+        :param rows: 测试项名称与统计结果列表
+        :param unit: 统计结果的时间单位
+        :return:
+        """
+        print(title)
+        print(f'{"case":<48}{f"p50({unit})":>12}{f"p99({unit})":>12}{f"mean({unit})":>12}')
+        for name, result in rows:
+            print(f'{name:<48}{result["p50"]:>12.3f}{result["p99"]:>12.3f}{result["mean"]:>12.3f}')
@@ -48,5 +48,12 @@ class RedisInitKeyConfig(Enum):
     CAPTCHA_CODES = {'key': 'captcha_codes', 'remark': '图片验证码'}
     ACCOUNT_LOCK = {'key': 'account_lock', 'remark': '用户锁定'}
     PASSWORD_ERROR_COUNT = {'key': 'password_error_count', 'remark': '密码错误次数'}
+    LOGIN_IP_LOCK = {'key': 'login_ip_lock', 'remark': '登录IP锁定'}
+    LOGIN_IP_ERROR_COUNT = {'key': 'login_ip_error_count', 'remark': '登录IP失败次数'}
     SMS_CODE = {'key': 'sms_code', 'remark': '短信验证码'}
     MEMBER_ACCESS_TOKEN = {'key': 'member_access_token', 'remark': '会员登录令牌信息'}
+    EXPORT_JOB = {'key': 'export_job', 'remark': '后台导出任务'}
+    TREE_VERSION = {'key': 'tree_version', 'remark': '部门及菜单树版本号'}
+    TREE_CACHE = {'key': 'tree_cache', 'remark': '部门及菜单树缓存'}
+    ONLINE_SESSION_INDEX = {'key': 'online_session_index', 'remark': '在线会话索引'}
+    ONLINE_SESSION_INFO = {'key': 'online_session_info', 'remark': '在线会话信息'}
@@ -4,7 +4,7 @@ import sys
 from dotenv import load_dotenv
 from functools import lru_cache
 from pydantic_settings import BaseSettings
-from typing import Literal
+from typing import Literal, Union
 
 
 class AppSettings(BaseSettings):
@@ -19,8 +19,25 @@ class AppSettings(BaseSettings):
     app_port: int = 9099
     app_version: str = '1.0.3'
     app_reload: bool = True
-    app_ip_location_query: bool = True
+    app_ip_location_query: Union[bool, Literal['offline', 'remote', 'disabled']] = 'remote'
+    app_ip_location_db_path: str = 'assets/ip_location/ip_location.db'
+    app_ip_location_timeout: float = 3.0
+    app_ip_location_failure_threshold: int = 5
     app_same_time_login: bool = True
+    app_pwd_hash_max_workers: int = 4
+    app_login_ip_max_error_count: int = 20
+    app_trusted_proxy_count: int = 0
+    app_log_queue_maxsize: int = 10000
+    app_log_batch_size: int = 200
+    app_log_flush_interval: float = 1.0
+    app_log_put_timeout: float = 0.05
+    app_log_retention_months: int = 6
+    app_log_partition_ahead_months: int = 3
+    app_log_retention_archive: bool = False
+    app_page_approximate_count_threshold: int = 1000000
+    app_export_job_workers: int = 2
+    app_export_job_queue_maxsize: int = 100
+    app_export_job_expire: int = 3600
 
 
 class JwtSettings(BaseSettings):
@@ -32,6 +49,7 @@ class JwtSettings(BaseSettings):
     jwt_algorithm: str = 'HS256'
     jwt_expire_minutes: int = 1440
     jwt_redis_expire_minutes: int = 30
+    jwt_redis_renew_threshold: float = 0.5
 
 
 class DataBaseSettings(BaseSettings):
@@ -64,6 +82,25 @@ class RedisSettings(BaseSettings):
     redis_database: int = 2
 
 
+class CacheSettings(BaseSettings):
+    """
+    缓存配置
+    """
+
+    principal_cache_maxsize: int = 10000
+    principal_cache_expire: int = 5
+    permission_cache_maxsize: int = 1000
+    permission_cache_expire: int = 60
+    token_cache_maxsize: int = 10000
+    ip_location_cache_maxsize: int = 10000
+    ip_location_cache_expire: int = 86400
+    ip_location_failure_cache_expire: int = 60
+    page_count_cache_maxsize: int = 1000
+    page_count_cache_expire: int = 10
+    tree_cache_maxsize: int = 1000
+    tree_cache_expire: int = 86400
+
+
 class UploadSettings:
     """
     上传配置
@@ -159,6 +196,14 @@ class GetConfig:
         # 实例化Redis配置模型
         return RedisSettings()
 
+    @lru_cache()
+    def get_cache_config(self):
+        """
+        获取缓存配置
+        """
+        # 实例化缓存配置模型
+        return CacheSettings()
+
     @lru_cache()
     def get_upload_config(self):
         """
@@ -204,5 +249,7 @@ JwtConfig = get_config.get_jwt_config()
 DataBaseConfig = get_config.get_database_config()
 # Redis配置
 RedisConfig = get_config.get_redis_config()
+# 缓存配置
+CacheConfig = get_config.get_cache_config()
 # 上传配置
 UploadConfig = get_config.get_upload_config()
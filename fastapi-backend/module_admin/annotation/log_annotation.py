@@ -1,22 +1,21 @@
 import inspect
 import json
 import os
-import requests
 import time
 from datetime import datetime
 from fastapi import Request
 from fastapi.responses import JSONResponse, ORJSONResponse, UJSONResponse
-from functools import lru_cache, wraps
+from functools import wraps
 from typing import Literal, Optional
 from user_agents import parse
 from module_admin.entity.vo.log_vo import LogininforModel, OperLogModel
-from module_admin.service.log_service import LoginLogService, OperationLogService
+from module_admin.service.log_service import LogWriterService
 from module_admin.service.login_service import LoginService
 from config.enums import BusinessType
-from config.env import AppConfig
 from exceptions.exception import LoginException, ServiceException, ServiceWarning
+from utils.ip_location_util import IpLocationUtil
 from utils.log_util import logger
-from utils.response_util import ResponseUtil
+from utils.response_util import RESULT_PREVIEW_MAX_LENGTH, ResponseUtil
 
 
 class Log:
@@ -43,17 +42,18 @@ class Log:
         self.log_type = log_type
 
     def __call__(self, func):
+        # 获取被装饰函数的文件路径
+        file_path = inspect.getfile(func)
+        # 获取项目根路径
+        project_root = os.getcwd()
+        # 处理文件路径，去除项目根路径部分
+        relative_path = os.path.relpath(file_path, start=project_root)[0:-2].replace('\\', '.')
+        # 获取当前被装饰函数所在路径，装饰时计算一次即可
+        func_path = f'{relative_path}{func.__name__}()'
+
         @wraps(func)
         async def wrapper(*args, **kwargs):
             start_time = time.time()
-            # 获取被装饰函数的文件路径
-            file_path = inspect.getfile(func)
-            # 获取项目根路径
-            project_root = os.getcwd()
-            # 处理文件路径，去除项目根路径部分
-            relative_path = os.path.relpath(file_path, start=project_root)[0:-2].replace('\\', '.')
-            # 获取当前被装饰函数所在路径
-            func_path = f'{relative_path}{func.__name__}()'
             # 获取上下文信息
             request: Request = kwargs.get('request')
             token = request.headers.get('Authorization')
@@ -73,9 +73,7 @@ class Log:
                 if request.headers.get('is_browser') == 'no'
                 else request.headers.get('X-Forwarded-For')
             )
-            oper_location = '内网IP'
-            if AppConfig.app_ip_location_query:
-                oper_location = get_ip_location(oper_ip)
+            oper_location = await IpLocationUtil.get_ip_location(oper_ip)
             # 根据不同的请求类型使用不同的方法获取请求参数
             content_type = request.headers.get('Content-Type')
             if content_type and (
@@ -138,29 +136,36 @@ class Log:
             request_from_redoc = (
                 request.headers.get('referer').endswith('redoc') if request.headers.get('referer') else False
             )
-            # 根据响应结果的类型使用不同的方法获取响应结果参数
-            if (
-                isinstance(result, JSONResponse)
-                or isinstance(result, ORJSONResponse)
-                or isinstance(result, UJSONResponse)
-            ):
-                result_dict = json.loads(str(result.body, 'utf-8'))
+            # 响应工具类创建的响应直接读取其携带的元信息，无需重新解析响应体
+            response_meta = ResponseUtil.get_response_meta(result)
+            if response_meta is not None:
+                result_code, result_msg, json_result = response_meta
             else:
-                if request_from_swagger or request_from_redoc:
-                    result_dict = {}
+                # 根据响应结果的类型使用不同的方法获取响应结果参数
+                if (
+                    isinstance(result, JSONResponse)
+                    or isinstance(result, ORJSONResponse)
+                    or isinstance(result, UJSONResponse)
+                ):
+                    result_dict = json.loads(str(result.body, 'utf-8'))
                 else:
-                    if result.status_code == 200:
-                        result_dict = {'code': result.status_code, 'message': '获取成功'}
+                    if request_from_swagger or request_from_redoc:
+                        result_dict = {}
                     else:
-                        result_dict = {'code': result.status_code, 'message': '获取失败'}
-            json_result = json.dumps(result_dict, ensure_ascii=False)
+                        if result.status_code == 200:
+                            result_dict = {'code': result.status_code, 'message': '获取成功'}
+                        else:
+                            result_dict = {'code': result.status_code, 'message': '获取失败'}
+                result_code = result_dict.get('code')
+                result_msg = result_dict.get('msg')
+                json_result = json.dumps(result_dict, ensure_ascii=False)[:RESULT_PREVIEW_MAX_LENGTH]
             # 根据响应结果获取响应状态及异常信息
             status = 1
             error_msg = ''
-            if result_dict.get('code') == 200:
+            if result_code == 200:
                 status = 0
             else:
-                error_msg = result_dict.get('msg')
+                error_msg = result_msg
             # 根据日志类型向对应的日志表插入数据
             if self.log_type == 'login':
                 # 登录请求来自于api文档时不记录登录日志，其余情况则记录
@@ -172,9 +177,9 @@ class Log:
                     login_log['login_time'] = oper_time
                     login_log['user_name'] = user_name
                     login_log['status'] = str(status)
-                    login_log['msg'] = result_dict.get('msg')
+                    login_log['msg'] = result_msg
 
-                    await LoginLogService.add_login_log_services(query_db, LogininforModel(**login_log))
+                    await LogWriterService.add_log(LogininforModel(**login_log))
             else:
                 current_user = await LoginService.get_current_user(request, token, query_db)
                 oper_name = current_user.user.user_name
@@ -197,32 +202,8 @@ class Log:
                     oper_time=oper_time,
                     cost_time=int(cost_time),
                 )
-                await OperationLogService.add_operation_log_services(query_db, operation_log)
+                await LogWriterService.add_log(operation_log)
 
             return result
 
         return wrapper
-
-
-@lru_cache()
-def get_ip_location(oper_ip: str):
-    """
-    查询ip归属区域
-
-    :param oper_ip: 需要查询的ip
-    :return: ip归属区域
-    """
-    oper_location = '内网IP'
-    try:
-        if oper_ip != '127.0.0.1' and oper_ip != 'localhost':
-            oper_location = '未知'
-            ip_result = requests.get(f'https://qifu-api.baidubce.com/ip/geo/v1/district?ip={oper_ip}')
-            if ip_result.status_code == 200:
-                prov = ip_result.json().get('data').get('prov')
-                city = ip_result.json().get('data').get('city')
-                if prov or city:
-                    oper_location = f'{prov}-{city}'
-    except Exception as e:
-        oper_location = '未知'
-        print(e)
-    return oper_location
@@ -1,12 +1,21 @@
 from fastapi import Depends
-from typing import Optional
+from functools import lru_cache
+from sqlalchemy import ColumnElement, false, or_, select, true
+from typing import Optional, Tuple
+from module_admin.entity.do.dept_do import SysDept, SysDeptClosure
+from module_admin.entity.do.role_do import SysRoleDept
+from module_admin.entity.do.user_do import SysUser
 from module_admin.entity.vo.user_vo import CurrentUserModel
 from module_admin.service.login_service import LoginService
 
 
+# 数据权限过滤条件缓存的最大条目数
+DATA_SCOPE_CACHE_MAXSIZE = 1024
+
+
 class GetDataScope:
     """
-    获取当前用户数据权限对应的查询sql语句
+    获取当前用户数据权限对应的查询条件
     """
 
     DATA_SCOPE_ALL = '1'
@@ -14,6 +23,7 @@ class GetDataScope:
     DATA_SCOPE_DEPT = '3'
     DATA_SCOPE_DEPT_AND_CHILD = '4'
     DATA_SCOPE_SELF = '5'
+    QUERY_MODELS = {SysDept.__name__: SysDept, SysUser.__name__: SysUser}
 
     def __init__(
         self,
@@ -23,7 +33,7 @@ class GetDataScope:
         dept_alias: Optional[str] = 'dept_id',
     ):
         """
-        获取当前用户数据权限对应的查询sql语句
+        获取当前用户数据权限对应的查询条件
 
         :param query_alias: 所要查询表对应的sqlalchemy模型名称，默认为''
         :param db_alias: orm对象别名，默认为'db'
@@ -35,41 +45,76 @@ class GetDataScope:
         self.user_alias = user_alias
         self.dept_alias = dept_alias
 
-    def __call__(self, current_user: CurrentUserModel = Depends(LoginService.get_current_user)):
-        user_id = current_user.user.user_id
-        dept_id = current_user.user.dept_id
-        custom_data_scope_role_id_list = [
-            item.role_id for item in current_user.user.role if item.data_scope == self.DATA_SCOPE_CUSTOM
-        ]
-        param_sql_list = []
-        for role in current_user.user.role:
-            if current_user.user.admin or role.data_scope == self.DATA_SCOPE_ALL:
-                param_sql_list = ['1 == 1']
-                break
-            elif role.data_scope == self.DATA_SCOPE_CUSTOM:
-                if len(custom_data_scope_role_id_list) > 1:
-                    param_sql_list.append(
-                        f"{self.query_alias}.{self.dept_alias}.in_(select(SysRoleDept.dept_id).where(SysRoleDept.role_id.in_({custom_data_scope_role_id_list}))) if hasattr({self.query_alias}, '{self.dept_alias}') else 1 == 0"
-                    )
-                else:
-                    param_sql_list.append(
-                        f"{self.query_alias}.{self.dept_alias}.in_(select(SysRoleDept.dept_id).where(SysRoleDept.role_id == {role.role_id})) if hasattr({self.query_alias}, '{self.dept_alias}') else 1 == 0"
-                    )
-            elif role.data_scope == self.DATA_SCOPE_DEPT:
-                param_sql_list.append(
-                    f"{self.query_alias}.{self.dept_alias} == {dept_id} if hasattr({self.query_alias}, '{self.dept_alias}') else 1 == 0"
-                )
-            elif role.data_scope == self.DATA_SCOPE_DEPT_AND_CHILD:
-                param_sql_list.append(
-                    f"{self.query_alias}.{self.dept_alias}.in_(select(SysDept.dept_id).where(or_(SysDept.dept_id == {dept_id}, func.find_in_set({dept_id}, SysDept.ancestors)))) if hasattr({self.query_alias}, '{self.dept_alias}') else 1 == 0"
+    def __call__(self, current_user: CurrentUserModel = Depends(LoginService.get_current_user)) -> ColumnElement[bool]:
+        data_scope_key = self.get_data_scope_key(current_user)
+        if data_scope_key is None:
+            return true()
+
+        return self.get_data_scope_filter(self.query_alias, self.user_alias, self.dept_alias, *data_scope_key)
+
+    @classmethod
+    def get_data_scope_key(
+        cls, current_user: CurrentUserModel
+    ) -> Optional[Tuple[Tuple[str, ...], Tuple[int, ...], Optional[int], Optional[int]]]:
+        """
+        获取当前用户数据权限的归一化参数，仅保留所含数据权限实际用到的部门id及用户id，使相同角色组合及部门的用户共用同一缓存条目
+
+        :param current_user: 当前用户对象
+        :return: 数据权限列表、自定义数据权限角色的id列表、部门id及用户id，拥有全部数据权限时返回None
+        """
+        data_scope_set = {role.data_scope for role in current_user.user.role}
+        if current_user.user.admin or cls.DATA_SCOPE_ALL in data_scope_set:
+            return None
+        custom_role_ids = tuple(
+            sorted(role.role_id for role in current_user.user.role if role.data_scope == cls.DATA_SCOPE_CUSTOM)
+        )
+        dept_id = (
+            current_user.user.dept_id if data_scope_set & {cls.DATA_SCOPE_DEPT, cls.DATA_SCOPE_DEPT_AND_CHILD} else None
+        )
+        user_id = current_user.user.user_id if cls.DATA_SCOPE_SELF in data_scope_set else None
+
+        return tuple(sorted(data_scope_set - {None})), custom_role_ids, dept_id, user_id
+
+    @classmethod
+    @lru_cache(maxsize=DATA_SCOPE_CACHE_MAXSIZE)
+    def get_data_scope_filter(
+        cls,
+        query_alias: str,
+        user_alias: str,
+        dept_alias: str,
+        data_scope_list: Tuple[str, ...],
+        custom_role_ids: Tuple[int, ...],
+        dept_id: Optional[int],
+        user_id: Optional[int],
+    ) -> ColumnElement[bool]:
+        """
+        根据数据权限生成查询条件，条件中的id均为绑定参数，生成的条件对象按参数缓存复用
+
+        :param query_alias: 所要查询表对应的sqlalchemy模型名称
+        :param user_alias: 用户id字段别名
+        :param dept_alias: 部门id字段别名
+        :param data_scope_list: 当前用户各角色的数据权限列表
+        :param custom_role_ids: 自定义数据权限角色的id列表
+        :param dept_id: 当前用户的部门id，不含本部门相关数据权限时为None
+        :param user_id: 当前用户的id，不含仅本人数据权限时为None
+        :return: 数据权限对应的查询条件
+        """
+        query_model = cls.QUERY_MODELS.get(query_alias)
+        dept_column = getattr(query_model, dept_alias, None)
+        user_column = getattr(query_model, user_alias, None)
+        filter_list = []
+        for data_scope in data_scope_list:
+            if data_scope == cls.DATA_SCOPE_CUSTOM and dept_column is not None:
+                filter_list.append(
+                    dept_column.in_(select(SysRoleDept.dept_id).where(SysRoleDept.role_id.in_(custom_role_ids)))
                 )
-            elif role.data_scope == self.DATA_SCOPE_SELF:
-                param_sql_list.append(
-                    f"{self.query_alias}.{self.user_alias} == {user_id} if hasattr({self.query_alias}, '{self.user_alias}') else 1 == 0"
+            elif data_scope == cls.DATA_SCOPE_DEPT and dept_column is not None:
+                filter_list.append(dept_column == dept_id)
+            elif data_scope == cls.DATA_SCOPE_DEPT_AND_CHILD and dept_column is not None:
+                filter_list.append(
+                    dept_column.in_(select(SysDeptClosure.descendant_id).where(SysDeptClosure.ancestor_id == dept_id))
                 )
-            else:
-                param_sql_list.append('1 == 0')
-        param_sql_list = list(dict.fromkeys(param_sql_list))
-        param_sql = f"or_({', '.join(param_sql_list)})"
+            elif data_scope == cls.DATA_SCOPE_SELF and user_column is not None:
+                filter_list.append(user_column == user_id)
 
-        return param_sql
+        return or_(*filter_list) if filter_list else false()
@@ -1,8 +1,10 @@
+import sys
 from fastapi import Depends
 from typing import List, Union
 from exceptions.exception import PermissionException
 from module_admin.entity.vo.user_vo import CurrentUserModel
 from module_admin.service.login_service import LoginService
+from utils.permission_util import PermissionUtil
 
 
 class CheckUserInterfaceAuth:
@@ -19,21 +21,17 @@ class CheckUserInterfaceAuth:
         """
         self.perm = perm
         self.is_strict = is_strict
+        # 装饰时预先将权限标识整理为驻留字符串元组，避免每次请求重复构建列表
+        self.perm_tuple = tuple(sys.intern(perm_str) for perm_str in ([perm] if isinstance(perm, str) else perm))
 
-    def __call__(self, current_user: CurrentUserModel = Depends(LoginService.get_current_user)):
-        user_auth_list = current_user.permissions
-        if '*:*:*' in user_auth_list:
-            return True
-        if isinstance(self.perm, str):
-            if self.perm in user_auth_list:
+    async def __call__(self, current_user: CurrentUserModel = Depends(LoginService.get_current_user)):
+        permission_index = PermissionUtil.get_permission_index(current_user)
+        if self.is_strict:
+            if all(permission_index.has_perm(perm_str) for perm_str in self.perm_tuple):
+                return True
+        else:
+            if any(permission_index.has_perm(perm_str) for perm_str in self.perm_tuple):
                 return True
-        if isinstance(self.perm, list):
-            if self.is_strict:
-                if all([perm_str in user_auth_list for perm_str in self.perm]):
-                    return True
-            else:
-                if any([perm_str in user_auth_list for perm_str in self.perm]):
-                    return True
         raise PermissionException(data='', message='该用户无此接口权限')
 
 
@@ -51,18 +49,16 @@ class CheckRoleInterfaceAuth:
         """
         self.role_key = role_key
         self.is_strict = is_strict
+        self.role_key_tuple = tuple(
+            sys.intern(role_key_str) for role_key_str in ([role_key] if isinstance(role_key, str) else role_key)
+        )
 
-    def __call__(self, current_user: CurrentUserModel = Depends(LoginService.get_current_user)):
-        user_role_list = current_user.user.role
-        user_role_key_list = [role.role_key for role in user_role_list]
-        if isinstance(self.role_key, str):
-            if self.role_key in user_role_key_list:
+    async def __call__(self, current_user: CurrentUserModel = Depends(LoginService.get_current_user)):
+        permission_index = PermissionUtil.get_permission_index(current_user)
+        if self.is_strict:
+            if all(permission_index.has_role(role_key_str) for role_key_str in self.role_key_tuple):
+                return True
+        else:
+            if any(permission_index.has_role(role_key_str) for role_key_str in self.role_key_tuple):
                 return True
-        if isinstance(self.role_key, list):
-            if self.is_strict:
-                if all([role_key_str in user_role_key_list for role_key_str in self.role_key]):
-                    return True
-            else:
-                if any([role_key_str in user_role_key_list for role_key_str in self.role_key]):
-                    return True
         raise PermissionException(data='', message='该用户无此接口权限')
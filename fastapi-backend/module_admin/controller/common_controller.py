@@ -1,7 +1,9 @@
 from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, Query, Request, status, UploadFile
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
+from module_admin.entity.vo.user_vo import CurrentUserModel
 from module_admin.service.common_service import CommonService
+from module_admin.service.export_job_service import ExportJobService
 from module_admin.service.login_service import LoginService
 from utils.log_util import logger
 from utils.response_util import ResponseUtil
@@ -57,6 +59,18 @@ async def common_download(
     return ResponseUtil.streaming(data=download_result.result)
 
 
+@commonController.get('/export/job/{job_id}')
+async def common_export_job(
+    request: Request,
+    job_id: str,
+    current_user: CurrentUserModel = Depends(LoginService.get_current_user),
+):
+    export_job_result = await ExportJobService.get_export_job_services(request, job_id, current_user.user.user_id)
+    logger.info('获取成功')
+
+    return ResponseUtil.success(data=export_job_result)
+
+
 @commonController.get('/download/resource')
 async def common_download_resource(request: Request, resource: str = Query()):
     download_resource_result = await CommonService.download_resource_services(resource)
@@ -10,10 +10,10 @@ from module_admin.entity.vo.config_vo import ConfigModel, ConfigPageQueryModel,
 from module_admin.entity.vo.user_vo import CurrentUserModel
 from module_admin.service.config_service import ConfigService
 from module_admin.service.login_service import LoginService
-from utils.common_util import bytes2file_response
 from utils.log_util import logger
 from utils.page_util import PageResponseModel
 from utils.response_util import ResponseUtil
+from utils.export_util import ExportFormat, ExportUtil
 
 
 configController = APIRouter(prefix='/system/config', dependencies=[Depends(LoginService.get_current_user)])
@@ -113,11 +113,12 @@ async def query_system_config(request: Request, config_key: str):
 async def export_system_config_list(
     request: Request,
     config_page_query: ConfigPageQueryModel = Form(),
+    export_format: ExportFormat = Query(default='xlsx', alias='exportFormat'),
     query_db: AsyncSession = Depends(get_db),
 ):
     # 获取全量数据
     config_query_result = await ConfigService.get_config_list_services(query_db, config_page_query, is_page=False)
-    config_export_result = await ConfigService.export_config_list_services(config_query_result)
+    config_export_result = await ConfigService.export_config_list_services(config_query_result, export_format)
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(config_export_result))
+    return ResponseUtil.streaming(data=config_export_result, media_type=ExportUtil.get_media_type(export_format))
@@ -1,6 +1,7 @@
 from datetime import datetime
 from fastapi import APIRouter, Depends, Query, Request
 from pydantic_validation_decorator import ValidateFields
+from sqlalchemy import ColumnElement
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from config.enums import BusinessType
@@ -28,10 +29,10 @@ async def get_system_dept_tree_for_edit_option(
     request: Request,
     dept_id: int,
     query_db: AsyncSession = Depends(get_db),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_filter: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     dept_query = DeptModel(dept_id=dept_id)
-    dept_query_result = await DeptService.get_dept_for_edit_option_services(query_db, dept_query, data_scope_sql)
+    dept_query_result = await DeptService.get_dept_for_edit_option_services(query_db, dept_query, data_scope_filter)
     logger.info('获取成功')
 
     return ResponseUtil.success(data=dept_query_result)
@@ -44,9 +45,9 @@ async def get_system_dept_list(
     request: Request,
     dept_query: DeptQueryModel = Query(),
     query_db: AsyncSession = Depends(get_db),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_filter: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
-    dept_query_result = await DeptService.get_dept_list_services(query_db, dept_query, data_scope_sql)
+    dept_query_result = await DeptService.get_dept_list_services(query_db, dept_query, data_scope_filter)
     logger.info('获取成功')
 
     return ResponseUtil.success(data=dept_query_result)
@@ -65,7 +66,7 @@ async def add_system_dept(
     add_dept.create_time = datetime.now()
     add_dept.update_by = current_user.user.user_name
     add_dept.update_time = datetime.now()
-    add_dept_result = await DeptService.add_dept_services(query_db, add_dept)
+    add_dept_result = await DeptService.add_dept_services(request, query_db, add_dept)
     logger.info(add_dept_result.message)
 
     return ResponseUtil.success(data=add_dept_result)
@@ -79,13 +80,13 @@ async def edit_system_dept(
     edit_dept: DeptModel,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_filter: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     if not current_user.user.admin:
-        await DeptService.check_dept_data_scope_services(query_db, edit_dept.dept_id, data_scope_sql)
+        await DeptService.check_dept_data_scope_services(query_db, edit_dept.dept_id, data_scope_filter)
     edit_dept.update_by = current_user.user.user_name
     edit_dept.update_time = datetime.now()
-    edit_dept_result = await DeptService.edit_dept_services(query_db, edit_dept)
+    edit_dept_result = await DeptService.edit_dept_services(request, query_db, edit_dept)
     logger.info(edit_dept_result.message)
 
     return ResponseUtil.success(msg=edit_dept_result.message)
@@ -98,17 +99,17 @@ async def delete_system_dept(
     dept_ids: str,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_filter: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     dept_id_list = dept_ids.split(',') if dept_ids else []
     if dept_id_list:
         for dept_id in dept_id_list:
             if not current_user.user.admin:
-                await DeptService.check_dept_data_scope_services(query_db, int(dept_id), data_scope_sql)
+                await DeptService.check_dept_data_scope_services(query_db, int(dept_id), data_scope_filter)
     delete_dept = DeleteDeptModel(dept_ids=dept_ids)
     delete_dept.update_by = current_user.user.user_name
     delete_dept.update_time = datetime.now()
-    delete_dept_result = await DeptService.delete_dept_services(query_db, delete_dept)
+    delete_dept_result = await DeptService.delete_dept_services(request, query_db, delete_dept)
     logger.info(delete_dept_result.message)
 
     return ResponseUtil.success(msg=delete_dept_result.message)
@@ -122,10 +123,10 @@ async def query_detail_system_dept(
     dept_id: int,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_filter: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     if not current_user.user.admin:
-        await DeptService.check_dept_data_scope_services(query_db, dept_id, data_scope_sql)
+        await DeptService.check_dept_data_scope_services(query_db, dept_id, data_scope_filter)
     detail_dept_result = await DeptService.dept_detail_services(query_db, dept_id)
     logger.info(f'获取dept_id为{dept_id}的信息成功')
 
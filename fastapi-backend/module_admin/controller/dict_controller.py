@@ -18,10 +18,10 @@ from module_admin.entity.vo.dict_vo import (
 from module_admin.entity.vo.user_vo import CurrentUserModel
 from module_admin.service.dict_service import DictDataService, DictTypeService
 from module_admin.service.login_service import LoginService
-from utils.common_util import bytes2file_response
 from utils.log_util import logger
 from utils.page_util import PageResponseModel
 from utils.response_util import ResponseUtil
+from utils.export_util import ExportFormat, ExportUtil
 
 
 dictController = APIRouter(prefix='/system/dict', dependencies=[Depends(LoginService.get_current_user)])
@@ -124,16 +124,19 @@ async def query_detail_system_dict_type(request: Request, dict_id: int, query_db
 async def export_system_dict_type_list(
     request: Request,
     dict_type_page_query: DictTypePageQueryModel = Form(),
+    export_format: ExportFormat = Query(default='xlsx', alias='exportFormat'),
     query_db: AsyncSession = Depends(get_db),
 ):
     # 获取全量数据
     dict_type_query_result = await DictTypeService.get_dict_type_list_services(
         query_db, dict_type_page_query, is_page=False
     )
-    dict_type_export_result = await DictTypeService.export_dict_type_list_services(dict_type_query_result)
+    dict_type_export_result = await DictTypeService.export_dict_type_list_services(
+        dict_type_query_result, export_format
+    )
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(dict_type_export_result))
+    return ResponseUtil.streaming(data=dict_type_export_result, media_type=ExportUtil.get_media_type(export_format))
 
 
 @dictController.get('/data/type/{dict_type}')
@@ -227,13 +230,16 @@ async def query_detail_system_dict_data(request: Request, dict_code: int, query_
 async def export_system_dict_data_list(
     request: Request,
     dict_data_page_query: DictDataPageQueryModel = Form(),
+    export_format: ExportFormat = Query(default='xlsx', alias='exportFormat'),
     query_db: AsyncSession = Depends(get_db),
 ):
     # 获取全量数据
     dict_data_query_result = await DictDataService.get_dict_data_list_services(
         query_db, dict_data_page_query, is_page=False
     )
-    dict_data_export_result = await DictDataService.export_dict_data_list_services(dict_data_query_result)
+    dict_data_export_result = await DictDataService.export_dict_data_list_services(
+        dict_data_query_result, export_format
+    )
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(dict_data_export_result))
+    return ResponseUtil.streaming(data=dict_data_export_result, media_type=ExportUtil.get_media_type(export_format))
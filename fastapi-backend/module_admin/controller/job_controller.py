@@ -1,5 +1,6 @@
 from datetime import datetime
 from fastapi import APIRouter, Depends, Form, Query, Request
+from functools import partial
 from pydantic_validation_decorator import ValidateFields
 from sqlalchemy.ext.asyncio import AsyncSession
 from config.enums import BusinessType
@@ -15,13 +16,14 @@ from module_admin.entity.vo.job_vo import (
     JobPageQueryModel,
 )
 from module_admin.entity.vo.user_vo import CurrentUserModel
+from module_admin.service.export_job_service import ExportJobService
 from module_admin.service.job_log_service import JobLogService
 from module_admin.service.job_service import JobService
 from module_admin.service.login_service import LoginService
-from utils.common_util import bytes2file_response
 from utils.log_util import logger
 from utils.page_util import PageResponseModel
-from utils.response_util import ResponseUtil
+from utils.response_util import OrjsonResponse, ResponseUtil
+from utils.export_util import ExportFormat, ExportUtil
 
 
 jobController = APIRouter(prefix='/monitor', dependencies=[Depends(LoginService.get_current_user)])
@@ -133,14 +135,15 @@ async def query_detail_system_job(request: Request, job_id: int, query_db: Async
 async def export_system_job_list(
     request: Request,
     job_page_query: JobPageQueryModel = Form(),
+    export_format: ExportFormat = Query(default='xlsx', alias='exportFormat'),
     query_db: AsyncSession = Depends(get_db),
 ):
     # 获取全量数据
     job_query_result = await JobService.get_job_list_services(query_db, job_page_query, is_page=False)
-    job_export_result = await JobService.export_job_list_services(request, job_query_result)
+    job_export_result = await JobService.export_job_list_services(request, job_query_result, export_format)
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(job_export_result))
+    return ResponseUtil.streaming(data=job_export_result, media_type=ExportUtil.get_media_type(export_format))
 
 
 @jobController.get(
@@ -157,7 +160,7 @@ async def get_system_job_log_list(
     )
     logger.info('获取成功')
 
-    return ResponseUtil.success(model_content=job_log_page_query_result)
+    return ResponseUtil.success(model_content=job_log_page_query_result, response_class=OrjsonResponse)
 
 
 @jobController.delete('/jobLog/clean', dependencies=[Depends(CheckUserInterfaceAuth('monitor:job:remove'))])
@@ -184,11 +187,30 @@ async def delete_system_job_log(request: Request, job_log_ids: str, query_db: As
 async def export_system_job_log_list(
     request: Request,
     job_log_page_query: JobLogPageQueryModel = Form(),
+    export_format: ExportFormat = Query(default='xlsx', alias='exportFormat'),
+    background: bool = Query(default=False),
     query_db: AsyncSession = Depends(get_db),
+    current_user: CurrentUserModel = Depends(LoginService.get_current_user),
 ):
-    # 获取全量数据
-    job_log_query_result = await JobLogService.get_job_log_list_services(query_db, job_log_page_query, is_page=False)
-    job_log_export_result = await JobLogService.export_job_log_list_services(request, job_log_query_result)
+    if background:
+        # 后台导出任务使用独立的会话读取数据，请求立即返回任务信息，由前端轮询任务状态后下载导出文件
+        export_job_result = await ExportJobService.create_export_job_services(
+            request,
+            '定时任务调度日志',
+            JobLogService.stream_job_log_list_services(job_log_page_query),
+            partial(JobLogService.export_job_log_list_services, request, export_format=export_format),
+            export_format,
+            current_user.user.user_id,
+        )
+        logger.info('导出任务创建成功')
+
+        return ResponseUtil.success(msg='导出任务创建成功', data=export_job_result)
+
+    # 通过服务端游标逐批读取全量数据
+    job_log_query_result = JobLogService.stream_job_log_list_services(job_log_page_query)
+    job_log_export_result = await JobLogService.export_job_log_list_services(
+        request, job_log_query_result, export_format
+    )
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(job_log_export_result))
+    return ResponseUtil.streaming(data=job_log_export_result, media_type=ExportUtil.get_media_type(export_format))
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, Form, Query, Request
+from functools import partial
 from sqlalchemy.ext.asyncio import AsyncSession
 from config.enums import BusinessType
 from config.get_db import get_db
@@ -11,12 +12,14 @@ from module_admin.entity.vo.log_vo import (
     OperLogPageQueryModel,
     UnlockUser,
 )
+from module_admin.entity.vo.user_vo import CurrentUserModel
+from module_admin.service.export_job_service import ExportJobService
 from module_admin.service.log_service import LoginLogService, OperationLogService
 from module_admin.service.login_service import LoginService
-from utils.common_util import bytes2file_response
 from utils.log_util import logger
 from utils.page_util import PageResponseModel
-from utils.response_util import ResponseUtil
+from utils.response_util import OrjsonResponse, ResponseUtil
+from utils.export_util import ExportFormat, ExportUtil
 
 
 logController = APIRouter(prefix='/monitor', dependencies=[Depends(LoginService.get_current_user)])
@@ -38,7 +41,7 @@ async def get_system_operation_log_list(
     )
     logger.info('获取成功')
 
-    return ResponseUtil.success(model_content=operation_log_page_query_result)
+    return ResponseUtil.success(model_content=operation_log_page_query_result, response_class=OrjsonResponse)
 
 
 @logController.delete('/operlog/clean', dependencies=[Depends(CheckUserInterfaceAuth('monitor:operlog:remove'))])
@@ -67,18 +70,33 @@ async def delete_system_operation_log(request: Request, oper_ids: str, query_db:
 async def export_system_operation_log_list(
     request: Request,
     operation_log_page_query: OperLogPageQueryModel = Form(),
+    export_format: ExportFormat = Query(default='xlsx', alias='exportFormat'),
+    background: bool = Query(default=False),
     query_db: AsyncSession = Depends(get_db),
+    current_user: CurrentUserModel = Depends(LoginService.get_current_user),
 ):
-    # 获取全量数据
-    operation_log_query_result = await OperationLogService.get_operation_log_list_services(
-        query_db, operation_log_page_query, is_page=False
-    )
+    if background:
+        # 后台导出任务使用独立的会话读取数据，请求立即返回任务信息，由前端轮询任务状态后下载导出文件
+        export_job_result = await ExportJobService.create_export_job_services(
+            request,
+            '操作日志',
+            OperationLogService.stream_operation_log_list_services(operation_log_page_query),
+            partial(OperationLogService.export_operation_log_list_services, request, export_format=export_format),
+            export_format,
+            current_user.user.user_id,
+        )
+        logger.info('导出任务创建成功')
+
+        return ResponseUtil.success(msg='导出任务创建成功', data=export_job_result)
+
+    # 通过服务端游标逐批读取全量数据
+    operation_log_query_result = OperationLogService.stream_operation_log_list_services(operation_log_page_query)
     operation_log_export_result = await OperationLogService.export_operation_log_list_services(
-        request, operation_log_query_result
+        request, operation_log_query_result, export_format
     )
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(operation_log_export_result))
+    return ResponseUtil.streaming(data=operation_log_export_result, media_type=ExportUtil.get_media_type(export_format))
 
 
 @logController.get(
@@ -97,7 +115,7 @@ async def get_system_login_log_list(
     )
     logger.info('获取成功')
 
-    return ResponseUtil.success(model_content=login_log_page_query_result)
+    return ResponseUtil.success(model_content=login_log_page_query_result, response_class=OrjsonResponse)
 
 
 @logController.delete('/logininfor/clean', dependencies=[Depends(CheckUserInterfaceAuth('monitor:logininfor:remove'))])
@@ -138,13 +156,30 @@ async def unlock_system_user(request: Request, user_name: str, query_db: AsyncSe
 async def export_system_login_log_list(
     request: Request,
     login_log_page_query: LoginLogPageQueryModel = Form(),
+    export_format: ExportFormat = Query(default='xlsx', alias='exportFormat'),
+    background: bool = Query(default=False),
     query_db: AsyncSession = Depends(get_db),
+    current_user: CurrentUserModel = Depends(LoginService.get_current_user),
 ):
-    # 获取全量数据
-    login_log_query_result = await LoginLogService.get_login_log_list_services(
-        query_db, login_log_page_query, is_page=False
+    if background:
+        # 后台导出任务使用独立的会话读取数据，请求立即返回任务信息，由前端轮询任务状态后下载导出文件
+        export_job_result = await ExportJobService.create_export_job_services(
+            request,
+            '登录日志',
+            LoginLogService.stream_login_log_list_services(login_log_page_query),
+            partial(LoginLogService.export_login_log_list_services, export_format=export_format),
+            export_format,
+            current_user.user.user_id,
+        )
+        logger.info('导出任务创建成功')
+
+        return ResponseUtil.success(msg='导出任务创建成功', data=export_job_result)
+
+    # 通过服务端游标逐批读取全量数据
+    login_log_query_result = LoginLogService.stream_login_log_list_services(login_log_page_query)
+    login_log_export_result = await LoginLogService.export_login_log_list_services(
+        login_log_query_result, export_format
     )
-    login_log_export_result = await LoginLogService.export_login_log_list_services(login_log_query_result)
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(login_log_export_result))
+    return ResponseUtil.streaming(data=login_log_export_result, media_type=ExportUtil.get_media_type(export_format))
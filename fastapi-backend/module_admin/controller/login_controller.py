@@ -5,16 +5,18 @@ from fastapi import APIRouter, Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from config.enums import BusinessType, RedisInitKeyConfig
-from config.env import AppConfig, JwtConfig
+from config.env import JwtConfig
 from config.get_db import get_db
 from module_admin.annotation.log_annotation import Log
 from module_admin.entity.vo.common_vo import CrudResponseModel
 from module_admin.entity.vo.login_vo import UserLogin, UserRegister, SmsCode, Token
 from module_admin.entity.vo.user_vo import CurrentUserModel, EditUserModel, ResetUserModel
 from module_admin.service.login_service import CustomOAuth2PasswordRequestForm, LoginService, oauth2_scheme
+from module_admin.service.online_service import OnlineService
 from module_admin.service.user_service import UserService
 from utils.log_util import logger
 from utils.response_util import ResponseUtil
+from utils.session_util import SessionUtil
 
 
 loginController = APIRouter()
@@ -42,29 +44,19 @@ async def login(
     result = await LoginService.authenticate_user(request, query_db, user)
     access_token_expires = timedelta(minutes=JwtConfig.jwt_expire_minutes)
     session_id = str(uuid.uuid4())
-    access_token = await LoginService.create_access_token(
-        data={
-            'user_id': str(result[0].user_id),
-            'user_name': result[0].user_name,
-            'dept_name': result[1].dept_name if result[1] else None,
-            'session_id': session_id,
-            'login_info': user.login_info,
-        },
-        expires_delta=access_token_expires,
+    token_payload = {
+        'user_id': str(result[0].user_id),
+        'user_name': result[0].user_name,
+        'dept_name': result[1].dept_name if result[1] else None,
+        'session_id': session_id,
+        'login_info': user.login_info,
+    }
+    access_token = await LoginService.create_access_token(data=token_payload, expires_delta=access_token_expires)
+    # 同一账号同一时间只能登录一次时，会话标识为用户id，新登录的令牌会覆盖旧令牌
+    token_id, session_info = OnlineService.get_session_info(token_payload)
+    await SessionUtil.save_session(
+        request.app.state.redis, RedisInitKeyConfig.ACCESS_TOKEN.key, token_id, access_token, session_info
     )
-    if AppConfig.app_same_time_login:
-        await request.app.state.redis.set(
-            f'{RedisInitKeyConfig.ACCESS_TOKEN.key}:{session_id}',
-            access_token,
-            ex=timedelta(minutes=JwtConfig.jwt_redis_expire_minutes),
-        )
-    else:
-        # 此方法可实现同一账号同一时间只能登录一次
-        await request.app.state.redis.set(
-            f'{RedisInitKeyConfig.ACCESS_TOKEN.key}:{result[0].user_id}',
-            access_token,
-            ex=timedelta(minutes=JwtConfig.jwt_redis_expire_minutes),
-        )
     await UserService.edit_user_services(
         query_db, EditUserModel(user_id=result[0].user_id, login_date=datetime.now(), type='status')
     )
@@ -93,7 +85,7 @@ async def get_login_user_routers(
     query_db: AsyncSession = Depends(get_db),
 ):
     logger.info('获取成功')
-    user_routers = await LoginService.get_current_user_routers(current_user.user.user_id, query_db)
+    user_routers = await LoginService.get_current_user_routers(request, query_db, current_user)
 
     return ResponseUtil.success(data=user_routers)
 
@@ -1,5 +1,6 @@
 import os
 from datetime import datetime
+from functools import partial
 from fastapi import APIRouter, Depends, File, Form, Query, Request, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Literal, Optional, Union
@@ -18,6 +19,7 @@ from module_admin.entity.vo.member_vo import (
 )
 
 from module_admin.entity.vo.user_vo import  CurrentUserModel
+from module_admin.service.export_job_service import ExportJobService
 from module_admin.service.login_service import LoginService
 from module_admin.service.member_service import MemberService
 from config.enums import BusinessType
@@ -25,8 +27,9 @@ from utils.common_util import bytes2file_response
 from utils.log_util import logger
 from utils.page_util import PageResponseModel
 from utils.pwd_util import PwdUtil
-from utils.response_util import ResponseUtil
+from utils.response_util import OrjsonResponse, ResponseUtil
 from utils.upload_util import UploadUtil
+from utils.export_util import ExportFormat, ExportUtil
 
 # 初始化 router 实例
 #router = APIRouter(prefix="/member", tags=["Members"])
@@ -51,7 +54,7 @@ async def get_all_members(
     )
     logger.info('获取成功')
 
-    return ResponseUtil.success(model_content=member_page_query_result)
+    return ResponseUtil.success(model_content=member_page_query_result, response_class=OrjsonResponse)
     #return await MemberService.get_all_members(db)
 
 #新增会员
@@ -70,7 +73,7 @@ async def add_member(
     :param current_user: 当前登陆用户
     :return: 成员列表
     """
-    add_member.password = PwdUtil.get_password_hash(add_member.password)
+    add_member.password = await PwdUtil.get_password_hash_async(add_member.password)
     add_member.create_by = current_user.user.user_name
     add_member.create_at = datetime.now()
     add_member.update_by = current_user.user.user_name
@@ -149,7 +152,7 @@ async def reset_member_pwd(
 
     edit_member = EditMemberModel(
         member_id=reset_member.member_id,
-        password=PwdUtil.get_password_hash(reset_member.password),
+        password=await PwdUtil.get_password_hash_async(reset_member.password),
         update_by=current_user.user.user_name,
         update_time=datetime.now(),
         type='pwd',
@@ -190,16 +193,31 @@ async def export_member_template(request: Request, query_db: AsyncSession = Depe
 async def export_member_list(
     request: Request,
     member_page_query: MemberPageQueryModel = Form(),
+    export_format: ExportFormat = Query(default='xlsx', alias='exportFormat'),
+    background: bool = Query(default=False),
     query_db: AsyncSession = Depends(get_db),
+    current_user: CurrentUserModel = Depends(LoginService.get_current_user),
 ):
-    # 获取全量数据
-    member_query_result = await MemberService.get_member_list_services(
-        query_db, member_page_query, is_page=False
-    )
-    member_export_result = await MemberService.export_member_list_services(member_query_result)
+    if background:
+        # 后台导出任务使用独立的会话读取数据，请求立即返回任务信息，由前端轮询任务状态后下载导出文件
+        export_job_result = await ExportJobService.create_export_job_services(
+            request,
+            '会员管理',
+            MemberService.stream_member_list_services(member_page_query),
+            partial(MemberService.export_member_list_services, export_format=export_format),
+            export_format,
+            current_user.user.user_id,
+        )
+        logger.info('导出任务创建成功')
+
+        return ResponseUtil.success(msg='导出任务创建成功', data=export_job_result)
+
+    # 通过服务端游标逐批读取全量数据
+    member_query_result = MemberService.stream_member_list_services(member_page_query)
+    member_export_result = await MemberService.export_member_list_services(member_query_result, export_format)
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(member_export_result))
+    return ResponseUtil.streaming(data=member_export_result, media_type=ExportUtil.get_media_type(export_format))
 
 #获取会员信息
 @memberController.get(
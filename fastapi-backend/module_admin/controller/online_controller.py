@@ -8,7 +8,7 @@ from module_admin.entity.vo.online_vo import DeleteOnlineModel, OnlinePageQueryM
 from module_admin.service.login_service import LoginService
 from module_admin.service.online_service import OnlineService
 from utils.log_util import logger
-from utils.page_util import PageResponseModel, PageUtil
+from utils.page_util import PageResponseModel
 from utils.response_util import ResponseUtil
 
 
@@ -34,13 +34,8 @@ async def get_monitor_online_list(request: Request, online_page_query: OnlineQue
     dependencies=[Depends(CheckUserInterfaceAuth('monitor:online:list'))],
 )
 async def get_monitor_online_page_list(request: Request, online_page_query: OnlinePageQueryModel = Query()):
-    online_query = OnlineQueryModel(**online_page_query.model_dump(by_alias=True))
-    # 获取全量数据
-    online_query_result = await OnlineService.get_online_list_services(request, online_query)
     # 获取分页数据
-    online_page_query_result = PageUtil.get_page_obj(
-        online_query_result, online_page_query.page_num, online_page_query.page_size
-    )
+    online_page_query_result = await OnlineService.get_online_list_services(request, online_page_query, is_page=True)
     logger.info('获取成功')
 
     return ResponseUtil.success(model_content=online_page_query_result)
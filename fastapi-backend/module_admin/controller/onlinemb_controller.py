@@ -8,7 +8,7 @@ from module_admin.entity.vo.onlinemb_vo import DeleteOnlinembModel, OnlinembPage
 from module_admin.service.login_service import LoginService
 from module_admin.service.onlinemb_service import OnlinembService
 from utils.log_util import logger
-from utils.page_util import PageResponseModel, PageUtil
+from utils.page_util import PageResponseModel
 from utils.response_util import ResponseUtil
 
 
@@ -34,12 +34,9 @@ async def get_monitor_onlinemb_list(request: Request, online_page_query: Onlinem
     dependencies=[Depends(CheckUserInterfaceAuth('member:online:list'))],
 )
 async def get_monitor_onlinemb_page_list(request: Request, online_page_query: OnlinembPageQueryModel = Query()):
-    online_query = OnlinembQueryModel(**online_page_query.model_dump(by_alias=True))
-    # 获取全量数据
-    online_query_result = await OnlinembService.get_onlinemb_list_services(request, online_query)
     # 获取分页数据
-    online_page_query_result = PageUtil.get_page_obj(
-        online_query_result, online_page_query.page_num, online_page_query.page_size
+    online_page_query_result = await OnlinembService.get_onlinemb_list_services(
+        request, online_page_query, is_page=True
     )
     logger.info('获取成功')
 
@@ -10,10 +10,10 @@ from module_admin.service.login_service import LoginService
 from module_admin.service.post_service import PostService
 from module_admin.entity.vo.post_vo import DeletePostModel, PostModel, PostPageQueryModel
 from module_admin.entity.vo.user_vo import CurrentUserModel
-from utils.common_util import bytes2file_response
 from utils.log_util import logger
 from utils.page_util import PageResponseModel
 from utils.response_util import ResponseUtil
+from utils.export_util import ExportFormat, ExportUtil
 
 
 postController = APIRouter(prefix='/system/post', dependencies=[Depends(LoginService.get_current_user)])
@@ -95,11 +95,12 @@ async def query_detail_system_post(request: Request, post_id: int, query_db: Asy
 async def export_system_post_list(
     request: Request,
     post_page_query: PostPageQueryModel = Form(),
+    export_format: ExportFormat = Query(default='xlsx', alias='exportFormat'),
     query_db: AsyncSession = Depends(get_db),
 ):
     # 获取全量数据
     post_query_result = await PostService.get_post_list_services(query_db, post_page_query, is_page=False)
-    post_export_result = await PostService.export_post_list_services(post_query_result)
+    post_export_result = await PostService.export_post_list_services(post_query_result, export_format)
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(post_export_result))
+    return ResponseUtil.streaming(data=post_export_result, media_type=ExportUtil.get_media_type(export_format))
@@ -1,23 +1,23 @@
 from datetime import datetime
 from fastapi import APIRouter, Depends, Form, Query, Request
 from pydantic_validation_decorator import ValidateFields
+from sqlalchemy import ColumnElement
 from sqlalchemy.ext.asyncio import AsyncSession
 from config.enums import BusinessType
 from config.get_db import get_db
 from module_admin.annotation.log_annotation import Log
 from module_admin.aspect.data_scope import GetDataScope
 from module_admin.aspect.interface_auth import CheckUserInterfaceAuth
-from module_admin.entity.vo.dept_vo import DeptModel
 from module_admin.entity.vo.role_vo import AddRoleModel, DeleteRoleModel, RoleModel, RolePageQueryModel
 from module_admin.entity.vo.user_vo import CrudUserRoleModel, CurrentUserModel, UserRolePageQueryModel
 from module_admin.service.dept_service import DeptService
 from module_admin.service.login_service import LoginService
 from module_admin.service.role_service import RoleService
 from module_admin.service.user_service import UserService
-from utils.common_util import bytes2file_response
 from utils.log_util import logger
 from utils.page_util import PageResponseModel
 from utils.response_util import ResponseUtil
+from utils.export_util import ExportFormat, ExportUtil
 
 
 roleController = APIRouter(prefix='/system/role', dependencies=[Depends(LoginService.get_current_user)])
@@ -28,9 +28,9 @@ async def get_system_role_dept_tree(
     request: Request,
     role_id: int,
     query_db: AsyncSession = Depends(get_db),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    current_user: CurrentUserModel = Depends(LoginService.get_current_user),
 ):
-    dept_query_result = await DeptService.get_dept_tree_services(query_db, DeptModel(**{}), data_scope_sql)
+    dept_query_result = await DeptService.get_dept_tree_services(request, query_db, current_user)
     role_dept_query_result = await RoleService.get_role_dept_tree_services(query_db, role_id)
     role_dept_query_result.depts = dept_query_result
     logger.info('获取成功')
@@ -45,10 +45,10 @@ async def get_system_role_list(
     request: Request,
     role_page_query: RolePageQueryModel = Query(),
     query_db: AsyncSession = Depends(get_db),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_filter: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     role_page_query_result = await RoleService.get_role_list_services(
-        query_db, role_page_query, data_scope_sql, is_page=True
+        query_db, role_page_query, data_scope_filter, is_page=True
     )
     logger.info('获取成功')
 
@@ -68,7 +68,7 @@ async def add_system_role(
     add_role.create_time = datetime.now()
     add_role.update_by = current_user.user.user_name
     add_role.update_time = datetime.now()
-    add_role_result = await RoleService.add_role_services(query_db, add_role)
+    add_role_result = await RoleService.add_role_services(request, query_db, add_role)
     logger.info(add_role_result.message)
 
     return ResponseUtil.success(msg=add_role_result.message)
@@ -82,14 +82,14 @@ async def edit_system_role(
     edit_role: AddRoleModel,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_filter: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     await RoleService.check_role_allowed_services(edit_role)
     if not current_user.user.admin:
-        await RoleService.check_role_data_scope_services(query_db, str(edit_role.role_id), data_scope_sql)
+        await RoleService.check_role_data_scope_services(query_db, str(edit_role.role_id), data_scope_filter)
     edit_role.update_by = current_user.user.user_name
     edit_role.update_time = datetime.now()
-    edit_role_result = await RoleService.edit_role_services(query_db, edit_role)
+    edit_role_result = await RoleService.edit_role_services(request, query_db, edit_role)
     logger.info(edit_role_result.message)
 
     return ResponseUtil.success(msg=edit_role_result.message)
@@ -102,11 +102,11 @@ async def edit_system_role_datascope(
     role_data_scope: AddRoleModel,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_filter: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     await RoleService.check_role_allowed_services(role_data_scope)
     if not current_user.user.admin:
-        await RoleService.check_role_data_scope_services(query_db, str(role_data_scope.role_id), data_scope_sql)
+        await RoleService.check_role_data_scope_services(query_db, str(role_data_scope.role_id), data_scope_filter)
     edit_role = AddRoleModel(
         role_id=role_data_scope.role_id,
         data_scope=role_data_scope.data_scope,
@@ -115,7 +115,7 @@ async def edit_system_role_datascope(
         update_by=current_user.user.user_name,
         update_time=datetime.now(),
     )
-    role_data_scope_result = await RoleService.role_datascope_services(query_db, edit_role)
+    role_data_scope_result = await RoleService.role_datascope_services(request, query_db, edit_role)
     logger.info(role_data_scope_result.message)
 
     return ResponseUtil.success(msg=role_data_scope_result.message)
@@ -128,16 +128,16 @@ async def delete_system_role(
     role_ids: str,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_filter: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     role_id_list = role_ids.split(',') if role_ids else []
     if role_id_list:
         for role_id in role_id_list:
             await RoleService.check_role_allowed_services(RoleModel(role_id=int(role_id)))
             if not current_user.user.admin:
-                await RoleService.check_role_data_scope_services(query_db, role_id, data_scope_sql)
+                await RoleService.check_role_data_scope_services(query_db, role_id, data_scope_filter)
     delete_role = DeleteRoleModel(role_ids=role_ids, update_by=current_user.user.user_name, update_time=datetime.now())
-    delete_role_result = await RoleService.delete_role_services(query_db, delete_role)
+    delete_role_result = await RoleService.delete_role_services(request, query_db, delete_role)
     logger.info(delete_role_result.message)
 
     return ResponseUtil.success(msg=delete_role_result.message)
@@ -151,10 +151,10 @@ async def query_detail_system_role(
     role_id: int,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_filter: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     if not current_user.user.admin:
-        await RoleService.check_role_data_scope_services(query_db, str(role_id), data_scope_sql)
+        await RoleService.check_role_data_scope_services(query_db, str(role_id), data_scope_filter)
     role_detail_result = await RoleService.role_detail_services(query_db, role_id)
     logger.info(f'获取role_id为{role_id}的信息成功')
 
@@ -166,17 +166,18 @@ async def query_detail_system_role(
 async def export_system_role_list(
     request: Request,
     role_page_query: RolePageQueryModel = Form(),
+    export_format: ExportFormat = Query(default='xlsx', alias='exportFormat'),
     query_db: AsyncSession = Depends(get_db),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_filter: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     # 获取全量数据
     role_query_result = await RoleService.get_role_list_services(
-        query_db, role_page_query, data_scope_sql, is_page=False
+        query_db, role_page_query, data_scope_filter, is_page=False
     )
-    role_export_result = await RoleService.export_role_list_services(role_query_result)
+    role_export_result = await RoleService.export_role_list_services(role_query_result, export_format)
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(role_export_result))
+    return ResponseUtil.streaming(data=role_export_result, media_type=ExportUtil.get_media_type(export_format))
 
 
 @roleController.put('/changeStatus', dependencies=[Depends(CheckUserInterfaceAuth('system:role:edit'))])
@@ -186,11 +187,11 @@ async def reset_system_role_status(
     change_role: AddRoleModel,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_filter: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     await RoleService.check_role_allowed_services(change_role)
     if not current_user.user.admin:
-        await RoleService.check_role_data_scope_services(query_db, str(change_role.role_id), data_scope_sql)
+        await RoleService.check_role_data_scope_services(query_db, str(change_role.role_id), data_scope_filter)
     edit_role = AddRoleModel(
         role_id=change_role.role_id,
         status=change_role.status,
@@ -198,7 +199,7 @@ async def reset_system_role_status(
         update_time=datetime.now(),
         type='status',
     )
-    edit_role_result = await RoleService.edit_role_services(query_db, edit_role)
+    edit_role_result = await RoleService.edit_role_services(request, query_db, edit_role)
     logger.info(edit_role_result.message)
 
     return ResponseUtil.success(msg=edit_role_result.message)
@@ -213,10 +214,10 @@ async def get_system_allocated_user_list(
     request: Request,
     user_role: UserRolePageQueryModel = Query(),
     query_db: AsyncSession = Depends(get_db),
-    data_scope_sql: str = Depends(GetDataScope('SysUser')),
+    data_scope_filter: ColumnElement = Depends(GetDataScope('SysUser')),
 ):
     role_user_allocated_page_query_result = await RoleService.get_role_user_allocated_list_services(
-        query_db, user_role, data_scope_sql, is_page=True
+        query_db, user_role, data_scope_filter, is_page=True
     )
     logger.info('获取成功')
 
@@ -232,10 +233,10 @@ async def get_system_unallocated_user_list(
     request: Request,
     user_role: UserRolePageQueryModel = Query(),
     query_db: AsyncSession = Depends(get_db),
-    data_scope_sql: str = Depends(GetDataScope('SysUser')),
+    data_scope_filter: ColumnElement = Depends(GetDataScope('SysUser')),
 ):
     role_user_unallocated_page_query_result = await RoleService.get_role_user_unallocated_list_services(
-        query_db, user_role, data_scope_sql, is_page=True
+        query_db, user_role, data_scope_filter, is_page=True
     )
     logger.info('获取成功')
 
@@ -249,10 +250,10 @@ async def add_system_role_user(
     add_role_user: CrudUserRoleModel = Query(),
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_filter: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     if not current_user.user.admin:
-        await RoleService.check_role_data_scope_services(query_db, str(add_role_user.role_id), data_scope_sql)
+        await RoleService.check_role_data_scope_services(query_db, str(add_role_user.role_id), data_scope_filter)
     add_role_user_result = await UserService.add_user_role_services(query_db, add_role_user)
     logger.info(add_role_user_result.message)
 
@@ -12,11 +12,11 @@ from module_admin.service.login_service import LoginService
 from module_admin.service.tags_service import TagsService
 from module_admin.entity.vo.tags_vo import DeleteTagsModel, TagsModel, TagsPageQueryModel
 from module_admin.entity.vo.user_vo import CurrentUserModel
-from utils.common_util import bytes2file_response
 from utils.log_util import logger
 from utils.page_util import PageResponseModel
 from utils.response_util import ResponseUtil
 from utils.upload_util import UploadUtil
+from utils.export_util import ExportFormat, ExportUtil
 from config.env import UploadConfig
 
 
@@ -99,14 +99,15 @@ async def query_detail_tags(request: Request, tags_id: int, query_db: AsyncSessi
 async def export_tags_list(
     request: Request,
     tags_page_query: TagsPageQueryModel = Form(),
+    export_format: ExportFormat = Query(default='xlsx', alias='exportFormat'),
     query_db: AsyncSession = Depends(get_db),
 ):
     # 获取全量数据
     tags_query_result = await TagsService.get_tags_list_services(query_db, tags_page_query, is_page=False)
-    tags_export_result = await TagsService.export_tags_list_services(tags_query_result)
+    tags_export_result = await TagsService.export_tags_list_services(tags_query_result, export_format)
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(tags_export_result))
+    return ResponseUtil.streaming(data=tags_export_result, media_type=ExportUtil.get_media_type(export_format))
 
 
 #更新图标
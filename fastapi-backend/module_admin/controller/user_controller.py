@@ -1,6 +1,8 @@
 import os
 from datetime import datetime
+from functools import partial
 from fastapi import APIRouter, Depends, File, Form, Query, Request, UploadFile
+from sqlalchemy import ColumnElement
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Literal, Optional, Union
 from pydantic_validation_decorator import ValidateFields
@@ -9,7 +11,6 @@ from config.env import UploadConfig
 from module_admin.annotation.log_annotation import Log
 from module_admin.aspect.data_scope import GetDataScope
 from module_admin.aspect.interface_auth import CheckUserInterfaceAuth
-from module_admin.entity.vo.dept_vo import DeptModel
 from module_admin.entity.vo.user_vo import (
     AddUserModel,
     CrudUserRoleModel,
@@ -26,6 +27,7 @@ from module_admin.entity.vo.user_vo import (
     UserRoleQueryModel,
     UserRoleResponseModel,
 )
+from module_admin.service.export_job_service import ExportJobService
 from module_admin.service.login_service import LoginService
 from module_admin.service.user_service import UserService
 from module_admin.service.role_service import RoleService
@@ -35,8 +37,9 @@ from utils.common_util import bytes2file_response
 from utils.log_util import logger
 from utils.page_util import PageResponseModel
 from utils.pwd_util import PwdUtil
-from utils.response_util import ResponseUtil
+from utils.response_util import OrjsonResponse, ResponseUtil
 from utils.upload_util import UploadUtil
+from utils.export_util import ExportFormat, ExportUtil
 
 
 userController = APIRouter(prefix='/system/user', dependencies=[Depends(LoginService.get_current_user)])
@@ -44,9 +47,11 @@ userController = APIRouter(prefix='/system/user', dependencies=[Depends(LoginSer
 
 @userController.get('/deptTree', dependencies=[Depends(CheckUserInterfaceAuth('system:user:list'))])
 async def get_system_dept_tree(
-    request: Request, query_db: AsyncSession = Depends(get_db), data_scope_sql: str = Depends(GetDataScope('SysDept'))
+    request: Request,
+    query_db: AsyncSession = Depends(get_db),
+    current_user: CurrentUserModel = Depends(LoginService.get_current_user),
 ):
-    dept_query_result = await DeptService.get_dept_tree_services(query_db, DeptModel(**{}), data_scope_sql)
+    dept_query_result = await DeptService.get_dept_tree_services(request, query_db, current_user)
     logger.info('获取成功')
 
     return ResponseUtil.success(data=dept_query_result)
@@ -59,15 +64,15 @@ async def get_system_user_list(
     request: Request,
     user_page_query: UserPageQueryModel = Query(),
     query_db: AsyncSession = Depends(get_db),
-    data_scope_sql: str = Depends(GetDataScope('SysUser')),
+    data_scope_filter: ColumnElement = Depends(GetDataScope('SysUser')),
 ):
     # 获取分页数据
     user_page_query_result = await UserService.get_user_list_services(
-        query_db, user_page_query, data_scope_sql, is_page=True
+        query_db, user_page_query, data_scope_filter, is_page=True
     )
     logger.info('获取成功')
 
-    return ResponseUtil.success(model_content=user_page_query_result)
+    return ResponseUtil.success(model_content=user_page_query_result, response_class=OrjsonResponse)
 
 
 @userController.post('', dependencies=[Depends(CheckUserInterfaceAuth('system:user:add'))])
@@ -78,15 +83,15 @@ async def add_system_user(
     add_user: AddUserModel,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    dept_data_scope_sql: str = Depends(GetDataScope('SysDept')),
-    role_data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    dept_data_scope_filter: ColumnElement = Depends(GetDataScope('SysDept')),
+    role_data_scope_filter: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     if not current_user.user.admin:
-        await DeptService.check_dept_data_scope_services(query_db, add_user.dept_id, dept_data_scope_sql)
+        await DeptService.check_dept_data_scope_services(query_db, add_user.dept_id, dept_data_scope_filter)
         await RoleService.check_role_data_scope_services(
-            query_db, ','.join([str(item) for item in add_user.role_ids]), role_data_scope_sql
+            query_db, ','.join([str(item) for item in add_user.role_ids]), role_data_scope_filter
         )
-    add_user.password = PwdUtil.get_password_hash(add_user.password)
+    add_user.password = await PwdUtil.get_password_hash_async(add_user.password)
     add_user.create_by = current_user.user.user_name
     add_user.create_time = datetime.now()
     add_user.update_by = current_user.user.user_name
@@ -105,16 +110,16 @@ async def edit_system_user(
     edit_user: EditUserModel,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    user_data_scope_sql: str = Depends(GetDataScope('SysUser')),
-    dept_data_scope_sql: str = Depends(GetDataScope('SysDept')),
-    role_data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    user_data_scope_filter: ColumnElement = Depends(GetDataScope('SysUser')),
+    dept_data_scope_filter: ColumnElement = Depends(GetDataScope('SysDept')),
+    role_data_scope_filter: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     await UserService.check_user_allowed_services(edit_user)
     if not current_user.user.admin:
-        await UserService.check_user_data_scope_services(query_db, edit_user.user_id, user_data_scope_sql)
-        await DeptService.check_dept_data_scope_services(query_db, edit_user.dept_id, dept_data_scope_sql)
+        await UserService.check_user_data_scope_services(query_db, edit_user.user_id, user_data_scope_filter)
+        await DeptService.check_dept_data_scope_services(query_db, edit_user.dept_id, dept_data_scope_filter)
         await RoleService.check_role_data_scope_services(
-            query_db, ','.join([str(item) for item in edit_user.role_ids]), role_data_scope_sql
+            query_db, ','.join([str(item) for item in edit_user.role_ids]), role_data_scope_filter
         )
     edit_user.update_by = current_user.user.user_name
     edit_user.update_time = datetime.now()
@@ -131,7 +136,7 @@ async def delete_system_user(
     user_ids: str,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysUser')),
+    data_scope_filter: ColumnElement = Depends(GetDataScope('SysUser')),
 ):
     user_id_list = user_ids.split(',') if user_ids else []
     if user_id_list:
@@ -142,7 +147,7 @@ async def delete_system_user(
         for user_id in user_id_list:
             await UserService.check_user_allowed_services(UserModel(user_id=int(user_id)))
             if not current_user.user.admin:
-                await UserService.check_user_data_scope_services(query_db, int(user_id), data_scope_sql)
+                await UserService.check_user_data_scope_services(query_db, int(user_id), data_scope_filter)
     delete_user = DeleteUserModel(user_ids=user_ids, update_by=current_user.user.user_name, update_time=datetime.now())
     delete_user_result = await UserService.delete_user_services(query_db, delete_user)
     logger.info(delete_user_result.message)
@@ -157,14 +162,14 @@ async def reset_system_user_pwd(
     reset_user: EditUserModel,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysUser')),
+    data_scope_filter: ColumnElement = Depends(GetDataScope('SysUser')),
 ):
     await UserService.check_user_allowed_services(reset_user)
     if not current_user.user.admin:
-        await UserService.check_user_data_scope_services(query_db, reset_user.user_id, data_scope_sql)
+        await UserService.check_user_data_scope_services(query_db, reset_user.user_id, data_scope_filter)
     edit_user = EditUserModel(
         user_id=reset_user.user_id,
-        password=PwdUtil.get_password_hash(reset_user.password),
+        password=await PwdUtil.get_password_hash_async(reset_user.password),
         update_by=current_user.user.user_name,
         update_time=datetime.now(),
         type='pwd',
@@ -182,11 +187,11 @@ async def change_system_user_status(
     change_user: EditUserModel,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysUser')),
+    data_scope_filter: ColumnElement = Depends(GetDataScope('SysUser')),
 ):
     await UserService.check_user_allowed_services(change_user)
     if not current_user.user.admin:
-        await UserService.check_user_data_scope_services(query_db, change_user.user_id, data_scope_sql)
+        await UserService.check_user_data_scope_services(query_db, change_user.user_id, data_scope_filter)
     edit_user = EditUserModel(
         user_id=change_user.user_id,
         status=change_user.status,
@@ -223,10 +228,10 @@ async def query_detail_system_user(
     user_id: Optional[Union[int, Literal['']]] = '',
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysUser')),
+    data_scope_filter: ColumnElement = Depends(GetDataScope('SysUser')),
 ):
     if user_id and not current_user.user.admin:
-        await UserService.check_user_data_scope_services(query_db, user_id, data_scope_sql)
+        await UserService.check_user_data_scope_services(query_db, user_id, data_scope_filter)
     detail_user_result = await UserService.user_detail_services(query_db, user_id)
     logger.info(f'获取user_id为{user_id}的信息成功')
 
@@ -321,11 +326,11 @@ async def batch_import_system_user(
     update_support: bool = Query(),
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    user_data_scope_sql: str = Depends(GetDataScope('SysUser')),
-    dept_data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    user_data_scope_filter: ColumnElement = Depends(GetDataScope('SysUser')),
+    dept_data_scope_filter: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     batch_import_result = await UserService.batch_import_user_services(
-        request, query_db, file, update_support, current_user, user_data_scope_sql, dept_data_scope_sql
+        request, query_db, file, update_support, current_user, user_data_scope_filter, dept_data_scope_filter
     )
     logger.info(batch_import_result.message)
 
@@ -345,17 +350,34 @@ async def export_system_user_template(request: Request, query_db: AsyncSession =
 async def export_system_user_list(
     request: Request,
     user_page_query: UserPageQueryModel = Form(),
+    export_format: ExportFormat = Query(default='xlsx', alias='exportFormat'),
+    background: bool = Query(default=False),
     query_db: AsyncSession = Depends(get_db),
-    data_scope_sql: str = Depends(GetDataScope('SysUser')),
+    current_user: CurrentUserModel = Depends(LoginService.get_current_user),
+    data_scope_filter: ColumnElement = Depends(GetDataScope('SysUser')),
 ):
+    if background:
+        # 后台导出任务使用独立的会话读取数据，请求立即返回任务信息，由前端轮询任务状态后下载导出文件
+        export_job_result = await ExportJobService.create_export_job_services(
+            request,
+            '用户管理',
+            UserService.stream_user_list_services(user_page_query, data_scope_filter),
+            partial(UserService.export_user_list_services, export_format=export_format),
+            export_format,
+            current_user.user.user_id,
+        )
+        logger.info('导出任务创建成功')
+
+        return ResponseUtil.success(msg='导出任务创建成功', data=export_job_result)
+
     # 获取全量数据
     user_query_result = await UserService.get_user_list_services(
-        query_db, user_page_query, data_scope_sql, is_page=False
+        query_db, user_page_query, data_scope_filter, is_page=False
     )
-    user_export_result = await UserService.export_user_list_services(user_query_result)
+    user_export_result = await UserService.export_user_list_services(user_query_result, export_format)
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(user_export_result))
+    return ResponseUtil.streaming(data=user_export_result, media_type=ExportUtil.get_media_type(export_format))
 
 
 @userController.get(
@@ -385,12 +407,12 @@ async def update_system_role_user(
     role_ids: str = Query(),
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    user_data_scope_sql: str = Depends(GetDataScope('SysUser')),
-    role_data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    user_data_scope_filter: ColumnElement = Depends(GetDataScope('SysUser')),
+    role_data_scope_filter: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     if not current_user.user.admin:
-        await UserService.check_user_data_scope_services(query_db, user_id, user_data_scope_sql)
-        await RoleService.check_role_data_scope_services(query_db, role_ids, role_data_scope_sql)
+        await UserService.check_user_data_scope_services(query_db, user_id, user_data_scope_filter)
+        await RoleService.check_role_data_scope_services(query_db, role_ids, role_data_scope_filter)
     add_user_role_result = await UserService.add_user_role_services(
         query_db, CrudUserRoleModel(user_id=user_id, role_ids=role_ids)
     )
@@ -1,11 +1,13 @@
-from sqlalchemy import bindparam, func, or_, select, update  # noqa: F401
+from sqlalchemy import ColumnElement, delete, func, insert, literal, or_, select, true, update  # noqa: F401
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.util import immutabledict
-from typing import List
-from module_admin.entity.do.dept_do import SysDept
+from sqlalchemy.orm import aliased
+from typing import List, Set
+from config.env import DataBaseConfig
+from module_admin.entity.do.dept_do import SysDept, SysDeptClosure
 from module_admin.entity.do.role_do import SysRoleDept  # noqa: F401
 from module_admin.entity.do.user_do import SysUser
 from module_admin.entity.vo.dept_vo import DeptModel
+from utils.import_util import ImportUtil
 
 
 class DeptDao:
@@ -68,13 +70,15 @@ class DeptDao:
         return dept_info
 
     @classmethod
-    async def get_dept_info_for_edit_option(cls, db: AsyncSession, dept_info: DeptModel, data_scope_sql: str):
+    async def get_dept_info_for_edit_option(
+        cls, db: AsyncSession, dept_info: DeptModel, data_scope_filter: ColumnElement
+    ):
         """
         获取部门编辑对应的在用部门列表信息
 
         :param db: orm对象
         :param dept_info: 部门对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_filter: 数据权限对应的查询条件
         :return: 部门列表信息
         """
         dept_result = (
@@ -84,11 +88,11 @@ class DeptDao:
                     .where(
                         SysDept.dept_id != dept_info.dept_id,
                         ~SysDept.dept_id.in_(
-                            select(SysDept.dept_id).where(func.find_in_set(dept_info.dept_id, SysDept.ancestors))
+                            select(SysDeptClosure.descendant_id).where(SysDeptClosure.ancestor_id == dept_info.dept_id)
                         ),
                         SysDept.del_flag == '0',
                         SysDept.status == '0',
-                        eval(data_scope_sql),
+                        data_scope_filter,
                     )
                     .order_by(SysDept.order_num)
                     .distinct()
@@ -101,39 +105,43 @@ class DeptDao:
         return dept_result
 
     @classmethod
-    async def get_children_dept_dao(cls, db: AsyncSession, dept_id: int):
+    async def get_dept_list_for_tree(cls, db: AsyncSession):
         """
-        根据部门id查询当前部门的子部门列表信息
+        获取全部部门的树节点信息，包含停用及已删除的部门，以便按部门层级计算数据权限
 
         :param db: orm对象
-        :param dept_id: 部门id
-        :return: 子部门信息列表
+        :return: 按显示顺序排列的部门id、上级部门id、部门名称、部门状态及删除标志列表
         """
         dept_result = (
-            (await db.execute(select(SysDept).where(func.find_in_set(dept_id, SysDept.ancestors)))).scalars().all()
-        )
+            await db.execute(
+                select(
+                    SysDept.dept_id, SysDept.parent_id, SysDept.dept_name, SysDept.status, SysDept.del_flag
+                ).order_by(SysDept.order_num, SysDept.dept_id)
+            )
+        ).all()
 
         return dept_result
 
     @classmethod
-    async def get_dept_list_for_tree(cls, db: AsyncSession, dept_info: DeptModel, data_scope_sql: str):
+    async def get_dept_list(cls, db: AsyncSession, page_object: DeptModel, data_scope_filter: ColumnElement):
         """
-        获取所有在用部门列表信息
+        根据查询参数获取部门列表信息
 
         :param db: orm对象
-        :param dept_info: 部门对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
-        :return: 在用部门列表信息
+        :param page_object: 不分页查询参数对象
+        :param data_scope_filter: 数据权限对应的查询条件
+        :return: 部门列表信息对象
         """
         dept_result = (
             (
                 await db.execute(
                     select(SysDept)
                     .where(
-                        SysDept.status == '0',
                         SysDept.del_flag == '0',
-                        SysDept.dept_name.like(f'%{dept_info.dept_name}%') if dept_info.dept_name else True,
-                        eval(data_scope_sql),
+                        SysDept.dept_id == page_object.dept_id if page_object.dept_id is not None else True,
+                        SysDept.status == page_object.status if page_object.status else True,
+                        SysDept.dept_name.like(f'%{page_object.dept_name}%') if page_object.dept_name else True,
+                        data_scope_filter,
                     )
                     .order_by(SysDept.order_num)
                     .distinct()
@@ -146,35 +154,32 @@ class DeptDao:
         return dept_result
 
     @classmethod
-    async def get_dept_list(cls, db: AsyncSession, page_object: DeptModel, data_scope_sql: str):
+    async def get_data_scope_dept_id_set(
+        cls, db: AsyncSession, dept_id_list: List[int], data_scope_filter: ColumnElement
+    ) -> Set[int]:
         """
-        根据查询参数获取部门列表信息
+        分批获取部门id列表中当前用户有数据权限的部门id
 
         :param db: orm对象
-        :param page_object: 不分页查询参数对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
-        :return: 部门列表信息对象
+        :param dept_id_list: 部门id列表
+        :param data_scope_filter: 数据权限对应的查询条件
+        :return: 有数据权限的部门id集合
         """
-        dept_result = (
-            (
-                await db.execute(
-                    select(SysDept)
-                    .where(
-                        SysDept.del_flag == '0',
-                        SysDept.dept_id == page_object.dept_id if page_object.dept_id is not None else True,
-                        SysDept.status == page_object.status if page_object.status else True,
-                        SysDept.dept_name.like(f'%{page_object.dept_name}%') if page_object.dept_name else True,
-                        eval(data_scope_sql),
+        dept_id_set = set()
+        for dept_id_chunk in ImportUtil.chunk(list(set(dept_id_list))):
+            dept_id_set.update(
+                (
+                    await db.execute(
+                        select(SysDept.dept_id)
+                        .where(SysDept.del_flag == '0', SysDept.dept_id.in_(dept_id_chunk), data_scope_filter)
+                        .distinct()
                     )
-                    .order_by(SysDept.order_num)
-                    .distinct()
                 )
+                .scalars()
+                .all()
             )
-            .scalars()
-            .all()
-        )
 
-        return dept_result
+        return dept_id_set
 
     @classmethod
     async def add_dept_dao(cls, db: AsyncSession, dept: DeptModel):
@@ -203,25 +208,154 @@ class DeptDao:
         await db.execute(update(SysDept), [dept])
 
     @classmethod
-    async def update_dept_children_dao(cls, db: AsyncSession, update_dept: List):
+    async def update_dept_children_ancestors_dao(
+        cls, db: AsyncSession, dept_id: int, new_ancestors: str, old_ancestors: str
+    ):
         """
-        更新子部门信息
+        将部门的全部下级部门祖级列表中的旧祖级前缀替换为新祖级前缀
 
         :param db: orm对象
-        :param update_dept: 需要更新的部门列表
+        :param dept_id: 部门id
+        :param new_ancestors: 新的祖级列表
+        :param old_ancestors: 旧的祖级列表
         :return:
         """
         await db.execute(
             update(SysDept)
-            .where(SysDept.dept_id == bindparam('dept_id'))
-            .values(
-                {
-                    'dept_id': bindparam('dept_id'),
-                    'ancestors': bindparam('ancestors'),
-                }
-            ),
-            update_dept,
-            execution_options=immutabledict({'synchronize_session': None}),
+            .where(
+                SysDept.dept_id.in_(
+                    select(SysDeptClosure.descendant_id).where(
+                        SysDeptClosure.ancestor_id == dept_id, SysDeptClosure.depth > 0
+                    )
+                )
+            )
+            .values(ancestors=literal(new_ancestors).concat(func.substr(SysDept.ancestors, len(old_ancestors) + 1)))
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    async def add_dept_closure_dao(cls, db: AsyncSession, dept_id: int, parent_id: int):
+        """
+        新增部门闭包关系数据库操作，新部门继承上级部门的全部祖先关系并加入自身关系
+
+        :param db: orm对象
+        :param dept_id: 新增的部门id
+        :param parent_id: 上级部门id
+        :return:
+        """
+        await db.execute(
+            insert(SysDeptClosure).from_select(
+                ['ancestor_id', 'descendant_id', 'depth'],
+                select(SysDeptClosure.ancestor_id, literal(dept_id), SysDeptClosure.depth + 1).where(
+                    SysDeptClosure.descendant_id == parent_id
+                ),
+            )
+        )
+        await db.execute(insert(SysDeptClosure).values(ancestor_id=dept_id, descendant_id=dept_id, depth=0))
+
+    @classmethod
+    async def move_dept_closure_dao(cls, db: AsyncSession, dept_id: int, parent_id: int):
+        """
+        调整部门上级部门时更新闭包关系数据库操作，先删除子树与原祖先部门的关系，再将子树与新上级部门的全部祖先关系批量关联
+
+        :param db: orm对象
+        :param dept_id: 调整的部门id
+        :param parent_id: 新的上级部门id
+        :return:
+        """
+        subtree = aliased(SysDeptClosure)
+        super_tree = aliased(SysDeptClosure)
+        if DataBaseConfig.db_type == 'postgresql':
+            await db.execute(
+                delete(SysDeptClosure).where(
+                    SysDeptClosure.descendant_id.in_(
+                        select(subtree.descendant_id).where(subtree.ancestor_id == dept_id)
+                    ),
+                    SysDeptClosure.ancestor_id.in_(
+                        select(super_tree.ancestor_id).where(super_tree.descendant_id == dept_id, super_tree.depth > 0)
+                    ),
+                )
+            )
+        else:
+            # mysql不允许在删除语句的子查询中引用被删除的表，使用多表删除语法自关联
+            await db.execute(
+                delete(SysDeptClosure).where(
+                    SysDeptClosure.descendant_id == subtree.descendant_id,
+                    SysDeptClosure.ancestor_id == super_tree.ancestor_id,
+                    subtree.ancestor_id == dept_id,
+                    super_tree.descendant_id == dept_id,
+                    super_tree.depth > 0,
+                )
+            )
+        await db.execute(
+            insert(SysDeptClosure).from_select(
+                ['ancestor_id', 'descendant_id', 'depth'],
+                select(super_tree.ancestor_id, subtree.descendant_id, super_tree.depth + subtree.depth + 1)
+                .join(subtree, true())
+                .where(super_tree.descendant_id == parent_id, subtree.ancestor_id == dept_id),
+            )
+        )
+
+    @classmethod
+    async def check_dept_descendant_dao(cls, db: AsyncSession, dept_id: int, descendant_id: int) -> bool:
+        """
+        校验部门是否为另一部门自身或其下级部门
+
+        :param db: orm对象
+        :param dept_id: 部门id
+        :param descendant_id: 需要校验的部门id
+        :return: 校验结果
+        """
+        closure = (
+            await db.execute(
+                select(SysDeptClosure.depth).where(
+                    SysDeptClosure.ancestor_id == dept_id, SysDeptClosure.descendant_id == descendant_id
+                )
+            )
+        ).first()
+
+        return closure is not None
+
+    @classmethod
+    async def count_dept_without_closure_dao(cls, db: AsyncSession) -> int:
+        """
+        统计闭包表中缺少自身关系的部门数量
+
+        :param db: orm对象
+        :return: 缺少自身关系的部门数量
+        """
+        without_closure_count = (
+            await db.execute(
+                select(func.count('*'))
+                .select_from(SysDept)
+                .where(~SysDept.dept_id.in_(select(SysDeptClosure.descendant_id).where(SysDeptClosure.depth == 0)))
+            )
+        ).scalar()
+
+        return without_closure_count
+
+    @classmethod
+    async def rebuild_dept_closure_dao(cls, db: AsyncSession):
+        """
+        根据部门表的上级部门关系递归重建部门闭包表
+
+        :param db: orm对象
+        :return:
+        """
+        dept_closure = select(
+            SysDept.dept_id.label('ancestor_id'), SysDept.dept_id.label('descendant_id'), literal(0).label('depth')
+        ).cte('dept_closure', recursive=True)
+        dept_closure = dept_closure.union_all(
+            select(dept_closure.c.ancestor_id, SysDept.dept_id, dept_closure.c.depth + 1).where(
+                SysDept.parent_id == dept_closure.c.descendant_id
+            )
+        )
+        await db.execute(delete(SysDeptClosure))
+        await db.execute(
+            insert(SysDeptClosure).from_select(
+                ['ancestor_id', 'descendant_id', 'depth'],
+                select(dept_closure.c.ancestor_id, dept_closure.c.descendant_id, dept_closure.c.depth),
+            )
         )
 
     @classmethod
@@ -263,7 +397,13 @@ class DeptDao:
             await db.execute(
                 select(func.count('*'))
                 .select_from(SysDept)
-                .where(SysDept.status == '0', SysDept.del_flag == '0', func.find_in_set(dept_id, SysDept.ancestors))
+                .join(SysDeptClosure, SysDeptClosure.descendant_id == SysDept.dept_id)
+                .where(
+                    SysDeptClosure.ancestor_id == dept_id,
+                    SysDeptClosure.depth > 0,
+                    SysDept.status == '0',
+                    SysDept.del_flag == '0',
+                )
             )
         ).scalar()
 
@@ -2,9 +2,10 @@ from datetime import datetime, time
 from sqlalchemy import delete, desc, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from typing import AsyncGenerator, List
 from module_admin.entity.do.job_do import SysJobLog
 from module_admin.entity.vo.job_vo import JobLogModel, JobLogPageQueryModel
-from utils.page_util import PageUtil
+from utils.page_util import PageUtil, STREAM_CHUNK_SIZE
 
 
 class JobLogDao:
@@ -22,6 +23,41 @@ class JobLogDao:
         :param is_page: 是否开启分页
         :return: 定时任务日志列表信息对象
         """
+        query = cls.__get_job_log_list_query(query_object)
+        job_log_list = await PageUtil.paginate(
+            db,
+            query,
+            query_object.page_num,
+            query_object.page_size,
+            is_page,
+            cursor=query_object.cursor,
+            approximate_count=True,
+        )
+
+        return job_log_list
+
+    @classmethod
+    def stream_job_log_list(
+        cls, db: AsyncSession, query_object: JobLogPageQueryModel, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncGenerator[List, None]:
+        """
+        根据查询参数流式获取定时任务日志列表信息
+
+        :param db: orm对象
+        :param query_object: 查询参数对象
+        :param chunk_size: 每批读取的行数
+        :return: 逐批返回定时任务日志列表信息的异步生成器
+        """
+        return PageUtil.stream(db, cls.__get_job_log_list_query(query_object), chunk_size)
+
+    @classmethod
+    def __get_job_log_list_query(cls, query_object: JobLogPageQueryModel):
+        """
+        根据查询参数生成定时任务日志列表查询语句
+
+        :param query_object: 查询参数对象
+        :return: 定时任务日志列表查询语句
+        """
         query = (
             select(SysJobLog)
             .where(
@@ -38,9 +74,8 @@ class JobLogDao:
             .order_by(desc(SysJobLog.create_time))
             .distinct()
         )
-        job_log_list = await PageUtil.paginate(db, query, query_object.page_num, query_object.page_size, is_page)
 
-        return job_log_list
+        return query
 
     @classmethod
     def add_job_log_dao(cls, db: Session, job_log: JobLogModel):
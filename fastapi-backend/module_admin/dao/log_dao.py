@@ -1,10 +1,30 @@
-from datetime import datetime, time
-from sqlalchemy import asc, delete, desc, select
+from datetime import datetime, timedelta
+from sqlalchemy import asc, delete, desc, insert, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+from typing import AsyncGenerator, List, Optional
 from module_admin.entity.do.log_do import SysLogininfor, SysOperLog
 from module_admin.entity.vo.log_vo import LogininforModel, LoginLogPageQueryModel, OperLogModel, OperLogPageQueryModel
-from utils.common_util import SnakeCaseUtil
-from utils.page_util import PageUtil
+from utils.common_util import SnakeCaseUtil, SqlalchemyUtil
+from utils.page_util import PageUtil, STREAM_CHUNK_SIZE
+
+
+def get_time_range_conditions(time_column: InstrumentedAttribute, begin_time: Optional[str], end_time: Optional[str]):
+    """
+    根据起止日期生成日志时间列的半开区间查询条件，日志表按月分区时数据库可据此裁剪分区
+
+    :param time_column: 日志时间列
+    :param begin_time: 开始日期
+    :param end_time: 结束日期
+    :return: 查询条件列表
+    """
+    conditions = []
+    if begin_time:
+        conditions.append(time_column >= datetime.strptime(begin_time, '%Y-%m-%d'))
+    if end_time:
+        conditions.append(time_column < datetime.strptime(end_time, '%Y-%m-%d') + timedelta(days=1))
+
+    return conditions
 
 
 class OperationLogDao:
@@ -22,6 +42,41 @@ class OperationLogDao:
         :param is_page: 是否开启分页
         :return: 操作日志列表信息对象
         """
+        query = cls.__get_operation_log_list_query(query_object)
+        operation_log_list = await PageUtil.paginate(
+            db,
+            query,
+            query_object.page_num,
+            query_object.page_size,
+            is_page,
+            cursor=query_object.cursor,
+            approximate_count=True,
+        )
+
+        return operation_log_list
+
+    @classmethod
+    def stream_operation_log_list(
+        cls, db: AsyncSession, query_object: OperLogPageQueryModel, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncGenerator[List, None]:
+        """
+        根据查询参数流式获取操作日志列表信息
+
+        :param db: orm对象
+        :param query_object: 查询参数对象
+        :param chunk_size: 每批读取的行数
+        :return: 逐批返回操作日志列表信息的异步生成器
+        """
+        return PageUtil.stream(db, cls.__get_operation_log_list_query(query_object), chunk_size)
+
+    @classmethod
+    def __get_operation_log_list_query(cls, query_object: OperLogPageQueryModel):
+        """
+        根据查询参数生成操作日志列表查询语句
+
+        :param query_object: 查询参数对象
+        :return: 操作日志列表查询语句
+        """
         if query_object.is_asc == 'ascending':
             order_by_column = asc(getattr(SysOperLog, SnakeCaseUtil.camel_to_snake(query_object.order_by_column), None))
         elif query_object.is_asc == 'descending':
@@ -37,19 +92,13 @@ class OperationLogDao:
                 SysOperLog.oper_name.like(f'%{query_object.oper_name}%') if query_object.oper_name else True,
                 SysOperLog.business_type == query_object.business_type if query_object.business_type else True,
                 SysOperLog.status == query_object.status if query_object.status else True,
-                SysOperLog.oper_time.between(
-                    datetime.combine(datetime.strptime(query_object.begin_time, '%Y-%m-%d'), time(00, 00, 00)),
-                    datetime.combine(datetime.strptime(query_object.end_time, '%Y-%m-%d'), time(23, 59, 59)),
-                )
-                if query_object.begin_time and query_object.end_time
-                else True,
+                *get_time_range_conditions(SysOperLog.oper_time, query_object.begin_time, query_object.end_time),
             )
             .distinct()
             .order_by(order_by_column)
         )
-        operation_log_list = await PageUtil.paginate(db, query, query_object.page_num, query_object.page_size, is_page)
 
-        return operation_log_list
+        return query
 
     @classmethod
     async def add_operation_log_dao(cls, db: AsyncSession, operation_log: OperLogModel):
@@ -66,6 +115,20 @@ class OperationLogDao:
 
         return db_operation_log
 
+    @classmethod
+    async def batch_add_operation_log_dao(cls, db: AsyncSession, operation_log_list: List[OperLogModel]):
+        """
+        批量新增操作日志数据库操作
+
+        :param db: orm对象
+        :param operation_log_list: 操作日志对象列表
+        :return:
+        """
+        await db.execute(
+            insert(SysOperLog),
+            [operation_log.model_dump(exclude={'oper_id'}) for operation_log in operation_log_list],
+        )
+
     @classmethod
     async def delete_operation_log_dao(cls, db: AsyncSession, operation_log: OperLogModel):
         """
@@ -85,7 +148,10 @@ class OperationLogDao:
         :param db: orm对象
         :return:
         """
-        await db.execute(delete(SysOperLog))
+        # 使用truncate一次性清空所有分区，避免逐行删除，mysql下truncate会隐式提交，无法随会话回滚
+        await SqlalchemyUtil.execute_ddl(db, text(f'truncate table {SysOperLog.__tablename__}'))
+        # truncate语句不经过orm，需主动使分页总数缓存失效
+        PageUtil.invalidate_count_cache([SysOperLog.__tablename__])
 
 
 class LoginLogDao:
@@ -103,6 +169,41 @@ class LoginLogDao:
         :param is_page: 是否开启分页
         :return: 登录日志列表信息对象
         """
+        query = cls.__get_login_log_list_query(query_object)
+        login_log_list = await PageUtil.paginate(
+            db,
+            query,
+            query_object.page_num,
+            query_object.page_size,
+            is_page,
+            cursor=query_object.cursor,
+            approximate_count=True,
+        )
+
+        return login_log_list
+
+    @classmethod
+    def stream_login_log_list(
+        cls, db: AsyncSession, query_object: LoginLogPageQueryModel, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncGenerator[List, None]:
+        """
+        根据查询参数流式获取登录日志列表信息
+
+        :param db: orm对象
+        :param query_object: 查询参数对象
+        :param chunk_size: 每批读取的行数
+        :return: 逐批返回登录日志列表信息的异步生成器
+        """
+        return PageUtil.stream(db, cls.__get_login_log_list_query(query_object), chunk_size)
+
+    @classmethod
+    def __get_login_log_list_query(cls, query_object: LoginLogPageQueryModel):
+        """
+        根据查询参数生成登录日志列表查询语句
+
+        :param query_object: 查询参数对象
+        :return: 登录日志列表查询语句
+        """
         if query_object.is_asc == 'ascending':
             order_by_column = asc(
                 getattr(SysLogininfor, SnakeCaseUtil.camel_to_snake(query_object.order_by_column), None)
@@ -119,19 +220,13 @@ class LoginLogDao:
                 SysLogininfor.ipaddr.like(f'%{query_object.ipaddr}%') if query_object.ipaddr else True,
                 SysLogininfor.user_name.like(f'%{query_object.user_name}%') if query_object.user_name else True,
                 SysLogininfor.status == query_object.status if query_object.status else True,
-                SysLogininfor.login_time.between(
-                    datetime.combine(datetime.strptime(query_object.begin_time, '%Y-%m-%d'), time(00, 00, 00)),
-                    datetime.combine(datetime.strptime(query_object.end_time, '%Y-%m-%d'), time(23, 59, 59)),
-                )
-                if query_object.begin_time and query_object.end_time
-                else True,
+                *get_time_range_conditions(SysLogininfor.login_time, query_object.begin_time, query_object.end_time),
             )
             .distinct()
             .order_by(order_by_column)
         )
-        login_log_list = await PageUtil.paginate(db, query, query_object.page_num, query_object.page_size, is_page)
 
-        return login_log_list
+        return query
 
     @classmethod
     async def add_login_log_dao(cls, db: AsyncSession, login_log: LogininforModel):
@@ -148,6 +243,19 @@ class LoginLogDao:
 
         return db_login_log
 
+    @classmethod
+    async def batch_add_login_log_dao(cls, db: AsyncSession, login_log_list: List[LogininforModel]):
+        """
+        批量新增登录日志数据库操作
+
+        :param db: orm对象
+        :param login_log_list: 登录日志对象列表
+        :return:
+        """
+        await db.execute(
+            insert(SysLogininfor), [login_log.model_dump(exclude={'info_id'}) for login_log in login_log_list]
+        )
+
     @classmethod
     async def delete_login_log_dao(cls, db: AsyncSession, login_log: LogininforModel):
         """
@@ -167,4 +275,7 @@ class LoginLogDao:
         :param db: orm对象
         :return:
         """
-        await db.execute(delete(SysLogininfor))
+        # 使用truncate一次性清空所有分区，避免逐行删除，mysql下truncate会隐式提交，无法随会话回滚
+        await SqlalchemyUtil.execute_ddl(db, text(f'truncate table {SysLogininfor.__tablename__}'))
+        # truncate语句不经过orm，需主动使分页总数缓存失效
+        PageUtil.invalidate_count_cache([SysLogininfor.__tablename__])
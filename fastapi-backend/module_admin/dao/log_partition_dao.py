@@ -0,0 +1,187 @@
+from datetime import date, datetime
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+from typing import List, Optional
+from config.env import DataBaseConfig
+from utils.common_util import SqlalchemyUtil
+from utils.page_util import PageUtil
+
+
+class LogPartitionDao:
+    """
+    日志表分区管理模块数据库操作层
+
+    mysql使用按to_days(时间列)划分的range分区，月分区命名为pYYYYMM，p_max为兜底分区；
+    postgresql使用声明式range分区，月分区表命名为{表名}_pYYYYMM，{表名}_default为默认分区；
+    mysql的分区ddl会隐式提交，多条ddl组成的操作按可重复执行编写，中途失败后由下次维护任务继续完成
+    """
+
+    @classmethod
+    async def get_partition_name_list(cls, db: AsyncSession, table_name: str) -> List[str]:
+        """
+        获取日志表的分区名称列表，未分区的表返回空列表
+
+        :param db: orm对象
+        :param table_name: 表名
+        :return: 分区名称列表
+        """
+        if DataBaseConfig.db_type == 'postgresql':
+            sql = text(
+                'select child.relname from pg_inherits '
+                'join pg_class parent on pg_inherits.inhparent = parent.oid '
+                'join pg_class child on pg_inherits.inhrelid = child.oid '
+                'where parent.relname = :table_name'
+            )
+        else:
+            sql = text(
+                'select partition_name from information_schema.partitions '
+                'where table_schema = database() and table_name = :table_name and partition_name is not null'
+            )
+        partition_name_list = (await db.execute(sql, {'table_name': table_name})).scalars().all()
+
+        return list(partition_name_list)
+
+    @classmethod
+    async def get_earliest_log_time(cls, db: AsyncSession, time_column: InstrumentedAttribute) -> Optional[datetime]:
+        """
+        获取日志表中最早的日志时间
+
+        :param db: orm对象
+        :param time_column: 分区时间列
+        :return: 最早的日志时间，表为空时返回None
+        """
+        return (await db.execute(select(func.min(time_column)))).scalar()
+
+    @classmethod
+    async def add_month_partitions_dao(
+        cls, db: AsyncSession, table_name: str, time_column: InstrumentedAttribute, month_start_list: List[date]
+    ):
+        """
+        按月份升序新增月分区数据库操作，兜底分区或默认分区中已落入这些月份的数据会一并迁移至新分区
+
+        :param db: orm对象
+        :param table_name: 表名
+        :param time_column: 分区时间列
+        :param month_start_list: 升序排列的各月份起始日期
+        :return:
+        """
+        if DataBaseConfig.db_type == 'postgresql':
+            for month_start in month_start_list:
+                month_end = cls.__next_month(month_start)
+                partition_name = f'{table_name}_p{month_start.strftime("%Y%m")}'
+                await db.execute(
+                    text(f'create table {partition_name} (like {table_name} including defaults including constraints)')
+                )
+                await db.execute(
+                    text(
+                        f'with moved as (delete from {table_name}_default '
+                        f'where {time_column.key} >= :month_start and {time_column.key} < :month_end returning *) '
+                        f'insert into {partition_name} select * from moved'
+                    ),
+                    {'month_start': month_start, 'month_end': month_end},
+                )
+                await db.execute(
+                    text(
+                        f'alter table {table_name} attach partition {partition_name} '
+                        f"for values from ('{month_start.isoformat()}') to ('{month_end.isoformat()}')"
+                    )
+                )
+        else:
+            # 一次拆分出全部月分区，p_max中的数据只需重组一次
+            partition_definitions = ''.join(
+                f'partition p{month_start.strftime("%Y%m")} '
+                f"values less than (to_days('{cls.__next_month(month_start).isoformat()}')), "
+                for month_start in month_start_list
+            )
+            await SqlalchemyUtil.execute_ddl(
+                db,
+                text(
+                    f'alter table {table_name} reorganize partition p_max into ('
+                    f'{partition_definitions}partition p_max values less than maxvalue)'
+                ),
+            )
+
+    @classmethod
+    async def drop_partition_dao(cls, db: AsyncSession, table_name: str, partition_name: str):
+        """
+        删除分区数据库操作
+
+        :param db: orm对象
+        :param table_name: 表名
+        :param partition_name: 分区名称
+        :return:
+        """
+        if DataBaseConfig.db_type == 'postgresql':
+            await db.execute(text(f'drop table {partition_name}'))
+        else:
+            await SqlalchemyUtil.execute_ddl(db, text(f'alter table {table_name} drop partition {partition_name}'))
+        PageUtil.invalidate_count_cache([table_name])
+
+    @classmethod
+    async def archive_partition_dao(cls, db: AsyncSession, table_name: str, partition_name: str, archive_name: str):
+        """
+        归档分区数据库操作，将分区数据转移为独立的归档表后从日志表移除
+
+        :param db: orm对象
+        :param table_name: 表名
+        :param partition_name: 分区名称
+        :param archive_name: 归档表名
+        :return:
+        """
+        if DataBaseConfig.db_type == 'postgresql':
+            await db.execute(text(f'alter table {table_name} detach partition {partition_name}'))
+            await db.execute(text(f'alter table {partition_name} rename to {archive_name}'))
+        else:
+            # 每一步执行前检查上次中断时的进度，避免重复建表或将已交换出的数据再次交换回分区
+            if not await cls.__table_exists(db, archive_name):
+                await SqlalchemyUtil.execute_ddl(db, text(f'create table {archive_name} like {table_name}'))
+            if await cls.get_partition_name_list(db, archive_name):
+                await SqlalchemyUtil.execute_ddl(db, text(f'alter table {archive_name} remove partitioning'))
+            archived = (await db.execute(text(f'select exists(select 1 from {archive_name})'))).scalar()
+            if not archived:
+                await SqlalchemyUtil.execute_ddl(
+                    db, text(f'alter table {table_name} exchange partition {partition_name} with table {archive_name}')
+                )
+            await SqlalchemyUtil.execute_ddl(db, text(f'alter table {table_name} drop partition {partition_name}'))
+        PageUtil.invalidate_count_cache([table_name])
+
+    @classmethod
+    async def delete_expired_log_dao(cls, db: AsyncSession, time_column: InstrumentedAttribute, expire_time: date):
+        """
+        删除过期日志数据库操作，仅用于未分区的日志表
+
+        :param db: orm对象
+        :param time_column: 日志时间列
+        :param expire_time: 过期时间，早于该时间的日志将被删除
+        :return: 删除的行数
+        """
+        result = await db.execute(delete(time_column.class_).where(time_column < expire_time))
+
+        return result.rowcount
+
+    @classmethod
+    async def __table_exists(cls, db: AsyncSession, table_name: str) -> bool:
+        """
+        判断当前库中是否存在指定的表
+
+        :param db: orm对象
+        :param table_name: 表名
+        :return: 是否存在
+        """
+        sql = text(
+            'select count(1) from information_schema.tables '
+            'where table_schema = database() and table_name = :table_name'
+        )
+
+        return bool((await db.execute(sql, {'table_name': table_name})).scalar())
+
+    @staticmethod
+    def __next_month(month_start: date) -> date:
+        """
+        计算下月起始日期
+
+        :param month_start: 月份起始日期
+        :return: 下月起始日期
+        """
+        return date(month_start.year + month_start.month // 12, month_start.month % 12 + 1, 1)
@@ -1,14 +1,15 @@
 from datetime import datetime, time
-from sqlalchemy import and_, delete, desc, func, or_, select, update
+from sqlalchemy import and_, delete, desc, func, insert, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from module_admin.entity.do.member_do import Member
-from typing import Optional, List
+from typing import AsyncGenerator, Dict, Optional, List
 from module_admin.entity.vo.member_vo import (
     MemberModel,
     MemberPageQueryModel,
 )
-from utils.page_util import PageUtil
+from utils.import_util import ImportUtil
+from utils.page_util import PageUtil, STREAM_CHUNK_SIZE
 
 class MemberDao:
     """
@@ -41,6 +42,35 @@ class MemberDao:
         :param is_page: 是否开启分页
         :return: 会员列表信息对象
         """
+        query = cls.__get_member_list_query(query_object)
+        member_list = await PageUtil.paginate(
+            db, query, query_object.page_num, query_object.page_size, is_page, cursor=query_object.cursor
+        )
+
+        return member_list
+
+    @classmethod
+    def stream_member_list(
+        cls, db: AsyncSession, query_object: MemberPageQueryModel, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncGenerator[List, None]:
+        """
+        根据查询参数流式获取会员列表信息
+
+        :param db: orm对象
+        :param query_object: 查询参数对象
+        :param chunk_size: 每批读取的行数
+        :return: 逐批返回会员列表信息的异步生成器
+        """
+        return PageUtil.stream(db, cls.__get_member_list_query(query_object), chunk_size)
+
+    @classmethod
+    def __get_member_list_query(cls, query_object: MemberPageQueryModel):
+        """
+        根据查询参数生成会员列表查询语句
+
+        :param query_object: 查询参数对象
+        :return: 会员列表查询语句
+        """
         query = (
             select(Member)
             .where(
@@ -62,9 +92,8 @@ class MemberDao:
             .order_by(Member.member_id)
             .distinct()
         )
-        member_list = await PageUtil.paginate(db, query, query_object.page_num, query_object.page_size, is_page)
 
-        return member_list
+        return query
 
     @classmethod
     async def get_member_by_info(cls, db: AsyncSession, member: MemberModel):
@@ -122,6 +151,50 @@ class MemberDao:
         """
         await db.execute(update(Member), [member])
 
+    @classmethod
+    async def get_member_id_dict_by_member_names(cls, db: AsyncSession, member_name_list: List[str]) -> Dict[str, int]:
+        """
+        根据会员账号列表分批使用in查询获取已存在会员的会员id，同名账号以最新创建的会员为准
+
+        :param db: orm对象
+        :param member_name_list: 会员账号列表
+        :return: 会员账号与会员id的映射字典
+        """
+        member_id_dict = {}
+        for member_name_chunk in ImportUtil.chunk(list(set(member_name_list))):
+            member_rows = (
+                await db.execute(
+                    select(Member.member_name, Member.member_id)
+                    .where(Member.del_flag == '0', Member.member_name.in_(member_name_chunk))
+                    .order_by(Member.create_at)
+                )
+            ).all()
+            member_id_dict.update({member_name: member_id for member_name, member_id in member_rows})
+
+        return member_id_dict
+
+    @classmethod
+    async def batch_add_member_dao(cls, db: AsyncSession, member_list: List[Dict]):
+        """
+        批量新增会员数据库操作
+
+        :param db: orm对象
+        :param member_list: 需要新增的会员字典列表
+        :return:
+        """
+        await db.execute(insert(Member), member_list)
+
+    @classmethod
+    async def batch_edit_member_dao(cls, db: AsyncSession, member_list: List[Dict]):
+        """
+        按会员id批量编辑会员数据库操作
+
+        :param db: orm对象
+        :param member_list: 需要更新的会员字典列表，每个字典需包含会员id
+        :return:
+        """
+        await db.execute(update(Member), member_list)
+
 
     @classmethod
     async def delete_member_dao(cls, db: AsyncSession, member: MemberModel):
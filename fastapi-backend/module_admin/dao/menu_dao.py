@@ -1,5 +1,7 @@
 from sqlalchemy import and_, delete, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from config.constant import MenuConstant
 from module_admin.entity.do.menu_do import SysMenu
 from module_admin.entity.do.role_do import SysRole, SysRoleMenu
 from module_admin.entity.do.user_do import SysUser, SysUserRole
@@ -50,46 +52,40 @@ class MenuDao:
         return menu_info
 
     @classmethod
-    async def get_menu_list_for_tree(cls, db: AsyncSession, user_id: int, role: list):
+    async def get_menu_list_for_tree(cls, db: AsyncSession):
         """
-        根据角色信息获取所有在用菜单列表信息
+        获取所有在用菜单的树节点信息
 
         :param db: orm对象
-        :param user_id: 用户id
-        :param role: 用户角色列表信息
-        :return: 菜单列表信息
+        :return: 按显示顺序排列的菜单id、上级菜单id及菜单名称列表
         """
-        role_id_list = [item.role_id for item in role]
-        if 1 in role_id_list:
-            menu_query_all = (
-                (await db.execute(select(SysMenu).where(SysMenu.status == '0').order_by(SysMenu.order_num).distinct()))
-                .scalars()
-                .all()
+        menu_query_all = (
+            await db.execute(
+                select(SysMenu.menu_id, SysMenu.parent_id, SysMenu.menu_name)
+                .where(SysMenu.status == '0')
+                .order_by(SysMenu.order_num, SysMenu.menu_id)
             )
-        else:
-            menu_query_all = (
-                (
-                    await db.execute(
-                        select(SysMenu)
-                        .select_from(SysUser)
-                        .where(SysUser.status == '0', SysUser.del_flag == '0', SysUser.user_id == user_id)
-                        .join(SysUserRole, SysUser.user_id == SysUserRole.user_id, isouter=True)
-                        .join(
-                            SysRole,
-                            and_(
-                                SysUserRole.role_id == SysRole.role_id, SysRole.status == '0', SysRole.del_flag == '0'
-                            ),
-                            isouter=True,
-                        )
-                        .join(SysRoleMenu, SysRole.role_id == SysRoleMenu.role_id, isouter=True)
-                        .join(SysMenu, and_(SysRoleMenu.menu_id == SysMenu.menu_id, SysMenu.status == '0'))
-                        .order_by(SysMenu.order_num)
-                        .distinct()
-                    )
-                )
-                .scalars()
-                .all()
+        ).all()
+
+        return menu_query_all
+
+    @classmethod
+    async def get_router_menu_list(cls, db: AsyncSession, role_id_list: Optional[List[int]]):
+        """
+        根据角色id列表获取所有在用的目录及菜单信息
+
+        :param db: orm对象
+        :param role_id_list: 角色id列表，为None时获取全部目录及菜单
+        :return: 按显示顺序排列的目录及菜单列表信息
+        """
+        menu_query = select(SysMenu).where(
+            SysMenu.status == '0', SysMenu.menu_type.in_([MenuConstant.TYPE_DIR, MenuConstant.TYPE_MENU])
+        )
+        if role_id_list is not None:
+            menu_query = menu_query.where(
+                SysMenu.menu_id.in_(select(SysRoleMenu.menu_id).where(SysRoleMenu.role_id.in_(role_id_list)))
             )
+        menu_query_all = (await db.execute(menu_query.order_by(SysMenu.order_num, SysMenu.menu_id))).scalars().all()
 
         return menu_query_all
 
@@ -1,5 +1,5 @@
 from datetime import datetime, time
-from sqlalchemy import and_, delete, desc, func, or_, select, update  # noqa: F401
+from sqlalchemy import ColumnElement, and_, delete, desc, func, or_, select, update  # noqa: F401
 from sqlalchemy.ext.asyncio import AsyncSession
 from module_admin.entity.do.dept_do import SysDept
 from module_admin.entity.do.menu_do import SysMenu
@@ -126,14 +126,14 @@ class RoleDao:
 
     @classmethod
     async def get_role_list(
-        cls, db: AsyncSession, query_object: RolePageQueryModel, data_scope_sql: str, is_page: bool = False
+        cls, db: AsyncSession, query_object: RolePageQueryModel, data_scope_filter: ColumnElement, is_page: bool = False
     ):
         """
         根据查询参数获取角色列表信息
 
         :param db: orm对象
         :param query_object: 查询参数对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_filter: 数据权限对应的查询条件
         :param is_page: 是否开启分页
         :return: 角色列表信息对象
         """
@@ -154,7 +154,7 @@ class RoleDao:
                 )
                 if query_object.begin_time and query_object.end_time
                 else True,
-                eval(data_scope_sql),
+                data_scope_filter,
             )
             .order_by(SysRole.role_sort)
             .distinct()
@@ -263,6 +263,30 @@ class RoleDao:
         """
         await db.execute(delete(SysRoleMenu).where(SysRoleMenu.role_id.in_([role_menu.role_id])))
 
+    @classmethod
+    async def get_role_menu_id_list_dao(cls, db: AsyncSession):
+        """
+        获取全部角色与菜单的关联id列表
+
+        :param db: orm对象
+        :return: 角色id及菜单id列表
+        """
+        role_menu_query_all = (await db.execute(select(SysRoleMenu.role_id, SysRoleMenu.menu_id))).all()
+
+        return role_menu_query_all
+
+    @classmethod
+    async def get_role_dept_id_list_dao(cls, db: AsyncSession):
+        """
+        获取全部角色与部门的关联id列表
+
+        :param db: orm对象
+        :return: 角色id及部门id列表
+        """
+        role_dept_query_all = (await db.execute(select(SysRoleDept.role_id, SysRoleDept.dept_id))).all()
+
+        return role_dept_query_all
+
     @classmethod
     async def get_role_dept_dao(cls, db: AsyncSession, role: RoleModel):
         """
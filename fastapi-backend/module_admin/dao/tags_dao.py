@@ -86,7 +86,9 @@ class TagsDao:
             .order_by(Tags.tags_sort)
             .distinct()
         )
-        tags_list = await PageUtil.paginate(db, query, query_object.page_num, query_object.page_size, is_page)
+        tags_list = await PageUtil.paginate(
+            db, query, query_object.page_num, query_object.page_size, is_page, cursor=query_object.cursor
+        )
 
         return tags_list
 
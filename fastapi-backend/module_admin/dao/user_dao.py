@@ -1,7 +1,8 @@
 from datetime import datetime, time
-from sqlalchemy import and_, delete, desc, func, or_, select, update
+from sqlalchemy import ColumnElement, and_, delete, desc, insert, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from module_admin.entity.do.dept_do import SysDept
+from typing import AsyncGenerator, Dict, List, Set
+from module_admin.entity.do.dept_do import SysDept, SysDeptClosure
 from module_admin.entity.do.menu_do import SysMenu
 from module_admin.entity.do.post_do import SysPost
 from module_admin.entity.do.role_do import SysRole, SysRoleDept, SysRoleMenu  # noqa: F401
@@ -9,12 +10,14 @@ from module_admin.entity.do.user_do import SysUser, SysUserPost, SysUserRole
 from module_admin.entity.vo.user_vo import (
     UserModel,
     UserPageQueryModel,
+    UserPermissionInfo,
     UserPostModel,
     UserRoleModel,
     UserRolePageQueryModel,
     UserRoleQueryModel,
 )
-from utils.page_util import PageUtil
+from utils.import_util import ImportUtil
+from utils.page_util import PageUtil, STREAM_CHUNK_SIZE
 
 
 class UserDao:
@@ -76,67 +79,43 @@ class UserDao:
         return query_user_info
 
     @classmethod
-    async def get_user_by_id(cls, db: AsyncSession, user_id: int):
+    async def get_user_permission_info_by_id(cls, db: AsyncSession, user_id: int):
         """
-        根据user_id获取用户信息
+        根据user_id获取用户及其部门、角色、岗位、菜单信息，用户、部门与角色信息通过一条联表语句获取（结果行数即角色数），
+        岗位、菜单信息各通过一条语句获取，岗位不并入联表语句，避免角色与岗位的笛卡尔积
 
         :param db: orm对象
         :param user_id: 用户id
-        :return: 当前user_id的用户信息对象
-        """
-        query_user_basic_info = (
-            (
-                await db.execute(
-                    select(SysUser)
-                    .where(SysUser.status == '0', SysUser.del_flag == '0', SysUser.user_id == user_id)
-                    .distinct()
+        :return: 当前user_id的用户权限信息对象
+        """
+        query_user_rows = (
+            await db.execute(
+                select(SysUser, SysDept, SysRole)
+                .select_from(SysUser)
+                .where(SysUser.status == '0', SysUser.del_flag == '0', SysUser.user_id == user_id)
+                .join(
+                    SysDept,
+                    and_(SysUser.dept_id == SysDept.dept_id, SysDept.status == '0', SysDept.del_flag == '0'),
+                    isouter=True,
                 )
-            )
-            .scalars()
-            .first()
-        )
-        query_user_dept_info = (
-            (
-                await db.execute(
-                    select(SysDept)
-                    .select_from(SysUser)
-                    .where(SysUser.status == '0', SysUser.del_flag == '0', SysUser.user_id == user_id)
-                    .join(
-                        SysDept,
-                        and_(SysUser.dept_id == SysDept.dept_id, SysDept.status == '0', SysDept.del_flag == '0'),
-                    )
-                    .distinct()
+                .join(SysUserRole, SysUser.user_id == SysUserRole.user_id, isouter=True)
+                .join(
+                    SysRole,
+                    and_(SysUserRole.role_id == SysRole.role_id, SysRole.status == '0', SysRole.del_flag == '0'),
+                    isouter=True,
                 )
             )
-            .scalars()
-            .first()
-        )
-        query_user_role_info = (
+        ).all()
+        if not query_user_rows:
+            return UserPermissionInfo()
+        query_user_role_info = tuple(row[2] for row in query_user_rows if row[2] is not None)
+        query_user_post_info = tuple(
             (
                 await db.execute(
-                    select(SysRole)
-                    .select_from(SysUser)
-                    .where(SysUser.status == '0', SysUser.del_flag == '0', SysUser.user_id == user_id)
-                    .join(SysUserRole, SysUser.user_id == SysUserRole.user_id, isouter=True)
-                    .join(
-                        SysRole,
-                        and_(SysUserRole.role_id == SysRole.role_id, SysRole.status == '0', SysRole.del_flag == '0'),
+                    select(SysPost).where(
+                        SysPost.post_id.in_(select(SysUserPost.post_id).where(SysUserPost.user_id == user_id)),
+                        SysPost.status == '0',
                     )
-                    .distinct()
-                )
-            )
-            .scalars()
-            .all()
-        )
-        query_user_post_info = (
-            (
-                await db.execute(
-                    select(SysPost)
-                    .select_from(SysUser)
-                    .where(SysUser.status == '0', SysUser.del_flag == '0', SysUser.user_id == user_id)
-                    .join(SysUserPost, SysUser.user_id == SysUserPost.user_id, isouter=True)
-                    .join(SysPost, and_(SysUserPost.post_id == SysPost.post_id, SysPost.status == '0'))
-                    .distinct()
                 )
             )
             .scalars()
@@ -144,44 +123,28 @@ class UserDao:
         )
         role_id_list = [item.role_id for item in query_user_role_info]
         if 1 in role_id_list:
-            query_user_menu_info = (
-                (await db.execute(select(SysMenu).where(SysMenu.status == '0').distinct())).scalars().all()
-            )
+            menu_query = select(SysMenu).where(SysMenu.status == '0')
         else:
-            query_user_menu_info = (
-                (
-                    await db.execute(
-                        select(SysMenu)
-                        .select_from(SysUser)
-                        .where(SysUser.status == '0', SysUser.del_flag == '0', SysUser.user_id == user_id)
-                        .join(SysUserRole, SysUser.user_id == SysUserRole.user_id, isouter=True)
-                        .join(
-                            SysRole,
-                            and_(
-                                SysUserRole.role_id == SysRole.role_id, SysRole.status == '0', SysRole.del_flag == '0'
-                            ),
-                            isouter=True,
-                        )
-                        .join(SysRoleMenu, SysRole.role_id == SysRoleMenu.role_id, isouter=True)
-                        .join(SysMenu, and_(SysRoleMenu.menu_id == SysMenu.menu_id, SysMenu.status == '0'))
-                        .order_by(SysMenu.order_num)
-                        .distinct()
-                    )
+            menu_query = (
+                select(SysMenu)
+                .where(
+                    SysMenu.status == '0',
+                    SysMenu.menu_id.in_(
+                        select(SysRoleMenu.menu_id).where(SysRoleMenu.role_id.in_(role_id_list)).distinct()
+                    ),
                 )
-                .scalars()
-                .all()
+                .order_by(SysMenu.order_num)
             )
+        query_user_menu_info = tuple((await db.execute(menu_query)).scalars().all()) if role_id_list else ()
 
-        results = dict(
-            user_basic_info=query_user_basic_info,
-            user_dept_info=query_user_dept_info,
+        return UserPermissionInfo(
+            user_basic_info=query_user_rows[0][0],
+            user_dept_info=query_user_rows[0][1],
             user_role_info=query_user_role_info,
             user_post_info=query_user_post_info,
             user_menu_info=query_user_menu_info,
         )
 
-        return results
-
     @classmethod
     async def get_user_detail_by_id(cls, db: AsyncSession, user_id: int):
         """
@@ -275,26 +238,56 @@ class UserDao:
 
     @classmethod
     async def get_user_list(
-        cls, db: AsyncSession, query_object: UserPageQueryModel, data_scope_sql: str, is_page: bool = False
+        cls, db: AsyncSession, query_object: UserPageQueryModel, data_scope_filter: ColumnElement, is_page: bool = False
     ):
         """
         根据查询参数获取用户列表信息
 
         :param db: orm对象
         :param query_object: 查询参数对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_filter: 数据权限对应的查询条件
         :param is_page: 是否开启分页
         :return: 用户列表信息对象
         """
+        query = cls.__get_user_list_query(query_object, data_scope_filter)
+        user_list = await PageUtil.paginate(db, query, query_object.page_num, query_object.page_size, is_page)
+
+        return user_list
+
+    @classmethod
+    def stream_user_list(
+        cls,
+        db: AsyncSession,
+        query_object: UserPageQueryModel,
+        data_scope_filter: ColumnElement,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> AsyncGenerator[List, None]:
+        """
+        根据查询参数流式获取用户列表信息
+
+        :param db: orm对象
+        :param query_object: 查询参数对象
+        :param data_scope_filter: 数据权限对应的查询条件
+        :param chunk_size: 每批读取的行数
+        :return: 逐批返回用户列表信息的异步生成器
+        """
+        return PageUtil.stream(db, cls.__get_user_list_query(query_object, data_scope_filter), chunk_size)
+
+    @classmethod
+    def __get_user_list_query(cls, query_object: UserPageQueryModel, data_scope_filter: ColumnElement):
+        """
+        根据查询参数生成用户列表查询语句
+
+        :param query_object: 查询参数对象
+        :param data_scope_filter: 数据权限对应的查询条件
+        :return: 用户列表查询语句
+        """
         query = (
             select(SysUser, SysDept)
             .where(
                 SysUser.del_flag == '0',
-                or_(
-                    SysUser.dept_id == query_object.dept_id,
-                    SysUser.dept_id.in_(
-                        select(SysDept.dept_id).where(func.find_in_set(query_object.dept_id, SysDept.ancestors))
-                    ),
+                SysUser.dept_id.in_(
+                    select(SysDeptClosure.descendant_id).where(SysDeptClosure.ancestor_id == query_object.dept_id)
                 )
                 if query_object.dept_id
                 else True,
@@ -311,7 +304,7 @@ class UserDao:
                 )
                 if query_object.begin_time and query_object.end_time
                 else True,
-                eval(data_scope_sql),
+                data_scope_filter,
             )
             .join(
                 SysDept,
@@ -321,9 +314,8 @@ class UserDao:
             .order_by(SysUser.user_id)
             .distinct()
         )
-        user_list = await PageUtil.paginate(db, query, query_object.page_num, query_object.page_size, is_page)
 
-        return user_list
+        return query
 
     @classmethod
     async def add_user_dao(cls, db: AsyncSession, user: UserModel):
@@ -351,6 +343,83 @@ class UserDao:
         """
         await db.execute(update(SysUser), [user])
 
+    @classmethod
+    async def get_user_id_dict_by_user_names(cls, db: AsyncSession, user_name_list: List[str]) -> Dict[str, int]:
+        """
+        根据用户账号列表分批使用in查询获取已存在用户的用户id，同名账号以最新创建的用户为准
+
+        :param db: orm对象
+        :param user_name_list: 用户账号列表
+        :return: 用户账号与用户id的映射字典
+        """
+        user_id_dict = {}
+        for user_name_chunk in ImportUtil.chunk(list(set(user_name_list))):
+            user_rows = (
+                await db.execute(
+                    select(SysUser.user_name, SysUser.user_id)
+                    .where(SysUser.del_flag == '0', SysUser.user_name.in_(user_name_chunk))
+                    .order_by(SysUser.create_time)
+                )
+            ).all()
+            user_id_dict.update({user_name: user_id for user_name, user_id in user_rows})
+
+        return user_id_dict
+
+    @classmethod
+    async def get_data_scope_user_id_set(
+        cls, db: AsyncSession, user_id_list: List[int], data_scope_filter: ColumnElement
+    ) -> Set[int]:
+        """
+        分批获取用户id列表中当前用户有数据权限的用户id
+
+        :param db: orm对象
+        :param user_id_list: 用户id列表
+        :param data_scope_filter: 数据权限对应的查询条件
+        :return: 有数据权限的用户id集合
+        """
+        user_id_set = set()
+        for user_id_chunk in ImportUtil.chunk(list(set(user_id_list))):
+            user_id_set.update(
+                (
+                    await db.execute(
+                        select(SysUser.user_id)
+                        .where(SysUser.del_flag == '0', SysUser.user_id.in_(user_id_chunk), data_scope_filter)
+                        .join(
+                            SysDept,
+                            and_(SysUser.dept_id == SysDept.dept_id, SysDept.status == '0', SysDept.del_flag == '0'),
+                            isouter=True,
+                        )
+                        .distinct()
+                    )
+                )
+                .scalars()
+                .all()
+            )
+
+        return user_id_set
+
+    @classmethod
+    async def batch_add_user_dao(cls, db: AsyncSession, user_list: List[Dict]):
+        """
+        批量新增用户数据库操作
+
+        :param db: orm对象
+        :param user_list: 需要新增的用户字典列表
+        :return:
+        """
+        await db.execute(insert(SysUser), user_list)
+
+    @classmethod
+    async def batch_edit_user_dao(cls, db: AsyncSession, user_list: List[Dict]):
+        """
+        按用户id批量编辑用户数据库操作
+
+        :param db: orm对象
+        :param user_list: 需要更新的用户字典列表，每个字典需包含用户id
+        :return:
+        """
+        await db.execute(update(SysUser), user_list)
+
     @classmethod
     async def delete_user_dao(cls, db: AsyncSession, user: UserModel):
         """
@@ -399,14 +468,18 @@ class UserDao:
 
     @classmethod
     async def get_user_role_allocated_list_by_role_id(
-        cls, db: AsyncSession, query_object: UserRolePageQueryModel, data_scope_sql: str, is_page: bool = False
+        cls,
+        db: AsyncSession,
+        query_object: UserRolePageQueryModel,
+        data_scope_filter: ColumnElement,
+        is_page: bool = False,
     ):
         """
         根据角色id获取已分配的用户列表信息
 
         :param db: orm对象
         :param query_object: 用户角色查询对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_filter: 数据权限对应的查询条件
         :param is_page: 是否开启分页
         :return: 角色已分配的用户列表信息
         """
@@ -420,7 +493,7 @@ class UserDao:
                 SysUser.user_name == query_object.user_name if query_object.user_name else True,
                 SysUser.phonenumber == query_object.phonenumber if query_object.phonenumber else True,
                 SysRole.role_id == query_object.role_id,
-                eval(data_scope_sql),
+                data_scope_filter,
             )
             .distinct()
         )
@@ -430,14 +503,18 @@ class UserDao:
 
     @classmethod
     async def get_user_role_unallocated_list_by_role_id(
-        cls, db: AsyncSession, query_object: UserRolePageQueryModel, data_scope_sql: str, is_page: bool = False
+        cls,
+        db: AsyncSession,
+        query_object: UserRolePageQueryModel,
+        data_scope_filter: ColumnElement,
+        is_page: bool = False,
     ):
         """
         根据角色id获取未分配的用户列表信息
 
         :param db: orm对象
         :param query_object: 用户角色查询对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_filter: 数据权限对应的查询条件
         :param is_page: 是否开启分页
         :return: 角色未分配的用户列表信息
         """
@@ -459,7 +536,7 @@ class UserDao:
                         and_(SysUserRole.user_id == SysUser.user_id, SysUserRole.role_id == query_object.role_id),
                     )
                 ),
-                eval(data_scope_sql),
+                data_scope_filter,
             )
             .distinct()
         )
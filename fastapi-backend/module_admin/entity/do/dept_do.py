@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy import Column, DateTime, Index, Integer, String
 from config.database import Base
 
 
@@ -12,7 +12,7 @@ class SysDept(Base):
 
     dept_id = Column(Integer, primary_key=True, autoincrement=True, comment='部门id')
     parent_id = Column(Integer, default=0, comment='父部门id')
-    ancestors = Column(String(50), nullable=True, default='', comment='祖级列表')
+    ancestors = Column(String(1000), nullable=True, default='', comment='祖级列表')
     dept_name = Column(String(30), nullable=True, default='', comment='部门名称')
     order_num = Column(Integer, default=0, comment='显示顺序')
     leader = Column(String(20), nullable=True, default=None, comment='负责人')
@@ -24,3 +24,17 @@ class SysDept(Base):
     create_time = Column(DateTime, nullable=True, default=datetime.now(), comment='创建时间')
     update_by = Column(String(64), nullable=True, default='', comment='更新者')
     update_time = Column(DateTime, nullable=True, default=datetime.now(), comment='更新时间')
+
+
+class SysDeptClosure(Base):
+    """
+    部门闭包表，记录每个部门与其自身及全部下级部门的对应关系
+    """
+
+    __tablename__ = 'sys_dept_closure'
+
+    ancestor_id = Column(Integer, primary_key=True, nullable=False, comment='祖先部门id')
+    descendant_id = Column(Integer, primary_key=True, nullable=False, comment='后代部门id')
+    depth = Column(Integer, nullable=False, default=0, comment='层级距离（0为部门自身）')
+
+    idx_sys_dept_closure_d = Index('idx_sys_dept_closure_d', descendant_id, depth)
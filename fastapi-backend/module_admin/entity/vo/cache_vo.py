@@ -10,6 +10,8 @@ class CacheMonitorModel(BaseModel):
     command_stats: Optional[List] = Field(default=[], description='命令统计')
     db_size: Optional[int] = Field(default=None, description='Key数量')
     info: Optional[dict] = Field(default={}, description='Redis信息')
+    session_renew_stats: Optional[dict] = Field(default={}, description='会话续期统计')
+    token_cache_stats: Optional[dict] = Field(default={}, description='令牌缓存统计')
 
 
 class CacheInfoModel(BaseModel):
@@ -1,5 +1,6 @@
+from datetime import datetime
 from pydantic import BaseModel, Field
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 
 
 class CrudResponseModel(BaseModel):
@@ -21,3 +22,22 @@ class UploadResponseModel(BaseModel):
     new_file_name: Optional[str] = Field(default=None, description='新文件名称')
     original_filename: Optional[str] = Field(default=None, description='原文件名称')
     url: Optional[str] = Field(default=None, description='新文件url')
+
+
+class ExportJobModel(BaseModel):
+    """
+    后台导出任务模型
+    """
+
+    job_id: str = Field(description='导出任务id')
+    title: Optional[str] = Field(default=None, description='导出模块名称')
+    export_format: Optional[str] = Field(default=None, description='导出格式')
+    status: Literal['pending', 'running', 'success', 'failed'] = Field(
+        default='pending', description='任务状态（pending等待执行 running执行中 success成功 failed失败）'
+    )
+    processed_rows: int = Field(default=0, description='已导出行数')
+    file_name: Optional[str] = Field(default=None, description='导出文件名称，通过通用下载接口下载')
+    error_msg: Optional[str] = Field(default=None, description='失败原因')
+    user_id: Optional[int] = Field(default=None, description='创建任务的用户id')
+    create_time: Optional[datetime] = Field(default=None, description='创建时间')
+    finish_time: Optional[datetime] = Field(default=None, description='完成时间')
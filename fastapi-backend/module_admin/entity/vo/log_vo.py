@@ -73,6 +73,7 @@ class OperLogPageQueryModel(OperLogQueryModel):
 
     page_num: int = Field(default=1, description='当前页码')
     page_size: int = Field(default=10, description='每页记录数')
+    cursor: Optional[str] = Field(default=None, description='游标分页的游标，首页传入空字符串，传入时启用游标分页')
 
 
 class DeleteOperLogModel(BaseModel):
@@ -103,6 +104,7 @@ class LoginLogPageQueryModel(LoginLogQueryModel):
 
     page_num: int = Field(default=1, description='当前页码')
     page_size: int = Field(default=10, description='每页记录数')
+    cursor: Optional[str] = Field(default=None, description='游标分页的游标，首页传入空字符串，传入时启用游标分页')
 
 
 class DeleteLoginLogModel(BaseModel):
@@ -42,6 +42,24 @@ class SysFiles(BaseModel):
     usage: Optional[str] = Field(default=None, description='资源的使用率')
 
 
+class PwdHashInfo(BaseModel):
+    max_workers: Optional[int] = Field(default=None, description='密码线程池最大线程数')
+    pending: Optional[int] = Field(default=None, description='排队及执行中的任务数')
+    completed: Optional[int] = Field(default=None, description='已完成的任务数')
+    avg_queue_time: Optional[float] = Field(default=None, description='平均排队耗时（毫秒）')
+    max_queue_time: Optional[float] = Field(default=None, description='最大排队耗时（毫秒）')
+
+
+class LogWriterInfo(BaseModel):
+    queue_size: Optional[int] = Field(default=None, description='日志队列当前长度')
+    queue_maxsize: Optional[int] = Field(default=None, description='日志队列最大长度')
+    enqueued: Optional[int] = Field(default=None, description='已入队的日志数')
+    written: Optional[int] = Field(default=None, description='已写入数据库的日志数')
+    blocked: Optional[int] = Field(default=None, description='因队列已满等待入队的次数')
+    dropped: Optional[int] = Field(default=None, description='因队列已满丢弃的日志数')
+    failed: Optional[int] = Field(default=None, description='写入数据库失败的日志数')
+
+
 class ServerMonitorModel(BaseModel):
     """
     服务监控对应pydantic模型
@@ -52,3 +70,5 @@ class ServerMonitorModel(BaseModel):
     mem: Optional[MemoryInfo] = Field(description='內存相关信息')
     sys: Optional[SysInfo] = Field(description='服务器相关信息')
     sys_files: Optional[List[SysFiles]] = Field(description='磁盘相关信息')
+    pwd_hash: Optional[PwdHashInfo] = Field(default=None, description='密码线程池相关信息')
+    log_writer: Optional[LogWriterInfo] = Field(default=None, description='日志异步写入相关信息')
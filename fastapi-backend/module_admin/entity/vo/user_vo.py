@@ -2,7 +2,7 @@ import re
 from datetime import datetime
 from pydantic import BaseModel, ConfigDict, Field, model_validator
 from pydantic_validation_decorator import Network, NotBlank, Size, Xss
-from typing import List, Literal, Optional, Union
+from typing import Any, List, Literal, NamedTuple, Optional, Tuple, Union
 from exceptions.exception import ModelValidatorException
 from module_admin.entity.vo.dept_vo import DeptModel
 from module_admin.entity.vo.post_vo import PostModel
@@ -17,6 +17,18 @@ class TokenData(BaseModel):
     user_id: Union[int, None] = Field(default=None, description='用户ID')
 
 
+class UserPermissionInfo(NamedTuple):
+    """
+    用户及其部门、角色、岗位、菜单信息（只读）
+    """
+
+    user_basic_info: Any = None
+    user_dept_info: Any = None
+    user_role_info: Tuple[Any, ...] = ()
+    user_post_info: Tuple[Any, ...] = ()
+    user_menu_info: Tuple[Any, ...] = ()
+
+
 class UserModel(BaseModel):
     """
     用户表对应pydantic模型
@@ -3,6 +3,8 @@ from config.enums import RedisInitKeyConfig
 from config.get_redis import RedisUtil
 from module_admin.entity.vo.cache_vo import CacheInfoModel, CacheMonitorModel
 from module_admin.entity.vo.common_vo import CrudResponseModel
+from utils.cache_util import TokenCacheManager
+from utils.session_util import SessionUtil
 
 
 class CacheService:
@@ -24,7 +26,13 @@ class CacheService:
         command_stats = [
             dict(name=key.split('_')[1], value=str(value.get('calls'))) for key, value in command_stats_dict.items()
         ]
-        result = CacheMonitorModel(command_stats=command_stats, db_size=db_size, info=info)
+        result = CacheMonitorModel(
+            command_stats=command_stats,
+            db_size=db_size,
+            info=info,
+            session_renew_stats=SessionUtil.get_renew_statistic(),
+            token_cache_stats=TokenCacheManager.get_statistic(),
+        )
 
         return result
 
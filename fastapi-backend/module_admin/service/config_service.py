@@ -1,13 +1,15 @@
 from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import AsyncIterable, List, Union
 from config.constant import CommonConstant
 from config.enums import RedisInitKeyConfig
 from exceptions.exception import ServiceException
 from module_admin.dao.config_dao import ConfigDao
 from module_admin.entity.vo.common_vo import CrudResponseModel
 from module_admin.entity.vo.config_vo import ConfigModel, ConfigPageQueryModel, DeleteConfigModel
-from utils.common_util import export_list2excel, SqlalchemyUtil
+from utils.black_ip_util import BLACK_IP_CONFIG_KEY, BlackIpUtil
+from utils.common_util import SqlalchemyUtil
+from utils.export_util import ExportFormat, ExportUtil
 
 
 class ConfigService:
@@ -99,6 +101,8 @@ class ConfigService:
                 await request.app.state.redis.set(
                     f'{RedisInitKeyConfig.SYS_CONFIG.key}:{page_object.config_key}', page_object.config_value
                 )
+                if page_object.config_key == BLACK_IP_CONFIG_KEY:
+                    await BlackIpUtil.publish_refresh(request.app.state.redis)
                 return CrudResponseModel(is_success=True, message='新增成功')
             except Exception as e:
                 await query_db.rollback()
@@ -130,6 +134,8 @@ class ConfigService:
                     await request.app.state.redis.set(
                         f'{RedisInitKeyConfig.SYS_CONFIG.key}:{page_object.config_key}', page_object.config_value
                     )
+                    if BLACK_IP_CONFIG_KEY in (config_info.config_key, page_object.config_key):
+                        await BlackIpUtil.publish_refresh(request.app.state.redis)
                     return CrudResponseModel(is_success=True, message='更新成功')
                 except Exception as e:
                     await query_db.rollback()
@@ -161,6 +167,8 @@ class ConfigService:
                 await query_db.commit()
                 if delete_config_key_list:
                     await request.app.state.redis.delete(*delete_config_key_list)
+                if f'{RedisInitKeyConfig.SYS_CONFIG.key}:{BLACK_IP_CONFIG_KEY}' in delete_config_key_list:
+                    await BlackIpUtil.publish_refresh(request.app.state.redis)
                 return CrudResponseModel(is_success=True, message='删除成功')
             except Exception as e:
                 await query_db.rollback()
@@ -186,12 +194,15 @@ class ConfigService:
         return result
 
     @staticmethod
-    async def export_config_list_services(config_list: List):
+    async def export_config_list_services(
+        config_list: Union[List, AsyncIterable[List]], export_format: ExportFormat = 'xlsx'
+    ):
         """
         导出参数配置信息service
 
-        :param config_list: 参数配置信息列表
-        :return: 参数配置信息对应excel的二进制数据
+        :param config_list: 参数配置信息列表或逐批返回参数配置信息列表的异步生成器
+        :param export_format: 导出格式，xlsx或csv
+        :return: 分块返回参数配置信息导出文件内容的异步生成器
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -207,19 +218,14 @@ class ConfigService:
             'remark': '备注',
         }
 
-        data = config_list
-
-        for item in data:
-            if item.get('config_type') == 'Y':
-                item['config_type'] = '是'
-            else:
-                item['config_type'] = '否'
-        new_data = [
-            {mapping_dict.get(key): value for key, value in item.items() if mapping_dict.get(key)} for item in data
-        ]
-        binary_data = export_list2excel(new_data)
+        def format_rows(data: List):
+            for item in data:
+                if item.get('config_type') == 'Y':
+                    item['config_type'] = '是'
+                else:
+                    item['config_type'] = '否'
 
-        return binary_data
+        return ExportUtil.export_list(config_list, mapping_dict, format_rows, export_format)
 
     @classmethod
     async def refresh_sys_config_services(cls, request: Request, query_db: AsyncSession):
@@ -231,5 +237,6 @@ class ConfigService:
         :return: 刷新字典缓存校验结果
         """
         await cls.init_cache_sys_config_services(query_db, request.app.state.redis)
+        await BlackIpUtil.publish_refresh(request.app.state.redis)
 
         return CrudResponseModel(is_success=True, message='刷新成功')
@@ -1,10 +1,21 @@
+from collections import defaultdict
+from fastapi import Request
+from functools import partial
+from sqlalchemy import ColumnElement
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional, Set, Tuple
 from config.constant import CommonConstant
+from config.database import AsyncSessionLocal
 from exceptions.exception import ServiceException, ServiceWarning
+from module_admin.aspect.data_scope import GetDataScope
 from module_admin.dao.dept_dao import DeptDao
+from module_admin.dao.role_dao import RoleDao
 from module_admin.entity.vo.common_vo import CrudResponseModel
 from module_admin.entity.vo.dept_vo import DeleteDeptModel, DeptModel
+from module_admin.entity.vo.user_vo import CurrentUserModel
+from utils.cache_util import PrincipalCacheManager, TreeCacheManager
 from utils.common_util import SqlalchemyUtil
+from utils.log_util import logger
 
 
 class DeptService:
@@ -13,66 +24,162 @@ class DeptService:
     """
 
     @classmethod
-    async def get_dept_tree_services(cls, query_db: AsyncSession, page_object: DeptModel, data_scope_sql: str):
+    async def get_dept_tree_services(cls, request: Request, query_db: AsyncSession, current_user: CurrentUserModel):
         """
-        获取部门树信息service
+        获取部门树信息service，部门树按部门版本号及当前用户数据权限缓存，数据权限在缓存的部门层级上计算
 
+        :param request: Request对象
         :param query_db: orm对象
-        :param page_object: 查询参数对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param current_user: 当前用户对象
         :return: 部门树信息对象
         """
-        dept_list_result = await DeptDao.get_dept_list_for_tree(query_db, page_object, data_scope_sql)
-        dept_tree_result = cls.list_to_tree(dept_list_result)
+        version, dept_tree_source = await TreeCacheManager.get_source(
+            request.app.state.redis, 'dept', partial(cls.__load_dept_tree_source, query_db)
+        )
+        data_scope_key = GetDataScope.get_data_scope_key(current_user)
+        cache_key = ('dept', version, data_scope_key)
+        dept_tree_result = TreeCacheManager.get(cache_key)
+        if dept_tree_result is None:
+            data_scope_dept_id_set = cls.__get_data_scope_dept_id_set(dept_tree_source, data_scope_key)
+            dept_tree_result = cls.list_to_tree(
+                [
+                    (dept_id, parent_id, dept_name)
+                    for dept_id, parent_id, dept_name, normal in dept_tree_source['depts']
+                    if normal and (data_scope_dept_id_set is None or dept_id in data_scope_dept_id_set)
+                ]
+            )
+            TreeCacheManager.set(cache_key, dept_tree_result)
 
         return dept_tree_result
 
+    @classmethod
+    async def __load_dept_tree_source(cls, query_db: AsyncSession) -> Dict[str, List]:
+        """
+        加载部门树的源数据，包含全部部门的层级关系及角色自定义数据权限的部门关联
+
+        :param query_db: orm对象
+        :return: 部门树的源数据
+        """
+        dept_list = await DeptDao.get_dept_list_for_tree(query_db)
+        role_dept_list = await RoleDao.get_role_dept_id_list_dao(query_db)
+
+        return dict(
+            depts=[
+                [
+                    row.dept_id,
+                    row.parent_id,
+                    row.dept_name,
+                    row.status == CommonConstant.DEPT_NORMAL and row.del_flag == '0',
+                ]
+                for row in dept_list
+            ],
+            role_depts=[[row.role_id, row.dept_id] for row in role_dept_list],
+        )
+
+    @staticmethod
+    def __get_data_scope_dept_id_set(
+        dept_tree_source: Dict[str, List],
+        data_scope_key: Optional[Tuple[Tuple[str, ...], Tuple[int, ...], Optional[int], Optional[int]]],
+    ) -> Optional[Set[int]]:
+        """
+        在部门树的源数据上计算当前用户有数据权限的部门id，与GetDataScope生成的部门查询条件保持一致
+
+        :param dept_tree_source: 部门树的源数据
+        :param data_scope_key: 当前用户数据权限的归一化参数
+        :return: 有数据权限的部门id集合，拥有全部数据权限时返回None
+        """
+        if data_scope_key is None:
+            return None
+        data_scope_list, custom_role_ids, dept_id, _ = data_scope_key
+        dept_id_set = set()
+        for data_scope in data_scope_list:
+            if data_scope == GetDataScope.DATA_SCOPE_CUSTOM:
+                dept_id_set.update(
+                    role_dept_id
+                    for role_id, role_dept_id in dept_tree_source['role_depts']
+                    if role_id in custom_role_ids
+                )
+            elif data_scope == GetDataScope.DATA_SCOPE_DEPT:
+                dept_id_set.add(dept_id)
+            elif data_scope == GetDataScope.DATA_SCOPE_DEPT_AND_CHILD:
+                children_dict = defaultdict(list)
+                for child_id, parent_id, _, _ in dept_tree_source['depts']:
+                    children_dict[parent_id].append(child_id)
+                pending_dept_ids = [dept_id]
+                while pending_dept_ids:
+                    current_dept_id = pending_dept_ids.pop()
+                    dept_id_set.add(current_dept_id)
+                    pending_dept_ids.extend(children_dict.get(current_dept_id, []))
+
+        return dept_id_set
+
     @classmethod
     async def get_dept_for_edit_option_services(
-        cls, query_db: AsyncSession, page_object: DeptModel, data_scope_sql: str
+        cls, query_db: AsyncSession, page_object: DeptModel, data_scope_filter: ColumnElement
     ):
         """
         获取部门编辑部门树信息service
 
         :param query_db: orm对象
         :param page_object: 查询参数对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_filter: 数据权限对应的查询条件
         :return: 部门树信息对象
         """
-        dept_list_result = await DeptDao.get_dept_info_for_edit_option(query_db, page_object, data_scope_sql)
+        dept_list_result = await DeptDao.get_dept_info_for_edit_option(query_db, page_object, data_scope_filter)
 
         return SqlalchemyUtil.serialize_result(dept_list_result)
 
     @classmethod
-    async def get_dept_list_services(cls, query_db: AsyncSession, page_object: DeptModel, data_scope_sql: str):
+    async def get_dept_list_services(
+        cls, query_db: AsyncSession, page_object: DeptModel, data_scope_filter: ColumnElement
+    ):
         """
         获取部门列表信息service
 
         :param query_db: orm对象
         :param page_object: 分页查询参数对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_filter: 数据权限对应的查询条件
         :return: 部门列表信息对象
         """
-        dept_list_result = await DeptDao.get_dept_list(query_db, page_object, data_scope_sql)
+        dept_list_result = await DeptDao.get_dept_list(query_db, page_object, data_scope_filter)
 
         return SqlalchemyUtil.serialize_result(dept_list_result)
 
     @classmethod
-    async def check_dept_data_scope_services(cls, query_db: AsyncSession, dept_id: int, data_scope_sql: str):
+    async def check_dept_data_scope_services(
+        cls, query_db: AsyncSession, dept_id: int, data_scope_filter: ColumnElement
+    ):
         """
         校验部门是否有数据权限service
 
         :param query_db: orm对象
         :param dept_id: 部门id
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_filter: 数据权限对应的查询条件
         :return: 校验结果
         """
-        depts = await DeptDao.get_dept_list(query_db, DeptModel(dept_id=dept_id), data_scope_sql)
+        depts = await DeptDao.get_dept_list(query_db, DeptModel(dept_id=dept_id), data_scope_filter)
         if depts:
             return CrudResponseModel(is_success=True, message='校验通过')
         else:
             raise ServiceException(message='没有权限访问部门数据')
 
+    @classmethod
+    async def init_dept_closure_services(cls):
+        """
+        应用启动时校验部门闭包表，存在缺少自身关系的部门时根据部门表重建部门闭包表
+
+        :return:
+        """
+        async with AsyncSessionLocal() as query_db:
+            if await DeptDao.count_dept_without_closure_dao(query_db):
+                try:
+                    await DeptDao.rebuild_dept_closure_dao(query_db)
+                    await query_db.commit()
+                    logger.info('部门闭包表重建成功')
+                except Exception as e:
+                    await query_db.rollback()
+                    raise e
+
     @classmethod
     async def check_dept_name_unique_services(cls, query_db: AsyncSession, page_object: DeptModel):
         """
@@ -91,10 +198,11 @@ class DeptService:
         return CommonConstant.UNIQUE
 
     @classmethod
-    async def add_dept_services(cls, query_db: AsyncSession, page_object: DeptModel):
+    async def add_dept_services(cls, request: Request, query_db: AsyncSession, page_object: DeptModel):
         """
         新增部门信息service
 
+        :param request: Request对象
         :param query_db: orm对象
         :param page_object: 新增部门对象
         :return: 新增部门校验结果
@@ -106,18 +214,21 @@ class DeptService:
             raise ServiceException(message=f'部门{parent_info.dept_name}停用，不允许新增')
         page_object.ancestors = f'{parent_info.ancestors},{page_object.parent_id}'
         try:
-            await DeptDao.add_dept_dao(query_db, page_object)
+            add_dept = await DeptDao.add_dept_dao(query_db, page_object)
+            await DeptDao.add_dept_closure_dao(query_db, add_dept.dept_id, page_object.parent_id)
             await query_db.commit()
+            await TreeCacheManager.bump_version(request.app.state.redis, 'dept')
             return CrudResponseModel(is_success=True, message='新增成功')
         except Exception as e:
             await query_db.rollback()
             raise e
 
     @classmethod
-    async def edit_dept_services(cls, query_db: AsyncSession, page_object: DeptModel):
+    async def edit_dept_services(cls, request: Request, query_db: AsyncSession, page_object: DeptModel):
         """
         编辑部门信息service
 
+        :param request: Request对象
         :param query_db: orm对象
         :param page_object: 编辑部门对象
         :return: 编辑部门校验结果
@@ -126,6 +237,10 @@ class DeptService:
             raise ServiceException(message=f'修改部门{page_object.dept_name}失败，部门名称已存在')
         elif page_object.dept_id == page_object.parent_id:
             raise ServiceException(message=f'修改部门{page_object.dept_name}失败，上级部门不能是自己')
+        elif page_object.parent_id and await DeptDao.check_dept_descendant_dao(
+            query_db, page_object.dept_id, page_object.parent_id
+        ):
+            raise ServiceException(message=f'修改部门{page_object.dept_name}失败，上级部门不能是自己的下级部门')
         elif (
             page_object.status == CommonConstant.DEPT_DISABLE
             and (await DeptDao.count_normal_children_dept_dao(query_db, page_object.dept_id)) > 0
@@ -138,7 +253,10 @@ class DeptService:
                 new_ancestors = f'{new_parent_dept.ancestors},{new_parent_dept.dept_id}'
                 old_ancestors = old_dept.ancestors
                 page_object.ancestors = new_ancestors
-                await cls.update_dept_children(query_db, page_object.dept_id, new_ancestors, old_ancestors)
+                if new_ancestors != old_ancestors:
+                    await cls.update_dept_children(query_db, page_object.dept_id, new_ancestors, old_ancestors)
+                if new_parent_dept.dept_id != old_dept.parent_id:
+                    await DeptDao.move_dept_closure_dao(query_db, page_object.dept_id, new_parent_dept.dept_id)
             edit_dept = page_object.model_dump(exclude_unset=True)
             await DeptDao.edit_dept_dao(query_db, edit_dept)
             if (
@@ -148,16 +266,19 @@ class DeptService:
             ):
                 await cls.update_parent_dept_status_normal(query_db, page_object)
             await query_db.commit()
+            PrincipalCacheManager.clear()
+            await TreeCacheManager.bump_version(request.app.state.redis, 'dept')
             return CrudResponseModel(is_success=True, message='更新成功')
         except Exception as e:
             await query_db.rollback()
             raise e
 
     @classmethod
-    async def delete_dept_services(cls, query_db: AsyncSession, page_object: DeleteDeptModel):
+    async def delete_dept_services(cls, request: Request, query_db: AsyncSession, page_object: DeleteDeptModel):
         """
         删除部门信息service
 
+        :param request: Request对象
         :param query_db: orm对象
         :param page_object: 删除部门对象
         :return: 删除部门校验结果
@@ -173,6 +294,8 @@ class DeptService:
 
                     await DeptDao.delete_dept_dao(query_db, DeptModel(dept_id=dept_id))
                 await query_db.commit()
+                PrincipalCacheManager.clear()
+                await TreeCacheManager.bump_version(request.app.state.redis, 'dept')
                 return CrudResponseModel(is_success=True, message='删除成功')
             except Exception as e:
                 await query_db.rollback()
@@ -202,12 +325,12 @@ class DeptService:
         """
         工具方法：根据部门列表信息生成树形嵌套数据
 
-        :param permission_list: 部门列表信息
+        :param permission_list: 部门列表信息，元素为部门id、上级部门id及部门名称
         :return: 部门树形嵌套数据
         """
         permission_list = [
-            dict(key=str(item.dept_id), title=item.dept_name, value=str(item.dept_id), parent_id=str(item.parent_id))
-            for item in permission_list
+            dict(key=str(dept_id), title=dept_name, value=str(dept_id), parent_id=str(parent_id))
+            for dept_id, parent_id, dept_name in permission_list
         ]
         # 转成id为key的字典
         mapping: dict = dict(zip([i['key'] for i in permission_list], permission_list))
@@ -229,21 +352,6 @@ class DeptService:
 
         return container
 
-    @classmethod
-    async def replace_first(cls, original_str: str, old_str: str, new_str: str):
-        """
-        工具方法：替换字符串
-
-        :param original_str: 需要替换的原始字符串
-        :param old_str: 用于匹配的字符串
-        :param new_str: 替换的字符串
-        :return: 替换后的字符串
-        """
-        if original_str.startswith(old_str):
-            return original_str.replace(old_str, new_str, 1)
-        else:
-            return original_str
-
     @classmethod
     async def update_parent_dept_status_normal(cls, query_db: AsyncSession, dept: DeptModel):
         """
@@ -267,10 +375,4 @@ class DeptService:
         :param old_ancestors: 旧的祖先
         :return:
         """
-        children = await DeptDao.get_children_dept_dao(query_db, dept_id)
-        update_children = []
-        for child in children:
-            child_ancestors = await cls.replace_first(child.ancestors, old_ancestors, new_ancestors)
-            update_children.append({'dept_id': child.dept_id, 'ancestors': child_ancestors})
-        if children:
-            await DeptDao.update_dept_children_dao(query_db, update_children)
+        await DeptDao.update_dept_children_ancestors_dao(query_db, dept_id, new_ancestors, old_ancestors)
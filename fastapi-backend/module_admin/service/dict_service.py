@@ -1,7 +1,7 @@
 import json
 from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import AsyncIterable, List, Union
 from config.constant import CommonConstant
 from config.enums import RedisInitKeyConfig
 from exceptions.exception import ServiceException
@@ -15,7 +15,8 @@ from module_admin.entity.vo.dict_vo import (
     DictTypeModel,
     DictTypePageQueryModel,
 )
-from utils.common_util import export_list2excel, SqlalchemyUtil
+from utils.common_util import SqlalchemyUtil
+from utils.export_util import ExportFormat, ExportUtil
 
 
 class DictTypeService:
@@ -172,12 +173,15 @@ class DictTypeService:
         return result
 
     @staticmethod
-    async def export_dict_type_list_services(dict_type_list: List):
+    async def export_dict_type_list_services(
+        dict_type_list: Union[List, AsyncIterable[List]], export_format: ExportFormat = 'xlsx'
+    ):
         """
         导出字典类型信息service
 
-        :param dict_type_list: 字典信息列表
-        :return: 字典信息对应excel的二进制数据
+        :param dict_type_list: 字典信息列表或逐批返回字典信息列表的异步生成器
+        :param export_format: 导出格式，xlsx或csv
+        :return: 分块返回字典信息导出文件内容的异步生成器
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -192,19 +196,14 @@ class DictTypeService:
             'remark': '备注',
         }
 
-        data = dict_type_list
-
-        for item in data:
-            if item.get('status') == '0':
-                item['status'] = '正常'
-            else:
-                item['status'] = '停用'
-        new_data = [
-            {mapping_dict.get(key): value for key, value in item.items() if mapping_dict.get(key)} for item in data
-        ]
-        binary_data = export_list2excel(new_data)
+        def format_rows(data: List):
+            for item in data:
+                if item.get('status') == '0':
+                    item['status'] = '正常'
+                else:
+                    item['status'] = '停用'
 
-        return binary_data
+        return ExportUtil.export_list(dict_type_list, mapping_dict, format_rows, export_format)
 
     @classmethod
     async def refresh_sys_dict_services(cls, request: Request, query_db: AsyncSession):
@@ -429,12 +428,15 @@ class DictDataService:
         return result
 
     @staticmethod
-    async def export_dict_data_list_services(dict_data_list: List):
+    async def export_dict_data_list_services(
+        dict_data_list: Union[List, AsyncIterable[List]], export_format: ExportFormat = 'xlsx'
+    ):
         """
         导出字典数据信息service
 
-        :param dict_data_list: 字典数据信息列表
-        :return: 字典数据信息对应excel的二进制数据
+        :param dict_data_list: 字典数据信息列表或逐批返回字典数据信息列表的异步生成器
+        :param export_format: 导出格式，xlsx或csv
+        :return: 分块返回字典数据信息导出文件内容的异步生成器
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -454,20 +456,15 @@ class DictDataService:
             'remark': '备注',
         }
 
-        data = dict_data_list
-
-        for item in data:
-            if item.get('status') == '0':
-                item['status'] = '正常'
-            else:
-                item['status'] = '停用'
-            if item.get('is_default') == 'Y':
-                item['is_default'] = '是'
-            else:
-                item['is_default'] = '否'
-        new_data = [
-            {mapping_dict.get(key): value for key, value in item.items() if mapping_dict.get(key)} for item in data
-        ]
-        binary_data = export_list2excel(new_data)
-
-        return binary_data
+        def format_rows(data: List):
+            for item in data:
+                if item.get('status') == '0':
+                    item['status'] = '正常'
+                else:
+                    item['status'] = '停用'
+                if item.get('is_default') == 'Y':
+                    item['is_default'] = '是'
+                else:
+                    item['is_default'] = '否'
+
+        return ExportUtil.export_list(dict_data_list, mapping_dict, format_rows, export_format)
@@ -0,0 +1,250 @@
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime
+from fastapi import Request
+from redis import asyncio as aioredis
+from starlette.concurrency import run_in_threadpool
+from typing import AsyncGenerator, AsyncIterable, Awaitable, Callable, Dict, List, Optional
+from config.enums import RedisInitKeyConfig
+from config.env import AppConfig, UploadConfig
+from exceptions.exception import ServiceException
+from module_admin.entity.vo.common_vo import ExportJobModel
+from utils.export_util import ExportFormat
+from utils.log_util import logger
+
+
+EXPORT_FILE_PREFIX = 'export_'
+
+
+class ExportJobService:
+    """
+    后台导出任务模块服务层，导出任务放入有界队列由固定数量的后台任务执行，导出文件写入下载目录，任务状态及进度保存至redis，
+    前端轮询任务状态，成功后通过通用下载接口下载并删除导出文件
+    """
+
+    queue: Optional[asyncio.Queue] = None
+    worker_tasks: List[asyncio.Task] = []
+
+    @classmethod
+    async def start_workers(cls):
+        """
+        应用启动时创建导出任务队列及后台执行任务
+
+        :return:
+        """
+        cls.queue = asyncio.Queue(maxsize=AppConfig.app_export_job_queue_maxsize)
+        cls.worker_tasks = [asyncio.create_task(cls.__run()) for _ in range(AppConfig.app_export_job_workers)]
+
+    @classmethod
+    async def stop_workers(cls):
+        """
+        应用关闭时停止后台执行任务，执行中及等待执行的导出任务标记为失败
+
+        :return:
+        """
+        for worker_task in cls.worker_tasks:
+            worker_task.cancel()
+        await asyncio.gather(*cls.worker_tasks, return_exceptions=True)
+        cls.worker_tasks = []
+        if cls.queue is not None:
+            queue, cls.queue = cls.queue, None
+            while not queue.empty():
+                export_job = queue.get_nowait()
+                await cls.__update_job(
+                    export_job['redis'], export_job['job_id'], status='failed', error_msg='应用已关闭，导出任务已取消'
+                )
+
+    @classmethod
+    async def create_export_job_services(
+        cls,
+        request: Request,
+        title: str,
+        data: AsyncIterable[List],
+        exporter: Callable[[AsyncIterable[List]], Awaitable[AsyncIterable[bytes]]],
+        export_format: ExportFormat,
+        user_id: int,
+    ) -> ExportJobModel:
+        """
+        创建后台导出任务service
+
+        :param request: Request对象
+        :param title: 导出模块名称
+        :param data: 逐批返回导出数据列表的异步生成器，需使用独立的会话读取数据
+        :param exporter: 导出方法，接收逐批返回导出数据列表的异步生成器，返回分块返回文件内容的异步生成器
+        :param export_format: 导出格式，xlsx或csv
+        :param user_id: 创建任务的用户id
+        :return: 导出任务信息
+        """
+        if cls.queue is None:
+            raise ServiceException(message='后台导出任务未启动')
+        export_job = ExportJobModel(
+            job_id=uuid.uuid4().hex,
+            title=title,
+            export_format=export_format,
+            status='pending',
+            user_id=user_id,
+            create_time=datetime.now(),
+        )
+        redis = request.app.state.redis
+        await redis.hset(
+            cls.__get_job_key(export_job.job_id),
+            mapping={key: value for key, value in export_job.model_dump(mode='json').items() if value is not None},
+        )
+        await redis.expire(cls.__get_job_key(export_job.job_id), AppConfig.app_export_job_expire)
+        try:
+            cls.queue.put_nowait(
+                dict(
+                    job_id=export_job.job_id,
+                    export_format=export_format,
+                    redis=redis,
+                    data=data,
+                    exporter=exporter,
+                )
+            )
+        except asyncio.QueueFull:
+            await redis.delete(cls.__get_job_key(export_job.job_id))
+            raise ServiceException(message='当前导出任务过多，请稍后再试')
+
+        return export_job
+
+    @classmethod
+    async def get_export_job_services(cls, request: Request, job_id: str, user_id: int) -> ExportJobModel:
+        """
+        获取后台导出任务状态service
+
+        :param request: Request对象
+        :param job_id: 导出任务id
+        :param user_id: 当前用户id
+        :return: 导出任务信息
+        """
+        export_job_info = await request.app.state.redis.hgetall(cls.__get_job_key(job_id))
+        if not export_job_info or str(export_job_info.get('user_id')) != str(user_id):
+            raise ServiceException(message='导出任务不存在或已过期')
+
+        return ExportJobModel(**export_job_info)
+
+    @classmethod
+    async def __run(cls):
+        """
+        后台执行任务，循环从队列中获取导出任务并执行
+
+        :return:
+        """
+        while True:
+            export_job = await cls.queue.get()
+            try:
+                await cls.__execute(export_job)
+            except Exception as e:
+                logger.exception(f'后台导出任务{export_job["job_id"]}状态更新失败，详细错误信息：{e}')
+            finally:
+                cls.queue.task_done()
+
+    @classmethod
+    async def __execute(cls, export_job: Dict):
+        """
+        执行导出任务，导出文件先写入临时文件，完成后再重命名为正式文件名，避免下载到未写完的文件
+
+        :param export_job: 导出任务
+        :return:
+        """
+        redis: aioredis.Redis = export_job['redis']
+        job_id = export_job['job_id']
+        file_name = f'{EXPORT_FILE_PREFIX}{job_id}.{export_job["export_format"]}'
+        filepath = os.path.join(UploadConfig.DOWNLOAD_PATH, file_name)
+        part_filepath = f'{filepath}.part'
+        await cls.__update_job(redis, job_id, status='running')
+        try:
+            await run_in_threadpool(cls.__clean_expired_files)
+            content = await export_job['exporter'](cls.__count_rows(redis, job_id, export_job['data']))
+            with open(part_filepath, 'wb') as export_file:
+                async for chunk in content:
+                    await run_in_threadpool(export_file.write, chunk)
+            os.replace(part_filepath, filepath)
+        except asyncio.CancelledError:
+            cls.__remove_file(part_filepath)
+            await cls.__update_job(redis, job_id, status='failed', error_msg='应用已关闭，导出任务已取消')
+            raise
+        except Exception as e:
+            logger.exception(f'后台导出任务{job_id}执行失败，详细错误信息：{e}')
+            cls.__remove_file(part_filepath)
+            await cls.__update_job(redis, job_id, status='failed', error_msg=str(e) or '导出失败')
+            return
+        await cls.__update_job(redis, job_id, status='success', file_name=file_name)
+
+    @classmethod
+    async def __count_rows(
+        cls, redis: aioredis.Redis, job_id: str, data: AsyncIterable[List]
+    ) -> AsyncGenerator[List, None]:
+        """
+        包装导出数据异步生成器，每批数据写入后更新任务的已导出行数
+
+        :param redis: redis对象
+        :param job_id: 导出任务id
+        :param data: 逐批返回导出数据列表的异步生成器
+        :return: 逐批返回导出数据列表的异步生成器
+        """
+        processed_rows = 0
+        try:
+            async for rows in data:
+                yield rows
+                processed_rows += len(rows)
+                await redis.hset(cls.__get_job_key(job_id), 'processed_rows', processed_rows)
+        finally:
+            if hasattr(data, 'aclose'):
+                await data.aclose()
+
+    @classmethod
+    async def __update_job(cls, redis: aioredis.Redis, job_id: str, **fields):
+        """
+        更新导出任务状态，任务结束时记录完成时间并重新计算过期时间
+
+        :param redis: redis对象
+        :param job_id: 导出任务id
+        :param fields: 需要更新的任务字段
+        :return:
+        """
+        if fields.get('status') in ('success', 'failed'):
+            fields['finish_time'] = datetime.now().isoformat()
+        job_key = cls.__get_job_key(job_id)
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hset(job_key, mapping=fields)
+            pipe.expire(job_key, AppConfig.app_export_job_expire)
+            await pipe.execute()
+
+    @classmethod
+    def __clean_expired_files(cls):
+        """
+        清理下载目录中超过保留时间仍未下载的导出文件
+
+        :return:
+        """
+        expire_timestamp = time.time() - AppConfig.app_export_job_expire
+        with os.scandir(UploadConfig.DOWNLOAD_PATH) as entries:
+            for entry in entries:
+                if entry.name.startswith(EXPORT_FILE_PREFIX) and entry.stat().st_mtime < expire_timestamp:
+                    cls.__remove_file(entry.path)
+
+    @staticmethod
+    def __remove_file(filepath: str):
+        """
+        删除文件，文件不存在时忽略
+
+        :param filepath: 文件路径
+        :return:
+        """
+        try:
+            os.remove(filepath)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def __get_job_key(job_id: str) -> str:
+        """
+        获取导出任务在redis中的键名
+
+        :param job_id: 导出任务id
+        :return: 键名
+        """
+        return f'{RedisInitKeyConfig.EXPORT_JOB.key}:{job_id}'
@@ -1,12 +1,14 @@
 from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import AsyncGenerator, AsyncIterable, List, Union
+from config.database import AsyncSessionLocal
 from module_admin.dao.job_log_dao import JobLogDao
 from module_admin.entity.vo.common_vo import CrudResponseModel
 from module_admin.entity.vo.job_vo import DeleteJobLogModel, JobLogModel, JobLogPageQueryModel
 from module_admin.service.dict_service import DictDataService
-from utils.common_util import export_list2excel
+from utils.export_util import ExportFormat, ExportUtil
+from utils.page_util import STREAM_CHUNK_SIZE
 
 
 class JobLogService:
@@ -30,6 +32,21 @@ class JobLogService:
 
         return job_log_list_result
 
+    @classmethod
+    async def stream_job_log_list_services(
+        cls, query_object: JobLogPageQueryModel, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncGenerator[List, None]:
+        """
+        流式获取定时任务日志列表信息service，流式响应开始迭代时请求依赖中的会话已关闭，因此使用独立的会话
+
+        :param query_object: 查询参数对象
+        :param chunk_size: 每批读取的行数
+        :return: 逐批返回定时任务日志列表信息的异步生成器
+        """
+        async with AsyncSessionLocal() as query_db:
+            async for rows in JobLogDao.stream_job_log_list(query_db, query_object, chunk_size):
+                yield rows
+
     @classmethod
     def add_job_log_services(cls, query_db: Session, page_object: JobLogModel):
         """
@@ -91,13 +108,16 @@ class JobLogService:
         return CrudResponseModel(**result)
 
     @staticmethod
-    async def export_job_log_list_services(request: Request, job_log_list: List):
+    async def export_job_log_list_services(
+        request: Request, job_log_list: Union[List, AsyncIterable[List]], export_format: ExportFormat = 'xlsx'
+    ):
         """
         导出定时任务日志信息service
 
         :param request: Request对象
-        :param job_log_list: 定时任务日志信息列表
-        :return: 定时任务日志信息对应excel的二进制数据
+        :param job_log_list: 定时任务日志信息列表或逐批返回定时任务日志信息列表的异步生成器
+        :param export_format: 导出格式，xlsx或csv
+        :return: 分块返回定时任务日志信息导出文件内容的异步生成器
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -115,7 +135,6 @@ class JobLogService:
             'create_time': '创建时间',
         }
 
-        data = job_log_list
         job_group_list = await DictDataService.query_dict_data_list_from_cache_services(
             request.app.state.redis, dict_type='sys_job_group'
         )
@@ -129,18 +148,15 @@ class JobLogService:
         ]
         job_executor_option_dict = {item.get('value'): item for item in job_executor_option}
 
-        for item in data:
-            if item.get('status') == '0':
-                item['status'] = '正常'
-            else:
-                item['status'] = '暂停'
-            if str(item.get('job_group')) in job_group_option_dict.keys():
-                item['job_group'] = job_group_option_dict.get(str(item.get('job_group'))).get('label')
-            if str(item.get('job_executor')) in job_executor_option_dict.keys():
-                item['job_executor'] = job_executor_option_dict.get(str(item.get('job_executor'))).get('label')
-        new_data = [
-            {mapping_dict.get(key): value for key, value in item.items() if mapping_dict.get(key)} for item in data
-        ]
-        binary_data = export_list2excel(new_data)
-
-        return binary_data
+        def format_rows(data: List):
+            for item in data:
+                if item.get('status') == '0':
+                    item['status'] = '正常'
+                else:
+                    item['status'] = '暂停'
+                if str(item.get('job_group')) in job_group_option_dict.keys():
+                    item['job_group'] = job_group_option_dict.get(str(item.get('job_group'))).get('label')
+                if str(item.get('job_executor')) in job_executor_option_dict.keys():
+                    item['job_executor'] = job_executor_option_dict.get(str(item.get('job_executor'))).get('label')
+
+        return ExportUtil.export_list(job_log_list, mapping_dict, format_rows, export_format)
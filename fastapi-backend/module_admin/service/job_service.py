@@ -1,6 +1,6 @@
 from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import AsyncIterable, List, Union
 from config.constant import CommonConstant, JobConstant
 from config.get_scheduler import SchedulerUtil
 from exceptions.exception import ServiceException
@@ -8,9 +8,10 @@ from module_admin.dao.job_dao import JobDao
 from module_admin.entity.vo.common_vo import CrudResponseModel
 from module_admin.entity.vo.job_vo import DeleteJobModel, EditJobModel, JobModel, JobPageQueryModel
 from module_admin.service.dict_service import DictDataService
-from utils.common_util import export_list2excel, SqlalchemyUtil
+from utils.common_util import SqlalchemyUtil
 from utils.cron_util import CronUtil
 from utils.string_util import StringUtil
+from utils.export_util import ExportFormat, ExportUtil
 
 
 class JobService:
@@ -199,13 +200,16 @@ class JobService:
         return result
 
     @staticmethod
-    async def export_job_list_services(request: Request, job_list: List):
+    async def export_job_list_services(
+        request: Request, job_list: Union[List, AsyncIterable[List]], export_format: ExportFormat = 'xlsx'
+    ):
         """
         导出定时任务信息service
 
         :param request: Request对象
-        :param job_list: 定时任务信息列表
-        :return: 定时任务信息对应excel的二进制数据
+        :param job_list: 定时任务信息列表或逐批返回定时任务信息列表的异步生成器
+        :param export_format: 导出格式，xlsx或csv
+        :return: 分块返回定时任务信息导出文件内容的异步生成器
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -227,7 +231,6 @@ class JobService:
             'remark': '备注',
         }
 
-        data = job_list
         job_group_list = await DictDataService.query_dict_data_list_from_cache_services(
             request.app.state.redis, dict_type='sys_job_group'
         )
@@ -241,28 +244,25 @@ class JobService:
         ]
         job_executor_option_dict = {item.get('value'): item for item in job_executor_option}
 
-        for item in data:
-            if item.get('status') == '0':
-                item['status'] = '正常'
-            else:
-                item['status'] = '暂停'
-            if str(item.get('job_group')) in job_group_option_dict.keys():
-                item['job_group'] = job_group_option_dict.get(str(item.get('job_group'))).get('label')
-            if str(item.get('job_executor')) in job_executor_option_dict.keys():
-                item['job_executor'] = job_executor_option_dict.get(str(item.get('job_executor'))).get('label')
-            if item.get('misfire_policy') == '1':
-                item['misfire_policy'] = '立即执行'
-            elif item.get('misfire_policy') == '2':
-                item['misfire_policy'] = '执行一次'
-            else:
-                item['misfire_policy'] = '放弃执行'
-            if item.get('concurrent') == '0':
-                item['concurrent'] = '允许'
-            else:
-                item['concurrent'] = '禁止'
-        new_data = [
-            {mapping_dict.get(key): value for key, value in item.items() if mapping_dict.get(key)} for item in data
-        ]
-        binary_data = export_list2excel(new_data)
+        def format_rows(data: List):
+            for item in data:
+                if item.get('status') == '0':
+                    item['status'] = '正常'
+                else:
+                    item['status'] = '暂停'
+                if str(item.get('job_group')) in job_group_option_dict.keys():
+                    item['job_group'] = job_group_option_dict.get(str(item.get('job_group'))).get('label')
+                if str(item.get('job_executor')) in job_executor_option_dict.keys():
+                    item['job_executor'] = job_executor_option_dict.get(str(item.get('job_executor'))).get('label')
+                if item.get('misfire_policy') == '1':
+                    item['misfire_policy'] = '立即执行'
+                elif item.get('misfire_policy') == '2':
+                    item['misfire_policy'] = '执行一次'
+                else:
+                    item['misfire_policy'] = '放弃执行'
+                if item.get('concurrent') == '0':
+                    item['concurrent'] = '允许'
+                else:
+                    item['concurrent'] = '禁止'
 
-        return binary_data
+        return ExportUtil.export_list(job_list, mapping_dict, format_rows, export_format)
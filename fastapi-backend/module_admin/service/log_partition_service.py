@@ -0,0 +1,159 @@
+import re
+from datetime import date
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional
+from config.env import AppConfig
+from module_admin.dao.log_partition_dao import LogPartitionDao
+from module_admin.entity.do.log_do import SysLogininfor, SysOperLog
+from utils.log_util import logger
+
+
+# 需要按月分区的日志表及其分区时间列
+LOG_PARTITION_TABLES = {
+    SysOperLog.__tablename__: SysOperLog.oper_time,
+    SysLogininfor.__tablename__: SysLogininfor.login_time,
+}
+MONTH_PARTITION_PATTERN = re.compile(r'p(\d{6})$')
+
+
+class LogPartitionService:
+    """
+    日志表分区管理模块服务层
+    """
+
+    @classmethod
+    async def maintain_log_partitions_services(
+        cls,
+        query_db: AsyncSession,
+        retention_months: Optional[int] = None,
+        ahead_months: Optional[int] = None,
+        archive: Optional[bool] = None,
+    ):
+        """
+        维护日志表分区service：预建未来月份分区，并删除或归档超出保留期的月分区；
+        mysql的分区ddl会隐式提交，失败时回滚不会撤销已执行的步骤，各步骤可由下次维护任务重复执行
+
+        :param query_db: orm对象
+        :param retention_months: 日志保留月数（含当月），默认读取应用配置
+        :param ahead_months: 预建未来月份分区的数量，默认读取应用配置
+        :param archive: 过期分区是否归档为独立表而非直接删除，默认读取应用配置
+        :return: 各日志表的维护结果
+        """
+        retention_months = int(retention_months or AppConfig.app_log_retention_months)
+        ahead_months = int(ahead_months if ahead_months is not None else AppConfig.app_log_partition_ahead_months)
+        archive = AppConfig.app_log_retention_archive if archive is None else str(archive).lower() in ('true', '1')
+        current_month = date.today().replace(day=1)
+        expire_month = cls.__add_months(current_month, 1 - retention_months)
+        result = {}
+        for table_name, time_column in LOG_PARTITION_TABLES.items():
+            try:
+                result[table_name] = await cls.__maintain_table_partitions(
+                    query_db, table_name, time_column, current_month, expire_month, ahead_months, archive
+                )
+                await query_db.commit()
+            except Exception as e:
+                await query_db.rollback()
+                logger.exception(f'日志表{table_name}分区维护失败，详细错误信息：{e}')
+                raise e
+        logger.info(f'日志表分区维护完成：{result}')
+
+        return result
+
+    @classmethod
+    async def __maintain_table_partitions(
+        cls,
+        query_db: AsyncSession,
+        table_name: str,
+        time_column,
+        current_month: date,
+        expire_month: date,
+        ahead_months: int,
+        archive: bool,
+    ) -> Dict:
+        """
+        维护单张日志表的分区
+
+        :param query_db: orm对象
+        :param table_name: 表名
+        :param time_column: 分区时间列
+        :param current_month: 当月起始日期
+        :param expire_month: 保留期内最早月份的起始日期
+        :param ahead_months: 预建未来月份分区的数量
+        :param archive: 过期分区是否归档
+        :return: 维护结果
+        """
+        partition_name_list = await LogPartitionDao.get_partition_name_list(query_db, table_name)
+        if not partition_name_list:
+            # 未分区的日志表退化为按时间范围一次性删除过期日志
+            deleted_count = await LogPartitionDao.delete_expired_log_dao(query_db, time_column, expire_month)
+            return dict(partitioned=False, deleted=deleted_count)
+        month_partition_dict = cls.__get_month_partition_dict(partition_name_list)
+        if month_partition_dict:
+            # 分区只能在已有月分区之后按月份升序追加
+            latest_suffix = max(month_partition_dict)
+            first_month = cls.__add_months(date(int(latest_suffix[:4]), int(latest_suffix[4:]), 1), 1)
+        else:
+            # 首次拆分时从最早日志所在月份开始补建历史月分区，避免历史日志全部落入当月分区而无法按月清理
+            earliest_log_time = await LogPartitionDao.get_earliest_log_time(query_db, time_column)
+            first_month = current_month
+            if earliest_log_time is not None:
+                first_month = min(first_month, date(earliest_log_time.year, earliest_log_time.month, 1))
+        last_month = cls.__add_months(current_month, ahead_months)
+        month_start_list = []
+        month_start = first_month
+        while month_start <= last_month:
+            month_start_list.append(month_start)
+            month_start = cls.__add_months(month_start, 1)
+        if month_start_list:
+            await LogPartitionDao.add_month_partitions_dao(query_db, table_name, time_column, month_start_list)
+            month_partition_dict = cls.__get_month_partition_dict(
+                await LogPartitionDao.get_partition_name_list(query_db, table_name)
+            )
+        added_list = [month_start.strftime('%Y%m') for month_start in month_start_list]
+        removed_list = []
+        expire_suffix = expire_month.strftime('%Y%m')
+        for suffix, partition_name in sorted(month_partition_dict.items()):
+            if suffix >= expire_suffix:
+                continue
+            if archive:
+                await LogPartitionDao.archive_partition_dao(
+                    query_db, table_name, partition_name, f'{table_name}_archive_{suffix}'
+                )
+            else:
+                await LogPartitionDao.drop_partition_dao(query_db, table_name, partition_name)
+            removed_list.append(suffix)
+
+        return dict(
+            partitioned=True,
+            added=added_list,
+            archived=removed_list if archive else [],
+            dropped=[] if archive else removed_list,
+        )
+
+    @staticmethod
+    def __get_month_partition_dict(partition_name_list: List[str]) -> Dict[str, str]:
+        """
+        从分区名称列表中解析月分区
+
+        :param partition_name_list: 分区名称列表
+        :return: 月份（YYYYMM）与分区名称的映射
+        """
+        month_partition_dict = {}
+        for partition_name in partition_name_list:
+            match = MONTH_PARTITION_PATTERN.search(partition_name)
+            if match:
+                month_partition_dict[match.group(1)] = partition_name
+
+        return month_partition_dict
+
+    @staticmethod
+    def __add_months(month_start: date, months: int) -> date:
+        """
+        计算月份偏移后的月份起始日期
+
+        :param month_start: 月份起始日期
+        :param months: 偏移月数，可为负数
+        :return: 偏移后的月份起始日期
+        """
+        month_index = month_start.year * 12 + month_start.month - 1 + months
+        return date(month_index // 12, month_index % 12 + 1, 1)
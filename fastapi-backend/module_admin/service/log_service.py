@@ -1,6 +1,10 @@
+import asyncio
 from fastapi import Request
+from sqlalchemy.exc import InterfaceError, OperationalError
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import AsyncGenerator, AsyncIterable, List, Optional, Union
+from config.database import AsyncSessionLocal
+from config.env import AppConfig
 from exceptions.exception import ServiceException
 from module_admin.dao.log_dao import LoginLogDao, OperationLogDao
 from module_admin.entity.vo.common_vo import CrudResponseModel
@@ -14,7 +18,9 @@ from module_admin.entity.vo.log_vo import (
     UnlockUser,
 )
 from module_admin.service.dict_service import DictDataService
-from utils.common_util import export_list2excel
+from utils.log_util import logger
+from utils.page_util import STREAM_CHUNK_SIZE
+from utils.export_util import ExportFormat, ExportUtil
 
 
 class OperationLogService:
@@ -38,6 +44,21 @@ class OperationLogService:
 
         return operation_log_list_result
 
+    @classmethod
+    async def stream_operation_log_list_services(
+        cls, query_object: OperLogPageQueryModel, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncGenerator[List, None]:
+        """
+        流式获取操作日志列表信息service，流式响应开始迭代时请求依赖中的会话已关闭，因此使用独立的会话
+
+        :param query_object: 查询参数对象
+        :param chunk_size: 每批读取的行数
+        :return: 逐批返回操作日志列表信息的异步生成器
+        """
+        async with AsyncSessionLocal() as query_db:
+            async for rows in OperationLogDao.stream_operation_log_list(query_db, query_object, chunk_size):
+                yield rows
+
     @classmethod
     async def add_operation_log_services(cls, query_db: AsyncSession, page_object: OperLogModel):
         """
@@ -94,13 +115,19 @@ class OperationLogService:
             raise e
 
     @classmethod
-    async def export_operation_log_list_services(cls, request: Request, operation_log_list: List):
+    async def export_operation_log_list_services(
+        cls,
+        request: Request,
+        operation_log_list: Union[List, AsyncIterable[List]],
+        export_format: ExportFormat = 'xlsx',
+    ):
         """
         导出操作日志信息service
 
         :param request: Request对象
-        :param operation_log_list: 操作日志信息列表
-        :return: 操作日志信息对应excel的二进制数据
+        :param operation_log_list: 操作日志信息列表或逐批返回操作日志信息列表的异步生成器
+        :param export_format: 导出格式，xlsx或csv
+        :return: 分块返回操作日志信息导出文件内容的异步生成器
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -122,7 +149,6 @@ class OperationLogService:
             'cost_time': '消耗时间（毫秒）',
         }
 
-        data = operation_log_list
         operation_type_list = await DictDataService.query_dict_data_list_from_cache_services(
             request.app.state.redis, dict_type='sys_oper_type'
         )
@@ -131,20 +157,16 @@ class OperationLogService:
         ]
         operation_type_option_dict = {item.get('value'): item for item in operation_type_option}
 
-        for item in data:
-            if item.get('status') == 0:
-                item['status'] = '成功'
-            else:
-                item['status'] = '失败'
-            if str(item.get('business_type')) in operation_type_option_dict.keys():
-                item['business_type'] = operation_type_option_dict.get(str(item.get('business_type'))).get('label')
-
-        new_data = [
-            {mapping_dict.get(key): value for key, value in item.items() if mapping_dict.get(key)} for item in data
-        ]
-        binary_data = export_list2excel(new_data)
+        def format_rows(data: List):
+            for item in data:
+                if item.get('status') == 0:
+                    item['status'] = '成功'
+                else:
+                    item['status'] = '失败'
+                if str(item.get('business_type')) in operation_type_option_dict.keys():
+                    item['business_type'] = operation_type_option_dict.get(str(item.get('business_type'))).get('label')
 
-        return binary_data
+        return ExportUtil.export_list(operation_log_list, mapping_dict, format_rows, export_format)
 
 
 class LoginLogService:
@@ -168,6 +190,21 @@ class LoginLogService:
 
         return operation_log_list_result
 
+    @classmethod
+    async def stream_login_log_list_services(
+        cls, query_object: LoginLogPageQueryModel, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncGenerator[List, None]:
+        """
+        流式获取登录日志列表信息service，流式响应开始迭代时请求依赖中的会话已关闭，因此使用独立的会话
+
+        :param query_object: 查询参数对象
+        :param chunk_size: 每批读取的行数
+        :return: 逐批返回登录日志列表信息的异步生成器
+        """
+        async with AsyncSessionLocal() as query_db:
+            async for rows in LoginLogDao.stream_login_log_list(query_db, query_object, chunk_size):
+                yield rows
+
     @classmethod
     async def add_login_log_services(cls, query_db: AsyncSession, page_object: LogininforModel):
         """
@@ -233,12 +270,15 @@ class LoginLogService:
             raise ServiceException(message='该用户未锁定')
 
     @staticmethod
-    async def export_login_log_list_services(login_log_list: List):
+    async def export_login_log_list_services(
+        login_log_list: Union[List, AsyncIterable[List]], export_format: ExportFormat = 'xlsx'
+    ):
         """
         导出登录日志信息service
 
-        :param login_log_list: 登录日志信息列表
-        :return: 登录日志信息对应excel的二进制数据
+        :param login_log_list: 登录日志信息列表或逐批返回登录日志信息列表的异步生成器
+        :param export_format: 导出格式，xlsx或csv
+        :return: 分块返回登录日志信息导出文件内容的异步生成器
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -253,16 +293,184 @@ class LoginLogService:
             'login_time': '登录日期',
         }
 
-        data = login_log_list
+        def format_rows(data: List):
+            for item in data:
+                if item.get('status') == '0':
+                    item['status'] = '成功'
+                else:
+                    item['status'] = '失败'
 
-        for item in data:
-            if item.get('status') == '0':
-                item['status'] = '成功'
-            else:
-                item['status'] = '失败'
-        new_data = [
-            {mapping_dict.get(key): value for key, value in item.items() if mapping_dict.get(key)} for item in data
-        ]
-        binary_data = export_list2excel(new_data)
+        return ExportUtil.export_list(login_log_list, mapping_dict, format_rows, export_format)
+
+
+class LogWriterService:
+    """
+    日志异步批量写入模块服务层，日志先写入有界队列，由后台任务按条数或时间间隔批量插入数据库
+    """
+
+    queue: Optional[asyncio.Queue] = None
+    writer_task: Optional[asyncio.Task] = None
+    enqueued_count: int = 0
+    written_count: int = 0
+    dropped_count: int = 0
+    failed_count: int = 0
+    blocked_count: int = 0
+
+    @classmethod
+    async def start_writer(cls):
+        """
+        应用启动时创建日志队列及后台写入任务
+
+        :return:
+        """
+        cls.queue = asyncio.Queue(maxsize=AppConfig.app_log_queue_maxsize)
+        cls.writer_task = asyncio.create_task(cls.__run())
+
+    @classmethod
+    async def stop_writer(cls):
+        """
+        应用关闭时停止后台写入任务，并将队列中剩余的日志全部写入数据库
+
+        :return:
+        """
+        if cls.writer_task is not None:
+            cls.writer_task.cancel()
+            try:
+                await cls.writer_task
+            except asyncio.CancelledError:
+                pass
+            cls.writer_task = None
+        if cls.queue is not None:
+            queue, cls.queue = cls.queue, None
+            remaining_log_list = []
+            while not queue.empty():
+                remaining_log_list.append(queue.get_nowait())
+            for index in range(0, len(remaining_log_list), AppConfig.app_log_batch_size):
+                await cls.__write_batch(remaining_log_list[index : index + AppConfig.app_log_batch_size])
 
-        return binary_data
+    @classmethod
+    async def add_log(cls, log_object: Union[OperLogModel, LogininforModel]):
+        """
+        将日志放入写入队列，队列已满时最多等待配置的时间，仍无法入队则丢弃并计数
+
+        :param log_object: 操作日志或登录日志对象
+        :return:
+        """
+        if cls.queue is None:
+            # 后台写入任务未启动（如应用启动或关闭期间）时直接写入数据库
+            await cls.__write_batch([log_object])
+            return
+        try:
+            cls.queue.put_nowait(log_object)
+        except asyncio.QueueFull:
+            cls.blocked_count += 1
+            try:
+                await asyncio.wait_for(cls.queue.put(log_object), timeout=AppConfig.app_log_put_timeout)
+            except asyncio.TimeoutError:
+                cls.dropped_count += 1
+                logger.warning(f'日志写入队列已满，已丢弃{cls.dropped_count}条日志')
+                return
+        cls.enqueued_count += 1
+
+    @classmethod
+    def get_writer_statistic(cls):
+        """
+        获取日志写入统计信息
+
+        :return: 日志写入统计信息
+        """
+        return dict(
+            queue_size=cls.queue.qsize() if cls.queue is not None else 0,
+            queue_maxsize=AppConfig.app_log_queue_maxsize,
+            enqueued=cls.enqueued_count,
+            written=cls.written_count,
+            blocked=cls.blocked_count,
+            dropped=cls.dropped_count,
+            failed=cls.failed_count,
+        )
+
+    @classmethod
+    async def __run(cls):
+        """
+        后台写入任务：阻塞等待首条日志，随后在批量条数或时间间隔内尽量凑满一批再写入
+
+        :return:
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            log_list = [await cls.queue.get()]
+            deadline = loop.time() + AppConfig.app_log_flush_interval
+            while len(log_list) < AppConfig.app_log_batch_size:
+                try:
+                    log_list.append(cls.queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    log_list.append(await asyncio.wait_for(cls.queue.get(), timeout=timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await cls.__write_batch(log_list)
+            except asyncio.CancelledError:
+                # 写入过程中被取消时将本批日志放回队列，由关闭流程统一写入
+                for log_object in log_list:
+                    if not cls.queue.full():
+                        cls.queue.put_nowait(log_object)
+                raise
+
+    @classmethod
+    async def __write_batch(cls, log_list: List[Union[OperLogModel, LogininforModel]]):
+        """
+        使用独立会话批量写入一批日志，整批写入失败时逐条重试，仅丢弃写入失败的日志，不影响后续批次
+
+        :param log_list: 操作日志或登录日志对象列表
+        :return:
+        """
+        async with AsyncSessionLocal() as session:
+            try:
+                await cls.__insert_logs(session, log_list)
+                cls.written_count += len(log_list)
+                return
+            except (OperationalError, InterfaceError) as e:
+                # 数据库连接类错误逐条重试同样会失败，直接丢弃本批
+                cls.failed_count += len(log_list)
+                logger.exception(f'日志批量写入失败，已丢弃{len(log_list)}条日志，详细错误信息：{e}')
+                return
+            except Exception as e:
+                if len(log_list) == 1:
+                    cls.failed_count += 1
+                    logger.exception(f'日志写入失败，已丢弃1条日志，详细错误信息：{e}')
+                    return
+                logger.warning(f'日志批量写入失败，改为逐条写入，详细错误信息：{e}')
+            for log_object in log_list:
+                try:
+                    await cls.__insert_logs(session, [log_object])
+                    cls.written_count += 1
+                except Exception as e:
+                    cls.failed_count += 1
+                    logger.exception(f'日志写入失败，已丢弃1条日志，详细错误信息：{e}')
+
+    @classmethod
+    async def __insert_logs(cls, session: AsyncSession, log_list: List[Union[OperLogModel, LogininforModel]]):
+        """
+        在一个事务内写入日志，失败时回滚并抛出异常
+
+        :param session: orm对象
+        :param log_list: 操作日志或登录日志对象列表
+        :return:
+        """
+        operation_log_list = [log_object for log_object in log_list if isinstance(log_object, OperLogModel)]
+        login_log_list = [log_object for log_object in log_list if isinstance(log_object, LogininforModel)]
+        try:
+            if operation_log_list:
+                await OperationLogDao.batch_add_operation_log_dao(session, operation_log_list)
+            if login_log_list:
+                await LoginLogDao.batch_add_login_log_dao(session, login_log_list)
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            raise e
@@ -5,6 +5,7 @@ from datetime import datetime, timedelta, timezone
 from fastapi import Depends, Form, Request
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jwt.exceptions import InvalidTokenError
+from redis.commands.core import AsyncScript
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, List, Optional, Union
 from config.constant import CommonConstant, MenuConstant
@@ -13,18 +14,64 @@ from config.env import AppConfig, JwtConfig
 from config.get_db import get_db
 from exceptions.exception import LoginException, AuthException, ServiceException
 from module_admin.dao.login_dao import login_by_account
+from module_admin.dao.menu_dao import MenuDao
 from module_admin.dao.user_dao import UserDao
 from module_admin.entity.do.menu_do import SysMenu
 from module_admin.entity.vo.login_vo import MenuTreeModel, MetaModel, RouterModel, SmsCode, UserLogin, UserRegister
 from module_admin.entity.vo.user_vo import AddUserModel, CurrentUserModel, ResetUserModel, TokenData, UserInfoModel
 from module_admin.service.user_service import UserService
+from utils.black_ip_util import BlackIpUtil
+from utils.cache_util import PrincipalCacheManager, TokenCacheManager, TreeCacheManager
 from utils.common_util import SqlalchemyUtil
 from utils.log_util import logger
 from utils.message_util import message_service
 from utils.pwd_util import PwdUtil
+from utils.session_util import SessionUtil
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='login')
 
+# 登录尝试计数脚本，ARGV[1]为acquire时在同一次调用内原子地校验锁定、累加账号及ip的登录尝试次数并在超过阈值时锁定，
+# 返回{账号状态, ip状态}（0未锁定，1已处于锁定，2本次尝试触发锁定）；为release时撤销登录成功的本次尝试计数
+LOGIN_ATTEMPT_LUA = """
+local window = tonumber(ARGV[2])
+if ARGV[1] == 'release' then
+    if ARGV[7] == '1' then
+        redis.call('DEL', KEYS[1])
+    end
+    if ARGV[6] == '1' and redis.call('EXISTS', KEYS[3]) == 1 and redis.call('DECR', KEYS[3]) <= 0 then
+        redis.call('DEL', KEYS[3])
+    end
+    return {0, 0}
+end
+if ARGV[7] == '1' and redis.call('GET', KEYS[2]) == ARGV[5] then
+    return {1, 0}
+end
+if ARGV[6] == '1' and redis.call('EXISTS', KEYS[4]) == 1 then
+    return {0, 1}
+end
+local account_state = 0
+local ip_state = 0
+if ARGV[7] == '1' then
+    local account_count = redis.call('INCR', KEYS[1])
+    redis.call('EXPIRE', KEYS[1], window)
+    if account_count > tonumber(ARGV[3]) then
+        redis.call('DEL', KEYS[1])
+        redis.call('SET', KEYS[2], ARGV[5], 'EX', window)
+        account_state = 2
+    end
+end
+if ARGV[6] == '1' then
+    local ip_count = redis.call('INCR', KEYS[3])
+    redis.call('EXPIRE', KEYS[3], window)
+    if ip_count > tonumber(ARGV[4]) then
+        redis.call('DEL', KEYS[3])
+        redis.call('SET', KEYS[4], '1', 'EX', window)
+        ip_state = 2
+    end
+end
+return {account_state, ip_state}
+"""
+
 
 class CustomOAuth2PasswordRequestForm(OAuth2PasswordRequestForm):
     """
@@ -61,6 +108,8 @@ class LoginService:
     登录模块服务层
     """
 
+    login_attempt_script: Optional[AsyncScript] = None
+
     @classmethod
     async def authenticate_user(cls, request: Request, query_db: AsyncSession, login_user: UserLogin):
         """
@@ -71,13 +120,8 @@ class LoginService:
         :param login_user: 登录用户对象
         :return: 校验结果
         """
-        await cls.__check_login_ip(request)
-        account_lock = await request.app.state.redis.get(
-            f'{RedisInitKeyConfig.ACCOUNT_LOCK.key}:{login_user.user_name}'
-        )
-        if login_user.user_name == account_lock:
-            logger.warning('账号已锁定，请稍后再试')
-            raise LoginException(data='', message='账号已锁定，请稍后再试')
+        login_ip = cls.__get_login_ip(request)
+        await cls.__check_login_ip(request, login_ip)
         # 判断请求是否来自于api文档，如果是返回指定格式的结果，用于修复api文档认证成功后token显示undefined的bug
         request_from_swagger = (
             request.headers.get('referer').endswith('docs') if request.headers.get('referer') else False
@@ -93,52 +137,139 @@ class LoginService:
         else:
             await cls.__check_login_captcha(request, login_user)
         user = await login_by_account(query_db, login_user.user_name)
+        # 账号不存在时仅累加ip尝试次数，避免为任意用户名创建计数及锁定键
+        await cls.__acquire_login_attempt(request, login_user.user_name, login_ip, account_exists=bool(user))
         if not user:
             logger.warning('用户不存在')
             raise LoginException(data='', message='用户不存在')
-        if not PwdUtil.verify_password(login_user.password, user[0].password):
-            cache_password_error_count = await request.app.state.redis.get(
-                f'{RedisInitKeyConfig.PASSWORD_ERROR_COUNT.key}:{login_user.user_name}'
-            )
-            password_error_counted = 0
-            if cache_password_error_count:
-                password_error_counted = cache_password_error_count
-            password_error_count = int(password_error_counted) + 1
-            await request.app.state.redis.set(
-                f'{RedisInitKeyConfig.PASSWORD_ERROR_COUNT.key}:{login_user.user_name}',
-                password_error_count,
-                ex=timedelta(minutes=10),
-            )
-            if password_error_count > 5:
-                await request.app.state.redis.delete(
-                    f'{RedisInitKeyConfig.PASSWORD_ERROR_COUNT.key}:{login_user.user_name}'
-                )
-                await request.app.state.redis.set(
-                    f'{RedisInitKeyConfig.ACCOUNT_LOCK.key}:{login_user.user_name}',
-                    login_user.user_name,
-                    ex=timedelta(minutes=10),
-                )
-                logger.warning('10分钟内密码已输错超过5次，账号已锁定，请10分钟后再试')
-                raise LoginException(data='', message='10分钟内密码已输错超过5次，账号已锁定，请10分钟后再试')
+        if not await PwdUtil.verify_password_async(login_user.password, user[0].password):
             logger.warning('密码错误')
             raise LoginException(data='', message='密码错误')
+        await cls.__release_login_attempt(request, login_user.user_name, login_ip)
         if user[0].status == '1':
             logger.warning('用户已停用')
             raise LoginException(data='', message='用户已停用')
-        await request.app.state.redis.delete(f'{RedisInitKeyConfig.PASSWORD_ERROR_COUNT.key}:{login_user.user_name}')
         return user
 
     @classmethod
-    async def __check_login_ip(cls, request: Request):
+    def __get_login_ip(cls, request: Request):
+        """
+        获取登录请求的ip，登录ip黑名单及ip登录失败次数均以此为准。来自前端服务的请求取其转发的remote_addr请求头，
+        生产环境下该请求头为前端服务收到的X-Forwarded-For，按可信代理层数（至少1层，即前端服务前的代理）取地址；
+        X-Forwarded-For最左侧的地址可由客户端伪造，仅在配置了可信代理层数时取最外层可信代理追加的地址；
+        未配置可信代理却携带X-Forwarded-For时直连地址为代理地址，无可信的客户端ip，返回空字符串
+
+        :param request: Request对象
+        :return: 登录请求的ip
+        """
+        if request.headers.get('is_browser') == 'no':
+            hops = cls.__split_forwarded_hops(request.headers.get('remote_addr'))
+            return hops[-min(max(AppConfig.app_trusted_proxy_count, 1), len(hops))] if hops else ''
+        hops = cls.__split_forwarded_hops(request.headers.get('X-Forwarded-For'))
+        if hops:
+            if AppConfig.app_trusted_proxy_count > 0:
+                return hops[-min(AppConfig.app_trusted_proxy_count, len(hops))]
+            return ''
+        return request.client.host if request.client else ''
+
+    @staticmethod
+    def __split_forwarded_hops(forwarded_for: Optional[str]):
+        """
+        拆分X-Forwarded-For格式的代理地址列表
+
+        :param forwarded_for: 以逗号分隔的地址列表
+        :return: 地址列表
+        """
+        return [hop.strip() for hop in (forwarded_for or '').split(',') if hop.strip()]
+
+    @classmethod
+    async def __call_login_attempt_script(
+        cls, request: Request, mode: str, user_name: str, login_ip: str, account_exists: bool
+    ):
+        """
+        调用登录尝试计数lua脚本
+
+        :param request: Request对象
+        :param mode: 脚本模式，acquire为校验锁定并累加尝试次数，release为撤销本次尝试计数
+        :param user_name: 登录账号
+        :param login_ip: 登录ip，为空时不累加ip尝试次数
+        :param account_exists: 账号是否存在，不存在时不累加账号尝试次数
+        :return: {账号状态, ip状态}
+        """
+        redis = request.app.state.redis
+        if cls.login_attempt_script is None or cls.login_attempt_script.registered_client is not redis:
+            cls.login_attempt_script = redis.register_script(LOGIN_ATTEMPT_LUA)
+        lock_seconds = int(timedelta(minutes=10).total_seconds())
+        account_state, ip_state = await cls.login_attempt_script(
+            keys=[
+                f'{RedisInitKeyConfig.PASSWORD_ERROR_COUNT.key}:{user_name}',
+                f'{RedisInitKeyConfig.ACCOUNT_LOCK.key}:{user_name}',
+                f'{RedisInitKeyConfig.LOGIN_IP_ERROR_COUNT.key}:{login_ip}',
+                f'{RedisInitKeyConfig.LOGIN_IP_LOCK.key}:{login_ip}',
+            ],
+            args=[
+                mode,
+                lock_seconds,
+                5,
+                AppConfig.app_login_ip_max_error_count,
+                user_name,
+                1 if login_ip else 0,
+                1 if account_exists else 0,
+            ],
+        )
+
+        return int(account_state), int(ip_state)
+
+    @classmethod
+    async def __acquire_login_attempt(cls, request: Request, user_name: str, login_ip: str, account_exists: bool):
+        """
+        校验账号及ip是否已锁定并原子地累加登录尝试次数，校验密码前先计数，避免并发请求绕过锁定阈值
+
+        :param request: Request对象
+        :param user_name: 登录账号
+        :param login_ip: 登录ip
+        :param account_exists: 账号是否存在
+        :return: 校验结果
+        """
+        if not account_exists and not login_ip:
+            return
+        account_state, ip_state = await cls.__call_login_attempt_script(
+            request, 'acquire', user_name, login_ip, account_exists
+        )
+        if ip_state == 2:
+            logger.warning(f'IP{login_ip}在10分钟内登录失败次数过多，已锁定10分钟')
+        if account_state == 1:
+            logger.warning('账号已锁定，请稍后再试')
+            raise LoginException(data='', message='账号已锁定，请稍后再试')
+        if account_state == 2:
+            logger.warning('10分钟内密码已输错超过5次，账号已锁定，请10分钟后再试')
+            raise LoginException(data='', message='10分钟内密码已输错超过5次，账号已锁定，请10分钟后再试')
+        if ip_state:
+            logger.warning('当前IP登录失败次数过多，请稍后再试')
+            raise LoginException(data='', message='当前IP登录失败次数过多，请稍后再试')
+
+    @classmethod
+    async def __release_login_attempt(cls, request: Request, user_name: str, login_ip: str):
+        """
+        密码校验通过后清除账号尝试次数并撤销本次ip尝试计数
+
+        :param request: Request对象
+        :param user_name: 登录账号
+        :param login_ip: 登录ip
+        :return: None
+        """
+        await cls.__call_login_attempt_script(request, 'release', user_name, login_ip, True)
+
+    @classmethod
+    async def __check_login_ip(cls, request: Request, login_ip: str):
         """
         校验用户登录ip是否在黑名单内
 
         :param request: Request对象
+        :param login_ip: 经__get_login_ip解析的登录ip，为空时无可信的客户端ip，不做黑名单匹配
         :return: 校验结果
         """
-        black_ip_value = await request.app.state.redis.get(f'{RedisInitKeyConfig.SYS_CONFIG.key}:sys.login.blackIPList')
-        black_ip_list = black_ip_value.split(',') if black_ip_value else []
-        if request.headers.get('X-Forwarded-For') in black_ip_list:
+        if await BlackIpUtil.is_blocked(request.app.state.redis, login_ip):
             logger.warning('当前IP禁止登录')
             raise LoginException(data='', message='当前IP禁止登录')
         return True
@@ -195,10 +326,14 @@ class LoginService:
         # if token[:6] != 'Bearer':
         #     logger.warning("用户token不合法")
         #     raise AuthException(data="", message="用户token不合法")
+        # 同一请求内重复获取当前用户时（如日志装饰器）直接复用已解析的结果
+        request_current_user = getattr(request.state, 'current_user', None)
+        if request_current_user is not None:
+            return request_current_user
         try:
             if token.startswith('Bearer'):
                 token = token.split(' ')[1]
-            payload = jwt.decode(token, JwtConfig.jwt_secret_key, algorithms=[JwtConfig.jwt_algorithm])
+            payload = SessionUtil.decode_token(token)
             user_id: str = payload.get('user_id')
             session_id: str = payload.get('session_id')
             if not user_id:
@@ -208,95 +343,107 @@ class LoginService:
         except InvalidTokenError:
             logger.warning('用户token已失效，请重新登录')
             raise AuthException(data='', message='用户token已失效，请重新登录')
-        query_user = await UserDao.get_user_by_id(query_db, user_id=token_data.user_id)
-        if query_user.get('user_basic_info') is None:
-            logger.warning('用户token不合法')
-            raise AuthException(data='', message='用户token不合法')
         if AppConfig.app_same_time_login:
-            redis_token = await request.app.state.redis.get(f'{RedisInitKeyConfig.ACCESS_TOKEN.key}:{session_id}')
+            redis_token_key = f'{RedisInitKeyConfig.ACCESS_TOKEN.key}:{session_id}'
         else:
             # 此方法可实现同一账号同一时间只能登录一次
-            redis_token = await request.app.state.redis.get(
-                f"{RedisInitKeyConfig.ACCESS_TOKEN.key}:{query_user.get('user_basic_info').user_id}"
-            )
+            redis_token_key = f'{RedisInitKeyConfig.ACCESS_TOKEN.key}:{token_data.user_id}'
+        redis_token = await SessionUtil.get_and_renew_token(request.app.state.redis, redis_token_key, token)
         if token == redis_token:
-            if AppConfig.app_same_time_login:
-                await request.app.state.redis.set(
-                    f'{RedisInitKeyConfig.ACCESS_TOKEN.key}:{session_id}',
-                    redis_token,
-                    ex=timedelta(minutes=JwtConfig.jwt_redis_expire_minutes),
-                )
-            else:
-                await request.app.state.redis.set(
-                    f"{RedisInitKeyConfig.ACCESS_TOKEN.key}:{query_user.get('user_basic_info').user_id}",
-                    redis_token,
-                    ex=timedelta(minutes=JwtConfig.jwt_redis_expire_minutes),
-                )
-
-            role_id_list = [item.role_id for item in query_user.get('user_role_info')]
-            if 1 in role_id_list:
-                permissions = ['*:*:*']
-            else:
-                permissions = [row.perms for row in query_user.get('user_menu_info')]
-            post_ids = ','.join([str(row.post_id) for row in query_user.get('user_post_info')])
-            role_ids = ','.join([str(row.role_id) for row in query_user.get('user_role_info')])
-            roles = [row.role_key for row in query_user.get('user_role_info')]
-
-            current_user = CurrentUserModel(
-                permissions=permissions,
-                roles=roles,
-                user=UserInfoModel(
-                    **SqlalchemyUtil.serialize_result(query_user.get('user_basic_info')),
-                    post_ids=post_ids,
-                    role_ids=role_ids,
-                    dept=SqlalchemyUtil.serialize_result(query_user.get('user_dept_info')),
-                    role=SqlalchemyUtil.serialize_result(query_user.get('user_role_info')),
-                ),
-            )
+            current_user = PrincipalCacheManager.get(session_id)
+            if current_user is None:
+                current_user = await cls.__get_current_user_from_db(query_db, token_data.user_id)
+                PrincipalCacheManager.set(session_id, current_user)
+            request.state.current_user = current_user
             return current_user
         else:
             logger.warning('用户token已失效，请重新登录')
             raise AuthException(data='', message='用户token已失效，请重新登录')
 
     @classmethod
-    async def get_current_user_routers(cls, user_id: int, query_db: AsyncSession):
+    async def __get_current_user_from_db(cls, query_db: AsyncSession, user_id: int):
         """
-        根据用户id获取当前用户路由信息
+        从数据库中查询并构建当前用户信息
 
+        :param query_db: orm对象
         :param user_id: 用户id
+        :return: 当前用户信息对象
+        :raise: 令牌异常AuthException
+        """
+        query_user = await UserDao.get_user_permission_info_by_id(query_db, user_id=user_id)
+        if query_user.user_basic_info is None:
+            logger.warning('用户token不合法')
+            raise AuthException(data='', message='用户token不合法')
+        role_id_list = [item.role_id for item in query_user.user_role_info]
+        if 1 in role_id_list:
+            permissions = ['*:*:*']
+        else:
+            permissions = [row.perms for row in query_user.user_menu_info]
+        post_ids = ','.join([str(row.post_id) for row in query_user.user_post_info])
+        role_ids = ','.join([str(row.role_id) for row in query_user.user_role_info])
+        roles = [row.role_key for row in query_user.user_role_info]
+
+        return CurrentUserModel(
+            permissions=permissions,
+            roles=roles,
+            user=UserInfoModel(
+                **SqlalchemyUtil.serialize_result(query_user.user_basic_info),
+                post_ids=post_ids,
+                role_ids=role_ids,
+                dept=SqlalchemyUtil.serialize_result(query_user.user_dept_info),
+                role=SqlalchemyUtil.serialize_result(query_user.user_role_info),
+            ),
+        )
+
+    @classmethod
+    async def get_current_user_routers(cls, request: Request, query_db: AsyncSession, current_user: CurrentUserModel):
+        """
+        获取当前用户路由信息，路由信息仅与角色组合相关，按菜单版本号及排序后的角色id缓存
+
+        :param request: Request对象
         :param query_db: orm对象
+        :param current_user: 当前用户对象
         :return: 当前用户路由信息对象
         """
-        query_user = await UserDao.get_user_by_id(query_db, user_id=user_id)
-        user_router_menu = sorted(
-            [
-                row
-                for row in query_user.get('user_menu_info')
-                if row.menu_type in [MenuConstant.TYPE_DIR, MenuConstant.TYPE_MENU]
-            ],
-            key=lambda x: x.order_num,
-        )
-        menus = cls.__generate_menus(0, user_router_menu)
-        user_router = cls.__generate_user_router_menu(menus)
-        return [router.model_dump(exclude_unset=True) for router in user_router]
+        role_id_list = [item.role_id for item in current_user.user.role]
+        role_key = None if 1 in role_id_list else tuple(sorted(set(role_id_list)))
+        version = await TreeCacheManager.get_version(request.app.state.redis, 'menu')
+        cache_key = ('router', version, role_key)
+        user_router = TreeCacheManager.get(cache_key)
+        if user_router is None:
+            user_router_menu = (
+                await MenuDao.get_router_menu_list(query_db, None if role_key is None else list(role_key))
+                if role_id_list
+                else []
+            )
+            menus = cls.__generate_menus(user_router_menu)
+            user_router = [router.model_dump(exclude_unset=True) for router in cls.__generate_user_router_menu(menus)]
+            TreeCacheManager.set(cache_key, user_router)
+
+        return user_router
 
     @classmethod
-    def __generate_menus(cls, pid: int, permission_list: List[SysMenu]):
+    def __generate_menus(cls, permission_list: List[SysMenu]):
         """
-        工具方法：根据菜单信息生成菜单信息树形嵌套数据
+        工具方法：根据菜单信息生成菜单信息树形嵌套数据，通过菜单id索引一次遍历挂载子菜单，上级菜单不在列表中的菜单不返回
 
-        :param pid: 菜单id
-        :param permission_list: 菜单列表信息
+        :param permission_list: 按显示顺序排列的菜单列表信息
         :return: 菜单信息树形嵌套数据
         """
+        menu_dict: Dict[int, MenuTreeModel] = {
+            permission.menu_id: MenuTreeModel(**SqlalchemyUtil.serialize_result(permission))
+            for permission in permission_list
+        }
         menu_list: List[MenuTreeModel] = []
-        for permission in permission_list:
-            if permission.parent_id == pid:
-                children = cls.__generate_menus(permission.menu_id, permission_list)
-                menu_list_data = MenuTreeModel(**SqlalchemyUtil.serialize_result(permission))
-                if children:
-                    menu_list_data.children = children
-                menu_list.append(menu_list_data)
+        for menu in menu_dict.values():
+            if menu.parent_id == 0:
+                menu_list.append(menu)
+                continue
+            parent = menu_dict.get(menu.parent_id)
+            if parent is not None:
+                if parent.children is None:
+                    parent.children = []
+                parent.children.append(menu)
 
         return menu_list
 
@@ -402,7 +549,7 @@ class LoginService:
                 add_user = AddUserModel(
                     user_name=user_register.username,
                     nick_name=user_register.username,
-                    password=PwdUtil.get_password_hash(user_register.password),
+                    password=await PwdUtil.get_password_hash_async(user_register.password),
                 )
                 result = await UserService.add_user_services(query_db, add_user)
                 return result
@@ -470,7 +617,9 @@ class LoginService:
         :param session_id: 会话编号
         :return: 退出登录结果
         """
-        await request.app.state.redis.delete(f'{RedisInitKeyConfig.ACCESS_TOKEN.key}:{session_id}')
+        await SessionUtil.remove_sessions(request.app.state.redis, RedisInitKeyConfig.ACCESS_TOKEN.key, [session_id])
+        PrincipalCacheManager.delete(session_id)
+        TokenCacheManager.delete_by_session(session_id)
         # await request.app.state.redis.delete(f'{current_user.user.user_id}_access_token')
         # await request.app.state.redis.delete(f'{current_user.user.user_id}_session_id')
 
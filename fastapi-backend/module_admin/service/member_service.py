@@ -1,10 +1,10 @@
 import logging
-import io
-import pandas as pd
 from datetime import datetime
 from fastapi import Request, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional, Union
+from starlette.concurrency import run_in_threadpool
+from typing import AsyncGenerator, AsyncIterable, Dict, List, Optional, Tuple, Union
+from config.database import AsyncSessionLocal
 from exceptions.exception import ServiceException
 from module_admin.dao.member_dao import MemberDao
 from module_admin.entity.vo.common_vo import CrudResponseModel
@@ -20,9 +20,11 @@ from module_admin.service.config_service import ConfigService
 from module_admin.entity.vo.user_vo import CurrentUserModel
 from config.constant import CommonConstant
 from module_admin.entity.vo.common_vo import CrudResponseModel
-from utils.page_util import PageResponseModel
-from utils.common_util import export_list2excel, get_excel_template, SqlalchemyUtil
+from utils.page_util import PageResponseModel, STREAM_CHUNK_SIZE
+from utils.common_util import get_excel_template, SqlalchemyUtil
+from utils.import_util import ImportUtil
 from utils.pwd_util import PwdUtil
+from utils.export_util import ExportFormat, ExportUtil
 
 logger = logging.getLogger(__name__)  # 日志记录器
 
@@ -56,6 +58,22 @@ class MemberService:
 
         return member_list_result
 
+#流式获取会员
+    @classmethod
+    async def stream_member_list_services(
+        cls, query_object: MemberPageQueryModel, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncGenerator[List, None]:
+        """
+        流式获取会员信息，流式响应开始迭代时请求依赖中的会话已关闭，因此使用独立的会话
+
+        :param query_object: 查询参数对象
+        :param chunk_size: 每批读取的行数
+        :return: 逐批返回会员信息列表的异步生成器
+        """
+        async with AsyncSessionLocal() as query_db:
+            async for rows in MemberDao.stream_member_list(query_db, query_object, chunk_size):
+                yield rows
+
 #检查会员账号名的唯一性
     @classmethod
     async def check_member_name_unique_services(cls, query_db: AsyncSession, page_object: MemberModel):
@@ -227,7 +245,7 @@ class MemberService:
         :param current_user: 当前用户对象
         :return: 批量导入会员结果
         """
-        header_dict = {            
+        header_dict = {
             '登录名称': 'member_name',
             '会员名称': 'nick_name',
             '会员邮箱': 'email',
@@ -235,67 +253,108 @@ class MemberService:
             '会员性别': 'gender',
             '会员生日': 'birthday',
             '帐号状态': 'status',
+            '备注': 'remark',
             '备    注': 'remark',
         }
+        value_mapping = {'gender': {'男': '0', '女': '1', '未知': '2'}, 'status': {'正常': '0', '停用': '1'}}
         contents = await file.read()
-        df = pd.read_excel(io.BytesIO(contents))
         await file.close()
-        df.rename(columns=header_dict, inplace=True)
-        add_error_result = []
-        count = 0
+        # excel解析及逐行校验为cpu密集型操作，放入线程池执行，避免阻塞事件循环
+        import_rows = await run_in_threadpool(ImportUtil.read_excel, contents, header_dict, value_mapping)
+        # 初始密码对所有新增会员相同，只需计算一次哈希
+        password = await PwdUtil.get_password_hash_async(
+            await ConfigService.query_config_list_from_cache_services(request.app.state.redis, 'sys.user.initPassword')
+        )
         try:
-            for index, row in df.iterrows():
-                count = count + 1
-                row['gender'] = {'男': '0', '女': '1', '未知': '2'}.get(row['gender'], row['gender'])
-                row['status'] = {'正常': '0', '停用': '1'}.get(row['status'], row['status'])
-                add_member = MemberModel(                    
+            member_id_dict = await MemberDao.get_member_id_dict_by_member_names(
+                query_db, [row['member_name'] for row in import_rows if row['member_name']]
+            )
+            add_member_list, edit_member_list, add_error_result = await run_in_threadpool(
+                cls.__get_import_member_list,
+                import_rows,
+                member_id_dict,
+                password,
+                update_support,
+                current_user.user.user_name,
+            )
+            for add_member_chunk in ImportUtil.chunk(add_member_list):
+                await MemberDao.batch_add_member_dao(query_db, add_member_chunk)
+            for edit_member_chunk in ImportUtil.chunk(edit_member_list):
+                await MemberDao.batch_edit_member_dao(query_db, edit_member_chunk)
+            await query_db.commit()
+            return CrudResponseModel(is_success=True, message='\n'.join(add_error_result))
+        except Exception as e:
+            await query_db.rollback()
+            raise e
+
+    @staticmethod
+    def __get_import_member_list(
+        import_rows: List[Dict],
+        member_id_dict: Dict[str, int],
+        password: str,
+        update_support: bool,
+        operator: str,
+    ) -> Tuple[List[Dict], List[Dict], List[str]]:
+        """
+        校验导入数据并区分需要新增及更新的会员，导入文件中重复的账号以最后一行为准
+
+        :param import_rows: 导入数据列表
+        :param member_id_dict: 已存在会员的会员账号与会员id的映射字典
+        :param password: 初始密码哈希值
+        :param update_support: 会员存在时是否更新
+        :param operator: 操作人
+        :return: 需要新增的会员字典列表、需要更新的会员字典列表及导入失败信息列表
+        """
+        now = datetime.now()
+        add_member_dict: Dict[str, Dict] = {}
+        edit_member_dict: Dict[int, Dict] = {}
+        add_error_result = []
+        for count, row in enumerate(import_rows, start=1):
+            member_id = member_id_dict.get(row['member_name'])
+            if member_id is None and row['member_name'] not in add_member_dict:
+                add_member = MemberModel(
                     member_name=row['member_name'],
-                    password=PwdUtil.get_password_hash(
-                        await ConfigService.query_config_list_from_cache_services(
-                            request.app.state.redis, 'sys.user.initPassword'
-                        )
-                    ),
+                    password=password,
                     nick_name=row['nick_name'],
                     email=row['email'],
-                    phonenumber=str(row['phonenumber']),
+                    phonenumber=row['phonenumber'],
                     gender=row['gender'],
                     birthday=row['birthday'],
                     status=row['status'],
-                    create_by=current_user.user.user_name,
-                    create_at=datetime.now(),
-                    update_by=current_user.user.user_name,
-                    update_at=datetime.now(),
+                    create_by=operator,
+                    create_at=now,
+                    update_by=operator,
+                    update_at=now,
                     remark=row['remark'],
                 )
-                member_info = await MemberDao.get_member_by_info(query_db, MemberModel(user_name=row['member_name']))
-                if member_info:
-                    if update_support:
-                        edit_member_model = MemberModel(
-                            member_id=member_info.member_id,
-                            member_name=row['member_name'],
-                            nick_name=row['nick_name'],
-                            email=row['email'],
-                            phonenumber=str(row['phonenumber']),
-                            gender=row['gender'],
-                            birthday=row['birthday'],
-                            remark=row['remark'],
-                            status=row['status'],
-                            update_by=current_user.user.user_name,
-                            update_at=datetime.now(),
-                        )
-                        edit_member_model.validate_fields()                        
-                        edit_member = edit_member_model.model_dump(exclude_unset=True)
-                        await MemberDao.edit_member_dao(query_db, edit_member)
-                    else:
-                        add_error_result.append(f"{count}.会员账号{row['member_name']}已存在")
+                add_member.validate_fields()
+                add_member_dict[row['member_name']] = add_member.model_dump(exclude={'member_id'})
+            elif update_support:
+                edit_member_model = MemberModel(
+                    member_id=member_id,
+                    member_name=row['member_name'],
+                    nick_name=row['nick_name'],
+                    email=row['email'],
+                    phonenumber=row['phonenumber'],
+                    gender=row['gender'],
+                    birthday=row['birthday'],
+                    remark=row['remark'],
+                    status=row['status'],
+                    update_by=operator,
+                    update_at=now,
+                )
+                edit_member_model.validate_fields()
+                if member_id is None:
+                    # 导入文件中前面的行已新增该账号时，直接合并至待新增的会员数据
+                    add_member_dict[row['member_name']].update(
+                        edit_member_model.model_dump(exclude={'member_id'}, exclude_unset=True)
+                    )
                 else:
-                    add_member.validate_fields()                    
-                    await MemberDao.add_member_dao(query_db, add_member)
-            await query_db.commit()
-            return CrudResponseModel(is_success=True, message='\n'.join(add_error_result))
-        except Exception as e:
-            await query_db.rollback()
-            raise e
+                    edit_member_dict[member_id] = edit_member_model.model_dump(exclude_unset=True)
+            else:
+                add_error_result.append(f"{count}.会员账号{row['member_name']}已存在")
+
+        return list(add_member_dict.values()), list(edit_member_dict.values()), add_error_result
 
 #批量导入会员的模板        
     @staticmethod
@@ -316,12 +375,15 @@ class MemberService:
 
 #批量导出会员模板    
     @staticmethod
-    async def export_member_list_services(member_list: List):
+    async def export_member_list_services(
+        member_list: Union[List, AsyncIterable[List]], export_format: ExportFormat = 'xlsx'
+    ):
         """
         导出会员信息service
 
-        :param member_list: 会员信息列表
-        :return: 会员信息对应excel的二进制数据
+        :param member_list: 会员信息列表或逐批返回会员信息列表的异步生成器
+        :param export_format: 导出格式，xlsx或csv
+        :return: 分块返回会员信息导出文件内容的异步生成器
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -341,15 +403,11 @@ class MemberService:
             'remark': '备注',
         }
 
-        data = member_list
         gender_mapping = {'0': '男', '1': '女', '2': '未知'}
-        for item in data:
-            item['gender'] = gender_mapping.get(item.get('gender'), '未知')
-            item['status'] = '正常' if item.get('status') == '0' else '停用'
 
-        new_data = [
-            {mapping_dict.get(key): value for key, value in item.items() if mapping_dict.get(key)} for item in data
-        ]
-        binary_data = export_list2excel(new_data)
+        def format_rows(data: List):
+            for item in data:
+                item['gender'] = gender_mapping.get(item.get('gender'), '未知')
+                item['status'] = '正常' if item.get('status') == '0' else '停用'
 
-        return binary_data    
+        return ExportUtil.export_list(member_list, mapping_dict, format_rows, export_format)
@@ -1,5 +1,7 @@
+from fastapi import Request
+from functools import partial
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional
+from typing import Dict, List, Optional
 from config.constant import CommonConstant, MenuConstant
 from exceptions.exception import ServiceException, ServiceWarning
 from module_admin.dao.menu_dao import MenuDao
@@ -8,6 +10,7 @@ from module_admin.entity.vo.common_vo import CrudResponseModel
 from module_admin.entity.vo.menu_vo import DeleteMenuModel, MenuQueryModel, MenuModel
 from module_admin.entity.vo.role_vo import RoleMenuQueryModel
 from module_admin.entity.vo.user_vo import CurrentUserModel
+from utils.cache_util import PrincipalCacheManager, TreeCacheManager
 from utils.common_util import SqlalchemyUtil
 from utils.string_util import StringUtil
 
@@ -18,37 +21,51 @@ class MenuService:
     """
 
     @classmethod
-    async def get_menu_tree_services(cls, query_db: AsyncSession, current_user: Optional[CurrentUserModel] = None):
+    async def get_menu_tree_services(
+        cls, request: Request, query_db: AsyncSession, current_user: Optional[CurrentUserModel] = None
+    ):
         """
-        获取菜单树信息service
+        获取菜单树信息service，菜单树按菜单版本号及当前用户的角色组合缓存
 
+        :param request: Request对象
         :param query_db: orm对象
         :param current_user: 当前用户对象
         :return: 菜单树信息对象
         """
-        menu_list_result = await MenuDao.get_menu_list_for_tree(
-            query_db, current_user.user.user_id, current_user.user.role
+        version, menu_tree_source = await TreeCacheManager.get_source(
+            request.app.state.redis, 'menu', partial(cls.__load_menu_tree_source, query_db)
         )
-        menu_tree_result = cls.list_to_tree(menu_list_result)
+        role_id_list = [item.role_id for item in current_user.user.role]
+        role_key = None if 1 in role_id_list else tuple(sorted(set(role_id_list)))
+        cache_key = ('menu', version, role_key)
+        menu_tree_result = TreeCacheManager.get(cache_key)
+        if menu_tree_result is None:
+            role_menu_id_set = (
+                None
+                if role_key is None
+                else {menu_id for role_id, menu_id in menu_tree_source['role_menus'] if role_id in role_key}
+            )
+            menu_tree_result = cls.list_to_tree(
+                [menu for menu in menu_tree_source['menus'] if role_menu_id_set is None or menu[0] in role_menu_id_set]
+            )
+            TreeCacheManager.set(cache_key, menu_tree_result)
 
         return menu_tree_result
 
     @classmethod
     async def get_role_menu_tree_services(
-        cls, query_db: AsyncSession, role_id: int, current_user: Optional[CurrentUserModel] = None
+        cls, request: Request, query_db: AsyncSession, role_id: int, current_user: Optional[CurrentUserModel] = None
     ):
         """
         根据角色id获取菜单树信息service
 
+        :param request: Request对象
         :param query_db: orm对象
         :param role_id: 角色id
         :param current_user: 当前用户对象
         :return: 当前角色id的菜单树信息对象
         """
-        menu_list_result = await MenuDao.get_menu_list_for_tree(
-            query_db, current_user.user.user_id, current_user.user.role
-        )
-        menu_tree_result = cls.list_to_tree(menu_list_result)
+        menu_tree_result = await cls.get_menu_tree_services(request, query_db, current_user)
         role = await RoleDao.get_role_detail_by_id(query_db, role_id)
         role_menu_list = await RoleDao.get_role_menu_dao(query_db, role)
         checked_keys = [row.menu_id for row in role_menu_list]
@@ -56,6 +73,22 @@ class MenuService:
 
         return result
 
+    @classmethod
+    async def __load_menu_tree_source(cls, query_db: AsyncSession) -> Dict[str, List]:
+        """
+        加载菜单树的源数据，包含全部在用菜单的层级关系及角色与菜单的关联
+
+        :param query_db: orm对象
+        :return: 菜单树的源数据
+        """
+        menu_list = await MenuDao.get_menu_list_for_tree(query_db)
+        role_menu_list = await RoleDao.get_role_menu_id_list_dao(query_db)
+
+        return dict(
+            menus=[[row.menu_id, row.parent_id, row.menu_name] for row in menu_list],
+            role_menus=[[row.role_id, row.menu_id] for row in role_menu_list],
+        )
+
     @classmethod
     async def get_menu_list_services(
         cls, query_db: AsyncSession, page_object: MenuQueryModel, current_user: Optional[CurrentUserModel] = None
@@ -90,10 +123,11 @@ class MenuService:
         return CommonConstant.UNIQUE
 
     @classmethod
-    async def add_menu_services(cls, query_db: AsyncSession, page_object: MenuModel):
+    async def add_menu_services(cls, request: Request, query_db: AsyncSession, page_object: MenuModel):
         """
         新增菜单信息service
 
+        :param request: Request对象
         :param query_db: orm对象
         :param page_object: 新增菜单对象
         :return: 新增菜单校验结果
@@ -106,16 +140,18 @@ class MenuService:
             try:
                 await MenuDao.add_menu_dao(query_db, page_object)
                 await query_db.commit()
+                await TreeCacheManager.bump_version(request.app.state.redis, 'menu')
                 return CrudResponseModel(is_success=True, message='新增成功')
             except Exception as e:
                 await query_db.rollback()
                 raise e
 
     @classmethod
-    async def edit_menu_services(cls, query_db: AsyncSession, page_object: MenuModel):
+    async def edit_menu_services(cls, request: Request, query_db: AsyncSession, page_object: MenuModel):
         """
         编辑菜单信息service
 
+        :param request: Request对象
         :param query_db: orm对象
         :param page_object: 编辑部门对象
         :return: 编辑菜单校验结果
@@ -133,6 +169,8 @@ class MenuService:
                 try:
                     await MenuDao.edit_menu_dao(query_db, edit_menu)
                     await query_db.commit()
+                    PrincipalCacheManager.clear()
+                    await TreeCacheManager.bump_version(request.app.state.redis, 'menu')
                     return CrudResponseModel(is_success=True, message='更新成功')
                 except Exception as e:
                     await query_db.rollback()
@@ -141,10 +179,11 @@ class MenuService:
             raise ServiceException(message='菜单不存在')
 
     @classmethod
-    async def delete_menu_services(cls, query_db: AsyncSession, page_object: DeleteMenuModel):
+    async def delete_menu_services(cls, request: Request, query_db: AsyncSession, page_object: DeleteMenuModel):
         """
         删除菜单信息service
 
+        :param request: Request对象
         :param query_db: orm对象
         :param page_object: 删除菜单对象
         :return: 删除菜单校验结果
@@ -159,6 +198,8 @@ class MenuService:
                         raise ServiceWarning(message='菜单已分配,不允许删除')
                     await MenuDao.delete_menu_dao(query_db, MenuModel(menu_id=menu_id))
                 await query_db.commit()
+                PrincipalCacheManager.clear()
+                await TreeCacheManager.bump_version(request.app.state.redis, 'menu')
                 return CrudResponseModel(is_success=True, message='删除成功')
             except Exception as e:
                 await query_db.rollback()
@@ -188,12 +229,12 @@ class MenuService:
         """
         工具方法：根据菜单列表信息生成树形嵌套数据
 
-        :param permission_list: 菜单列表信息
+        :param permission_list: 菜单列表信息，元素为菜单id、上级菜单id及菜单名称
         :return: 菜单树形嵌套数据
         """
         permission_list = [
-            dict(key=str(item.menu_id), title=item.menu_name, value=str(item.menu_id), parent_id=str(item.parent_id))
-            for item in permission_list
+            dict(key=str(menu_id), title=menu_name, value=str(menu_id), parent_id=str(parent_id))
+            for menu_id, parent_id, menu_name in permission_list
         ]
         # 转成id为key的字典
         mapping: dict = dict(zip([i['key'] for i in permission_list], permission_list))
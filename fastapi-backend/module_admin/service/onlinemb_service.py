@@ -1,10 +1,13 @@
-import jwt
 from fastapi import Request
+from redis import asyncio as aioredis
+from typing import Dict, List, Tuple, Union
 from config.enums import RedisInitKeyConfig
-from config.env import JwtConfig
 from exceptions.exception import ServiceException
 from module_admin.entity.vo.common_vo import CrudResponseModel
-from module_admin.entity.vo.onlinemb_vo import DeleteOnlinembModel, OnlinembQueryModel
+from module_admin.entity.vo.onlinemb_vo import DeleteOnlinembModel, OnlinembPageQueryModel
+from utils.cache_util import TokenCacheManager
+from utils.page_util import PageResponseModel
+from utils.session_util import SessionUtil
 
 
 class OnlinembService:
@@ -13,47 +16,40 @@ class OnlinembService:
     """
 
     @classmethod
-    async def get_onlinemb_list_services(cls, request: Request, query_object: OnlinembQueryModel):
+    async def get_onlinemb_list_services(
+        cls, request: Request, query_object: OnlinembPageQueryModel, is_page: bool = False
+    ) -> Union[List[Dict], PageResponseModel]:
         """
-        获取在线会员表信息service
+        获取在线会员表信息service，从在线会话索引中读取，无需扫描及解析全部令牌
 
         :param request: Request对象
         :param query_object: 查询参数对象
+        :param is_page: 是否开启分页
         :return: 在线会员列表信息
         """
-        member_access_token_keys = await request.app.state.redis.keys(f'{RedisInitKeyConfig.MEMBER_ACCESS_TOKEN.key}*')
-        if not member_access_token_keys:
-            member_access_token_keys = []
-        member_access_token_values_list = [await request.app.state.redis.get(key) for key in member_access_token_keys]
-        member_online_info_list = []
-        for item in member_access_token_values_list:
-            payload = jwt.decode(item, JwtConfig.jwt_secret_key, algorithms=[JwtConfig.jwt_algorithm])
-            member_online_dict = dict(
-                token_id=payload.get('session_id'),
-                member_name=payload.get('member_name'),
-                visit_name=payload.get('visit_name'),
-                ipaddr=payload.get('member_login_info').get('ipaddr'),
-                login_location=payload.get('member_login_info').get('login_location'),
-                browser=payload.get('member_login_info').get('browser'),
-                os=payload.get('member_login_info').get('os'),
-                login_time=payload.get('member_login_info').get('login_time'),
+
+        def session_filter(session_info: Dict) -> bool:
+            return (not query_object.member_name or session_info.get('member_name') == query_object.member_name) and (
+                not query_object.ipaddr or session_info.get('ipaddr') == query_object.ipaddr
+            )
+
+        member_online_info_list, total = await SessionUtil.get_online_sessions(
+            request.app.state.redis,
+            RedisInitKeyConfig.MEMBER_ACCESS_TOKEN.key,
+            session_filter if query_object.member_name or query_object.ipaddr else None,
+            query_object.page_num if is_page else None,
+            query_object.page_size if is_page else None,
+        )
+        for member_online_info in member_online_info_list:
+            member_online_info.pop('session_id', None)
+        if is_page:
+            return PageResponseModel(
+                rows=member_online_info_list,
+                page_num=query_object.page_num,
+                page_size=query_object.page_size,
+                total=total,
+                has_next=query_object.page_num * query_object.page_size < total,
             )
-            if query_object.member_name and not query_object.ipaddr:
-                if query_object.member_name == payload.get('member_login_info').get('ipaddr'):
-                    member_online_info_list = [member_online_dict]
-                    break
-            elif not query_object.member_name and query_object.ipaddr:
-                if query_object.ipaddr == payload.get('ipaddr'):
-                    member_online_info_list = [member_online_dict]
-                    break
-            elif query_object.member_name and query_object.ipaddr:
-                if query_object.member_name == payload.get('member_name') and query_object.ipaddr == payload.get(
-                    'member_login_info'
-                ).get('ipaddr'):
-                    member_online_info_list = [member_online_dict]
-                    break
-            else:
-                member_online_info_list.append(member_online_dict)
 
         return member_online_info_list
 
@@ -68,8 +64,46 @@ class OnlinembService:
         """
         if page_object.token_ids:
             token_id_list = page_object.token_ids.split(',')
-            for token_id in token_id_list:
-                await request.app.state.redis.delete(f'{RedisInitKeyConfig.MEMBER_ACCESS_TOKEN.key}:{token_id}')
+            session_info_list = await SessionUtil.remove_sessions(
+                request.app.state.redis, RedisInitKeyConfig.MEMBER_ACCESS_TOKEN.key, token_id_list
+            )
+            session_id_list = list(
+                dict.fromkeys(token_id_list + [session_info['session_id'] for session_info in session_info_list])
+            )
+            TokenCacheManager.delete_by_session(session_id_list)
             return CrudResponseModel(is_success=True, message='强退成功')
         else:
             raise ServiceException(message='传入session_id为空')
+
+    @classmethod
+    def get_session_info(cls, payload: Dict) -> Tuple[str, Dict]:
+        """
+        根据令牌载荷获取在线会话标识及在线列表展示的会话信息
+
+        :param payload: 令牌载荷
+        :return: 会话标识及会话信息
+        """
+        token_id = payload.get('session_id')
+        member_login_info = payload.get('member_login_info') or {}
+
+        return token_id, dict(
+            token_id=token_id,
+            session_id=payload.get('session_id'),
+            member_name=payload.get('member_name'),
+            visit_name=payload.get('visit_name'),
+            ipaddr=member_login_info.get('ipaddr'),
+            login_location=member_login_info.get('login_location'),
+            browser=member_login_info.get('browser'),
+            os=member_login_info.get('os'),
+            login_time=member_login_info.get('login_time'),
+        )
+
+    @classmethod
+    async def init_onlinemb_session_services(cls, redis: aioredis.Redis):
+        """
+        应用启动时回填在线会员会话索引
+
+        :param redis: redis对象
+        :return:
+        """
+        await SessionUtil.init_session_index(redis, RedisInitKeyConfig.MEMBER_ACCESS_TOKEN.key, cls.get_session_info)
@@ -1,5 +1,7 @@
+from fastapi import Request
+from sqlalchemy import ColumnElement
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import AsyncIterable, List, Union
 from config.constant import CommonConstant
 from exceptions.exception import ServiceException
 from module_admin.entity.vo.common_vo import CrudResponseModel
@@ -15,8 +17,10 @@ from module_admin.entity.vo.role_vo import (
 from module_admin.entity.vo.user_vo import UserInfoModel, UserRolePageQueryModel
 from module_admin.dao.role_dao import RoleDao
 from module_admin.dao.user_dao import UserDao
-from utils.common_util import export_list2excel, SqlalchemyUtil
+from utils.cache_util import PrincipalCacheManager, TreeCacheManager
+from utils.common_util import SqlalchemyUtil
 from utils.page_util import PageResponseModel
+from utils.export_util import ExportFormat, ExportUtil
 
 
 class RoleService:
@@ -54,18 +58,22 @@ class RoleService:
 
     @classmethod
     async def get_role_list_services(
-        cls, query_db: AsyncSession, query_object: RolePageQueryModel, data_scope_sql: str, is_page: bool = False
+        cls,
+        query_db: AsyncSession,
+        query_object: RolePageQueryModel,
+        data_scope_filter: ColumnElement,
+        is_page: bool = False,
     ):
         """
         获取角色列表信息service
 
         :param query_db: orm对象
         :param query_object: 查询参数对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_filter: 数据权限对应的查询条件
         :param is_page: 是否开启分页
         :return: 角色列表信息对象
         """
-        role_list_result = await RoleDao.get_role_list(query_db, query_object, data_scope_sql, is_page)
+        role_list_result = await RoleDao.get_role_list(query_db, query_object, data_scope_filter, is_page)
 
         return role_list_result
 
@@ -83,20 +91,22 @@ class RoleService:
             return CrudResponseModel(is_success=True, message='校验通过')
 
     @classmethod
-    async def check_role_data_scope_services(cls, query_db: AsyncSession, role_ids: str, data_scope_sql: str):
+    async def check_role_data_scope_services(
+        cls, query_db: AsyncSession, role_ids: str, data_scope_filter: ColumnElement
+    ):
         """
         校验角色是否有数据权限service
 
         :param query_db: orm对象
         :param role_ids: 角色id
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_filter: 数据权限对应的查询条件
         :return: 校验结果
         """
         role_id_list = role_ids.split(',') if role_ids else []
         if role_id_list:
             for role_id in role_id_list:
                 roles = await RoleDao.get_role_list(
-                    query_db, RolePageQueryModel(role_id=int(role_id)), data_scope_sql, is_page=False
+                    query_db, RolePageQueryModel(role_id=int(role_id)), data_scope_filter, is_page=False
                 )
                 if roles:
                     continue
@@ -134,10 +144,11 @@ class RoleService:
         return CommonConstant.UNIQUE
 
     @classmethod
-    async def add_role_services(cls, query_db: AsyncSession, page_object: AddRoleModel):
+    async def add_role_services(cls, request: Request, query_db: AsyncSession, page_object: AddRoleModel):
         """
         新增角色信息service
 
+        :param request: Request对象
         :param query_db: orm对象
         :param page_object: 新增角色对象
         :return: 新增角色校验结果
@@ -155,16 +166,18 @@ class RoleService:
                     for menu in page_object.menu_ids:
                         await RoleDao.add_role_menu_dao(query_db, RoleMenuModel(role_id=role_id, menu_id=menu))
                 await query_db.commit()
+                await TreeCacheManager.bump_version(request.app.state.redis, 'menu')
                 return CrudResponseModel(is_success=True, message='新增成功')
             except Exception as e:
                 await query_db.rollback()
                 raise e
 
     @classmethod
-    async def edit_role_services(cls, query_db: AsyncSession, page_object: AddRoleModel):
+    async def edit_role_services(cls, request: Request, query_db: AsyncSession, page_object: AddRoleModel):
         """
         编辑角色信息service
 
+        :param request: Request对象
         :param query_db: orm对象
         :param page_object: 编辑角色对象
         :return: 编辑角色校验结果
@@ -191,6 +204,8 @@ class RoleService:
                                 query_db, RoleMenuModel(role_id=page_object.role_id, menu_id=menu)
                             )
                 await query_db.commit()
+                PrincipalCacheManager.clear()
+                await TreeCacheManager.bump_version(request.app.state.redis, 'menu')
                 return CrudResponseModel(is_success=True, message='更新成功')
             except Exception as e:
                 await query_db.rollback()
@@ -199,10 +214,11 @@ class RoleService:
             raise ServiceException(message='角色不存在')
 
     @classmethod
-    async def role_datascope_services(cls, query_db: AsyncSession, page_object: AddRoleModel):
+    async def role_datascope_services(cls, request: Request, query_db: AsyncSession, page_object: AddRoleModel):
         """
         分配角色数据权限service
 
+        :param request: Request对象
         :param query_db: orm对象
         :param page_object: 角色数据权限对象
         :return: 分配角色数据权限结果
@@ -219,6 +235,8 @@ class RoleService:
                             query_db, RoleDeptModel(role_id=page_object.role_id, dept_id=dept)
                         )
                 await query_db.commit()
+                PrincipalCacheManager.clear()
+                await TreeCacheManager.bump_version(request.app.state.redis, 'dept')
                 return CrudResponseModel(is_success=True, message='分配成功')
             except Exception as e:
                 await query_db.rollback()
@@ -227,10 +245,11 @@ class RoleService:
             raise ServiceException(message='角色不存在')
 
     @classmethod
-    async def delete_role_services(cls, query_db: AsyncSession, page_object: DeleteRoleModel):
+    async def delete_role_services(cls, request: Request, query_db: AsyncSession, page_object: DeleteRoleModel):
         """
         删除角色信息service
 
+        :param request: Request对象
         :param query_db: orm对象
         :param page_object: 删除角色对象
         :return: 删除角色校验结果
@@ -249,6 +268,8 @@ class RoleService:
                     await RoleDao.delete_role_dept_dao(query_db, RoleDeptModel(**role_id_dict))
                     await RoleDao.delete_role_dao(query_db, RoleModel(**role_id_dict))
                 await query_db.commit()
+                PrincipalCacheManager.clear()
+                await TreeCacheManager.bump_version(request.app.state.redis, 'dept', 'menu')
                 return CrudResponseModel(is_success=True, message='删除成功')
             except Exception as e:
                 await query_db.rollback()
@@ -274,12 +295,15 @@ class RoleService:
         return result
 
     @staticmethod
-    async def export_role_list_services(role_list: List):
+    async def export_role_list_services(
+        role_list: Union[List, AsyncIterable[List]], export_format: ExportFormat = 'xlsx'
+    ):
         """
         导出角色列表信息service
 
-        :param role_list: 角色信息列表
-        :return: 角色列表信息对象
+        :param role_list: 角色信息列表或逐批返回角色信息列表的异步生成器
+        :param export_format: 导出格式，xlsx或csv
+        :return: 分块返回角色信息导出文件内容的异步生成器
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -295,35 +319,34 @@ class RoleService:
             'remark': '备注',
         }
 
-        data = role_list
-
-        for item in data:
-            if item.get('status') == '0':
-                item['status'] = '正常'
-            else:
-                item['status'] = '停用'
-        new_data = [
-            {mapping_dict.get(key): value for key, value in item.items() if mapping_dict.get(key)} for item in data
-        ]
-        binary_data = export_list2excel(new_data)
+        def format_rows(data: List):
+            for item in data:
+                if item.get('status') == '0':
+                    item['status'] = '正常'
+                else:
+                    item['status'] = '停用'
 
-        return binary_data
+        return ExportUtil.export_list(role_list, mapping_dict, format_rows, export_format)
 
     @classmethod
     async def get_role_user_allocated_list_services(
-        cls, query_db: AsyncSession, page_object: UserRolePageQueryModel, data_scope_sql: str, is_page: bool = False
+        cls,
+        query_db: AsyncSession,
+        page_object: UserRolePageQueryModel,
+        data_scope_filter: ColumnElement,
+        is_page: bool = False,
     ):
         """
         根据角色id获取已分配用户列表
 
         :param query_db: orm对象
         :param page_object: 用户关联角色对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_filter: 数据权限对应的查询条件
         :param is_page: 是否开启分页
         :return: 已分配用户列表
         """
         query_user_list = await UserDao.get_user_role_allocated_list_by_role_id(
-            query_db, page_object, data_scope_sql, is_page
+            query_db, page_object, data_scope_filter, is_page
         )
         allocated_list = PageResponseModel(
             **{
@@ -336,19 +359,23 @@ class RoleService:
 
     @classmethod
     async def get_role_user_unallocated_list_services(
-        cls, query_db: AsyncSession, page_object: UserRolePageQueryModel, data_scope_sql: str, is_page: bool = False
+        cls,
+        query_db: AsyncSession,
+        page_object: UserRolePageQueryModel,
+        data_scope_filter: ColumnElement,
+        is_page: bool = False,
     ):
         """
         根据角色id获取未分配用户列表
 
         :param query_db: orm对象
         :param page_object: 用户关联角色对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_filter: 数据权限对应的查询条件
         :param is_page: 是否开启分页
         :return: 未分配用户列表
         """
         query_user_list = await UserDao.get_user_role_unallocated_list_by_role_id(
-            query_db, page_object, data_scope_sql, is_page
+            query_db, page_object, data_scope_filter, is_page
         )
         unallocated_list = PageResponseModel(
             **{
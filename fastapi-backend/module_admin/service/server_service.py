@@ -3,8 +3,19 @@ import platform
 import psutil
 import socket
 import time
-from module_admin.entity.vo.server_vo import CpuInfo, MemoryInfo, PyInfo, ServerMonitorModel, SysFiles, SysInfo
+from module_admin.entity.vo.server_vo import (
+    CpuInfo,
+    LogWriterInfo,
+    MemoryInfo,
+    PwdHashInfo,
+    PyInfo,
+    ServerMonitorModel,
+    SysFiles,
+    SysInfo,
+)
+from module_admin.service.log_service import LogWriterService
 from utils.common_util import bytes2human
+from utils.pwd_util import PwdUtil
 
 
 class ServerService:
@@ -91,6 +102,13 @@ class ServerService:
             )
             sys_files.append(disk_data)
 
-        result = ServerMonitorModel(cpu=cpu, mem=mem, sys=sys, py=py, sys_files=sys_files)
+        # 密码线程池信息
+        pwd_hash = PwdHashInfo(**PwdUtil.get_executor_statistic())
+        # 日志异步写入信息
+        log_writer = LogWriterInfo(**LogWriterService.get_writer_statistic())
+
+        result = ServerMonitorModel(
+            cpu=cpu, mem=mem, sys=sys, py=py, sys_files=sys_files, pwd_hash=pwd_hash, log_writer=log_writer
+        )
 
         return result
@@ -1,11 +1,12 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import AsyncIterable, List, Union
 from config.constant import CommonConstant
 from exceptions.exception import ServiceException
 from module_admin.dao.tags_dao import TagsDao
 from module_admin.entity.vo.common_vo import CrudResponseModel
 from module_admin.entity.vo.tags_vo import DeleteTagsModel, TagsModel, TagsPageQueryModel
-from utils.common_util import export_list2excel, SqlalchemyUtil
+from utils.common_util import SqlalchemyUtil
+from utils.export_util import ExportFormat, ExportUtil
 
 
 class TagsService:
@@ -173,12 +174,15 @@ class TagsService:
         return result
 
     @staticmethod
-    async def export_tags_list_services(tags_list: List):
+    async def export_tags_list_services(
+        tags_list: Union[List, AsyncIterable[List]], export_format: ExportFormat = 'xlsx'
+    ):
         """
         导出标签信息service
 
-        :param tags_list: 标签信息列表
-        :return: 标签信息对应excel的二进制数据
+        :param tags_list: 标签信息列表或逐批返回标签信息列表的异步生成器
+        :param export_format: 导出格式，xlsx或csv
+        :return: 分块返回标签信息导出文件内容的异步生成器
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -196,16 +200,11 @@ class TagsService:
             'remark': '备注',
         }
 
-        data = tags_list
-
-        for item in data:
-            if item.get('status') == '0':
-                item['status'] = '正常'
-            else:
-                item['status'] = '停用'
-        new_data = [
-            {mapping_dict.get(key): value for key, value in item.items() if mapping_dict.get(key)} for item in data
-        ]
-        binary_data = export_list2excel(new_data)
+        def format_rows(data: List):
+            for item in data:
+                if item.get('status') == '0':
+                    item['status'] = '正常'
+                else:
+                    item['status'] = '停用'
 
-        return binary_data
+        return ExportUtil.export_list(tags_list, mapping_dict, format_rows, export_format)
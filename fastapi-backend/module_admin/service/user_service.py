@@ -1,11 +1,13 @@
-import io
-import pandas as pd
 from datetime import datetime
 from fastapi import Request, UploadFile
+from sqlalchemy import ColumnElement
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Union
+from starlette.concurrency import run_in_threadpool
+from typing import AsyncGenerator, AsyncIterable, Dict, List, Tuple, Union
 from config.constant import CommonConstant
+from config.database import AsyncSessionLocal
 from exceptions.exception import ServiceException
+from module_admin.dao.dept_dao import DeptDao
 from module_admin.dao.user_dao import UserDao
 from module_admin.entity.vo.common_vo import CrudResponseModel
 from module_admin.entity.vo.post_vo import PostPageQueryModel
@@ -28,12 +30,14 @@ from module_admin.entity.vo.user_vo import (
     UserRoleResponseModel,
 )
 from module_admin.service.config_service import ConfigService
-from module_admin.service.dept_service import DeptService
 from module_admin.service.post_service import PostService
 from module_admin.service.role_service import RoleService
-from utils.common_util import export_list2excel, get_excel_template, SqlalchemyUtil
-from utils.page_util import PageResponseModel
+from utils.cache_util import PrincipalCacheManager
+from utils.common_util import get_excel_template, SqlalchemyUtil
+from utils.import_util import ImportUtil
+from utils.page_util import PageResponseModel, STREAM_CHUNK_SIZE
 from utils.pwd_util import PwdUtil
+from utils.export_util import ExportFormat, ExportUtil
 
 
 class UserService:
@@ -43,18 +47,22 @@ class UserService:
 
     @classmethod
     async def get_user_list_services(
-        cls, query_db: AsyncSession, query_object: UserPageQueryModel, data_scope_sql: str, is_page: bool = False
+        cls,
+        query_db: AsyncSession,
+        query_object: UserPageQueryModel,
+        data_scope_filter: ColumnElement,
+        is_page: bool = False,
     ):
         """
         获取用户列表信息service
 
         :param query_db: orm对象
         :param query_object: 查询参数对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_filter: 数据权限对应的查询条件
         :param is_page: 是否开启分页
         :return: 用户列表信息对象
         """
-        query_result = await UserDao.get_user_list(query_db, query_object, data_scope_sql, is_page)
+        query_result = await UserDao.get_user_list(query_db, query_object, data_scope_filter, is_page)
         if is_page:
             user_list_result = PageResponseModel(
                 **{
@@ -69,6 +77,22 @@ class UserService:
 
         return user_list_result
 
+    @classmethod
+    async def stream_user_list_services(
+        cls, query_object: UserPageQueryModel, data_scope_filter: ColumnElement, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncGenerator[List, None]:
+        """
+        流式获取全量用户列表信息，供后台导出任务在请求结束后读取，因此使用独立的会话
+
+        :param query_object: 查询参数对象
+        :param data_scope_filter: 数据权限对应的查询条件
+        :param chunk_size: 每批读取的行数
+        :return: 逐批返回用户列表信息的异步生成器
+        """
+        async with AsyncSessionLocal() as query_db:
+            async for rows in UserDao.stream_user_list(query_db, query_object, data_scope_filter, chunk_size):
+                yield [{**row[0], 'dept': row[1]} for row in rows]
+
     @classmethod
     async def check_user_allowed_services(cls, check_user: UserModel):
         """
@@ -83,17 +107,19 @@ class UserService:
             return CrudResponseModel(is_success=True, message='校验通过')
 
     @classmethod
-    async def check_user_data_scope_services(cls, query_db: AsyncSession, user_id: int, data_scope_sql: str):
+    async def check_user_data_scope_services(
+        cls, query_db: AsyncSession, user_id: int, data_scope_filter: ColumnElement
+    ):
         """
         校验用户数据权限service
 
         :param query_db: orm对象
         :param user_id: 用户id
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_filter: 数据权限对应的查询条件
         :return: 校验结果
         """
         users = await UserDao.get_user_list(
-            query_db, UserPageQueryModel(user_id=user_id), data_scope_sql, is_page=False
+            query_db, UserPageQueryModel(user_id=user_id), data_scope_filter, is_page=False
         )
         if users:
             return CrudResponseModel(is_success=True, message='校验通过')
@@ -218,6 +244,7 @@ class UserService:
                                 query_db, UserPostModel(user_id=page_object.user_id, post_id=post)
                             )
                 await query_db.commit()
+                PrincipalCacheManager.delete_by_user(page_object.user_id)
                 return CrudResponseModel(is_success=True, message='更新成功')
             except Exception as e:
                 await query_db.rollback()
@@ -245,6 +272,7 @@ class UserService:
                     await UserDao.delete_user_post_dao(query_db, UserPostModel(**user_id_dict))
                     await UserDao.delete_user_dao(query_db, UserModel(**user_id_dict))
                 await query_db.commit()
+                PrincipalCacheManager.delete_by_user(user_id_list)
                 return CrudResponseModel(is_success=True, message='删除成功')
             except Exception as e:
                 await query_db.rollback()
@@ -325,9 +353,9 @@ class UserService:
         reset_user = page_object.model_dump(exclude_unset=True, exclude={'admin'})
         if page_object.old_password:
             user = (await UserDao.get_user_detail_by_id(query_db, user_id=page_object.user_id)).get('user_basic_info')
-            if not PwdUtil.verify_password(page_object.old_password, user.password):
+            if not await PwdUtil.verify_password_async(page_object.old_password, user.password):
                 raise ServiceException(message='修改密码失败，旧密码错误')
-            elif PwdUtil.verify_password(page_object.password, user.password):
+            elif await PwdUtil.verify_password_async(page_object.password, user.password):
                 raise ServiceException(message='新密码不能与旧密码相同')
             else:
                 del reset_user['old_password']
@@ -335,9 +363,10 @@ class UserService:
             del reset_user['sms_code']
             del reset_user['session_id']
         try:
-            reset_user['password'] = PwdUtil.get_password_hash(page_object.password)
+            reset_user['password'] = await PwdUtil.get_password_hash_async(page_object.password)
             await UserDao.edit_user_dao(query_db, reset_user)
             await query_db.commit()
+            PrincipalCacheManager.delete_by_user(page_object.user_id)
             return CrudResponseModel(is_success=True, message='重置成功')
         except Exception as e:
             await query_db.rollback()
@@ -351,8 +380,8 @@ class UserService:
         file: UploadFile,
         update_support: bool,
         current_user: CurrentUserModel,
-        user_data_scope_sql: str,
-        dept_data_scope_sql: str,
+        user_data_scope_filter: ColumnElement,
+        dept_data_scope_filter: ColumnElement,
     ):
         """
         批量导入用户service
@@ -362,8 +391,8 @@ class UserService:
         :param file: 用户导入文件对象
         :param update_support: 用户存在时是否更新
         :param current_user: 当前用户对象
-        :param user_data_scope_sql: 用户数据权限sql
-        :param dept_data_scope_sql: 部门数据权限sql
+        :param user_data_scope_filter: 用户数据权限对应的查询条件
+        :param dept_data_scope_filter: 部门数据权限对应的查询条件
         :return: 批量导入用户结果
         """
         header_dict = {
@@ -375,83 +404,120 @@ class UserService:
             '用户性别': 'sex',
             '帐号状态': 'status',
         }
+        value_mapping = {'sex': {'男': '0', '女': '1', '未知': '2'}, 'status': {'正常': '0', '停用': '1'}}
         contents = await file.read()
-        df = pd.read_excel(io.BytesIO(contents))
         await file.close()
-        df.rename(columns=header_dict, inplace=True)
-        add_error_result = []
-        count = 0
+        # excel解析及逐行校验为cpu密集型操作，放入线程池执行，避免阻塞事件循环
+        import_rows = await run_in_threadpool(ImportUtil.read_excel, contents, header_dict, value_mapping)
+        # 初始密码对所有新增用户相同，只需计算一次哈希
+        password = await PwdUtil.get_password_hash_async(
+            await ConfigService.query_config_list_from_cache_services(request.app.state.redis, 'sys.user.initPassword')
+        )
         try:
-            for index, row in df.iterrows():
-                count = count + 1
-                if row['sex'] == '男':
-                    row['sex'] = '0'
-                if row['sex'] == '女':
-                    row['sex'] = '1'
-                if row['sex'] == '未知':
-                    row['sex'] = '2'
-                if row['status'] == '正常':
-                    row['status'] = '0'
-                if row['status'] == '停用':
-                    row['status'] = '1'
+            user_id_dict = await UserDao.get_user_id_dict_by_user_names(
+                query_db, [row['user_name'] for row in import_rows if row['user_name']]
+            )
+            add_user_list, edit_user_list, add_error_result = await run_in_threadpool(
+                cls.__get_import_user_list,
+                import_rows,
+                user_id_dict,
+                password,
+                update_support,
+                current_user.user.user_name,
+            )
+            if not current_user.user.admin:
+                # 批量校验需要更新的用户及涉及的部门是否均有数据权限
+                edit_user_id_set = {edit_user['user_id'] for edit_user in edit_user_list}
+                data_scope_user_id_set = await UserDao.get_data_scope_user_id_set(
+                    query_db, list(edit_user_id_set), user_data_scope_filter
+                )
+                if data_scope_user_id_set != edit_user_id_set:
+                    raise ServiceException(message='没有权限访问用户数据')
+                dept_id_set = {user['dept_id'] for user in add_user_list + edit_user_list if user['dept_id']}
+                data_scope_dept_id_set = await DeptDao.get_data_scope_dept_id_set(
+                    query_db, list(dept_id_set), dept_data_scope_filter
+                )
+                if data_scope_dept_id_set != dept_id_set:
+                    raise ServiceException(message='没有权限访问部门数据')
+            for add_user_chunk in ImportUtil.chunk(add_user_list):
+                await UserDao.batch_add_user_dao(query_db, add_user_chunk)
+            for edit_user_chunk in ImportUtil.chunk(edit_user_list):
+                await UserDao.batch_edit_user_dao(query_db, edit_user_chunk)
+            await query_db.commit()
+            PrincipalCacheManager.clear()
+            return CrudResponseModel(is_success=True, message='\n'.join(add_error_result))
+        except Exception as e:
+            await query_db.rollback()
+            raise e
+
+    @staticmethod
+    def __get_import_user_list(
+        import_rows: List[Dict],
+        user_id_dict: Dict[str, int],
+        password: str,
+        update_support: bool,
+        operator: str,
+    ) -> Tuple[List[Dict], List[Dict], List[str]]:
+        """
+        校验导入数据并区分需要新增及更新的用户，导入文件中重复的账号以最后一行为准
+
+        :param import_rows: 导入数据列表
+        :param user_id_dict: 已存在用户的用户账号与用户id的映射字典
+        :param password: 初始密码哈希值
+        :param update_support: 用户存在时是否更新
+        :param operator: 操作人
+        :return: 需要新增的用户字典列表、需要更新的用户字典列表及导入失败信息列表
+        """
+        now = datetime.now()
+        add_user_dict: Dict[str, Dict] = {}
+        edit_user_dict: Dict[int, Dict] = {}
+        add_error_result = []
+        for count, row in enumerate(import_rows, start=1):
+            user_id = user_id_dict.get(row['user_name'])
+            if user_id is None and row['user_name'] not in add_user_dict:
                 add_user = UserModel(
                     dept_id=row['dept_id'],
                     user_name=row['user_name'],
-                    password=PwdUtil.get_password_hash(
-                        await ConfigService.query_config_list_from_cache_services(
-                            request.app.state.redis, 'sys.user.initPassword'
-                        )
-                    ),
+                    password=password,
                     nick_name=row['nick_name'],
                     email=row['email'],
-                    phonenumber=str(row['phonenumber']),
+                    phonenumber=row['phonenumber'],
                     sex=row['sex'],
                     status=row['status'],
-                    create_by=current_user.user.user_name,
-                    create_time=datetime.now(),
-                    update_by=current_user.user.user_name,
-                    update_time=datetime.now(),
+                    create_by=operator,
+                    create_time=now,
+                    update_by=operator,
+                    update_time=now,
                 )
-                user_info = await UserDao.get_user_by_info(query_db, UserModel(user_name=row['user_name']))
-                if user_info:
-                    if update_support:
-                        edit_user_model = UserModel(
-                            user_id=user_info.user_id,
-                            dept_id=row['dept_id'],
-                            user_name=row['user_name'],
-                            nick_name=row['nick_name'],
-                            email=row['email'],
-                            phonenumber=str(row['phonenumber']),
-                            sex=row['sex'],
-                            status=row['status'],
-                            update_by=current_user.user.user_name,
-                            update_time=datetime.now(),
-                        )
-                        edit_user_model.validate_fields()
-                        await cls.check_user_allowed_services(edit_user_model)
-                        if not current_user.user.admin:
-                            await cls.check_user_data_scope_services(
-                                query_db, edit_user_model.user_id, user_data_scope_sql
-                            )
-                            await DeptService.check_dept_data_scope_services(
-                                query_db, edit_user_model.dept_id, dept_data_scope_sql
-                            )
-                        edit_user = edit_user_model.model_dump(exclude_unset=True)
-                        await UserDao.edit_user_dao(query_db, edit_user)
-                    else:
-                        add_error_result.append(f"{count}.用户账号{row['user_name']}已存在")
+                add_user.validate_fields()
+                add_user_dict[row['user_name']] = add_user.model_dump(exclude={'admin', 'user_id'})
+            elif update_support:
+                edit_user_model = UserModel(
+                    user_id=user_id,
+                    dept_id=row['dept_id'],
+                    user_name=row['user_name'],
+                    nick_name=row['nick_name'],
+                    email=row['email'],
+                    phonenumber=row['phonenumber'],
+                    sex=row['sex'],
+                    status=row['status'],
+                    update_by=operator,
+                    update_time=now,
+                )
+                edit_user_model.validate_fields()
+                if edit_user_model.admin:
+                    raise ServiceException(message='不允许操作超级管理员用户')
+                if user_id is None:
+                    # 导入文件中前面的行已新增该账号时，直接合并至待新增的用户数据
+                    add_user_dict[row['user_name']].update(
+                        edit_user_model.model_dump(exclude={'admin', 'user_id'}, exclude_unset=True)
+                    )
                 else:
-                    add_user.validate_fields()
-                    if not current_user.user.admin:
-                        await DeptService.check_dept_data_scope_services(
-                            query_db, add_user.dept_id, dept_data_scope_sql
-                        )
-                    await UserDao.add_user_dao(query_db, add_user)
-            await query_db.commit()
-            return CrudResponseModel(is_success=True, message='\n'.join(add_error_result))
-        except Exception as e:
-            await query_db.rollback()
-            raise e
+                    edit_user_dict[user_id] = edit_user_model.model_dump(exclude={'admin'}, exclude_unset=True)
+            else:
+                add_error_result.append(f'{count}.用户账号{row["user_name"]}已存在')
+
+        return list(add_user_dict.values()), list(edit_user_dict.values()), add_error_result
 
     @staticmethod
     async def get_user_import_template_services():
@@ -470,12 +536,15 @@ class UserService:
         return binary_data
 
     @staticmethod
-    async def export_user_list_services(user_list: List):
+    async def export_user_list_services(
+        user_list: Union[List, AsyncIterable[List]], export_format: ExportFormat = 'xlsx'
+    ):
         """
         导出用户信息service
 
-        :param user_list: 用户信息列表
-        :return: 用户信息对应excel的二进制数据
+        :param user_list: 用户信息列表或逐批返回用户信息列表的异步生成器
+        :param export_format: 导出格式，xlsx或csv
+        :return: 分块返回用户信息导出文件内容的异步生成器
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -494,25 +563,20 @@ class UserService:
             'remark': '备注',
         }
 
-        data = user_list
-
-        for item in data:
-            if item.get('status') == '0':
-                item['status'] = '正常'
-            else:
-                item['status'] = '停用'
-            if item.get('sex') == '0':
-                item['sex'] = '男'
-            elif item.get('sex') == '1':
-                item['sex'] = '女'
-            else:
-                item['sex'] = '未知'
-        new_data = [
-            {mapping_dict.get(key): value for key, value in item.items() if mapping_dict.get(key)} for item in data
-        ]
-        binary_data = export_list2excel(new_data)
+        def format_rows(data: List):
+            for item in data:
+                if item.get('status') == '0':
+                    item['status'] = '正常'
+                else:
+                    item['status'] = '停用'
+                if item.get('sex') == '0':
+                    item['sex'] = '男'
+                elif item.get('sex') == '1':
+                    item['sex'] = '女'
+                else:
+                    item['sex'] = '未知'
 
-        return binary_data
+        return ExportUtil.export_list(user_list, mapping_dict, format_rows, export_format)
 
     @classmethod
     async def get_user_role_allocated_list_services(cls, query_db: AsyncSession, page_object: UserRoleQueryModel):
@@ -564,6 +628,7 @@ class UserService:
                         query_db, UserRoleModel(user_id=page_object.user_id, role_id=role_id)
                     )
                 await query_db.commit()
+                PrincipalCacheManager.delete_by_user(page_object.user_id)
                 return CrudResponseModel(is_success=True, message='分配成功')
             except Exception as e:
                 await query_db.rollback()
@@ -574,6 +639,7 @@ class UserService:
                     query_db, UserRoleModel(user_id=page_object.user_id)
                 )
                 await query_db.commit()
+                PrincipalCacheManager.delete_by_user(page_object.user_id)
                 return CrudResponseModel(is_success=True, message='分配成功')
             except Exception as e:
                 await query_db.rollback()
@@ -592,6 +658,7 @@ class UserService:
                             query_db, UserRoleModel(user_id=user_id, role_id=page_object.role_id)
                         )
                 await query_db.commit()
+                PrincipalCacheManager.delete_by_user(user_id_list)
                 return CrudResponseModel(is_success=True, message='新增成功')
             except Exception as e:
                 await query_db.rollback()
@@ -615,6 +682,7 @@ class UserService:
                         query_db, UserRoleModel(user_id=page_object.user_id, role_id=page_object.role_id)
                     )
                     await query_db.commit()
+                    PrincipalCacheManager.delete_by_user(page_object.user_id)
                     return CrudResponseModel(is_success=True, message='删除成功')
                 except Exception as e:
                     await query_db.rollback()
@@ -627,6 +695,7 @@ class UserService:
                             query_db, UserRoleModel(user_id=user_id, role_id=page_object.role_id)
                         )
                     await query_db.commit()
+                    PrincipalCacheManager.delete_by_user(user_id_list)
                     return CrudResponseModel(is_success=True, message='删除成功')
                 except Exception as e:
                     await query_db.rollback()
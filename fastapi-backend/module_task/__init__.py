@@ -1 +1,2 @@
+from . import log_task  # noqa: F401
 from . import scheduler_test  # noqa: F401
@@ -0,0 +1,17 @@
+from config.database import AsyncSessionLocal
+from module_admin.service.log_partition_service import LogPartitionService
+
+
+async def maintain_log_partitions(*args, **kwargs):
+    """
+    日志表分区维护定时任务：预建未来月份分区，并删除或归档超出保留期的月分区
+
+    关键字参数（均可省略，默认读取应用配置）：retention_months日志保留月数，ahead_months预建分区月数，archive是否归档过期分区
+    """
+    async with AsyncSessionLocal() as session:
+        await LogPartitionService.maintain_log_partitions_services(
+            session,
+            retention_months=kwargs.get('retention_months'),
+            ahead_months=kwargs.get('ahead_months'),
+            archive=kwargs.get('archive'),
+        )
@@ -26,8 +26,15 @@ from module_admin.controller.member_controller import memberController
 from module_admin.controller.onlinemb_controller import onlinembController
 from module_admin.controller.tags_controller import tagsController
 from module_admin.controller.modeltype_controller import modeltypeController
+from module_admin.service.dept_service import DeptService
+from module_admin.service.export_job_service import ExportJobService
+from module_admin.service.log_service import LogWriterService
+from module_admin.service.online_service import OnlineService
+from module_admin.service.onlinemb_service import OnlinembService
 from sub_applications.handle import handle_sub_applications
+from utils.black_ip_util import BlackIpUtil
 from utils.common_util import worship
+from utils.ip_location_util import IpLocationUtil
 from utils.log_util import logger
 
 
@@ -37,12 +44,22 @@ async def lifespan(app: FastAPI):
     logger.info(f'{AppConfig.app_name}开始启动')
     worship()
     await init_create_table()
+    await DeptService.init_dept_closure_services()
     app.state.redis = await RedisUtil.create_redis_pool()
     await RedisUtil.init_sys_dict(app.state.redis)
     await RedisUtil.init_sys_config(app.state.redis)
+    await OnlineService.init_online_session_services(app.state.redis)
+    await OnlinembService.init_onlinemb_session_services(app.state.redis)
+    await BlackIpUtil.start_listener(app.state.redis)
+    await LogWriterService.start_writer()
+    await ExportJobService.start_workers()
     await SchedulerUtil.init_system_scheduler()
     logger.info(f'{AppConfig.app_name}启动成功')
     yield
+    await ExportJobService.stop_workers()
+    await LogWriterService.stop_writer()
+    await IpLocationUtil.close()
+    await BlackIpUtil.stop_listener()
     await RedisUtil.close_redis_pool(app)
     await SchedulerUtil.close_system_scheduler()
 
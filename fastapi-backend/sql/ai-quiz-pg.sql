@@ -5,7 +5,7 @@ drop table if exists sys_dept;
 create table sys_dept (
     dept_id bigserial,
     parent_id bigint default 0,
-    ancestors varchar(50) default '',
+    ancestors varchar(1000) default '',
     dept_name varchar(30) default '',
     order_num int4 default 0,
     leader varchar(20) default null,
@@ -521,10 +521,12 @@ create table sys_oper_log (
     json_result varchar(2000) default '',
     status int4 default 0,
     error_msg varchar(2000) default '',
-    oper_time timestamp(0),
+    oper_time timestamp(0) not null,
     cost_time int8 default 0,
-    primary key (oper_id)
-);
+    primary key (oper_id, oper_time)
+) partition by range (oper_time);
+-- 月分区sys_oper_log_pYYYYMM由日志分区维护任务预建，默认分区兜底尚未建分区的月份
+create table sys_oper_log_default partition of sys_oper_log default;
 alter sequence sys_oper_log_oper_id_seq restart 100;
 create index idx_sys_oper_log_bt on sys_oper_log(business_type);  
 create index idx_sys_oper_log_s on sys_oper_log(status);  
@@ -718,9 +720,11 @@ create table sys_logininfor (
     os varchar(50) default '',
     status char(1) default '0',
     msg varchar(255) default '',
-    login_time timestamp(0),
-    primary key (info_id)
-);
+    login_time timestamp(0) not null,
+    primary key (info_id, login_time)
+) partition by range (login_time);
+-- 月分区sys_logininfor_pYYYYMM由日志分区维护任务预建，默认分区兜底尚未建分区的月份
+create table sys_logininfor_default partition of sys_logininfor default;
 alter sequence sys_logininfor_info_id_seq restart 100;
 create index idx_sys_logininfor_s on sys_logininfor(status);  
 create index idx_sys_logininfor_lt on sys_logininfor(login_time);
@@ -783,6 +787,7 @@ comment on table sys_job is '定时任务调度表';
 insert into sys_job values(1, '系统默认（无参）', 'default', 'default', 'module_task.scheduler_test.job', null,   null, '0/10 * * * * ?', '3', '1', '1', 'admin', current_timestamp, '', null, '');
 insert into sys_job values(2, '系统默认（有参）', 'default', 'default', 'module_task.scheduler_test.job', 'test', null, '0/15 * * * * ?', '3', '1', '1', 'admin', current_timestamp, '', null, '');
 insert into sys_job values(3, '系统默认（多参）', 'default', 'default', 'module_task.scheduler_test.job', 'new',  '{test: 111}', '0/20 * * * * ?', '3', '1', '1', 'admin', current_timestamp, '', null, '');
+insert into sys_job values(4, '日志分区维护', 'default', 'default', 'module_task.log_task.maintain_log_partitions', null, null, '0 0 2 * * ?', '3', '1', '1', 'admin', current_timestamp, '', null, '预建日志表月分区并清理超出保留期的分区，默认暂停，确认日志保留期配置后再启用');
 
 -- ----------------------------
 -- 16、定时任务调度日志表
@@ -976,3 +981,30 @@ END;
 $BODY$
     LANGUAGE plpgsql VOLATILE
                      COST 100;
+
+-- ----------------------------
+-- 20、部门闭包表  祖先部门1-N后代部门
+-- ----------------------------
+drop table if exists sys_dept_closure;
+create table sys_dept_closure (
+    ancestor_id bigint not null,
+    descendant_id bigint not null,
+    depth int4 not null default 0,
+    primary key (ancestor_id, descendant_id)
+);
+create index idx_sys_dept_closure_d on sys_dept_closure(descendant_id, depth);
+comment on column sys_dept_closure.ancestor_id is '祖先部门id';
+comment on column sys_dept_closure.descendant_id is '后代部门id';
+comment on column sys_dept_closure.depth is '层级距离（0为部门自身）';
+comment on table sys_dept_closure is '部门闭包表';
+
+-- ----------------------------
+-- 初始化-部门闭包表数据，根据部门表的上级部门关系递归生成
+-- ----------------------------
+insert into sys_dept_closure (ancestor_id, descendant_id, depth)
+with recursive dept_closure (ancestor_id, descendant_id, depth) as (
+    select dept_id, dept_id, 0 from sys_dept
+    union all
+    select c.ancestor_id, d.dept_id, c.depth + 1 from dept_closure c join sys_dept d on d.parent_id = c.descendant_id
+)
+select ancestor_id, descendant_id, depth from dept_closure;
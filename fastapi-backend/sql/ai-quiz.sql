@@ -5,7 +5,7 @@ drop table if exists sys_dept;
 create table sys_dept (
   dept_id           bigint(20)      not null auto_increment    comment '部门id',
   parent_id         bigint(20)      default 0                  comment '父部门id',
-  ancestors         varchar(50)     default ''                 comment '祖级列表',
+  ancestors         varchar(1000)   default ''                 comment '祖级列表',
   dept_name         varchar(30)     default ''                 comment '部门名称',
   order_num         int(4)          default 0                  comment '显示顺序',
   leader            varchar(20)     default null               comment '负责人',
@@ -432,13 +432,17 @@ create table sys_oper_log (
   json_result       varchar(2000)   default ''                 comment '返回参数',
   status            int(1)          default 0                  comment '操作状态（0正常 1异常）',
   error_msg         varchar(2000)   default ''                 comment '错误消息',
-  oper_time         datetime                                   comment '操作时间',
+  oper_time         datetime        not null                   comment '操作时间',
   cost_time         bigint(20)      default 0                  comment '消耗时间',
-  primary key (oper_id),
+  primary key (oper_id, oper_time),
   key idx_sys_oper_log_bt (business_type),
   key idx_sys_oper_log_s  (status),
   key idx_sys_oper_log_ot (oper_time)
-) engine=innodb auto_increment=100 comment = '操作日志记录';
+) engine=innodb auto_increment=100 comment = '操作日志记录'
+-- 按月range分区，月分区pYYYYMM由日志分区维护任务从p_max中拆分预建
+partition by range (to_days(oper_time)) (
+  partition p_max values less than maxvalue
+);
 
 
 -- ----------------------------
@@ -570,11 +574,15 @@ create table sys_logininfor (
   os             varchar(50)    default ''                comment '操作系统',
   status         char(1)        default '0'               comment '登录状态（0成功 1失败）',
   msg            varchar(255)   default ''                comment '提示消息',
-  login_time     datetime                                 comment '访问时间',
-  primary key (info_id),
+  login_time     datetime       not null                  comment '访问时间',
+  primary key (info_id, login_time),
   key idx_sys_logininfor_s  (status),
   key idx_sys_logininfor_lt (login_time)
-) engine=innodb auto_increment=100 comment = '系统访问记录';
+) engine=innodb auto_increment=100 comment = '系统访问记录'
+-- 按月range分区，月分区pYYYYMM由日志分区维护任务从p_max中拆分预建
+partition by range (to_days(login_time)) (
+  partition p_max values less than maxvalue
+);
 
 
 -- ----------------------------
@@ -604,6 +612,7 @@ create table sys_job (
 insert into sys_job values(1, '系统默认（无参）', 'default', 'default', 'module_task.scheduler_test.job', NULL,   NULL, '0/10 * * * * ?', '3', '1', '1', 'admin', sysdate(), '', null, '');
 insert into sys_job values(2, '系统默认（有参）', 'default', 'default', 'module_task.scheduler_test.job', 'test', NULL, '0/15 * * * * ?', '3', '1', '1', 'admin', sysdate(), '', null, '');
 insert into sys_job values(3, '系统默认（多参）', 'default', 'default', 'module_task.scheduler_test.job', 'new',  '{\"test\": 111}', '0/20 * * * * ?', '3', '1', '1', 'admin', sysdate(), '', null, '');
+insert into sys_job values(4, '日志分区维护', 'default', 'default', 'module_task.log_task.maintain_log_partitions', NULL, NULL, '0 0 2 * * ?', '3', '1', '1', 'admin', sysdate(), '', null, '预建日志表月分区并清理超出保留期的分区，默认暂停，确认日志保留期配置后再启用');
 
 
 -- ----------------------------
@@ -710,4 +719,27 @@ create table gen_table_column (
   update_by         varchar(64)     default ''                 comment '更新者',
   update_time       datetime                                   comment '更新时间',
   primary key (column_id)
-) engine=innodb auto_increment=1 comment = '代码生成业务表字段';
\ No newline at end of file
+) engine=innodb auto_increment=1 comment = '代码生成业务表字段';
+
+-- ----------------------------
+-- 20、部门闭包表  祖先部门1-N后代部门
+-- ----------------------------
+drop table if exists sys_dept_closure;
+create table sys_dept_closure (
+  ancestor_id       bigint(20)      not null                   comment '祖先部门id',
+  descendant_id     bigint(20)      not null                   comment '后代部门id',
+  depth             int(4)          not null default 0         comment '层级距离（0为部门自身）',
+  primary key (ancestor_id, descendant_id),
+  key idx_sys_dept_closure_d (descendant_id, depth)
+) engine=innodb comment = '部门闭包表';
+
+-- ----------------------------
+-- 初始化-部门闭包表数据，根据部门表的上级部门关系递归生成
+-- ----------------------------
+insert into sys_dept_closure (ancestor_id, descendant_id, depth)
+with recursive dept_closure (ancestor_id, descendant_id, depth) as (
+  select dept_id, dept_id, 0 from sys_dept
+  union all
+  select c.ancestor_id, d.dept_id, c.depth + 1 from dept_closure c join sys_dept d on d.parent_id = c.descendant_id
+)
+select ancestor_id, descendant_id, depth from dept_closure;
@@ -0,0 +1,205 @@
+import asyncio
+import ipaddress
+import re
+from redis import asyncio as aioredis
+from typing import Dict, FrozenSet, List, Optional, Pattern, Set
+from config.enums import RedisInitKeyConfig
+from utils.log_util import logger
+
+
+BLACK_IP_CONFIG_KEY = 'sys.login.blackIPList'
+# 登录ip黑名单变更通知频道，各进程收到消息后重新编译本地匹配器
+BLACK_IP_CHANNEL = f'{RedisInitKeyConfig.SYS_CONFIG.key}:channel:{BLACK_IP_CONFIG_KEY}'
+
+
+class BlackIpMatcher:
+    """
+    编译后的登录ip黑名单匹配器，支持精确ip、CIDR网段（如10.0.0.0/8）、ip范围（如192.168.1.1-192.168.1.100）
+    及通配符（如192.168.1.*、192.168.*.1）
+    """
+
+    __slots__ = ('exact_ips', 'network_index', 'wildcard_pattern')
+
+    def __init__(self, black_ip_value: Optional[str]):
+        """
+        编译登录ip黑名单
+
+        :param black_ip_value: 参数配置中以逗号或分号分隔的登录ip黑名单
+        """
+        exact_ips: Set[str] = set()
+        # 按ip版本及前缀长度分组存储网段的网络地址整数值，匹配时每个前缀长度只需一次集合查找
+        network_index: Dict[int, Dict[int, Set[int]]] = {4: {}, 6: {}}
+        wildcard_patterns: List[str] = []
+        for item in re.split(r'[,;]', black_ip_value or ''):
+            item = item.strip()
+            if not item:
+                continue
+            try:
+                if '*' in item:
+                    network = self.__wildcard_to_network(item)
+                    if network is None:
+                        wildcard_patterns.append(re.escape(item).replace(r'\*', r'[0-9a-fA-F]*'))
+                        continue
+                    networks = [network]
+                elif '-' in item:
+                    start_ip, end_ip = (ipaddress.ip_address(ip.strip()) for ip in item.split('-', 1))
+                    networks = list(ipaddress.summarize_address_range(start_ip, end_ip))
+                elif '/' in item:
+                    networks = [ipaddress.ip_network(item, strict=False)]
+                else:
+                    exact_ips.add(str(ipaddress.ip_address(item)))
+                    continue
+            except ValueError:
+                logger.warning(f'登录ip黑名单配置项{item}格式有误，已忽略')
+                continue
+            for network in networks:
+                network_index[network.version].setdefault(network.prefixlen, set()).add(int(network.network_address))
+        self.exact_ips: FrozenSet[str] = frozenset(exact_ips)
+        self.network_index: Dict[int, Dict[int, FrozenSet[int]]] = {
+            version: {prefixlen: frozenset(addresses) for prefixlen, addresses in prefix_dict.items()}
+            for version, prefix_dict in network_index.items()
+        }
+        self.wildcard_pattern: Optional[Pattern] = (
+            re.compile(f'^(?:{"|".join(wildcard_patterns)})$') if wildcard_patterns else None
+        )
+
+    @staticmethod
+    def __wildcard_to_network(item: str):
+        """
+        将尾部通配的ipv4地址（如192.168.*.*）转换为对应网段，其他形式的通配符返回None
+
+        :param item: 通配符ip
+        :return: 对应网段
+        """
+        segments = item.split('.')
+        if len(segments) != 4:
+            return None
+        while segments and segments[-1] == '*':
+            segments.pop()
+        if '*' in ''.join(segments):
+            return None
+        prefixlen = len(segments) * 8
+        segments.extend(['0'] * (4 - len(segments)))
+        return ipaddress.ip_network(f'{".".join(segments)}/{prefixlen}')
+
+    def is_blocked(self, ip: str) -> bool:
+        """
+        判断ip是否命中登录ip黑名单
+
+        :param ip: 待校验的ip
+        :return: 是否命中
+        """
+        if not ip:
+            return False
+        try:
+            ip_address = ipaddress.ip_address(ip.strip())
+        except ValueError:
+            return False
+        if ip_address.version == 6 and ip_address.ipv4_mapped:
+            ip_address = ip_address.ipv4_mapped
+        if str(ip_address) in self.exact_ips:
+            return True
+        prefix_dict = self.network_index[ip_address.version]
+        if prefix_dict:
+            max_prefixlen = ip_address.max_prefixlen
+            ip_int = int(ip_address)
+            for prefixlen, addresses in prefix_dict.items():
+                if (ip_int >> (max_prefixlen - prefixlen) << (max_prefixlen - prefixlen)) in addresses:
+                    return True
+        if self.wildcard_pattern is not None and self.wildcard_pattern.match(str(ip_address)):
+            return True
+        return False
+
+
+class BlackIpUtil:
+    """
+    登录ip黑名单工具类
+    """
+
+    matcher: Optional[BlackIpMatcher] = None
+    listener_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    async def refresh(cls, redis: aioredis.Redis):
+        """
+        从redis读取登录ip黑名单并重新编译本地匹配器
+
+        :param redis: redis对象
+        :return:
+        """
+        black_ip_value = await redis.get(f'{RedisInitKeyConfig.SYS_CONFIG.key}:{BLACK_IP_CONFIG_KEY}')
+        cls.matcher = BlackIpMatcher(black_ip_value)
+
+    @classmethod
+    async def is_blocked(cls, redis: aioredis.Redis, ip: str) -> bool:
+        """
+        判断ip是否命中登录ip黑名单，匹配器未初始化时先从redis加载
+
+        :param redis: redis对象
+        :param ip: 待校验的ip
+        :return: 是否命中
+        """
+        if cls.matcher is None:
+            await cls.refresh(redis)
+        return cls.matcher.is_blocked(ip)
+
+    @classmethod
+    async def publish_refresh(cls, redis: aioredis.Redis):
+        """
+        重新编译本进程匹配器并通知其他进程刷新登录ip黑名单
+
+        :param redis: redis对象
+        :return:
+        """
+        await cls.refresh(redis)
+        await redis.publish(BLACK_IP_CHANNEL, BLACK_IP_CONFIG_KEY)
+
+    @classmethod
+    async def start_listener(cls, redis: aioredis.Redis):
+        """
+        应用启动时编译登录ip黑名单并订阅变更通知
+
+        :param redis: redis对象
+        :return:
+        """
+        await cls.refresh(redis)
+        cls.listener_task = asyncio.create_task(cls.__listen(redis))
+
+    @classmethod
+    async def stop_listener(cls):
+        """
+        应用关闭时取消订阅登录ip黑名单变更通知
+
+        :return:
+        """
+        if cls.listener_task is not None:
+            cls.listener_task.cancel()
+            try:
+                await cls.listener_task
+            except asyncio.CancelledError:
+                pass
+            cls.listener_task = None
+
+    @classmethod
+    async def __listen(cls, redis: aioredis.Redis):
+        """
+        订阅登录ip黑名单变更通知，连接异常时重试
+
+        :param redis: redis对象
+        :return:
+        """
+        while True:
+            try:
+                async with redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(BLACK_IP_CHANNEL)
+                    # 订阅建立前可能错过变更通知，重新订阅后主动刷新一次
+                    await cls.refresh(redis)
+                    async for message in pubsub.listen():
+                        if message.get('type') == 'message':
+                            await cls.refresh(redis)
+                            logger.info('登录ip黑名单已刷新')
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f'登录ip黑名单变更订阅异常，5秒后重试，详细错误信息：{e}')
+                await asyncio.sleep(5)
@@ -0,0 +1,248 @@
+import hashlib
+import json
+import time
+from cachebox import LRUCache, TTLCache
+from redis import asyncio as aioredis
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Literal, Optional, Tuple, Union
+from config.enums import RedisInitKeyConfig
+from config.env import CacheConfig
+from module_admin.entity.vo.user_vo import CurrentUserModel
+
+
+principal_cache = TTLCache(maxsize=CacheConfig.principal_cache_maxsize, ttl=CacheConfig.principal_cache_expire)
+token_cache = LRUCache(maxsize=CacheConfig.token_cache_maxsize)
+tree_cache = LRUCache(maxsize=CacheConfig.tree_cache_maxsize)
+
+TreeType = Literal['dept', 'menu']
+
+
+class PrincipalCacheManager:
+    """
+    登录用户信息缓存管理器
+    """
+
+    @classmethod
+    def get(cls, session_id: str) -> Optional[CurrentUserModel]:
+        """
+        获取会话编号对应的登录用户信息
+
+        :param session_id: 会话编号
+        :return: 登录用户信息对象
+        """
+        return principal_cache.get(session_id)
+
+    @classmethod
+    def set(cls, session_id: str, current_user: CurrentUserModel):
+        """
+        设置会话编号对应的登录用户信息
+
+        :param session_id: 会话编号
+        :param current_user: 登录用户信息对象
+        :return:
+        """
+        principal_cache.insert(session_id, current_user)
+
+    @classmethod
+    def delete(cls, session_ids: Union[str, List[str]]):
+        """
+        删除会话编号对应的登录用户信息
+
+        :param session_ids: 会话编号或会话编号列表
+        :return:
+        """
+        session_id_list = [session_ids] if isinstance(session_ids, str) else session_ids
+        for session_id in session_id_list:
+            principal_cache.pop(session_id, None)
+
+    @classmethod
+    def delete_by_user(cls, user_ids: Union[int, str, List[Union[int, str]]]):
+        """
+        删除用户id对应的所有会话的登录用户信息
+
+        :param user_ids: 用户id、以逗号分隔的用户id字符串或用户id列表
+        :return:
+        """
+        if isinstance(user_ids, str):
+            user_ids = user_ids.split(',')
+        elif not isinstance(user_ids, list):
+            user_ids = [user_ids]
+        user_id_set = {int(user_id) for user_id in user_ids if str(user_id).strip()}
+        expired_session_ids = [
+            session_id
+            for session_id, current_user in principal_cache.items()
+            if current_user.user.user_id in user_id_set
+        ]
+        cls.delete(expired_session_ids)
+
+    @classmethod
+    def clear(cls):
+        """
+        清空登录用户信息缓存
+
+        :return:
+        """
+        principal_cache.clear()
+
+
+class TokenCacheManager:
+    """
+    已验签令牌缓存管理器
+    """
+
+    hit_count: int = 0
+    miss_count: int = 0
+
+    @classmethod
+    def get_token_digest(cls, token: str) -> bytes:
+        """
+        获取令牌摘要，作为缓存键
+
+        :param token: 令牌
+        :return: 令牌摘要
+        """
+        return hashlib.blake2b(token.encode('utf-8'), digest_size=16).digest()
+
+    @classmethod
+    def get(cls, token: str) -> Optional[Dict]:
+        """
+        获取令牌对应的已验签载荷，载荷已过期时移除并视为未命中
+
+        :param token: 令牌
+        :return: 令牌载荷
+        """
+        token_digest = cls.get_token_digest(token)
+        payload = token_cache.get(token_digest)
+        if payload is not None:
+            exp = payload.get('exp')
+            if exp is None or exp > time.time():
+                cls.hit_count += 1
+                return payload
+            token_cache.pop(token_digest, None)
+        cls.miss_count += 1
+
+        return None
+
+    @classmethod
+    def set(cls, token: str, payload: Dict):
+        """
+        设置令牌对应的已验签载荷
+
+        :param token: 令牌
+        :param payload: 令牌载荷
+        :return:
+        """
+        token_cache.insert(cls.get_token_digest(token), payload)
+
+    @classmethod
+    def delete(cls, token: str):
+        """
+        删除令牌对应的已验签载荷
+
+        :param token: 令牌
+        :return:
+        """
+        token_cache.pop(cls.get_token_digest(token), None)
+
+    @classmethod
+    def delete_by_session(cls, session_ids: Union[str, List[str]]):
+        """
+        删除会话编号对应的已验签载荷
+
+        :param session_ids: 会话编号或会话编号列表
+        :return:
+        """
+        session_id_set = {session_ids} if isinstance(session_ids, str) else set(session_ids)
+        expired_token_digests = [
+            token_digest for token_digest, payload in token_cache.items() if payload.get('session_id') in session_id_set
+        ]
+        for token_digest in expired_token_digests:
+            token_cache.pop(token_digest, None)
+
+    @classmethod
+    def get_statistic(cls):
+        """
+        获取令牌缓存统计信息
+
+        :return: 令牌缓存统计信息
+        """
+        return dict(size=len(token_cache), hit=cls.hit_count, miss=cls.miss_count)
+
+
+class TreeCacheManager:
+    """
+    部门树及菜单树缓存管理器，树的源数据按版本号缓存至redis及进程内，由源数据生成的树按版本号及数据权限缓存至进程内；
+    部门、菜单及角色变更提交后递增对应版本号，各进程读取到新版本号后重新加载，旧版本的缓存自然淘汰
+    """
+
+    @classmethod
+    async def get_version(cls, redis: aioredis.Redis, tree_type: TreeType) -> int:
+        """
+        获取树的当前版本号
+
+        :param redis: redis对象
+        :param tree_type: 树类型，dept或menu
+        :return: 当前版本号
+        """
+        return int(await redis.hget(RedisInitKeyConfig.TREE_VERSION.key, tree_type) or 0)
+
+    @classmethod
+    async def bump_version(cls, redis: aioredis.Redis, *tree_types: TreeType):
+        """
+        递增树的版本号，使已缓存的树失效
+
+        :param redis: redis对象
+        :param tree_types: 树类型，dept或menu
+        :return:
+        """
+        async with redis.pipeline(transaction=True) as pipe:
+            for tree_type in tree_types:
+                pipe.hincrby(RedisInitKeyConfig.TREE_VERSION.key, tree_type, 1)
+            await pipe.execute()
+
+    @classmethod
+    async def get_source(
+        cls, redis: aioredis.Redis, tree_type: TreeType, loader: Callable[[], Awaitable[Any]]
+    ) -> Tuple[int, Any]:
+        """
+        获取树的源数据，依次读取进程内缓存、redis缓存，均未命中时调用加载方法并写入缓存
+
+        :param redis: redis对象
+        :param tree_type: 树类型，dept或menu
+        :param loader: 加载源数据的方法，返回值需可json序列化
+        :return: 当前版本号及源数据
+        """
+        version = await cls.get_version(redis, tree_type)
+        source = tree_cache.get((tree_type, version))
+        if source is not None:
+            return version, source
+        cache_key = f'{RedisInitKeyConfig.TREE_CACHE.key}:{tree_type}:{version}'
+        cache_value = await redis.get(cache_key)
+        if cache_value:
+            source = json.loads(cache_value)
+        else:
+            source = await loader()
+            await redis.set(cache_key, json.dumps(source, ensure_ascii=False), ex=CacheConfig.tree_cache_expire)
+        tree_cache.insert((tree_type, version), source)
+
+        return version, source
+
+    @classmethod
+    def get(cls, key: Hashable) -> Optional[Any]:
+        """
+        获取进程内缓存的树
+
+        :param key: 缓存键，需包含树类型及版本号
+        :return: 缓存的树
+        """
+        return tree_cache.get(key)
+
+    @classmethod
+    def set(cls, key: Hashable, tree: Any):
+        """
+        设置进程内缓存的树，缓存的树在各请求间共享，调用方不得修改
+
+        :param key: 缓存键，需包含树类型及版本号
+        :param tree: 树
+        :return:
+        """
+        tree_cache.insert(key, tree)
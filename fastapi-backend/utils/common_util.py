@@ -1,15 +1,17 @@
 import io
 import os
-import pandas as pd
 import re
 from openpyxl import Workbook
 from openpyxl.styles import Alignment, PatternFill
 from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.datavalidation import DataValidation
+from operator import attrgetter, itemgetter
+from sqlalchemy import TextClause
 from sqlalchemy.engine.row import Row
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Callable, Dict, List, Optional, Tuple, Type
 from config.database import Base
-from config.env import CachePathConfig
+from config.env import CachePathConfig, DataBaseConfig
 
 
 def worship():
@@ -39,11 +41,83 @@ def worship():
     """)
 
 
+# 下划线形式与小驼峰形式键名的转换结果缓存，键名来自模型字段及接口参数，数量有限
+CASE_KEY_CACHE_MAXSIZE = 10000
+camel_key_cache: Dict[str, str] = {}
+snake_key_cache: Dict[str, str] = {}
+CAMEL_WORD_PATTERN = re.compile('(.)([A-Z][a-z]+)')
+CAMEL_BOUNDARY_PATTERN = re.compile('([a-z0-9])([A-Z])')
+
+
+class ModelSerializer:
+    """
+    预编译的sqlalchemy模型序列化器，模型的表字段列表及批量取值方法只在首次使用时计算一次
+    """
+
+    __slots__ = ('column_names', 'dict_getter', 'attr_getter')
+
+    def __init__(self, model: Type[Base]):
+        """
+        根据模型的表结构预先计算表字段列表及批量取值方法
+
+        :param model: sqlalchemy模型类
+        """
+        self.column_names: Tuple[str, ...] = tuple(column.name for column in model.__table__.columns)
+        self.dict_getter = self.__get_tuple_getter(itemgetter, self.column_names)
+        self.attr_getter = self.__get_tuple_getter(attrgetter, self.column_names)
+
+    @staticmethod
+    def __get_tuple_getter(getter_class: Callable, names: Tuple[str, ...]) -> Callable[[object], Tuple]:
+        """
+        生成始终返回元组的批量取值方法，itemgetter及attrgetter只有一个参数时返回的不是元组
+
+        :param getter_class: itemgetter或attrgetter
+        :param names: 字段名称元组
+        :return: 批量取值方法
+        """
+        if len(names) == 1:
+            getter = getter_class(names[0])
+            return lambda obj: (getter(obj),)
+        return getter_class(*names)
+
+    def to_column_dict(self, obj: Base, key_names: Tuple[str, ...]) -> Dict:
+        """
+        按表字段顺序读取模型对象的字段值，并使用预先转换好的键名生成字典，
+        字段均已加载时直接从对象字典取值，否则通过属性访问触发加载
+
+        :param obj: sqlalchemy模型对象
+        :param key_names: 与表字段一一对应的键名元组
+        :return: 字典结果
+        """
+        try:
+            values = self.dict_getter(obj.__dict__)
+        except KeyError:
+            values = self.attr_getter(obj)
+        return dict(zip(key_names, values))
+
+
 class SqlalchemyUtil:
     """
     sqlalchemy工具类
     """
 
+    serializer_cache: Dict[type, ModelSerializer] = {}
+
+    @classmethod
+    def get_serializer(cls, model: Type[Base]) -> ModelSerializer:
+        """
+        获取模型对应的预编译序列化器，不存在时编译并缓存
+
+        :param model: sqlalchemy模型类
+        :return: 预编译序列化器
+        """
+        serializer = cls.serializer_cache.get(model)
+        if serializer is None:
+            serializer = ModelSerializer(model)
+            cls.serializer_cache[model] = serializer
+
+        return serializer
+
     @classmethod
     def base_to_dict(cls, obj: Base):
         """
@@ -67,8 +141,9 @@ class SqlalchemyUtil:
         """
         if isinstance(result, Base):
             return cls.base_to_dict(result)
-        elif isinstance(result, list):
-            return [cls.serialize_result(row) for row in result]
+        elif isinstance(result, (list, tuple)):
+            # 列表中的模型对象直接转换，减少逐行递归调用的开销
+            return [cls.base_to_dict(row) if isinstance(row, Base) else cls.serialize_result(row) for row in result]
         elif isinstance(result, Row):
             if all([isinstance(row, Base) for row in result]):
                 return [cls.base_to_dict(row) for row in result]
@@ -78,24 +153,64 @@ class SqlalchemyUtil:
                 return result._asdict()
         return result
 
+    @classmethod
+    async def execute_ddl(cls, db: AsyncSession, statement: TextClause, params: Optional[Dict] = None):
+        """
+        执行ddl语句（含truncate），mysql的ddl语句会隐式提交且无法回滚，因此执行前先提交当前事务，
+        使之前的修改在此处显式提交，并释放当前事务持有的元数据锁；postgresql的ddl语句支持事务，随会话一并提交或回滚
+
+        :param db: orm对象
+        :param statement: ddl语句
+        :param params: 语句参数
+        :return:
+        """
+        if DataBaseConfig.db_type != 'postgresql':
+            await db.commit()
+        await db.execute(statement, params)
+
 
 class CamelCaseUtil:
     """
     下划线形式(snake_case)转小驼峰形式(camelCase)工具方法
     """
 
+    # 各模型表字段转换后的键名元组缓存
+    model_key_cache: Dict[type, Tuple[str, ...]] = {}
+
     @classmethod
     def snake_to_camel(cls, snake_str):
         """
-        下划线形式字符串(snake_case)转换为小驼峰形式字符串(camelCase)
+        下划线形式字符串(snake_case)转换为小驼峰形式字符串(camelCase)，转换结果会被缓存
 
         :param snake_str: 下划线形式字符串
         :return: 小驼峰形式字符串
         """
-        # 分割字符串
-        words = snake_str.split('_')
-        # 小驼峰命名，第一个词首字母小写，其余词首字母大写
-        return words[0] + ''.join(word.capitalize() for word in words[1:])
+        camel_str = camel_key_cache.get(snake_str)
+        if camel_str is None:
+            # 分割字符串
+            words = snake_str.split('_')
+            # 小驼峰命名，第一个词首字母小写，其余词首字母大写
+            camel_str = words[0] + ''.join(word.capitalize() for word in words[1:])
+            if len(camel_key_cache) < CASE_KEY_CACHE_MAXSIZE:
+                camel_key_cache[snake_str] = camel_str
+        return camel_str
+
+    @classmethod
+    def model_to_dict(cls, obj: Base):
+        """
+        将sqlalchemy模型对象转换为键名为小驼峰形式的字典
+
+        :param obj: sqlalchemy模型对象
+        :return: 小驼峰形式结果
+        """
+        model = type(obj)
+        serializer = SqlalchemyUtil.get_serializer(model)
+        key_names = cls.model_key_cache.get(model)
+        if key_names is None:
+            key_names = tuple(cls.snake_to_camel(name) for name in serializer.column_names)
+            cls.model_key_cache[model] = key_names
+
+        return serializer.to_column_dict(obj, key_names)
 
     @classmethod
     def transform_result(cls, result):
@@ -113,26 +228,18 @@ class CamelCaseUtil:
         # 如果是一组字典或其他类型的列表，遍历列表进行转换
         elif isinstance(result, list):
             return [
-                cls.transform_result(row)
-                if isinstance(row, (dict, Row))
-                else (
-                    cls.transform_result({c.name: getattr(row, c.name) for c in row.__table__.columns}) if row else row
-                )
+                cls.transform_result(row) if isinstance(row, (dict, Row)) else (cls.model_to_dict(row) if row else row)
                 for row in result
             ]
         # 如果是sqlalchemy的Row实例，遍历Row进行转换
         elif isinstance(result, Row):
             return [
-                cls.transform_result(row)
-                if isinstance(row, dict)
-                else (
-                    cls.transform_result({c.name: getattr(row, c.name) for c in row.__table__.columns}) if row else row
-                )
+                cls.transform_result(row) if isinstance(row, dict) else (cls.model_to_dict(row) if row else row)
                 for row in result
             ]
         # 如果是其他类型，如模型实例，先转换为字典
         else:
-            return cls.transform_result({c.name: getattr(result, c.name) for c in result.__table__.columns})
+            return cls.model_to_dict(result)
 
 
 class SnakeCaseUtil:
@@ -140,17 +247,42 @@ class SnakeCaseUtil:
     小驼峰形式(camelCase)转下划线形式(snake_case)工具方法
     """
 
+    # 各模型表字段转换后的键名元组缓存
+    model_key_cache: Dict[type, Tuple[str, ...]] = {}
+
     @classmethod
     def camel_to_snake(cls, camel_str):
         """
-        小驼峰形式字符串(camelCase)转换为下划线形式字符串(snake_case)
+        小驼峰形式字符串(camelCase)转换为下划线形式字符串(snake_case)，转换结果会被缓存
 
         :param camel_str: 小驼峰形式字符串
         :return: 下划线形式字符串
         """
-        # 在大写字母前添加一个下划线，然后将整个字符串转为小写
-        words = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', camel_str)
-        return re.sub('([a-z0-9])([A-Z])', r'\1_\2', words).lower()
+        snake_str = snake_key_cache.get(camel_str)
+        if snake_str is None:
+            # 在大写字母前添加一个下划线，然后将整个字符串转为小写
+            words = CAMEL_WORD_PATTERN.sub(r'\1_\2', camel_str)
+            snake_str = CAMEL_BOUNDARY_PATTERN.sub(r'\1_\2', words).lower()
+            if len(snake_key_cache) < CASE_KEY_CACHE_MAXSIZE:
+                snake_key_cache[camel_str] = snake_str
+        return snake_str
+
+    @classmethod
+    def model_to_dict(cls, obj: Base):
+        """
+        将sqlalchemy模型对象转换为键名为下划线形式的字典
+
+        :param obj: sqlalchemy模型对象
+        :return: 下划线形式结果
+        """
+        model = type(obj)
+        serializer = SqlalchemyUtil.get_serializer(model)
+        key_names = cls.model_key_cache.get(model)
+        if key_names is None:
+            key_names = tuple(cls.camel_to_snake(name) for name in serializer.column_names)
+            cls.model_key_cache[model] = key_names
+
+        return serializer.to_column_dict(obj, key_names)
 
     @classmethod
     def transform_result(cls, result):
@@ -168,26 +300,18 @@ class SnakeCaseUtil:
         # 如果是一组字典或其他类型的列表，遍历列表进行转换
         elif isinstance(result, list):
             return [
-                cls.transform_result(row)
-                if isinstance(row, (dict, Row))
-                else (
-                    cls.transform_result({c.name: getattr(row, c.name) for c in row.__table__.columns}) if row else row
-                )
+                cls.transform_result(row) if isinstance(row, (dict, Row)) else (cls.model_to_dict(row) if row else row)
                 for row in result
             ]
         # 如果是sqlalchemy的Row实例，遍历Row进行转换
         elif isinstance(result, Row):
             return [
-                cls.transform_result(row)
-                if isinstance(row, dict)
-                else (
-                    cls.transform_result({c.name: getattr(row, c.name) for c in row.__table__.columns}) if row else row
-                )
+                cls.transform_result(row) if isinstance(row, dict) else (cls.model_to_dict(row) if row else row)
                 for row in result
             ]
         # 如果是其他类型，如模型实例，先转换为字典
         else:
-            return cls.transform_result({c.name: getattr(result, c.name) for c in result.__table__.columns})
+            return cls.model_to_dict(result)
 
 
 def bytes2human(n, format_str='%(value).1f%(symbol)s'):
@@ -214,21 +338,6 @@ def bytes2file_response(bytes_info):
     yield bytes_info
 
 
-def export_list2excel(list_data: List):
-    """
-    工具方法：将需要导出的list数据转化为对应excel的二进制数据
-
-    :param list_data: 数据列表
-    :return: 字典信息对应excel的二进制数据
-    """
-    df = pd.DataFrame(list_data)
-    binary_data = io.BytesIO()
-    df.to_excel(binary_data, index=False, engine='openpyxl')
-    binary_data = binary_data.getvalue()
-
-    return binary_data
-
-
 def get_excel_template(header_list: List, selector_header_list: List, option_list: List[dict]):
     """
     工具方法：将需要导出的list数据转化为对应excel的二进制数据
@@ -0,0 +1,199 @@
+import csv
+import io
+import tempfile
+from datetime import date, datetime, time
+from decimal import Decimal
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles import Font
+from openpyxl.worksheet._write_only import WriteOnlyWorksheet
+from starlette.concurrency import run_in_threadpool
+from typing import Any, AsyncGenerator, AsyncIterable, Callable, Dict, List, Literal, Optional, Union
+
+
+ExportFormat = Literal['xlsx', 'csv']
+EXPORT_MEDIA_TYPES = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv; charset=utf-8',
+}
+# 导出文件分块响应时每块读取的字节数
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+class ExportUtil:
+    """
+    列表数据导出工具类，按批写入行数据并分块返回文件内容，内存占用与导出行数无关
+    """
+
+    @classmethod
+    def get_media_type(cls, export_format: ExportFormat) -> str:
+        """
+        获取导出格式对应的响应媒体类型
+
+        :param export_format: 导出格式
+        :return: 响应媒体类型
+        """
+        return EXPORT_MEDIA_TYPES[export_format]
+
+    @classmethod
+    def export_list(
+        cls,
+        data: Union[List[Dict], AsyncIterable[List[Dict]]],
+        mapping_dict: Dict[str, str],
+        rows_formatter: Optional[Callable[[List[Dict]], Any]] = None,
+        export_format: ExportFormat = 'xlsx',
+    ) -> AsyncGenerator[bytes, None]:
+        """
+        将列表数据或逐批返回列表数据的异步生成器导出为excel或csv文件
+
+        :param data: 数据列表或逐批返回数据列表的异步生成器
+        :param mapping_dict: 导出字段与表头的映射字典，未在映射字典中的字段不导出
+        :param rows_formatter: 可选，每批数据写入前的格式化方法，直接修改传入的数据列表
+        :param export_format: 导出格式，xlsx或csv
+        :return: 分块返回文件内容的异步生成器
+        """
+        if export_format == 'csv':
+            return cls.__export_csv(data, mapping_dict, rows_formatter)
+        return cls.__export_excel(data, mapping_dict, rows_formatter)
+
+    @classmethod
+    async def __export_excel(
+        cls,
+        data: Union[List[Dict], AsyncIterable[List[Dict]]],
+        mapping_dict: Dict[str, str],
+        rows_formatter: Optional[Callable[[List[Dict]], Any]],
+    ) -> AsyncGenerator[bytes, None]:
+        """
+        使用openpyxl只写模式逐批写入行数据，已写入的行由openpyxl暂存至临时文件，保存后分块读取返回
+
+        :param data: 数据列表或逐批返回数据列表的异步生成器
+        :param mapping_dict: 导出字段与表头的映射字典
+        :param rows_formatter: 每批数据写入前的格式化方法
+        :return: 分块返回excel文件内容的异步生成器
+        """
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet()
+        columns = None
+        async for rows in cls.__iterate_chunks(data):
+            if rows_formatter:
+                rows_formatter(rows)
+            if columns is None:
+                columns = cls.__get_columns(rows, mapping_dict)
+                worksheet.append([cls.__get_header_cell(worksheet, mapping_dict[column]) for column in columns])
+            await run_in_threadpool(cls.__append_excel_rows, worksheet, rows, columns)
+        with tempfile.TemporaryFile() as export_file:
+            await run_in_threadpool(workbook.save, export_file)
+            export_file.seek(0)
+            while True:
+                content = await run_in_threadpool(export_file.read, EXPORT_CHUNK_BYTES)
+                if not content:
+                    break
+                yield content
+
+    @classmethod
+    async def __export_csv(
+        cls,
+        data: Union[List[Dict], AsyncIterable[List[Dict]]],
+        mapping_dict: Dict[str, str],
+        rows_formatter: Optional[Callable[[List[Dict]], Any]],
+    ) -> AsyncGenerator[bytes, None]:
+        """
+        逐批将行数据编码为csv并直接返回，首块附带utf-8 bom以便excel正确识别中文
+
+        :param data: 数据列表或逐批返回数据列表的异步生成器
+        :param mapping_dict: 导出字段与表头的映射字典
+        :param rows_formatter: 每批数据写入前的格式化方法
+        :return: 分块返回csv文件内容的异步生成器
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        columns = None
+        async for rows in cls.__iterate_chunks(data):
+            if rows_formatter:
+                rows_formatter(rows)
+            if columns is None:
+                columns = cls.__get_columns(rows, mapping_dict)
+                buffer.write('\ufeff')
+                writer.writerow([mapping_dict[column] for column in columns])
+            writer.writerows([[cls.__get_csv_value(row.get(column)) for column in columns] for row in rows])
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+
+    @staticmethod
+    async def __iterate_chunks(data: Union[List[Dict], AsyncIterable[List[Dict]]]) -> AsyncGenerator[List[Dict], None]:
+        """
+        将数据列表或异步生成器统一为逐批返回数据列表的异步生成器，跳过空批次
+
+        :param data: 数据列表或逐批返回数据列表的异步生成器
+        :return: 逐批返回数据列表的异步生成器
+        """
+        if isinstance(data, list):
+            if data:
+                yield data
+            return
+        async for rows in data:
+            if rows:
+                yield rows
+
+    @staticmethod
+    def __get_columns(rows: List[Dict], mapping_dict: Dict[str, str]) -> List[str]:
+        """
+        以首行数据的字段顺序确定导出列，与原先按数据字段生成表头的顺序保持一致
+
+        :param rows: 首批数据列表
+        :param mapping_dict: 导出字段与表头的映射字典
+        :return: 导出列的字段列表
+        """
+        return [key for key in rows[0] if mapping_dict.get(key)]
+
+    @staticmethod
+    def __get_header_cell(worksheet: WriteOnlyWorksheet, header: str) -> WriteOnlyCell:
+        """
+        生成加粗的表头单元格
+
+        :param worksheet: 只写模式的工作表
+        :param header: 表头文字
+        :return: 表头单元格
+        """
+        cell = WriteOnlyCell(worksheet, value=header)
+        cell.font = Font(bold=True)
+        return cell
+
+    @classmethod
+    def __append_excel_rows(cls, worksheet: WriteOnlyWorksheet, rows: List[Dict], columns: List[str]):
+        """
+        将一批数据写入只写模式的工作表
+
+        :param worksheet: 只写模式的工作表
+        :param rows: 数据列表
+        :param columns: 导出列的字段列表
+        :return:
+        """
+        for row in rows:
+            worksheet.append([cls.__get_excel_value(row.get(column)) for column in columns])
+
+    @staticmethod
+    def __get_excel_value(value: Any):
+        """
+        将字段值转换为excel单元格支持的值，并移除excel不允许的控制字符
+
+        :param value: 字段值
+        :return: 单元格值
+        """
+        if value is None or isinstance(value, (bool, int, float, Decimal, datetime, date, time)):
+            return value
+        return ILLEGAL_CHARACTERS_RE.sub('', str(value))
+
+    @staticmethod
+    def __get_csv_value(value: Any):
+        """
+        将字段值转换为csv单元格文本，日期时间不输出微秒
+
+        :param value: 字段值
+        :return: 单元格文本
+        """
+        if isinstance(value, datetime):
+            return value.strftime('%Y-%m-%d %H:%M:%S')
+        return '' if value is None else value
@@ -0,0 +1,47 @@
+import io
+import pandas as pd
+from typing import Dict, Iterator, List, Optional
+
+
+# 批量导入时每批写入数据库及按账号批量查询的行数
+IMPORT_CHUNK_SIZE = 1000
+
+
+class ImportUtil:
+    """
+    excel导入工具类，使用pandas向量化操作解析及规范化导入数据，解析过程为cpu密集型操作，调用方应在线程池中执行
+    """
+
+    @classmethod
+    def read_excel(
+        cls, contents: bytes, header_dict: Dict[str, str], value_mapping: Optional[Dict[str, Dict[str, str]]] = None
+    ) -> List[Dict]:
+        """
+        解析导入的excel文件，所有单元格按文本读取，去除首尾空白后将空单元格统一转换为None
+
+        :param contents: excel文件内容
+        :param header_dict: 表头与字段的映射字典，文件中缺少的列补为None，未在映射字典中的列忽略
+        :param value_mapping: 可选，字段值的映射字典，如{'status': {'正常': '0', '停用': '1'}}
+        :return: 按文件行顺序排列的导入数据列表
+        """
+        df = pd.read_excel(io.BytesIO(contents), dtype=str)
+        df = df.rename(columns=header_dict).reindex(columns=list(dict.fromkeys(header_dict.values()))).astype(object)
+        df = df.apply(lambda column: column.str.strip()).mask(lambda frame: frame == '').dropna(how='all')
+        for column, mapping in (value_mapping or {}).items():
+            # 逐值映射，避免Series.replace将全空列向下转换为float64
+            df[column] = df[column].map(lambda value: mapping.get(value, value))
+        df = df.astype(object)
+
+        return df.where(df.notna(), None).to_dict('records')
+
+    @staticmethod
+    def chunk(data: List, chunk_size: int = IMPORT_CHUNK_SIZE) -> Iterator[List]:
+        """
+        将列表按固定行数分批
+
+        :param data: 数据列表
+        :param chunk_size: 每批的行数
+        :return: 逐批返回数据列表的迭代器
+        """
+        for index in range(0, len(data), chunk_size):
+            yield data[index : index + chunk_size]
@@ -0,0 +1,248 @@
+import asyncio
+import csv
+import httpx
+import ipaddress
+import mmap
+import os
+import struct
+import time
+from cachebox import TTLCache
+from ipaddress import IPv4Address, IPv6Address
+from typing import Dict, Iterable, Optional, Tuple, Union
+from config.env import AppConfig, CacheConfig
+from utils.log_util import logger
+
+
+INNER_IP_LOCATION = '内网IP'
+UNKNOWN_IP_LOCATION = '未知'
+REMOTE_IP_LOCATION_URL = 'https://qifu-api.baidubce.com/ip/geo/v1/district'
+
+# 离线ip库文件格式（大端序）：
+# 文件头：魔数b'IPLD'(4字节) + 记录数(4字节)
+# 记录区：按起始ip升序排列的定长记录，每条为起始ip(4字节) + 结束ip(4字节) + 归属区域偏移(4字节) + 归属区域长度(2字节)
+# 文本区：去重后的utf-8归属区域文本，偏移相对于文本区起始位置
+DATABASE_MAGIC = b'IPLD'
+HEADER_STRUCT = struct.Struct('>4sI')
+RECORD_STRUCT = struct.Struct('>IIIH')
+
+ip_location_cache = TTLCache(maxsize=CacheConfig.ip_location_cache_maxsize, ttl=CacheConfig.ip_location_cache_expire)
+# 远程查询失败的ip短期缓存，有效期内同一ip不再请求远程接口
+ip_location_failure_cache = TTLCache(
+    maxsize=CacheConfig.ip_location_cache_maxsize, ttl=CacheConfig.ip_location_failure_cache_expire
+)
+
+
+class IpLocationDatabase:
+    """
+    基于内存映射的离线ip库，按起始ip二分查找所在区间
+    """
+
+    def __init__(self, db_path: str):
+        """
+        打开离线ip库并建立内存映射
+
+        :param db_path: 离线ip库文件路径
+        """
+        with open(db_path, 'rb') as db_file:
+            self.mm = mmap.mmap(db_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.record_count = HEADER_STRUCT.unpack_from(self.mm, 0)
+        if magic != DATABASE_MAGIC:
+            self.mm.close()
+            raise ValueError(f'{db_path}不是有效的离线ip库文件')
+        self.text_offset = HEADER_STRUCT.size + self.record_count * RECORD_STRUCT.size
+
+    def search(self, ip: int) -> Optional[str]:
+        """
+        二分查找ip所在区间的归属区域
+
+        :param ip: ipv4地址对应的整数
+        :return: 归属区域，未收录时返回None
+        """
+        low, high = 0, self.record_count - 1
+        while low <= high:
+            middle = (low + high) >> 1
+            start_ip, end_ip, location_offset, location_length = RECORD_STRUCT.unpack_from(
+                self.mm, HEADER_STRUCT.size + middle * RECORD_STRUCT.size
+            )
+            if ip < start_ip:
+                high = middle - 1
+            elif ip > end_ip:
+                low = middle + 1
+            else:
+                location_start = self.text_offset + location_offset
+                return self.mm[location_start : location_start + location_length].decode('utf-8')
+        return None
+
+    def close(self):
+        """
+        关闭内存映射
+
+        :return:
+        """
+        self.mm.close()
+
+    @classmethod
+    def build(cls, records: Iterable[Tuple[str, str, str]], db_path: str):
+        """
+        根据ip区间记录生成离线ip库文件
+
+        :param records: (起始ip, 结束ip, 归属区域)记录列表
+        :param db_path: 离线ip库文件路径
+        :return:
+        """
+        sorted_records = sorted(
+            (int(IPv4Address(start_ip.strip())), int(IPv4Address(end_ip.strip())), location.strip())
+            for start_ip, end_ip, location in records
+        )
+        text_offset_dict: Dict[str, Tuple[int, int]] = {}
+        text_buffer = bytearray()
+        record_buffer = bytearray()
+        for start_ip, end_ip, location in sorted_records:
+            if location not in text_offset_dict:
+                location_bytes = location.encode('utf-8')
+                text_offset_dict[location] = (len(text_buffer), len(location_bytes))
+                text_buffer.extend(location_bytes)
+            record_buffer.extend(RECORD_STRUCT.pack(start_ip, end_ip, *text_offset_dict[location]))
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with open(db_path, 'wb') as db_file:
+            db_file.write(HEADER_STRUCT.pack(DATABASE_MAGIC, len(sorted_records)))
+            db_file.write(record_buffer)
+            db_file.write(text_buffer)
+
+    @classmethod
+    def build_from_csv(cls, csv_path: str, db_path: str):
+        """
+        根据csv文件（每行为起始ip,结束ip,归属区域）生成离线ip库文件
+
+        :param csv_path: csv文件路径
+        :param db_path: 离线ip库文件路径
+        :return:
+        """
+        with open(csv_path, encoding='utf-8', newline='') as csv_file:
+            cls.build([(row[0], row[1], row[2]) for row in csv.reader(csv_file) if len(row) >= 3], db_path)
+
+
+class IpLocationUtil:
+    """
+    ip归属区域查询工具类，支持离线ip库（offline）、远程异步接口（remote）及关闭（disabled）三种模式
+    """
+
+    database: Optional[IpLocationDatabase] = None
+    database_loaded: bool = False
+    http_client: Optional[httpx.AsyncClient] = None
+    remote_failure_count: int = 0
+    remote_paused_until: float = 0.0
+
+    @classmethod
+    def get_query_mode(cls) -> str:
+        """
+        获取ip归属区域查询模式，兼容布尔配置（true为remote，false为disabled）
+
+        :return: 查询模式
+        """
+        query_mode = AppConfig.app_ip_location_query
+        if isinstance(query_mode, bool):
+            return 'remote' if query_mode else 'disabled'
+        return query_mode
+
+    @classmethod
+    async def get_ip_location(cls, ip: Optional[str]) -> str:
+        """
+        查询ip归属区域，结果缓存至配置的有效期
+
+        :param ip: 需要查询的ip
+        :return: ip归属区域
+        """
+        query_mode = cls.get_query_mode()
+        if query_mode == 'disabled' or not ip:
+            return INNER_IP_LOCATION
+        try:
+            ip_address = ipaddress.ip_address(ip.strip())
+        except ValueError:
+            return UNKNOWN_IP_LOCATION
+        if ip_address.is_private or ip_address.is_loopback:
+            return INNER_IP_LOCATION
+        ip_location = ip_location_cache.get(ip_address)
+        if ip_location is None:
+            if query_mode == 'offline':
+                ip_location = cls.__get_offline_ip_location(ip_address)
+            else:
+                if ip_address in ip_location_failure_cache or time.monotonic() < cls.remote_paused_until:
+                    return UNKNOWN_IP_LOCATION
+                ip_location = await cls.__get_remote_ip_location(ip_address)
+                if ip_location is None:
+                    # 远程查询失败时仅短期缓存，避免接口故障期间每次请求都等待超时
+                    ip_location_failure_cache.insert(ip_address, UNKNOWN_IP_LOCATION)
+                    return UNKNOWN_IP_LOCATION
+            ip_location_cache.insert(ip_address, ip_location)
+
+        return ip_location
+
+    @classmethod
+    def __get_offline_ip_location(cls, ip_address: Union[IPv4Address, IPv6Address]) -> str:
+        """
+        从离线ip库查询ip归属区域
+
+        :param ip_address: ip地址对象
+        :return: ip归属区域
+        """
+        if not cls.database_loaded:
+            cls.database_loaded = True
+            try:
+                cls.database = IpLocationDatabase(AppConfig.app_ip_location_db_path)
+            except (OSError, ValueError) as e:
+                logger.warning(f'离线ip库加载失败，ip归属区域将显示为未知，详细错误信息：{e}')
+        if ip_address.version == 6:
+            ip_address = ip_address.ipv4_mapped
+        if cls.database is None or ip_address is None:
+            return UNKNOWN_IP_LOCATION
+
+        return cls.database.search(int(ip_address)) or UNKNOWN_IP_LOCATION
+
+    @classmethod
+    async def __get_remote_ip_location(cls, ip_address: Union[IPv4Address, IPv6Address]) -> Optional[str]:
+        """
+        通过远程接口异步查询ip归属区域，连续失败达到阈值后在失败缓存有效期内暂停远程查询，
+        暂停结束后的首次查询仍失败则立即再次暂停，查询成功后重置失败次数
+
+        :param ip_address: ip地址对象
+        :return: ip归属区域，查询失败时返回None
+        """
+        if cls.http_client is None:
+            cls.http_client = httpx.AsyncClient(timeout=AppConfig.app_ip_location_timeout)
+        try:
+            ip_result = await cls.http_client.get(REMOTE_IP_LOCATION_URL, params={'ip': str(ip_address)})
+            ip_result.raise_for_status()
+            data = ip_result.json().get('data') or {}
+        except (httpx.HTTPError, ValueError, asyncio.TimeoutError) as e:
+            logger.warning(f'ip归属区域查询失败，详细错误信息：{e}')
+            cls.remote_failure_count += 1
+            if cls.remote_failure_count >= AppConfig.app_ip_location_failure_threshold:
+                cls.remote_paused_until = time.monotonic() + CacheConfig.ip_location_failure_cache_expire
+                logger.warning(
+                    f'ip归属区域远程接口连续{cls.remote_failure_count}次查询失败，'
+                    f'暂停远程查询{CacheConfig.ip_location_failure_cache_expire}秒'
+                )
+            return None
+        cls.remote_failure_count = 0
+        prov = data.get('prov')
+        city = data.get('city')
+        if prov or city:
+            return f'{prov}-{city}'
+
+        return UNKNOWN_IP_LOCATION
+
+    @classmethod
+    async def close(cls):
+        """
+        应用关闭时释放离线ip库及远程查询客户端
+
+        :return:
+        """
+        if cls.database is not None:
+            cls.database.close()
+            cls.database = None
+        cls.database_loaded = False
+        if cls.http_client is not None:
+            await cls.http_client.aclose()
+            cls.http_client = None
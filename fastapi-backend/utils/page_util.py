@@ -1,11 +1,33 @@
+import base64
+import json
 import math
+from cachebox import TTLCache
+from datetime import date, datetime
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import func, select, Select
+from sqlalchemy import and_, event, false, func, or_, select, text, Select
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import True_, UnaryExpression
+from sqlalchemy.sql.util import find_tables
+from sqlalchemy.engine.row import Row
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional, List
+from sqlalchemy.orm import Session
+from typing import Any, AsyncGenerator, Dict, Iterable, List, Optional, Set, Tuple
+from config.database import Base
+from config.env import AppConfig, CacheConfig, DataBaseConfig
+from exceptions.exception import ServiceException
 from utils.common_util import SqlalchemyUtil
 
 
+# 分页总数缓存，键中包含查询涉及的各表的数据版本，表数据变更提交后版本递增，旧缓存随之失效
+page_count_cache = TTLCache(maxsize=CacheConfig.page_count_cache_maxsize, ttl=CacheConfig.page_count_cache_expire)
+# 各表的数据版本
+table_versions: Dict[str, int] = {}
+# 会话中待提交的数据变更所涉及的表名在session.info中的键名
+DIRTY_TABLES_INFO_KEY = 'page_count_dirty_tables'
+# 流式查询时每批从服务端游标读取的行数
+STREAM_CHUNK_SIZE = 1000
+
+
 class PageResponseModel(BaseModel):
     """
     列表分页查询返回模型
@@ -14,8 +36,10 @@ class PageResponseModel(BaseModel):
     rows: List = []
     page_num: Optional[int] = None
     page_size: Optional[int] = None
-    total: int
+    total: Optional[int] = None
+    total_estimated: Optional[bool] = None
     has_next: Optional[bool] = None
+    next_cursor: Optional[str] = None
 
 
 class PageUtil:
@@ -48,7 +72,16 @@ class PageUtil:
         return result
 
     @classmethod
-    async def paginate(cls, db: AsyncSession, query: Select, page_num: int, page_size: int, is_page: bool = False):
+    async def paginate(
+        cls,
+        db: AsyncSession,
+        query: Select,
+        page_num: int,
+        page_size: int,
+        is_page: bool = False,
+        cursor: Optional[str] = None,
+        approximate_count: bool = False,
+    ):
         """
         输入查询语句和分页信息，返回分页数据列表结果
 
@@ -57,10 +90,16 @@ class PageUtil:
         :param page_num: 当前页码
         :param page_size: 当前页面数据量
         :param is_page: 是否开启分页
+        :param cursor: 可选，游标分页的游标，传入时（首页传入空字符串）启用游标分页
+        :param approximate_count: 是否允许无筛选条件的大表使用表统计信息估算总数
         :return: 分页数据对象
         """
-        if is_page:
-            total = (await db.execute(select(func.count('*')).select_from(query.subquery()))).scalar()
+        if is_page and cursor is not None:
+            result = await cls.__cursor_paginate(db, query, page_num, page_size, cursor, approximate_count)
+        elif is_page:
+            total, total_estimated = await cls.get_total(db, query, approximate_count)
+            # 与游标分页使用相同的排序键（含主键兜底），保证排序值相同的行在各页间顺序稳定
+            query = cls.__order_by_sort_keys(query, cls.__get_sort_keys(query))
             query_result = await db.execute(query.offset((page_num - 1) * page_size).limit(page_size))
             paginated_data = []
             for row in query_result:
@@ -74,6 +113,7 @@ class PageUtil:
                 page_num=page_num,
                 page_size=page_size,
                 total=total,
+                total_estimated=total_estimated,
                 has_next=has_next,
             )
         else:
@@ -88,6 +128,361 @@ class PageUtil:
 
         return result
 
+    @classmethod
+    async def stream(
+        cls, db: AsyncSession, query: Select, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncGenerator[List, None]:
+        """
+        输入查询语句，通过服务端游标分批读取查询结果，逐批返回序列化后的数据，内存占用与结果总量无关
+
+        :param db: orm对象
+        :param query: sqlalchemy查询语句
+        :param chunk_size: 每批读取的行数
+        :return: 逐批返回序列化后数据列表的异步生成器
+        """
+        query_result = await db.stream(query.execution_options(yield_per=chunk_size))
+        try:
+            async for partition in query_result.partitions():
+                yield SqlalchemyUtil.serialize_result([row[0] if row and len(row) == 1 else row for row in partition])
+        finally:
+            await query_result.close()
+
+    @classmethod
+    async def get_total(cls, db: AsyncSession, query: Select, approximate_count: bool = False) -> Tuple[int, bool]:
+        """
+        获取查询语句的结果总数，相同查询条件的总数在短时间内复用缓存，查询涉及的表有数据变更提交后缓存失效
+
+        :param db: orm对象
+        :param query: sqlalchemy查询语句
+        :param approximate_count: 是否允许无筛选条件的大表使用表统计信息估算总数
+        :return: (总数, 是否为估算值)
+        """
+        if approximate_count and cls.__is_unfiltered(query):
+            estimated_total = await cls.__get_estimated_total(db, query)
+            if estimated_total is not None and estimated_total >= AppConfig.app_page_approximate_count_threshold:
+                return estimated_total, True
+        table_names = {table.name for table in find_tables(query)}
+        compiled = query.compile()
+        cache_key = (
+            tuple(sorted((table_name, table_versions.get(table_name, 0)) for table_name in table_names)),
+            str(compiled),
+            repr(sorted(compiled.params.items())),
+        )
+        total = page_count_cache.get(cache_key)
+        if total is None:
+            total = (await db.execute(select(func.count('*')).select_from(query.subquery()))).scalar()
+            page_count_cache.insert(cache_key, total)
+
+        return total, False
+
+    @classmethod
+    def invalidate_count_cache(cls, table_names: Iterable[str]):
+        """
+        使查询涉及指定表的分页总数缓存失效
+
+        :param table_names: 表名列表
+        :return:
+        """
+        for table_name in table_names:
+            table_versions[table_name] = table_versions.get(table_name, 0) + 1
+
+    @staticmethod
+    def __is_unfiltered(query: Select) -> bool:
+        """
+        判断查询语句是否为单表且无实际筛选条件，未传入的筛选条件在dao层会以True占位
+
+        :param query: sqlalchemy查询语句
+        :return: 是否无筛选条件
+        """
+        if len(query.get_final_froms()) != 1:
+            return False
+        where_clause = query.whereclause
+        return where_clause is None or isinstance(getattr(where_clause, 'element', where_clause), True_)
+
+    @classmethod
+    async def __get_estimated_total(cls, db: AsyncSession, query: Select) -> Optional[int]:
+        """
+        根据数据库的表统计信息估算单表的总行数，统计信息同样缓存至分页总数缓存有效期
+
+        :param db: orm对象
+        :param query: sqlalchemy查询语句
+        :return: 估算的总行数，表尚未收集统计信息时返回None
+        """
+        table_name = query.get_final_froms()[0].name
+        cache_key = ('estimated', table_name)
+        estimated_total = page_count_cache.get(cache_key)
+        if estimated_total is None:
+            if DataBaseConfig.db_type == 'postgresql':
+                # 分区表的统计信息分布在各分区中，需汇总各分区的估算行数
+                sql = text(
+                    'select sum(reltuples) from pg_class where reltuples >= 0 and '
+                    "(oid = to_regclass(:table_name) and relkind = 'r' "
+                    'or oid in (select inhrelid from pg_inherits where inhparent = to_regclass(:table_name)))'
+                )
+            else:
+                sql = text(
+                    'select table_rows from information_schema.tables '
+                    'where table_schema = database() and table_name = :table_name'
+                )
+            estimated_total = (await db.execute(sql, {'table_name': table_name})).scalar()
+            if estimated_total is None:
+                return None
+            estimated_total = int(estimated_total)
+            page_count_cache.insert(cache_key, estimated_total)
+
+        return estimated_total
+
+    @classmethod
+    async def __cursor_paginate(
+        cls,
+        db: AsyncSession,
+        query: Select,
+        page_num: int,
+        page_size: int,
+        cursor: str,
+        approximate_count: bool = False,
+    ):
+        """
+        游标分页：以上一页最后一行的排序键作为查询条件定位下一页，避免深分页时的offset扫描
+
+        :param db: orm对象
+        :param query: sqlalchemy查询语句，排序条件沿用查询语句中已设置的order_by
+        :param page_num: 当前页码，仅原样返回供前端分页组件显示
+        :param page_size: 当前页面数据量
+        :param cursor: 游标，空字符串表示首页
+        :param approximate_count: 是否允许无筛选条件的大表使用表统计信息估算总数
+        :return: 分页数据对象，首页附带总数
+        """
+        sort_keys = cls.__get_sort_keys(query)
+        total = None
+        total_estimated = None
+        if not cursor:
+            total, total_estimated = await cls.get_total(db, query, approximate_count)
+        else:
+            query = query.where(cls.__get_keyset_condition(sort_keys, cls.decode_cursor(cursor, len(sort_keys))))
+        row_length = len(query.column_descriptions)
+        # 将排序键作为附加列一并查询，用于生成下一页游标
+        query = cls.__order_by_sort_keys(query, sort_keys).add_columns(
+            *[column.label(f'cursor_key_{index}') for index, (column, _) in enumerate(sort_keys)]
+        )
+        query_result = (await db.execute(query.limit(page_size + 1))).all()
+        has_next = len(query_result) > page_size
+        query_result = query_result[:page_size]
+        paginated_data = [cls.__strip_cursor_columns(row, row_length) for row in query_result]
+        next_cursor = cls.encode_cursor(query_result[-1][row_length:]) if has_next else None
+
+        return PageResponseModel(
+            rows=SqlalchemyUtil.serialize_result(paginated_data),
+            page_num=page_num,
+            page_size=page_size,
+            total=total,
+            total_estimated=total_estimated,
+            has_next=has_next,
+            next_cursor=next_cursor,
+        )
+
+    @classmethod
+    def __strip_cursor_columns(cls, row: Row, row_length: int):
+        """
+        去除查询结果行中附加的排序键列，返回与普通分页一致的行结构
+
+        :param row: 查询结果行
+        :param row_length: 原始查询语句的列数
+        :return: 去除排序键列后的行
+        """
+        if row_length == 1:
+            return row[0]
+        values = tuple(row[:row_length])
+        if any(isinstance(value, Base) for value in values):
+            return values
+        return dict(zip(row._fields[:row_length], values))
+
+    @classmethod
+    def __get_sort_keys(cls, query: Select) -> List[Tuple[Any, bool]]:
+        """
+        获取查询语句的排序键，并追加主实体主键作为唯一排序键，保证游标定位的行唯一
+
+        :param query: sqlalchemy查询语句
+        :return: (排序列, 是否降序)列表
+        """
+        sort_keys = []
+        for clause in query._order_by_clauses:
+            if isinstance(clause, UnaryExpression) and clause.modifier in (operators.desc_op, operators.asc_op):
+                sort_keys.append((clause.element, clause.modifier is operators.desc_op))
+            else:
+                sort_keys.append((clause, False))
+        entity = query.column_descriptions[0].get('entity')
+        if entity is not None:
+            sorted_columns = {column for column, _ in sort_keys}
+            last_is_desc = sort_keys[-1][1] if sort_keys else False
+            for primary_key in entity.__mapper__.primary_key:
+                if not any(primary_key.compare(column) for column in sorted_columns):
+                    sort_keys.append((getattr(entity, primary_key.key), last_is_desc))
+
+        return sort_keys
+
+    @classmethod
+    def __order_by_sort_keys(cls, query: Select, sort_keys: List[Tuple[Any, bool]]) -> Select:
+        """
+        按排序键重新设置查询语句的排序，空值统一视为最小值（升序排在最前，降序排在最后），与游标定位条件保持一致
+
+        :param query: sqlalchemy查询语句
+        :param sort_keys: (排序列, 是否降序)列表
+        :return: 重新排序后的查询语句
+        """
+        order_by_clauses = []
+        for column, is_desc in sort_keys:
+            order_by_clause = column.desc() if is_desc else column.asc()
+            # mysql默认即将空值视为最小值，且不支持nulls first/last语法；postgresql默认将空值视为最大值，需显式指定
+            if DataBaseConfig.db_type == 'postgresql' and cls.__is_nullable(column):
+                order_by_clause = order_by_clause.nulls_last() if is_desc else order_by_clause.nulls_first()
+            order_by_clauses.append(order_by_clause)
+
+        return query.order_by(None).order_by(*order_by_clauses)
+
+    @classmethod
+    def __get_keyset_condition(cls, sort_keys: List[Tuple[Any, bool]], cursor_values: List):
+        """
+        根据排序键及游标值生成定位下一页的查询条件，如(a > x) or (a = x and b > y)，空值视为最小值
+
+        :param sort_keys: (排序列, 是否降序)列表
+        :param cursor_values: 游标中的排序键值
+        :return: 查询条件
+        """
+        conditions = []
+        equal_conditions = []
+        for (column, is_desc), cursor_value in zip(sort_keys, cursor_values):
+            if cursor_value is None:
+                # 空值为最小值：升序时其后为全部非空值，降序时其后没有更小的值
+                compare_condition = false() if is_desc else column.is_not(None)
+                equal_condition = column.is_(None)
+            else:
+                compare_condition = column < cursor_value if is_desc else column > cursor_value
+                if is_desc and cls.__is_nullable(column):
+                    compare_condition = or_(compare_condition, column.is_(None))
+                equal_condition = column == cursor_value
+            conditions.append(and_(*equal_conditions, compare_condition))
+            equal_conditions.append(equal_condition)
+
+        return or_(*conditions)
+
+    @staticmethod
+    def __is_nullable(column: Any) -> bool:
+        """
+        判断排序列是否可能为空，无法判断的表达式视为可能为空
+
+        :param column: 排序列
+        :return: 是否可能为空
+        """
+        return getattr(column, 'nullable', True) is not False
+
+    @classmethod
+    def encode_cursor(cls, values: Tuple) -> str:
+        """
+        将排序键值编码为不透明的游标字符串
+
+        :param values: 排序键值
+        :return: 游标字符串
+        """
+        encoded_values = [cls.__encode_cursor_value(value) for value in values]
+        return base64.urlsafe_b64encode(json.dumps(encoded_values, separators=(',', ':')).encode('utf-8')).decode()
+
+    @classmethod
+    def decode_cursor(cls, cursor: str, key_count: Optional[int] = None) -> List:
+        """
+        将游标字符串解码为排序键值
+
+        :param cursor: 游标字符串
+        :param key_count: 可选，排序键数量，传入时校验游标值数量与排序键数量一致
+        :return: 排序键值
+        """
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode('utf-8')))
+            if not isinstance(values, list) or (key_count is not None and len(values) != key_count):
+                raise ValueError('cursor length mismatch')
+            return [cls.__decode_cursor_value(value) for value in values]
+        except (TypeError, ValueError, KeyError):
+            raise ServiceException(message='分页游标无效')
+
+    @staticmethod
+    def __encode_cursor_value(value: Any):
+        """
+        将日期时间类型的排序键值转换为可json序列化的值
+
+        :param value: 排序键值
+        :return: 可json序列化的值
+        """
+        if isinstance(value, datetime):
+            return {'dt': value.isoformat()}
+        if isinstance(value, date):
+            return {'d': value.isoformat()}
+        return value
+
+    @staticmethod
+    def __decode_cursor_value(value: Any):
+        """
+        将json反序列化后的值还原为排序键值
+
+        :param value: json反序列化后的值
+        :return: 排序键值
+        """
+        if isinstance(value, dict):
+            if 'dt' in value:
+                return datetime.fromisoformat(value['dt'])
+            return date.fromisoformat(value['d'])
+        return value
+
+
+def get_dirty_tables(session: Session) -> Set[str]:
+    """
+    获取会话中待提交的数据变更所涉及的表名集合
+
+    :param session: 同步会话对象
+    :return: 表名集合
+    """
+    return session.info.setdefault(DIRTY_TABLES_INFO_KEY, set())
+
+
+@event.listens_for(Session, 'after_flush')
+def record_flushed_tables(session: Session, flush_context):
+    """
+    记录会话刷新时新增、修改、删除的orm对象所在的表
+    """
+    dirty_tables = get_dirty_tables(session)
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(instance, '__table__', None)
+        if table is not None:
+            dirty_tables.add(table.name)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def record_executed_tables(orm_execute_state):
+    """
+    记录会话直接执行的insert、update、delete语句所操作的表
+    """
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None:
+            get_dirty_tables(orm_execute_state.session).add(table.name)
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_committed_tables(session: Session):
+    """
+    事务提交后使数据变更所涉及表的分页总数缓存失效
+    """
+    dirty_tables = session.info.pop(DIRTY_TABLES_INFO_KEY, None)
+    if dirty_tables:
+        PageUtil.invalidate_count_cache(dirty_tables)
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_rollback_tables(session: Session):
+    """
+    事务回滚后丢弃已记录的数据变更表
+    """
+    session.info.pop(DIRTY_TABLES_INFO_KEY, None)
+
 
 def get_page_obj(data_list: List, page_num: int, page_size: int):
     """
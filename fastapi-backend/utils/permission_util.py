@@ -0,0 +1,104 @@
+import sys
+from cachebox import TTLCache
+from typing import FrozenSet, Iterable, Tuple
+from config.env import CacheConfig
+from module_admin.entity.vo.user_vo import CurrentUserModel
+
+
+WILDCARD = '*'
+SEPARATOR = ':'
+WILDCARD_SUFFIX = f'{SEPARATOR}{WILDCARD}'
+
+permission_index_cache = TTLCache(maxsize=CacheConfig.permission_cache_maxsize, ttl=CacheConfig.permission_cache_expire)
+
+
+class PermissionIndex:
+    """
+    编译后的权限索引，权限标识与角色标识均以驻留字符串的集合存储，通配符权限（如system:user:*）以前缀集合存储
+    """
+
+    __slots__ = ('is_all', 'perms', 'wildcard_prefixes', 'role_keys')
+
+    def __init__(self, permissions: Iterable[str], role_keys: Iterable[str]):
+        """
+        编译权限索引
+
+        :param permissions: 权限标识列表
+        :param role_keys: 角色标识列表
+        """
+        perms = set()
+        wildcard_prefixes = set()
+        for perm in permissions:
+            if not perm:
+                continue
+            if perm == WILDCARD or perm.endswith(WILDCARD_SUFFIX):
+                # system:user:* 与 system:*:* 分别编译为前缀 system:user 与 system，*:*:* 编译为空前缀
+                segments = perm.split(SEPARATOR)
+                while segments and segments[-1] == WILDCARD:
+                    segments.pop()
+                wildcard_prefixes.add(sys.intern(SEPARATOR.join(segments)))
+            else:
+                perms.add(sys.intern(perm))
+        self.is_all: bool = '' in wildcard_prefixes
+        self.perms: FrozenSet[str] = frozenset(perms)
+        self.wildcard_prefixes: FrozenSet[str] = frozenset(wildcard_prefixes)
+        self.role_keys: FrozenSet[str] = frozenset(sys.intern(role_key) for role_key in role_keys if role_key)
+
+    def has_perm(self, perm: str) -> bool:
+        """
+        判断是否具有权限标识
+
+        :param perm: 权限标识
+        :return: 是否具有该权限
+        """
+        if self.is_all or perm in self.perms:
+            return True
+        if self.wildcard_prefixes:
+            index = perm.rfind(SEPARATOR)
+            while index > 0:
+                if perm[:index] in self.wildcard_prefixes:
+                    return True
+                index = perm.rfind(SEPARATOR, 0, index)
+        return False
+
+    def has_role(self, role_key: str) -> bool:
+        """
+        判断是否具有角色标识
+
+        :param role_key: 角色标识
+        :return: 是否具有该角色
+        """
+        return role_key in self.role_keys
+
+
+class PermissionUtil:
+    """
+    权限工具类
+    """
+
+    @classmethod
+    def get_role_set_key(cls, current_user: CurrentUserModel) -> Tuple[int, ...]:
+        """
+        获取当前用户角色集合对应的缓存键
+
+        :param current_user: 当前用户对象
+        :return: 排序后的角色id元组
+        """
+        return tuple(sorted(role.role_id for role in current_user.user.role if role))
+
+    @classmethod
+    def get_permission_index(cls, current_user: CurrentUserModel) -> PermissionIndex:
+        """
+        获取当前用户对应的权限索引，缓存键包含角色集合及编译索引所用的权限标识与角色标识，
+        相同角色及权限的用户共享同一索引，角色或菜单分配变更后权限标识不同即命中新的索引，无需查询权限版本号
+
+        :param current_user: 当前用户对象
+        :return: 权限索引
+        """
+        cache_key = (cls.get_role_set_key(current_user), tuple(current_user.permissions), tuple(current_user.roles))
+        permission_index = permission_index_cache.get(cache_key)
+        if permission_index is None:
+            permission_index = PermissionIndex(current_user.permissions, current_user.roles)
+            permission_index_cache.insert(cache_key, permission_index)
+
+        return permission_index
@@ -1,6 +1,12 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
+from config.env import AppConfig
 
 pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
+# bcrypt计算期间会释放GIL，使用独立线程池执行，线程数即为并发上限
+pwd_executor = ThreadPoolExecutor(max_workers=AppConfig.app_pwd_hash_max_workers, thread_name_prefix='pwd_hash')
 
 
 class PwdUtil:
@@ -8,6 +14,11 @@ class PwdUtil:
     密码工具类
     """
 
+    pending_count: int = 0
+    completed_count: int = 0
+    total_queue_time: float = 0.0
+    max_queue_time: float = 0.0
+
     @classmethod
     def verify_password(cls, plain_password, hashed_password):
         """
@@ -28,3 +39,65 @@ class PwdUtil:
         :return: 加密成功的密码
         """
         return pwd_context.hash(input_password)
+
+    @classmethod
+    async def verify_password_async(cls, plain_password, hashed_password):
+        """
+        工具方法：在密码线程池中校验当前输入的密码与数据库存储的密码是否一致，不阻塞事件循环
+
+        :param plain_password: 当前输入的密码
+        :param hashed_password: 数据库存储的密码
+        :return: 校验结果
+        """
+        return await cls.__run_in_executor(pwd_context.verify, plain_password, hashed_password)
+
+    @classmethod
+    async def get_password_hash_async(cls, input_password):
+        """
+        工具方法：在密码线程池中对当前输入的密码进行加密，不阻塞事件循环
+
+        :param input_password: 输入的密码
+        :return: 加密成功的密码
+        """
+        return await cls.__run_in_executor(pwd_context.hash, input_password)
+
+    @classmethod
+    def get_executor_statistic(cls):
+        """
+        获取密码线程池统计信息
+
+        :return: 密码线程池统计信息
+        """
+        return dict(
+            max_workers=AppConfig.app_pwd_hash_max_workers,
+            pending=cls.pending_count,
+            completed=cls.completed_count,
+            avg_queue_time=round(cls.total_queue_time / cls.completed_count * 1000, 2) if cls.completed_count else 0,
+            max_queue_time=round(cls.max_queue_time * 1000, 2),
+        )
+
+    @classmethod
+    async def __run_in_executor(cls, func, *args):
+        """
+        在密码线程池中执行函数并记录排队耗时
+
+        :param func: 需要执行的函数
+        :param args: 函数参数
+        :return: 函数执行结果
+        """
+        submit_time = time.perf_counter()
+
+        def task():
+            queue_time = time.perf_counter() - submit_time
+            return queue_time, func(*args)
+
+        cls.pending_count += 1
+        try:
+            queue_time, result = await asyncio.get_running_loop().run_in_executor(pwd_executor, task)
+        finally:
+            cls.pending_count -= 1
+        cls.completed_count += 1
+        cls.total_queue_time += queue_time
+        cls.max_queue_time = max(cls.max_queue_time, queue_time)
+
+        return result
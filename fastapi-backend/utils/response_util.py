@@ -1,15 +1,71 @@
+import orjson
 from datetime import datetime
 from fastapi import status
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Any, Dict, Optional
+from starlette.types import Receive, Scope, Send
+from typing import Any, AsyncIterator, Dict, NamedTuple, Optional, Type
 from config.constant import HttpStatusConstant
+from utils.log_util import logger
+
+
+# 日志表返回参数字段长度最大为2000，响应结果预览按此长度截断
+RESULT_PREVIEW_MAX_LENGTH = 2000
+
+
+class ResponseMeta(NamedTuple):
+    """
+    响应结果元信息，随响应对象一同返回，供日志装饰器直接读取而无需重新解析响应体
+    """
+
+    code: int
+    msg: str
+    preview: str
+
+
+class OrjsonResponse(ORJSONResponse):
+    """
+    使用orjson直接序列化响应结果的json响应类，字典、列表、字符串、数字、日期时间等类型由orjson原生编码，
+    无需先经jsonable_encoder递归生成中间副本；pydantic模型、Decimal等其余类型交由jsonable_encoder按原有规则编码，
+    编码结果与JSONResponse一致
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS)
+
+
+class GuardedStreamingResponse(StreamingResponse):
+    """
+    发送响应头前预先生成首块内容的流式响应类，首块生成失败时异常交由全局异常处理返回失败响应；
+    响应头发送后生成失败时记录日志并重新抛出，由服务器中止连接，客户端收到不完整的响应而不会将截断的内容视为完整文件
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        body_iterator = self.body_iterator.__aiter__()
+        try:
+            first_chunk = await body_iterator.__anext__()
+        except StopAsyncIteration:
+            first_chunk = None
+        self.body_iterator = self.__chain(first_chunk, body_iterator)
+        await super().__call__(scope, receive, send)
+
+    @staticmethod
+    async def __chain(first_chunk: Any, body_iterator: AsyncIterator) -> AsyncIterator:
+        if first_chunk is None:
+            return
+        yield first_chunk
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        except Exception as e:
+            logger.exception(f'流式响应内容生成失败，已中止响应，详细错误信息：{e}')
+            raise e
 
 
 class ResponseUtil:
     """
-    响应工具类
+    响应工具类，各响应方法默认使用JSONResponse，可通过response_class参数按接口逐个切换为OrjsonResponse
     """
 
     @classmethod
@@ -20,6 +76,7 @@ class ResponseUtil:
         rows: Optional[Any] = None,
         dict_content: Optional[Dict] = None,
         model_content: Optional[BaseModel] = None,
+        response_class: Type[JSONResponse] = JSONResponse,
     ) -> Response:
         """
         成功响应方法
@@ -29,6 +86,7 @@ class ResponseUtil:
         :param rows: 可选，成功响应结果中属性为rows的值
         :param dict_content: 可选，dict类型，成功响应结果中自定义属性的值
         :param model_content: 可选，BaseModel类型，成功响应结果中自定义属性的值
+        :param response_class: 可选，响应类，默认为JSONResponse，大数据量接口可使用OrjsonResponse
         :return: 成功响应结果
         """
         result = {'code': HttpStatusConstant.SUCCESS, 'msg': msg}
@@ -44,7 +102,7 @@ class ResponseUtil:
 
         result.update({'success': True, 'time': datetime.now()})
 
-        return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(result))
+        return cls.__create_json_response(result, response_class)
 
     @classmethod
     def failure(
@@ -54,6 +112,7 @@ class ResponseUtil:
         rows: Optional[Any] = None,
         dict_content: Optional[Dict] = None,
         model_content: Optional[BaseModel] = None,
+        response_class: Type[JSONResponse] = JSONResponse,
     ) -> Response:
         """
         失败响应方法
@@ -63,6 +122,7 @@ class ResponseUtil:
         :param rows: 可选，失败响应结果中属性为rows的值
         :param dict_content: 可选，dict类型，失败响应结果中自定义属性的值
         :param model_content: 可选，BaseModel类型，失败响应结果中自定义属性的值
+        :param response_class: 可选，响应类，默认为JSONResponse，大数据量接口可使用OrjsonResponse
         :return: 失败响应结果
         """
         result = {'code': HttpStatusConstant.WARN, 'msg': msg}
@@ -78,7 +138,7 @@ class ResponseUtil:
 
         result.update({'success': False, 'time': datetime.now()})
 
-        return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(result))
+        return cls.__create_json_response(result, response_class)
 
     @classmethod
     def unauthorized(
@@ -88,6 +148,7 @@ class ResponseUtil:
         rows: Optional[Any] = None,
         dict_content: Optional[Dict] = None,
         model_content: Optional[BaseModel] = None,
+        response_class: Type[JSONResponse] = JSONResponse,
     ) -> Response:
         """
         未认证响应方法
@@ -97,6 +158,7 @@ class ResponseUtil:
         :param rows: 可选，未认证响应结果中属性为rows的值
         :param dict_content: 可选，dict类型，未认证响应结果中自定义属性的值
         :param model_content: 可选，BaseModel类型，未认证响应结果中自定义属性的值
+        :param response_class: 可选，响应类，默认为JSONResponse，大数据量接口可使用OrjsonResponse
         :return: 未认证响应结果
         """
         result = {'code': HttpStatusConstant.UNAUTHORIZED, 'msg': msg}
@@ -112,7 +174,7 @@ class ResponseUtil:
 
         result.update({'success': False, 'time': datetime.now()})
 
-        return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(result))
+        return cls.__create_json_response(result, response_class)
 
     @classmethod
     def forbidden(
@@ -122,6 +184,7 @@ class ResponseUtil:
         rows: Optional[Any] = None,
         dict_content: Optional[Dict] = None,
         model_content: Optional[BaseModel] = None,
+        response_class: Type[JSONResponse] = JSONResponse,
     ) -> Response:
         """
         未授权响应方法
@@ -131,6 +194,7 @@ class ResponseUtil:
         :param rows: 可选，未授权响应结果中属性为rows的值
         :param dict_content: 可选，dict类型，未授权响应结果中自定义属性的值
         :param model_content: 可选，BaseModel类型，未授权响应结果中自定义属性的值
+        :param response_class: 可选，响应类，默认为JSONResponse，大数据量接口可使用OrjsonResponse
         :return: 未授权响应结果
         """
         result = {'code': HttpStatusConstant.FORBIDDEN, 'msg': msg}
@@ -146,7 +210,7 @@ class ResponseUtil:
 
         result.update({'success': False, 'time': datetime.now()})
 
-        return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(result))
+        return cls.__create_json_response(result, response_class)
 
     @classmethod
     def error(
@@ -156,6 +220,7 @@ class ResponseUtil:
         rows: Optional[Any] = None,
         dict_content: Optional[Dict] = None,
         model_content: Optional[BaseModel] = None,
+        response_class: Type[JSONResponse] = JSONResponse,
     ) -> Response:
         """
         错误响应方法
@@ -165,6 +230,7 @@ class ResponseUtil:
         :param rows: 可选，错误响应结果中属性为rows的值
         :param dict_content: 可选，dict类型，错误响应结果中自定义属性的值
         :param model_content: 可选，BaseModel类型，错误响应结果中自定义属性的值
+        :param response_class: 可选，响应类，默认为JSONResponse，大数据量接口可使用OrjsonResponse
         :return: 错误响应结果
         """
         result = {'code': HttpStatusConstant.ERROR, 'msg': msg}
@@ -180,14 +246,47 @@ class ResponseUtil:
 
         result.update({'success': False, 'time': datetime.now()})
 
-        return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(result))
+        return cls.__create_json_response(result, response_class)
+
+    @classmethod
+    def get_response_meta(cls, response: Any) -> Optional[ResponseMeta]:
+        """
+        获取由响应工具类创建的响应对象携带的元信息
+
+        :param response: 响应对象
+        :return: 响应结果元信息，非响应工具类创建的响应返回None
+        """
+        return getattr(response, 'response_meta', None)
+
+    @classmethod
+    def __create_json_response(cls, result: Dict, response_class: Type[JSONResponse] = JSONResponse) -> Response:
+        """
+        创建json响应对象，并附带响应码、响应信息及截断后的响应体预览
+
+        :param result: 响应结果
+        :param response_class: 响应类
+        :return: json响应对象
+        """
+        if issubclass(response_class, OrjsonResponse):
+            # orjson直接编码响应结果，不再预先生成jsonable_encoder的中间副本
+            response = response_class(status_code=status.HTTP_200_OK, content=result)
+        else:
+            response = response_class(status_code=status.HTTP_200_OK, content=jsonable_encoder(result))
+        # utf-8单个字符最多4字节，只解码可能落入预览范围的字节
+        preview = response.body[: RESULT_PREVIEW_MAX_LENGTH * 4].decode('utf-8', errors='ignore')
+        response.response_meta = ResponseMeta(
+            code=result.get('code'), msg=result.get('msg'), preview=preview[:RESULT_PREVIEW_MAX_LENGTH]
+        )
+
+        return response
 
     @classmethod
-    def streaming(cls, *, data: Any = None):
+    def streaming(cls, *, data: Any = None, media_type: Optional[str] = None):
         """
-        流式响应方法
+        流式响应方法，内容生成失败时客户端收到失败响应或被中止的响应，而非截断的成功响应
 
         :param data: 流式传输的内容
+        :param media_type: 可选，响应媒体类型
         :return: 流式响应结果
         """
-        return StreamingResponse(status_code=status.HTTP_200_OK, content=data)
+        return GuardedStreamingResponse(status_code=status.HTTP_200_OK, content=data, media_type=media_type)
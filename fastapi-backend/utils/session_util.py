@@ -0,0 +1,312 @@
+import json
+import jwt
+import time
+from datetime import datetime, timedelta
+from jwt.exceptions import InvalidTokenError
+from redis import asyncio as aioredis
+from redis.commands.core import AsyncScript
+from typing import Callable, Dict, List, Optional, Tuple
+from config.enums import RedisInitKeyConfig
+from config.env import JwtConfig
+from utils.cache_util import TokenCacheManager
+
+
+# 读取令牌，仅在请求携带的令牌与存储的令牌一致且剩余有效期低于阈值时续期，返回{令牌, 是否续期}
+RENEW_SESSION_LUA = """
+local token = redis.call('GET', KEYS[1])
+if not token then
+    return nil
+end
+if token ~= ARGV[3] then
+    return {token, 0}
+end
+local pttl = redis.call('PTTL', KEYS[1])
+if pttl >= 0 and pttl < tonumber(ARGV[2]) then
+    redis.call('PEXPIRE', KEYS[1], ARGV[1])
+    return {token, 1}
+end
+return {token, 0}
+"""
+# 启动时回填在线会话索引每批扫描及读取的令牌数
+SESSION_INDEX_SCAN_COUNT = 1000
+
+
+class SessionUtil:
+    """
+    会话工具类
+    """
+
+    renew_script: Optional[AsyncScript] = None
+    renew_performed_count: int = 0
+    renew_skipped_count: int = 0
+
+    @classmethod
+    def decode_token(cls, token: str) -> Dict:
+        """
+        校验并解析令牌，已验签的载荷会缓存至令牌过期，重复请求无需再次验签及解析
+
+        :param token: 令牌
+        :return: 令牌载荷
+        :raise: 令牌异常InvalidTokenError
+        """
+        payload = TokenCacheManager.get(token)
+        if payload is None:
+            payload = jwt.decode(token, JwtConfig.jwt_secret_key, algorithms=[JwtConfig.jwt_algorithm])
+            TokenCacheManager.set(token, payload)
+
+        return payload
+
+    @classmethod
+    async def get_and_renew_token(cls, redis: aioredis.Redis, token_key: str, token: str) -> Optional[str]:
+        """
+        获取redis中的会话令牌，请求携带的令牌与存储的令牌一致且剩余有效期低于配置比例时续期，读取与续期通过一次lua脚本调用完成；
+        令牌不一致（如已被新的登录覆盖）时不续期，计为跳过
+
+        :param redis: redis对象
+        :param token_key: 会话令牌键名
+        :param token: 请求携带的令牌
+        :return: 会话令牌，不存在时返回None
+        """
+        if cls.renew_script is None or cls.renew_script.registered_client is not redis:
+            cls.renew_script = redis.register_script(RENEW_SESSION_LUA)
+        expire_milliseconds = JwtConfig.jwt_redis_expire_minutes * 60 * 1000
+        threshold_milliseconds = int(expire_milliseconds * JwtConfig.jwt_redis_renew_threshold)
+        result = await cls.renew_script(keys=[token_key], args=[expire_milliseconds, threshold_milliseconds, token])
+        if not result:
+            return None
+        redis_token, renewed = result
+        if int(renewed):
+            cls.renew_performed_count += 1
+        else:
+            cls.renew_skipped_count += 1
+
+        return redis_token
+
+    @classmethod
+    def get_renew_statistic(cls):
+        """
+        获取会话续期统计信息
+
+        :return: 会话续期统计信息
+        """
+        return dict(performed=cls.renew_performed_count, skipped=cls.renew_skipped_count)
+
+    @classmethod
+    async def save_session(
+        cls, redis: aioredis.Redis, token_key_prefix: str, token_id: str, token: str, session_info: Dict
+    ):
+        """
+        保存会话令牌并写入在线会话索引，令牌、登录时间有序集合及会话信息哈希在同一事务中写入
+
+        :param redis: redis对象
+        :param token_key_prefix: 会话令牌键名前缀
+        :param token_id: 会话令牌键名中的会话标识
+        :param token: 会话令牌
+        :param session_info: 在线列表展示的会话信息
+        :return:
+        """
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.set(f'{token_key_prefix}:{token_id}', token, ex=timedelta(minutes=JwtConfig.jwt_redis_expire_minutes))
+            cls.__add_session_index(pipe, token_key_prefix, {token_id: session_info})
+            await pipe.execute()
+
+    @classmethod
+    async def remove_sessions(cls, redis: aioredis.Redis, token_key_prefix: str, token_ids: List[str]) -> List[Dict]:
+        """
+        删除会话令牌及其在线会话索引，读取会话信息与删除操作通过一次管道调用完成
+
+        :param redis: redis对象
+        :param token_key_prefix: 会话令牌键名前缀
+        :param token_ids: 会话令牌键名中的会话标识列表
+        :return: 被删除会话的会话信息列表，不在索引中的会话不返回
+        """
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hmget(cls.__get_info_key(token_key_prefix), token_ids)
+            pipe.delete(*[f'{token_key_prefix}:{token_id}' for token_id in token_ids])
+            pipe.zrem(cls.__get_index_key(token_key_prefix), *token_ids)
+            pipe.hdel(cls.__get_info_key(token_key_prefix), *token_ids)
+            session_info_list, *_ = await pipe.execute()
+
+        return [json.loads(session_info) for session_info in session_info_list if session_info]
+
+    @classmethod
+    async def get_online_sessions(
+        cls,
+        redis: aioredis.Redis,
+        token_key_prefix: str,
+        session_filter: Optional[Callable[[Dict], bool]] = None,
+        page_num: Optional[int] = None,
+        page_size: Optional[int] = None,
+    ) -> Tuple[List[Dict], int]:
+        """
+        按登录时间倒序读取在线会话索引，令牌已过期的会话在读取时从索引中清理，过滤及分页在读取会话信息时完成
+
+        :param redis: redis对象
+        :param token_key_prefix: 会话令牌键名前缀
+        :param session_filter: 可选，会话信息的过滤方法
+        :param page_num: 可选，当前页码，不传时返回全部会话
+        :param page_size: 可选，每页记录数
+        :return: 会话信息列表及过滤后的会话总数
+        """
+        token_ids = await redis.zrange(cls.__get_index_key(token_key_prefix), 0, -1, desc=True)
+        if not token_ids:
+            return [], 0
+        async with redis.pipeline(transaction=False) as pipe:
+            for token_id in token_ids:
+                pipe.exists(f'{token_key_prefix}:{token_id}')
+            if session_filter:
+                pipe.hmget(cls.__get_info_key(token_key_prefix), token_ids)
+            result = await pipe.execute()
+        exists_list = result[: len(token_ids)]
+        expired_token_ids = [token_id for token_id, exists in zip(token_ids, exists_list) if not exists]
+        if expired_token_ids:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.zrem(cls.__get_index_key(token_key_prefix), *expired_token_ids)
+                pipe.hdel(cls.__get_info_key(token_key_prefix), *expired_token_ids)
+                await pipe.execute()
+        if session_filter:
+            session_info_list = [
+                session_info
+                for session_info in (
+                    json.loads(session_info)
+                    for exists, session_info in zip(exists_list, result[-1])
+                    if exists and session_info
+                )
+                if session_filter(session_info)
+            ]
+            total = len(session_info_list)
+            if page_num and page_size:
+                session_info_list = session_info_list[(page_num - 1) * page_size : page_num * page_size]
+        else:
+            token_ids = [token_id for token_id, exists in zip(token_ids, exists_list) if exists]
+            total = len(token_ids)
+            if page_num and page_size:
+                token_ids = token_ids[(page_num - 1) * page_size : page_num * page_size]
+            session_info_list = (
+                [
+                    json.loads(session_info)
+                    for session_info in await redis.hmget(cls.__get_info_key(token_key_prefix), token_ids)
+                    if session_info
+                ]
+                if token_ids
+                else []
+            )
+
+        return session_info_list, total
+
+    @classmethod
+    async def init_session_index(
+        cls, redis: aioredis.Redis, token_key_prefix: str, get_session_info: Callable[[Dict], Tuple[str, Dict]]
+    ):
+        """
+        在线会话索引不存在时（如首次部署），扫描已有的会话令牌回填索引，使用scan分批读取，不阻塞redis
+
+        :param redis: redis对象
+        :param token_key_prefix: 会话令牌键名前缀
+        :param get_session_info: 根据令牌载荷获取会话标识及会话信息的方法
+        :return:
+        """
+        if await redis.exists(cls.__get_index_key(token_key_prefix)):
+            return
+        token_keys = []
+        async for token_key in redis.scan_iter(match=f'{token_key_prefix}:*', count=SESSION_INDEX_SCAN_COUNT):
+            token_keys.append(token_key)
+            if len(token_keys) >= SESSION_INDEX_SCAN_COUNT:
+                await cls.__backfill_session_index(redis, token_key_prefix, token_keys, get_session_info)
+                token_keys = []
+        if token_keys:
+            await cls.__backfill_session_index(redis, token_key_prefix, token_keys, get_session_info)
+
+    @classmethod
+    async def __backfill_session_index(
+        cls,
+        redis: aioredis.Redis,
+        token_key_prefix: str,
+        token_keys: List[str],
+        get_session_info: Callable[[Dict], Tuple[str, Dict]],
+    ):
+        """
+        读取一批会话令牌并写入在线会话索引，无法解析的令牌跳过
+
+        :param redis: redis对象
+        :param token_key_prefix: 会话令牌键名前缀
+        :param token_keys: 会话令牌键名列表
+        :param get_session_info: 根据令牌载荷获取会话标识及会话信息的方法
+        :return:
+        """
+        session_info_dict = {}
+        for token in await redis.mget(token_keys):
+            if not token:
+                continue
+            try:
+                token_id, session_info = get_session_info(cls.decode_token(token))
+            except InvalidTokenError:
+                continue
+            session_info_dict[token_id] = session_info
+        if session_info_dict:
+            async with redis.pipeline(transaction=True) as pipe:
+                cls.__add_session_index(pipe, token_key_prefix, session_info_dict)
+                await pipe.execute()
+
+    @classmethod
+    def __add_session_index(cls, pipe: aioredis.client.Pipeline, token_key_prefix: str, session_info_dict: Dict):
+        """
+        向管道中添加写入在线会话索引的命令，有序集合的分值为会话的登录时间戳，补建索引时已有会话仍按原登录时间排序
+
+        :param pipe: redis管道对象
+        :param token_key_prefix: 会话令牌键名前缀
+        :param session_info_dict: 会话标识与会话信息的映射字典
+        :return:
+        """
+        now_timestamp = time.time()
+        pipe.zadd(
+            cls.__get_index_key(token_key_prefix),
+            {
+                token_id: cls.__get_login_timestamp(session_info, now_timestamp)
+                for token_id, session_info in session_info_dict.items()
+            },
+        )
+        pipe.hset(
+            cls.__get_info_key(token_key_prefix),
+            mapping={
+                token_id: json.dumps(session_info, ensure_ascii=False, default=str)
+                for token_id, session_info in session_info_dict.items()
+            },
+        )
+
+    @staticmethod
+    def __get_login_timestamp(session_info: Dict, default_timestamp: float) -> float:
+        """
+        获取会话信息中登录时间对应的时间戳
+
+        :param session_info: 会话信息
+        :param default_timestamp: 登录时间缺失或无法解析时使用的时间戳
+        :return: 登录时间戳
+        """
+        login_time = session_info.get('login_time')
+        if isinstance(login_time, datetime):
+            return login_time.timestamp()
+        try:
+            return datetime.fromisoformat(login_time).timestamp()
+        except (TypeError, ValueError):
+            return default_timestamp
+
+    @staticmethod
+    def __get_index_key(token_key_prefix: str) -> str:
+        """
+        获取按登录时间排序的在线会话索引键名
+
+        :param token_key_prefix: 会话令牌键名前缀
+        :return: 键名
+        """
+        return f'{RedisInitKeyConfig.ONLINE_SESSION_INDEX.key}:{token_key_prefix}'
+
+    @staticmethod
+    def __get_info_key(token_key_prefix: str) -> str:
+        """
+        获取在线会话信息哈希键名
+
+        :param token_key_prefix: 会话令牌键名前缀
+        :return: 键名
+        """
+        return f'{RedisInitKeyConfig.ONLINE_SESSION_INFO.key}:{token_key_prefix}'
@@ -0,0 +1,37 @@
+from config.enums import ApiMethod
+from utils.request import api_request
+
+
+class CommonApi:
+    """
+    通用模块相关接口
+    """
+
+    @classmethod
+    def get_export_job(cls, job_id: str):
+        """
+        查询后台导出任务状态接口
+
+        :param job_id: 导出任务id
+        :return:
+        """
+        return api_request(
+            url=f'/common/export/job/{job_id}',
+            method=ApiMethod.GET,
+        )
+
+    @classmethod
+    def download(cls, file_name: str, delete: bool = True):
+        """
+        下载下载目录文件接口
+
+        :param file_name: 文件名称
+        :param delete: 是否在下载完成后删除文件
+        :return:
+        """
+        return api_request(
+            url='/common/download',
+            method=ApiMethod.GET,
+            params={'fileName': file_name, 'delete': delete},
+            stream=True,
+        )
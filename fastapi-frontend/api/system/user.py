@@ -120,6 +120,21 @@ class UserApi:
             stream=True,
         )
 
+    @classmethod
+    def create_export_user_job(cls, data: dict):
+        """
+        创建后台导出用户任务接口
+
+        :param data: 导出用户参数
+        :return:
+        """
+        return api_request(
+            url='/system/user/export',
+            method=ApiMethod.POST,
+            params={'background': True},
+            data=data,
+        )
+
     @classmethod
     def reset_user_pwd(cls, user_id: int, password: str):
         """
@@ -3,7 +3,7 @@ import uuid
 from dash import ctx, dcc
 from dash.dependencies import Input, Output, State, ALL
 from dash.exceptions import PreventUpdate
-from typing import Dict
+from typing import Dict, List
 from api.monitor.operlog import OperlogApi
 from server import app
 from utils.dict_util import DictManager
@@ -17,39 +17,52 @@ def generate_operlog_table(query_params: Dict):
     根据查询参数获取操作日志表格数据及分页信息
 
     :param query_params: 查询参数
-    :return: 操作日志表格数据及分页信息
+    :return: 操作日志表格数据、分页信息及加载下一批数据的游标
     """
+    # 首页使用游标分页，以便后续通过游标加载下一批数据
+    if query_params.get('page_num') == 1:
+        query_params['cursor'] = ''
     table_info = OperlogApi.list_operlog(query_params)
     if table_info['code'] == 200:
-        table_data = table_info['rows']
+        table_data = format_operlog_rows(table_info['rows'])
         table_pagination = dict(
             pageSize=table_info['page_size'],
-            current=table_info['page_num'],
+            current=table_info.get('page_num') or query_params.get('page_num'),
             showSizeChanger=True,
             pageSizeOptions=[10, 30, 50, 100],
             showQuickJumper=True,
             total=table_info['total'],
         )
-        for item in table_data:
-            item['status_tag'] = DictManager.get_dict_tag(
-                dict_type='sys_common_status', dict_value=item.get('status')
-            )
-            item['business_type_tag'] = DictManager.get_dict_tag(
-                dict_type='sys_oper_type',
-                dict_value=item.get('business_type'),
-            )
-            item['oper_time'] = TimeFormatUtil.format_time(
-                item.get('oper_time')
-            )
-            item['key'] = str(item['oper_id'])
-            item['cost_time'] = f"{item['cost_time']}毫秒"
-            item['operation'] = [
-                {'content': '详情', 'type': 'link', 'icon': 'antd-eye'}
-                if PermissionManager.check_perms('monitor:operlog:query')
-                else {},
-            ]
+        next_cursor = table_info.get('next_cursor')
 
-    return [table_data, table_pagination]
+    return [table_data, table_pagination, next_cursor]
+
+
+def format_operlog_rows(table_data: List[Dict]):
+    """
+    格式化操作日志表格数据
+
+    :param table_data: 操作日志列表数据
+    :return: 格式化后的操作日志表格数据
+    """
+    for item in table_data:
+        item['status_tag'] = DictManager.get_dict_tag(
+            dict_type='sys_common_status', dict_value=item.get('status')
+        )
+        item['business_type_tag'] = DictManager.get_dict_tag(
+            dict_type='sys_oper_type',
+            dict_value=item.get('business_type'),
+        )
+        item['oper_time'] = TimeFormatUtil.format_time(item.get('oper_time'))
+        item['key'] = str(item['oper_id'])
+        item['cost_time'] = f"{item['cost_time']}毫秒"
+        item['operation'] = [
+            {'content': '详情', 'type': 'link', 'icon': 'antd-eye'}
+            if PermissionManager.check_perms('monitor:operlog:query')
+            else {},
+        ]
+
+    return table_data
 
 
 @app.callback(
@@ -64,6 +77,9 @@ def generate_operlog_table(query_params: Dict):
         operation_log_table_selectedrowkeys=Output(
             'operation_log-list-table', 'selectedRowKeys'
         ),
+        next_cursor=Output(
+            'operation_log-next-cursor-store', 'data', allow_duplicate=True
+        ),
     ),
     inputs=dict(
         search_click=Input('operation_log-search', 'nClicks'),
@@ -123,17 +139,98 @@ def get_operation_log_table_data(
             }
         )
     if search_click or refresh_click or pagination or operations:
-        table_data, table_pagination = generate_operlog_table(query_params)
+        table_data, table_pagination, next_cursor = generate_operlog_table(
+            query_params
+        )
         return dict(
             operation_log_table_data=table_data,
             operation_log_table_pagination=table_pagination,
             operation_log_table_key=str(uuid.uuid4()),
             operation_log_table_selectedrowkeys=None,
+            next_cursor=next_cursor,
+        )
+
+    raise PreventUpdate
+
+
+@app.callback(
+    output=dict(
+        operation_log_table_data=Output(
+            'operation_log-list-table', 'data', allow_duplicate=True
+        ),
+        next_cursor=Output(
+            'operation_log-next-cursor-store', 'data', allow_duplicate=True
+        ),
+    ),
+    inputs=dict(load_next_click=Input('operation_log-load-next', 'nClicks')),
+    state=dict(
+        cursor=State('operation_log-next-cursor-store', 'data'),
+        table_data=State('operation_log-list-table', 'data'),
+        sorter=State('operation_log-list-table', 'sorter'),
+        pagination=State('operation_log-list-table', 'pagination'),
+        title=State('operation_log-title-input', 'value'),
+        oper_name=State('operation_log-oper_name-input', 'value'),
+        business_type=State('operation_log-business_type-select', 'value'),
+        status_select=State('operation_log-status-select', 'value'),
+        oper_time_range=State('operation_log-oper_time-range', 'value'),
+    ),
+    prevent_initial_call=True,
+)
+def load_next_operation_log_table_data(
+    load_next_click,
+    cursor,
+    table_data,
+    sorter,
+    pagination,
+    title,
+    oper_name,
+    business_type,
+    status_select,
+    oper_time_range,
+):
+    """
+    通过游标加载下一批操作日志并追加至表格回调，用于数据量较大时避免深分页
+    """
+    if load_next_click and cursor:
+        begin_time = None
+        end_time = None
+        if oper_time_range:
+            begin_time = oper_time_range[0]
+            end_time = oper_time_range[1]
+        query_params = dict(
+            title=title,
+            oper_name=oper_name,
+            business_type=business_type,
+            status=status_select,
+            begin_time=begin_time,
+            end_time=end_time,
+            order_by_column=sorter.get('columns')[0] if sorter else None,
+            is_asc=f"{sorter.get('orders')[0]}ing" if sorter else None,
+            page_num=1,
+            page_size=pagination['pageSize'] if pagination else 10,
+            cursor=cursor,
         )
+        table_info = OperlogApi.list_operlog(query_params)
+        if table_info['code'] == 200:
+            return dict(
+                operation_log_table_data=(table_data or [])
+                + format_operlog_rows(table_info['rows']),
+                next_cursor=table_info.get('next_cursor'),
+            )
 
     raise PreventUpdate
 
 
+# 无下一批数据时禁用加载更多按钮回调
+app.clientside_callback(
+    """
+    (next_cursor) => !next_cursor
+    """,
+    Output('operation_log-load-next', 'disabled'),
+    Input('operation_log-next-cursor-store', 'data'),
+)
+
+
 # 重置操作日志搜索表单数据回调
 app.clientside_callback(
     """
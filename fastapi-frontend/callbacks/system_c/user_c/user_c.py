@@ -6,6 +6,7 @@ from dash import ctx, dcc, no_update
 from dash.dependencies import ALL, Input, Output, State
 from dash.exceptions import PreventUpdate
 from typing import Dict
+from api.common import CommonApi
 from api.system.user import UserApi
 from config.constant import SysNormalDisableConstant
 from server import app
@@ -15,6 +16,10 @@ from utils.permission_util import PermissionManager
 from utils.time_format_util import TimeFormatUtil
 
 
+# 后台导出任务状态的最大轮询次数，轮询间隔为1秒，超过后停止轮询，避免任务卡住时定时器一直运行
+EXPORT_JOB_MAX_POLL_COUNT = 600
+
+
 def generate_user_table(query_params: Dict):
     """
     根据查询参数获取用户表格数据及分页信息
@@ -856,10 +861,9 @@ def download_user_template(download_click):
 
 @app.callback(
     [
-        Output('user-export-container', 'data', allow_duplicate=True),
-        Output(
-            'user-export-complete-judge-container', 'data', allow_duplicate=True
-        ),
+        Output('user-export-job-store', 'data', allow_duplicate=True),
+        Output('user-export-job-interval', 'disabled', allow_duplicate=True),
+        Output('user-export-job-interval', 'n_intervals', allow_duplicate=True),
     ],
     Input('user-export', 'nClicks'),
     [
@@ -900,18 +904,68 @@ def export_user_list(
             begin_time=begin_time,
             end_time=end_time,
         )
-        export_user_res = UserApi.export_user(export_params)
-        MessageManager.success(content='导出成功')
+        # 创建后台导出任务后立即返回，由定时器轮询任务状态，避免长时间占用请求线程
+        export_job_res = UserApi.create_export_user_job(export_params)
+        MessageManager.info(content='导出任务已创建，导出完成后将自动下载')
 
-        export_user = export_user_res.content
+        return [export_job_res['data']['job_id'], False, 0]
+
+    raise PreventUpdate
+
+
+@app.callback(
+    [
+        Output('user-export-container', 'data', allow_duplicate=True),
+        Output(
+            'user-export-complete-judge-container', 'data', allow_duplicate=True
+        ),
+        Output('user-export-job-interval', 'disabled', allow_duplicate=True),
+        Output('user-export-job-store', 'data', allow_duplicate=True),
+    ],
+    Input('user-export-job-interval', 'n_intervals'),
+    State('user-export-job-store', 'data'),
+    prevent_initial_call=True,
+)
+def poll_user_export_job(n_intervals, job_id):
+    """
+    轮询后台导出用户任务状态回调，任务成功后下载导出文件
+    """
+    if not job_id:
+        return [no_update, no_update, True, no_update]
+    if n_intervals > EXPORT_JOB_MAX_POLL_COUNT:
+        MessageManager.warning(
+            content='导出任务长时间未完成，已停止查询，请稍后重新导出'
+        )
+
+        return [no_update, no_update, True, None]
+    try:
+        export_job = CommonApi.get_export_job(job_id)['data']
+        if export_job['status'] == 'success':
+            export_user = CommonApi.download(export_job['file_name']).content
+    except Exception as e:
+        # 查询或下载失败时停止轮询并清除任务id，否则定时器会持续重复失败的请求
+        MessageManager.error(
+            content=f'导出失败：{getattr(e, "message", None) or e}'
+        )
+
+        return [no_update, no_update, True, None]
+    if export_job['status'] == 'success':
+        MessageManager.success(content='导出成功')
 
         return [
             dcc.send_bytes(
                 export_user,
-                f'用户信息_{time.strftime("%Y%m%d%H%M%S", time.localtime())}.xlsx',
+                f'用户信息_{time.strftime("%Y%m%d%H%M%S", time.localtime())}'
+                f'.{export_job["export_format"]}',
             ),
             {'timestamp': time.time()},
+            True,
+            None,
         ]
+    if export_job['status'] == 'failed':
+        MessageManager.error(content=f'导出失败：{export_job["error_msg"]}')
+
+        return [no_update, no_update, True, None]
 
     raise PreventUpdate
 
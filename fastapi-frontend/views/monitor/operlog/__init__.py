@@ -7,8 +7,8 @@ from utils.permission_util import PermissionManager
 
 def render(*args, **kwargs):
     query_params = dict(page_num=1, page_size=10)
-    table_data, table_pagination = operlog_c.generate_operlog_table(
-        query_params
+    table_data, table_pagination, next_cursor = (
+        operlog_c.generate_operlog_table(query_params)
     )
 
     return [
@@ -20,6 +20,8 @@ def render(*args, **kwargs):
         dcc.Store(id='operation_log-operations-store'),
         # 操作日志管理模块删除操作行key存储容器
         dcc.Store(id='operation_log-delete-ids-store'),
+        # 操作日志管理模块加载下一批数据的游标存储容器
+        dcc.Store(id='operation_log-next-cursor-store', data=next_cursor),
         fac.AntdRow(
             [
                 fac.AntdCol(
@@ -254,102 +256,118 @@ def render(*args, **kwargs):
                         fac.AntdRow(
                             [
                                 fac.AntdCol(
-                                    fac.AntdSpin(
-                                        fac.AntdTable(
-                                            id='operation_log-list-table',
-                                            data=table_data,
-                                            columns=[
-                                                {
-                                                    'dataIndex': 'oper_id',
-                                                    'title': '日志编号',
-                                                    'renderOptions': {
-                                                        'renderType': 'ellipsis'
+                                    [
+                                        fac.AntdSpin(
+                                            fac.AntdTable(
+                                                id='operation_log-list-table',
+                                                data=table_data,
+                                                columns=[
+                                                    {
+                                                        'dataIndex': 'oper_id',
+                                                        'title': '日志编号',
+                                                        'renderOptions': {
+                                                            'renderType': 'ellipsis'
+                                                        },
                                                     },
-                                                },
-                                                {
-                                                    'dataIndex': 'title',
-                                                    'title': '系统模块',
-                                                    'renderOptions': {
-                                                        'renderType': 'ellipsis'
+                                                    {
+                                                        'dataIndex': 'title',
+                                                        'title': '系统模块',
+                                                        'renderOptions': {
+                                                            'renderType': 'ellipsis'
+                                                        },
                                                     },
-                                                },
-                                                {
-                                                    'dataIndex': 'business_type_tag',
-                                                    'title': '操作类型',
-                                                    'renderOptions': {
-                                                        'renderType': 'tags'
+                                                    {
+                                                        'dataIndex': 'business_type_tag',
+                                                        'title': '操作类型',
+                                                        'renderOptions': {
+                                                            'renderType': 'tags'
+                                                        },
                                                     },
-                                                },
-                                                {
-                                                    'dataIndex': 'oper_name',
-                                                    'title': '操作人员',
-                                                    'renderOptions': {
-                                                        'renderType': 'ellipsis'
+                                                    {
+                                                        'dataIndex': 'oper_name',
+                                                        'title': '操作人员',
+                                                        'renderOptions': {
+                                                            'renderType': 'ellipsis'
+                                                        },
                                                     },
-                                                },
-                                                {
-                                                    'dataIndex': 'oper_ip',
-                                                    'title': '操作地址',
-                                                    'renderOptions': {
-                                                        'renderType': 'ellipsis'
+                                                    {
+                                                        'dataIndex': 'oper_ip',
+                                                        'title': '操作地址',
+                                                        'renderOptions': {
+                                                            'renderType': 'ellipsis'
+                                                        },
                                                     },
-                                                },
-                                                {
-                                                    'dataIndex': 'oper_location',
-                                                    'title': '操作地点',
-                                                    'renderOptions': {
-                                                        'renderType': 'ellipsis'
+                                                    {
+                                                        'dataIndex': 'oper_location',
+                                                        'title': '操作地点',
+                                                        'renderOptions': {
+                                                            'renderType': 'ellipsis'
+                                                        },
                                                     },
-                                                },
-                                                {
-                                                    'dataIndex': 'status_tag',
-                                                    'title': '操作状态',
-                                                    'renderOptions': {
-                                                        'renderType': 'tags'
+                                                    {
+                                                        'dataIndex': 'status_tag',
+                                                        'title': '操作状态',
+                                                        'renderOptions': {
+                                                            'renderType': 'tags'
+                                                        },
                                                     },
-                                                },
-                                                {
-                                                    'dataIndex': 'oper_time',
-                                                    'title': '操作日期',
-                                                    'renderOptions': {
-                                                        'renderType': 'ellipsis'
+                                                    {
+                                                        'dataIndex': 'oper_time',
+                                                        'title': '操作日期',
+                                                        'renderOptions': {
+                                                            'renderType': 'ellipsis'
+                                                        },
                                                     },
-                                                },
-                                                {
-                                                    'dataIndex': 'cost_time',
-                                                    'title': '消耗时间',
-                                                    'renderOptions': {
-                                                        'renderType': 'ellipsis'
+                                                    {
+                                                        'dataIndex': 'cost_time',
+                                                        'title': '消耗时间',
+                                                        'renderOptions': {
+                                                            'renderType': 'ellipsis'
+                                                        },
                                                     },
-                                                },
-                                                {
-                                                    'title': '操作',
-                                                    'dataIndex': 'operation',
-                                                    'width': 120,
-                                                    'renderOptions': {
-                                                        'renderType': 'button'
+                                                    {
+                                                        'title': '操作',
+                                                        'dataIndex': 'operation',
+                                                        'width': 120,
+                                                        'renderOptions': {
+                                                            'renderType': 'button'
+                                                        },
                                                     },
-                                                },
-                                            ],
-                                            rowSelectionType='checkbox',
-                                            rowSelectionWidth=50,
-                                            bordered=True,
-                                            sortOptions={
-                                                'sortDataIndexes': [
-                                                    'oper_name',
-                                                    'oper_time',
                                                 ],
-                                                'multiple': False,
-                                            },
-                                            pagination=table_pagination,
-                                            mode='server-side',
+                                                rowSelectionType='checkbox',
+                                                rowSelectionWidth=50,
+                                                bordered=True,
+                                                sortOptions={
+                                                    'sortDataIndexes': [
+                                                        'oper_name',
+                                                        'oper_time',
+                                                    ],
+                                                    'multiple': False,
+                                                },
+                                                pagination=table_pagination,
+                                                mode='server-side',
+                                                style={
+                                                    'width': '100%',
+                                                    'padding-right': '10px',
+                                                },
+                                            ),
+                                            text='数据加载中',
+                                        ),
+                                        fac.AntdButton(
+                                            '加载更多',
+                                            id='operation_log-load-next',
+                                            type='dashed',
+                                            block=True,
+                                            icon=fac.AntdIcon(
+                                                icon='antd-arrow-down'
+                                            ),
+                                            disabled=not next_cursor,
                                             style={
-                                                'width': '100%',
-                                                'padding-right': '10px',
+                                                'marginTop': '10px',
+                                                'width': 'calc(100% - 10px)',
                                             },
                                         ),
-                                        text='数据加载中',
-                                    ),
+                                    ]
                                 )
                             ]
                         ),
@@ -20,6 +20,15 @@ def render(*args, **kwargs):
         dcc.Store(id='user-export-complete-judge-container'),
         # 绑定的导出组件
         dcc.Download(id='user-export-container'),
+        # 后台导出任务id存储容器
+        dcc.Store(id='user-export-job-store'),
+        # 后台导出任务状态轮询定时器
+        dcc.Interval(
+            id='user-export-job-interval',
+            n_intervals=0,
+            interval=1000,
+            disabled=True,
+        ),
         # 用户管理模块操作类型存储容器
         dcc.Store(id='user-operations-store'),
         # 用户管理模块弹窗类型存储容器